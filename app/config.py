@@ -11,18 +11,94 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Credenciales de integraciones: se validan al primer uso (settings.requerir),
+    # así la app arranca y responde /health aunque falte alguna
     # reCAPTCHA
-    RECAPTCHA_SECRET_KEY: str
+    RECAPTCHA_SECRET_KEY: Optional[str] = None
     
     # Supabase (LEGACY KEYS)
-    SUPABASE_URL: str
-    SUPABASE_KEY: str           # anon public key
-    SUPABASE_SERVICE_KEY: str   # service_role key
+    SUPABASE_URL: Optional[str] = None
+    SUPABASE_KEY: Optional[str] = None           # anon public key
+    SUPABASE_SERVICE_KEY: Optional[str] = None   # service_role key
 
     #email senders
-    IMG_BB_API_KEY: str
-    BREVO_API_KEY: str
-    SENDER_EMAIL: str
+    IMG_BB_API_KEY: Optional[str] = None
+    BREVO_API_KEY: Optional[str] = None
+    SENDER_EMAIL: Optional[str] = None
+    BREVO_API_URL: str = "https://api.brevo.com/v3/smtp/email"
+    IMGBB_API_URL: str = "https://api.imgbb.com/1/upload"
+    EMAIL_QR_WORKERS: int = 8   # hilos que generan y suben los QR de un envío por lotes
+    
+    # Storage de imágenes: "supabase" o "local" (disco, para desarrollo y pruebas)
+    STORAGE_BACKEND: str = "supabase"
+    LOCAL_STORAGE_DIR: str = "static/storage"
+    LOCAL_STORAGE_BASE_URL: str = "http://localhost:8000"
+    SIGNED_UPLOAD_EXPIRE_MINUTES: int = 10
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""            # por módulo: "app.routers.reservas_opcion=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_FORMAT: str = "json"        # "json" o "texto"
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0  # fracción de logs DEBUG que se emiten
+    
+    # Presupuesto de queries por request: "off", "warn" o "strict" (pruebas)
+    QUERY_BUDGET_MODE: str = "off"
+    QUERY_BUDGET_N_MAS_UNO: int = 5  # repeticiones de una misma sentencia que se consideran N+1
+    
+    # Idempotency-Key en POSTs con efectos (reservas, pagos, cupones)
+    IDEMPOTENCY_TTL_HORAS: int = 24
+    IDEMPOTENCY_ESPERA_SEGUNDOS: int = 30  # espera máxima por un duplicado en curso en otro worker
+    
+    # Ciclo de vida de reservas (app/scheduler.py)
+    RESERVA_PENDIENTE_EXPIRA_MINUTOS: int = 30  # reservas sin pago que liberan el horario
+    CICLO_RESERVAS_HABILITADO: bool = True      # en el proceso web; False si corre python -m app.scheduler
+    CICLO_RESERVAS_INTERVALO_SEGUNDOS: int = 60
+    CICLO_RESERVAS_LOTE: int = 5000             # filas por UPDATE
+    CICLO_RESERVAS_METRICS_PORT: Optional[int] = None  # /metrics del worker separado
+    
+    # Particiones mensuales de reserva en PostgreSQL (app/services/particiones_reserva.py)
+    RESERVA_PARTICIONES_FUTURAS_MESES: int = 3
+    RESERVA_ARCHIVAR_DESPUES_MESES: Optional[int] = None  # meses vivos antes de pasar al esquema archivo
+    
+    # Retenciones de horario durante el checkout (app/services/retenciones.py)
+    RETENCIONES_BACKEND: str = "base"   # "base" (compartido entre workers) o "memoria" (un solo proceso)
+    RETENCION_TTL_SEGUNDOS: int = 300
+    RETENCION_MAX_SEGUNDOS: int = 900   # tiempo máximo que un usuario renueva la misma retención
+    RETENCION_MAX_HORAS: int = 4        # horas seguidas que cubre una retención
+    
+    # Espacios y canchas de gestores / control de acceso en memoria (app/services/alcance_staff.py)
+    ALCANCE_STAFF_TTL_SEGUNDOS: int = 30
+    
+    # Índice en memoria de GET /busqueda (app/services/busqueda_catalogo.py)
+    BUSQUEDA_INDICE_TTL_SEGUNDOS: int = 60
+
+    # Webhooks del proveedor de pagos (app/services/eventos_pago.py)
+    STRIPE_WEBHOOK_SECRET: Optional[str] = None       # whsec_... del endpoint en Stripe
+    PAGOS_WEBHOOK_SECRET_LOCAL: Optional[str] = None  # proveedor "local" (desarrollo y pruebas)
+    PAGOS_WEBHOOK_TOLERANCIA_SEGUNDOS: int = 300      # antigüedad máxima de la firma
+    EVENTOS_PAGO_WORKER_HABILITADO: bool = True       # hilo que procesa los eventos en el proceso web
+    EVENTOS_PAGO_LOTE: int = 100                      # eventos por transacción
+    EVENTOS_PAGO_MAX_INTENTOS: int = 5
+    EVENTOS_PAGO_REINTENTO_SEGUNDOS: int = 5          # espera antes del segundo intento; se duplica en cada uno
+    EVENTOS_PAGO_RETENCION_DIAS: int = 30             # procesados que se conservan antes de la purga
+
+    # Pool de conexiones por proceso (python -m app.server lo recalcula por worker)
+    DB_POOL_SIZE: int = 2
+    DB_MAX_OVERFLOW: int = 0
+    DB_POOL_TIMEOUT: int = 30
+    DB_MAX_CONEXIONES: int = 20        # conexiones que la base admite para esta instancia
+    DB_CONEXIONES_RESERVADAS: int = 3  # migraciones, consola y tareas fuera del servidor
+    
+    # Servidor de producción (python -m app.server)
+    PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None  # workers; por defecto según CPU y memoria
+    SERVER_MEMORIA_POR_WORKER_MB: int = 160
+    SERVER_KEEPALIVE: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # por worker; excedente responde 503
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # segundos para terminar requests y tareas en segundo plano
+    SERVER_TIMEOUT: int = 60
+    SERVER_MAX_REQUESTS: int = 0       # reciclar workers cada N requests (0 = nunca)
     
     # CORS
     FRONTEND_URLS: str = "http://localhost:5173,http://localhost:3000,capacitor://localhost,http://localhost"
@@ -45,6 +121,12 @@ class Settings(BaseSettings):
         
         return all_urls
     
+    def requerir(self, *nombres: str) -> None:
+        """Falla con un mensaje claro si falta alguna credencial de la integración"""
+        faltantes = [nombre for nombre in nombres if not getattr(self, nombre)]
+        if faltantes:
+            raise RuntimeError(f"Falta configurar: {', '.join(faltantes)}")
+    
     class Config:
         env_file = ".env"
 
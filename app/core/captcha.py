@@ -1,5 +1,8 @@
-import requests
 from app.config import settings
+from app.core.metrics import medir_http_saliente
+import logging
+
+logger = logging.getLogger(__name__)
 
 def verificar_captcha(token: str) -> bool:
     """
@@ -8,6 +11,9 @@ def verificar_captcha(token: str) -> bool:
     if not token:
         return False
 
+    # requests se importa al primer uso para no pagarlo en el arranque
+    import requests
+
     url = "https://www.google.com/recaptcha/api/siteverify"
     payload = {
         "secret": settings.RECAPTCHA_SECRET_KEY,
@@ -15,10 +21,12 @@ def verificar_captcha(token: str) -> bool:
     }
 
     try:
-        response = requests.post(url, data=payload, timeout=10)
+        settings.requerir("RECAPTCHA_SECRET_KEY")
+        with medir_http_saliente("recaptcha"):
+            response = requests.post(url, data=payload, timeout=10)
         result = response.json()
-        print("Respuesta de Google reCAPTCHA:", result)
+        logger.debug("Respuesta de Google reCAPTCHA: %s", result)
         return result.get("success", False)
     except Exception as e:
-        print(f"Error verificando reCAPTCHA: {e}")
+        logger.error("Error verificando reCAPTCHA: %s", e)
         return False
\ No newline at end of file
@@ -1,37 +1,54 @@
-import qrcode
 import io
 import base64
 import uuid
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+from typing import List
 from app.config import settings
+from app.core.metrics import medir_http_saliente
+import logging
 
-# Configuración
-IMG_BB_API_KEY = settings.IMG_BB_API_KEY
-BREVO_API_KEY = settings.BREVO_API_KEY
-SENDER_EMAIL = settings.SENDER_EMAIL
+logger = logging.getLogger(__name__)
+
+# Configuración (las credenciales se leen de settings en cada envío)
 SENDER_NAME = "OlympiaHub"
+# Versiones de un mensaje que Brevo acepta en una sola llamada (messageVersions)
+BREVO_MAX_VERSIONES = 1000
+# Segundos de espera de las llamadas salientes: una llamada colgada no retiene la tarea en segundo plano
+BREVO_TIMEOUT = 30
+IMGBB_TIMEOUT = 15
+
+def _enviar_a_brevo(data: dict) -> bool:
+    """POST a la API de emails transaccionales de Brevo; True si respondió 201"""
+    # requests se importa al primer envío para no pagarlo en el arranque
+    import requests
+
+    headers = {
+        "accept": "application/json",
+        "api-key": settings.BREVO_API_KEY,
+        "content-type": "application/json"
+    }
+    with medir_http_saliente("brevo"):
+        response = requests.post(settings.BREVO_API_URL, headers=headers, json=data, timeout=BREVO_TIMEOUT)
+
+    if response.status_code == 201:
+        return True
+    logger.error("❌ [BREVO] Error %s: %s", response.status_code, response.text)
+    return False
 
 def send_email(to_email: str, subject: str, message: str, html_content: str = None):
     """
     Envía email usando Brevo API
     """
     try:
-        print(f"📧 [BREVO] Enviando email a: {to_email}")
-        
-        url = "https://api.brevo.com/v3/smtp/email"
-        
-        headers = {
-            "accept": "application/json",
-            "api-key": BREVO_API_KEY,
-            "content-type": "application/json"
-        }
+        logger.debug("📧 [BREVO] Enviando email a: %s", to_email)
+        settings.requerir("BREVO_API_KEY", "SENDER_EMAIL")
         
         data = {
             "sender": {
                 "name": SENDER_NAME,
-                "email": SENDER_EMAIL
+                "email": settings.SENDER_EMAIL
             },
             "to": [{"email": to_email}],
             "subject": subject,
@@ -41,21 +58,19 @@ def send_email(to_email: str, subject: str, message: str, html_content: str = No
         if html_content:
             data["htmlContent"] = html_content
         
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 201:
-            print(f"✅ [BREVO] Email enviado exitosamente")
+        if _enviar_a_brevo(data):
+            logger.debug("✅ [BREVO] Email enviado exitosamente")
             return True
-        else:
-            print(f"❌ [BREVO] Error {response.status_code}: {response.text}")
-            return False
+        return False
             
     except Exception as e:
-        print(f"❌ [BREVO] Error: {e}")
+        logger.error("❌ [BREVO] Error: %s", e)
         return False
 
 def generate_qr_image(qr_data: str):
     """Genera una imagen QR y la devuelve como bytes"""
+    import qrcode
+    
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -75,57 +90,61 @@ def upload_qr_to_imgbb(qr_image_bytes: bytes) -> str:
     """
     Sube la imagen QR a ImgBB y devuelve la URL
     """
+    import requests
+    
     try:
-        print("📤 Subiendo QR a ImgBB...")
+        logger.debug("📤 Subiendo QR a ImgBB...")
+        settings.requerir("IMG_BB_API_KEY")
         
         qr_base64 = base64.b64encode(qr_image_bytes).decode()
         
-        response = requests.post(
-            "https://api.imgbb.com/1/upload",
-            data={
-                "key": IMG_BB_API_KEY,
-                "image": qr_base64,
-                "name": f"qr_reserva_{uuid.uuid4().hex[:8]}",
-                "expiration": 604800
-            }
-        )
+        with medir_http_saliente("imgbb"):
+            response = requests.post(
+                settings.IMGBB_API_URL,
+                data={
+                    "key": settings.IMG_BB_API_KEY,
+                    "image": qr_base64,
+                    "name": f"qr_reserva_{uuid.uuid4().hex[:8]}",
+                    "expiration": 604800
+                },
+                timeout=IMGBB_TIMEOUT
+            )
         
         if response.status_code == 200:
             data = response.json()
             qr_url = data["data"]["url"]
-            print(f"✅ QR subido a ImgBB: {qr_url}")
+            logger.debug("✅ QR subido a ImgBB: %s", qr_url)
             return qr_url
         else:
-            print(f"❌ Error subiendo a ImgBB: {response.status_code}")
+            logger.error("❌ Error subiendo a ImgBB: %s", response.status_code)
             return None
             
     except Exception as e:
-        print(f"❌ Error en upload_qr_to_imgbb: {e}")
+        logger.error("❌ Error en upload_qr_to_imgbb: %s", e)
         return None
 
-def send_qr_email(to_email: str, datos: dict):
-    """
-    Envía email con código QR usando ImgBB con Brevo
-    """
+def _preparar_qr(datos: dict):
+    """Genera el QR del asistente y lo sube a ImgBB; retorna (bytes, url), con None si algo falla"""
     try:
-        print(f"🎯 [BREVO] Enviando QR email a: {to_email}")
-        
-        qr_data = f"{datos['codigo_qr']}|{datos['token_verificacion']}"
-        qr_image_bytes = generate_qr_image(qr_data)
-        
-        qr_url = upload_qr_to_imgbb(qr_image_bytes)
-        
-        qr_display = ""
-        if qr_url:
-            qr_display = f'<img src="{qr_url}" alt="Código QR para {datos["codigo_qr"]}" class="qr-image" />'
-        else:
-            print("⚠️ Usando base64 como fallback...")
-            qr_base64 = base64.b64encode(qr_image_bytes).decode()
-            qr_display = f'<img src="data:image/png;base64,{qr_base64}" alt="Código QR" class="qr-image" />'
-        
-        fecha = datos['fecha_reserva']
-        
-        html_content = f"""
+        qr_image_bytes = generate_qr_image(f"{datos['codigo_qr']}|{datos['token_verificacion']}")
+    except Exception as e:
+        logger.error("❌ Error generando QR %s: %s", datos['codigo_qr'], e)
+        return None, None
+    return qr_image_bytes, upload_qr_to_imgbb(qr_image_bytes)
+
+def _contenido_qr_email(datos: dict, qr_image_bytes: bytes, qr_url: str):
+    """Asunto, texto y HTML del email con el QR de un asistente"""
+    qr_display = ""
+    if qr_url:
+        qr_display = f'<img src="{qr_url}" alt="Código QR para {datos["codigo_qr"]}" class="qr-image" />'
+    elif qr_image_bytes:
+        logger.warning("⚠️ Usando base64 como fallback...")
+        qr_base64 = base64.b64encode(qr_image_bytes).decode()
+        qr_display = f'<img src="data:image/png;base64,{qr_base64}" alt="Código QR" class="qr-image" />'
+
+    fecha = datos['fecha_reserva']
+
+    html_content = f"""
         <!DOCTYPE html>
         <html>
         <head>
@@ -358,8 +377,8 @@ def send_qr_email(to_email: str, datos: dict):
         </body>
         </html>
         """
-        
-        text_content = f"""
+
+    text_content = f"""
         Tu código QR para la reserva en {datos['nombre_cancha']}
         
         Hola {datos['nombre_asistente']},
@@ -390,18 +409,30 @@ def send_qr_email(to_email: str, datos: dict):
         © {datetime.now().year} Sistema de Reservas Deportivas - OlympiaHub
         ID de reserva: {datos['codigo_reserva']}
         """
+
+    asunto = f"🎟️ Tu código QR para la reserva en {datos['nombre_cancha']} | {datos['codigo_reserva']}"
+    return asunto, text_content, html_content
+
+def send_qr_email(to_email: str, datos: dict):
+    """
+    Envía email con código QR usando ImgBB con Brevo
+    """
+    try:
+        logger.debug("🎯 [BREVO] Enviando QR email a: %s", to_email)
+        
+        qr_image_bytes = generate_qr_image(f"{datos['codigo_qr']}|{datos['token_verificacion']}")
+        qr_url = upload_qr_to_imgbb(qr_image_bytes)
+        asunto, text_content, html_content = _contenido_qr_email(datos, qr_image_bytes, qr_url)
         
         return send_email(
             to_email=to_email,
-            subject=f"🎟️ Tu código QR para la reserva en {datos['nombre_cancha']} | {datos['codigo_reserva']}",
+            subject=asunto,
             message=text_content,
             html_content=html_content
         )
         
     except Exception as e:
-        print(f"❌ [BREVO] Error enviando QR email: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ [BREVO] Error enviando QR email: %s", e)
         
         try:
             simple_subject = f"Tu código QR para la reserva en {datos['nombre_cancha']}"
@@ -413,7 +444,7 @@ def send_qr_email(to_email: str, datos: dict):
             Código QR: {datos['codigo_qr']}
             Token: {datos['token_verificacion']}
             
-            Fecha: {fecha}
+            Fecha: {datos['fecha_reserva']}
             Horario: {datos['hora_inicio']} - {datos['hora_fin']}
             Código Reserva: {datos['codigo_reserva']}
             Reservado por: {datos['nombre_reservante']}
@@ -424,12 +455,69 @@ def send_qr_email(to_email: str, datos: dict):
             """
             return send_email(to_email, simple_subject, simple_message)
         except Exception as e2:
-            print(f"❌ Falló el envío simple: {e2}")
+            logger.error("❌ Falló el envío simple: %s", e2)
             return False
 
 def send_qr_email_with_attachment(to_email: str, datos: dict):
     return send_qr_email(to_email, datos)
 
+def send_qr_emails_batch(lista_datos: List[dict]) -> int:
+    """
+    Envía el email con QR a varios asistentes de una reserva.
+    Los QR se generan y suben a ImgBB en paralelo (EMAIL_QR_WORKERS hilos) y
+    Brevo recibe una sola llamada con una versión del mensaje por asistente
+    (messageVersions). Si la llamada por lotes falla, se envían de a uno.
+    Retorna cuántos emails se enviaron.
+    """
+    if not lista_datos:
+        return 0
+    try:
+        settings.requerir("BREVO_API_KEY", "SENDER_EMAIL")
+    except Exception as e:
+        logger.error("❌ [BREVO] Error: %s", e)
+        return 0
+
+    hilos = max(1, min(settings.EMAIL_QR_WORKERS, len(lista_datos)))
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="qr-email") as pool:
+        qrs = list(pool.map(_preparar_qr, lista_datos))
+
+    versiones = []
+    for datos, (qr_image_bytes, qr_url) in zip(lista_datos, qrs):
+        asunto, text_content, html_content = _contenido_qr_email(datos, qr_image_bytes, qr_url)
+        versiones.append({
+            "to": [{"email": datos['email_asistente'], "name": datos['nombre_asistente']}],
+            "subject": asunto,
+            "textContent": text_content,
+            "htmlContent": html_content,
+        })
+
+    enviados = 0
+    for inicio in range(0, len(versiones), BREVO_MAX_VERSIONES):
+        lote = versiones[inicio:inicio + BREVO_MAX_VERSIONES]
+        data = {
+            "sender": {"name": SENDER_NAME, "email": settings.SENDER_EMAIL},
+            "subject": lote[0]["subject"],
+            "htmlContent": lote[0]["htmlContent"],
+            "messageVersions": lote,
+        }
+        try:
+            enviado = _enviar_a_brevo(data)
+        except Exception as e:
+            # Error de conexión o timeout: mismo camino que una respuesta distinta de 201
+            logger.error("❌ [BREVO] Error en el envío por lotes: %s", e)
+            enviado = False
+        if enviado:
+            enviados += len(lote)
+            continue
+        logger.warning("⚠️ [BREVO] Falló el envío por lotes, enviando %s emails de a uno", len(lote))
+        for version in lote:
+            enviados += bool(send_email(
+                version["to"][0]["email"], version["subject"], version["textContent"], version["htmlContent"]
+            ))
+
+    logger.debug("✅ [BREVO] %s de %s emails con QR enviados", enviados, len(versiones))
+    return enviados
+
 def send_welcome_email(to_email: str, nombre: str, apellido: str):
     html_content = f"""
     <!DOCTYPE html>
@@ -630,7 +718,7 @@ def send_reservation_complete_email(to_email: str, datos: dict):
     Envía email completo con código de reserva y QR para el usuario principal
     """
     try:
-        print(f"📧 [EMAIL] Enviando email completo a: {to_email}")
+        logger.debug("📧 [EMAIL] Enviando email completo a: %s", to_email)
         
         # Generar QR para el usuario principal
         qr_data = f"RES-{datos['codigo_reserva']}|{uuid.uuid4().hex[:8]}"
@@ -752,5 +840,5 @@ def send_reservation_complete_email(to_email: str, datos: dict):
         )
         
     except Exception as e:
-        print(f"❌ Error enviando email completo: {e}")
+        logger.error("❌ Error enviando email completo: %s", e)
         return False
\ No newline at end of file
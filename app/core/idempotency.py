@@ -0,0 +1,328 @@
+# app/core/idempotency.py
+"""
+Idempotency-Key para POSTs con efectos (reservas, pagos, cupones).
+
+El endpoint se marca con el decorador:
+
+    @router.post("/aplicar")
+    @idempotente
+    def aplicar_cupon(...):
+
+Si la request trae el header Idempotency-Key, la primera ejecución guarda
+su respuesta (status, headers y cuerpo) en la tabla idempotencia durante
+IDEMPOTENCY_TTL_HORAS, y los reintentos con la misma clave reciben esa
+respuesta sin volver a ejecutar el endpoint (header Idempotent-Replayed).
+
+Un duplicado que llega mientras la primera sigue en curso espera su
+resultado: dentro del worker comparte el mismo Future, y entre workers la
+fila 'en_proceso' funciona como candado. Las respuestas 5xx no se guardan,
+así el cliente puede reintentar. Sin el header no cambia nada.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.idempotencia import ClaveIdempotencia
+
+logger = logging.getLogger(__name__)
+
+LARGO_MAXIMO_CLAVE = 255
+INTERVALO_ESPERA = 0.2  # segundos entre consultas mientras otro worker ejecuta la request
+
+# Headers de la respuesta original que no se repiten
+_HEADERS_EXCLUIDOS = {b"date", b"server"}
+
+
+def idempotente(func):
+    """Habilita Idempotency-Key en el endpoint"""
+    func.idempotente = True
+    return func
+
+
+def _header(scope, nombre: bytes) -> Optional[str]:
+    for clave, valor in scope["headers"]:
+        if clave == nombre:
+            return valor.decode("latin-1")
+    return None
+
+
+def _ruta_idempotente(scope) -> Optional[dict]:
+    """child_scope de la ruta que atenderá la request si está marcada con @idempotente"""
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return child_scope if getattr(child_scope.get("endpoint"), "idempotente", False) else None
+    return None
+
+
+def _clave(scope, clave_cliente: str) -> str:
+    """La clave se aísla por método, ruta y credencial: otro usuario no puede leer la respuesta"""
+    partes = (scope["method"], scope["path"], _header(scope, b"authorization") or "", clave_cliente)
+    return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()
+
+
+def _vencida(fila: ClaveIdempotencia, ahora: datetime) -> bool:
+    expira_en = fila.expira_en
+    if expira_en.tzinfo is None:  # SQLite no guarda la zona horaria
+        expira_en = expira_en.replace(tzinfo=timezone.utc)
+    if expira_en <= ahora:
+        return True
+
+    # Una ejecución que supera el timeout del servidor quedó abandonada (worker reiniciado)
+    fecha_creacion = fila.fecha_creacion
+    if fecha_creacion.tzinfo is None:
+        fecha_creacion = fecha_creacion.replace(tzinfo=timezone.utc)
+    return fila.estado == "en_proceso" and fecha_creacion + timedelta(seconds=settings.SERVER_TIMEOUT) <= ahora
+
+
+def _respuesta_de_fila(fila: ClaveIdempotencia) -> dict:
+    return {
+        "status": fila.status_code,
+        "headers": [(nombre.encode("latin-1"), valor.encode("latin-1")) for nombre, valor in json.loads(fila.headers)],
+        "cuerpo": fila.cuerpo,
+    }
+
+
+def reservar_clave(clave: str, huella: str) -> Tuple[str, Optional[dict]]:
+    """
+    Intenta tomar la clave. Retorna (estado, respuesta guardada):
+    'nueva' (esta request ejecuta el endpoint), 'completada', 'en_proceso'
+    u 'otra_solicitud' (la clave ya se usó con otro cuerpo).
+    """
+    ahora = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        fila = db.get(ClaveIdempotencia, clave)
+        if fila is not None and _vencida(fila, ahora):
+            db.delete(fila)
+            db.commit()
+            fila = None
+
+        if fila is None:
+            db.add(ClaveIdempotencia(
+                clave=clave, huella=huella, estado="en_proceso", fecha_creacion=ahora,
+                expira_en=ahora + timedelta(hours=settings.IDEMPOTENCY_TTL_HORAS)
+            ))
+            try:
+                db.commit()
+                return "nueva", None
+            except IntegrityError:
+                # Otro worker la tomó al mismo tiempo
+                db.rollback()
+                fila = db.get(ClaveIdempotencia, clave)
+                if fila is None:
+                    return "en_proceso", None
+
+        if fila.huella != huella:
+            return "otra_solicitud", None
+        if fila.estado == "completada":
+            return "completada", _respuesta_de_fila(fila)
+        return "en_proceso", None
+    finally:
+        db.close()
+
+
+def guardar_respuesta(clave: str, respuesta: dict) -> None:
+    db = SessionLocal()
+    try:
+        fila = db.get(ClaveIdempotencia, clave)
+        if fila is None:
+            return
+        fila.estado = "completada"
+        fila.status_code = respuesta["status"]
+        fila.headers = json.dumps([
+            [nombre.decode("latin-1"), valor.decode("latin-1")] for nombre, valor in respuesta["headers"]
+        ])
+        fila.cuerpo = respuesta["cuerpo"]
+        db.commit()
+    finally:
+        db.close()
+
+
+def liberar_clave(clave: str) -> None:
+    """La request falló sin respuesta guardable: un reintento puede volver a ejecutarla"""
+    db = SessionLocal()
+    try:
+        db.query(ClaveIdempotencia).filter(
+            ClaveIdempotencia.clave == clave,
+            ClaveIdempotencia.estado == "en_proceso"
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def purgar_claves_vencidas() -> int:
+    """Elimina las claves vencidas; retorna cuántas se borraron"""
+    db = SessionLocal()
+    try:
+        borradas = db.query(ClaveIdempotencia).filter(
+            ClaveIdempotencia.expira_en <= datetime.now(timezone.utc)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return borradas
+    finally:
+        db.close()
+
+
+async def _leer_cuerpo(receive):
+    """Lee el cuerpo completo y retorna (cuerpo, receive que lo entrega de nuevo a la app)"""
+    partes = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        partes.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    cuerpo = b"".join(partes)
+    entregado = False
+
+    async def receive_repetido():
+        nonlocal entregado
+        if not entregado:
+            entregado = True
+            return {"type": "http.request", "body": cuerpo, "more_body": False}
+        return await receive()
+
+    return cuerpo, receive_repetido
+
+
+async def _repetir(send, respuesta: dict):
+    await send({
+        "type": "http.response.start",
+        "status": respuesta["status"],
+        "headers": list(respuesta["headers"]) + [(b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": respuesta["cuerpo"]})
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI para los endpoints @idempotente. Solo actúa en POSTs
+    que traen Idempotency-Key; el resto de las requests pasa directo.
+    """
+    def __init__(self, app):
+        self.app = app
+        # Ejecuciones en curso en este worker: clave -> Future con la respuesta (o None si falló)
+        self.en_curso: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        clave_cliente = _header(scope, b"idempotency-key")
+        child_scope = _ruta_idempotente(scope) if clave_cliente else None
+        if child_scope is None:
+            await self.app(scope, receive, send)
+            return
+
+        if len(clave_cliente) > LARGO_MAXIMO_CLAVE:
+            await JSONResponse(
+                {"detail": f"Idempotency-Key no puede superar {LARGO_MAXIMO_CLAVE} caracteres"},
+                status_code=400
+            )(scope, receive, send)
+            return
+
+        cuerpo, receive = await _leer_cuerpo(receive)
+        clave = _clave(scope, clave_cliente)
+        huella = hashlib.sha256(cuerpo).hexdigest()
+
+        # Duplicado en este worker: espera la ejecución en curso
+        while clave in self.en_curso:
+            respuesta = await asyncio.shield(self.en_curso[clave])
+            # None: la original falló y liberó la clave, esta request la vuelve a tomar
+            if respuesta is not None:
+                if respuesta["huella"] != huella:
+                    await self._otra_solicitud(scope, receive, send)
+                    return
+                scope.update(child_scope)
+                await _repetir(send, respuesta)
+                return
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.en_curso[clave] = futuro
+        try:
+            estado, respuesta = await run_in_threadpool(reservar_clave, clave, huella)
+            limite = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_ESPERA_SEGUNDOS
+            # Otro worker la está ejecutando: se consulta hasta que guarde la respuesta
+            while estado == "en_proceso" and asyncio.get_running_loop().time() < limite:
+                await asyncio.sleep(INTERVALO_ESPERA)
+                estado, respuesta = await run_in_threadpool(reservar_clave, clave, huella)
+
+            if estado == "otra_solicitud":
+                await self._otra_solicitud(scope, receive, send)
+            elif estado == "en_proceso":
+                await JSONResponse(
+                    {"detail": "Hay una solicitud en curso con esta Idempotency-Key, reintenta en unos segundos"},
+                    status_code=409
+                )(scope, receive, send)
+            elif estado == "completada":
+                logger.debug("🔁 Idempotency-Key repetida en %s", scope["path"])
+                respuesta["huella"] = huella
+                self._terminar(clave, futuro, respuesta)
+                scope.update(child_scope)
+                await _repetir(send, respuesta)
+            else:
+                await self._ejecutar(scope, receive, send, clave, huella, futuro)
+        finally:
+            self._terminar(clave, futuro, None)
+
+    def _terminar(self, clave: str, futuro: asyncio.Future, respuesta: Optional[dict]):
+        """Entrega el resultado a los duplicados que esperan y suelta la clave en este worker"""
+        if not futuro.done():
+            futuro.set_result(respuesta)
+        if self.en_curso.get(clave) is futuro:
+            del self.en_curso[clave]
+
+    async def _ejecutar(self, scope, receive, send, clave: str, huella: str, futuro: asyncio.Future):
+        respuesta = {"status": 500, "headers": [], "cuerpo": b"", "huella": huella}
+        partes = []
+
+        async def send_guardando(message):
+            if message["type"] == "http.response.start":
+                respuesta["status"] = message["status"]
+                respuesta["headers"] = [
+                    (nombre, valor) for nombre, valor in message.get("headers", [])
+                    if nombre.lower() not in _HEADERS_EXCLUIDOS
+                ]
+                await send(message)
+                return
+
+            if message["type"] == "http.response.body":
+                partes.append(message.get("body", b""))
+            await send(message)
+            # Los duplicados de este worker reciben la respuesta apenas se envía,
+            # sin esperar las tareas en segundo plano
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                respuesta["cuerpo"] = b"".join(partes)
+                self._terminar(clave, futuro, respuesta if respuesta["status"] < 500 else None)
+
+        try:
+            await self.app(scope, receive, send_guardando)
+        finally:
+            # Se persiste cuando la app ya devolvió su conexión del pool (get_db se
+            # cierra después de las tareas en segundo plano); mientras tanto los
+            # duplicados de otros workers ven la fila 'en_proceso' y esperan
+            guardable = futuro.done() and futuro.result() is not None
+            if guardable:
+                await run_in_threadpool(guardar_respuesta, clave, respuesta)
+            else:
+                await run_in_threadpool(liberar_clave, clave)
+
+    async def _otra_solicitud(self, scope, receive, send):
+        await JSONResponse(
+            {"detail": "La Idempotency-Key ya se usó con una solicitud distinta"},
+            status_code=422
+        )(scope, receive, send)
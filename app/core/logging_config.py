@@ -0,0 +1,205 @@
+# app/core/logging_config.py
+"""
+Logging estructurado y asíncrono.
+
+Los handlers de la aplicación solo encolan el LogRecord (QueueHandler);
+un hilo QueueListener se encarga de formatear y escribir en stdout, así
+los endpoints no bloquean en la escritura.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+# ID de la request en curso (lo asigna RequestIdMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Agrega el request_id al record en el hilo que genera el log"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Deja pasar solo una fracción de los logs DEBUG (LOG_DEBUG_SAMPLE_RATE)"""
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class ColaHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que solo resuelve el mensaje en el hilo de la request
+    (los args pueden ser objetos ORM ligados a la sesión); el formato
+    JSON y la escritura se hacen en el hilo del listener.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por evento"""
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        # Campos pasados con extra={...}
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD and not clave.startswith("_"):
+                data[clave] = valor
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return super().format(record)
+
+
+def parsear_niveles(valor: str) -> Tuple[Dict[str, int], List[str]]:
+    """
+    'app.routers.reservas_opcion=DEBUG,sqlalchemy.engine=WARNING' -> ({nombre: nivel}, ignoradas).
+    Las partes sin "nombre=NIVEL" o con un nivel desconocido se ignoran y se retornan aparte.
+    """
+    niveles = {}
+    ignoradas = []
+    for parte in valor.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        nombre, _, nivel = parte.partition("=")
+        # getLevelName retorna "Level X" (un str) para los nombres desconocidos
+        numero = logging.getLevelName(nivel.strip().upper())
+        if not nombre.strip() or not isinstance(numero, int):
+            ignoradas.append(parte)
+            continue
+        niveles[nombre.strip()] = numero
+    return niveles, ignoradas
+
+
+def configurar_logging() -> None:
+    """Configura el logging raíz con QueueHandler + QueueListener (idempotente)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    cola: queue.SimpleQueue = queue.SimpleQueue()
+    handler_cola = ColaHandler(cola)
+    handler_cola.addFilter(RequestIdFilter())
+    handler_cola.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    raiz = logging.getLogger()
+    raiz.handlers[:] = [handler_cola]
+    raiz.setLevel(settings.LOG_LEVEL.upper())
+
+    niveles, ignoradas = parsear_niveles(settings.LOG_LEVELS)
+    for nombre, nivel in niveles.items():
+        logging.getLogger(nombre).setLevel(nivel)
+
+    # Uvicorn trae sus propios handlers: se redirigen a la cola
+    for nombre in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger_uvicorn = logging.getLogger(nombre)
+        logger_uvicorn.handlers[:] = []
+        logger_uvicorn.propagate = True
+
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+
+    if ignoradas:
+        logging.getLogger(__name__).warning(
+            "⚠️ LOG_LEVELS: se ignoran %s (formato modulo=NIVEL, con DEBUG, INFO, WARNING, ERROR o CRITICAL)",
+            ", ".join(ignoradas)
+        )
+
+
+def reiniciar_logging_tras_fork() -> None:
+    """En un worker creado con fork el hilo del listener no existe: se crea uno propio"""
+    global _listener
+    _listener = None
+    configurar_logging()
+
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo del listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que asigna un request_id (o respeta X-Request-ID)
+    y lo devuelve en la respuesta.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for clave, valor in scope["headers"]:
+            if clave == b"x-request-id":
+                request_id = valor.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        token = request_id_var.set(request_id)
+
+        async def send_con_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_id)
+        finally:
+            request_id_var.reset(token)
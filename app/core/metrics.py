@@ -0,0 +1,205 @@
+# app/core/metrics.py
+"""
+Métricas estilo Prometheus expuestas en /metrics.
+
+- Latencia, status e in-flight por ruta (plantilla de la ruta, no el path real)
+- Cantidad y tiempo de sentencias SQL por request (eventos de SQLAlchemy)
+- Tiempo de las llamadas HTTP salientes (Brevo, ImgBB, reCAPTCHA, Supabase)
+- Transiciones y duración del ciclo de vida de reservas (app/scheduler.py)
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess, REGISTRY
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+RUTA_SIN_MATCH = "sin_ruta"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requests HTTP atendidas",
+    ["method", "route", "status"]
+)
+HTTP_LATENCIA = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las requests HTTP",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+HTTP_EN_CURSO = Gauge(
+    "http_requests_in_progress",
+    "Requests HTTP en curso",
+    ["method"],
+    multiprocess_mode="livesum"
+)
+DB_QUERIES_POR_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Sentencias SQL ejecutadas por request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+)
+DB_TIEMPO_POR_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Tiempo total en la base de datos por request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+DB_SENTENCIAS = Counter(
+    "db_statements_total",
+    "Sentencias SQL ejecutadas (incluye las de tareas fuera de una request)"
+)
+HTTP_SALIENTE_LATENCIA = Histogram(
+    "http_client_request_duration_seconds",
+    "Latencia de las llamadas HTTP a servicios externos",
+    ["service", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+CICLO_TRANSICIONES = Counter(
+    "reservas_transiciones_total",
+    "Reservas que el ciclo de vida cambió de estado",
+    ["transicion"]
+)
+CICLO_DURACION = Histogram(
+    "reservas_ciclo_duration_seconds",
+    "Duración de cada ejecución del ciclo de vida de reservas",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+CICLO_ERRORES = Counter(
+    "reservas_ciclo_errores_total",
+    "Tareas del programador (app/scheduler.py) que fallaron, por tarea",
+    ["tarea"]
+)
+CICLO_ULTIMA_EJECUCION = Gauge(
+    "reservas_ciclo_ultima_ejecucion_timestamp_seconds",
+    "Momento de la última ejecución completa del ciclo de vida de reservas",
+    multiprocess_mode="max"
+)
+
+EVENTOS_PAGO_RECIBIDOS = Counter(
+    "pagos_eventos_recibidos_total",
+    "Webhooks del proveedor de pagos por resultado de la recepción",
+    ["proveedor", "resultado"]
+)
+EVENTOS_PAGO_PROCESADOS = Counter(
+    "pagos_eventos_procesados_total",
+    "Eventos de pago aplicados por el worker, por resultado",
+    ["resultado"]
+)
+EVENTOS_PAGO_DEMORA = Histogram(
+    "pagos_eventos_demora_seconds",
+    "Tiempo entre la recepción de un evento de pago y su procesamiento",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+)
+
+
+class EstadisticasDB:
+    """Contador de sentencias SQL de la request en curso"""
+    __slots__ = ("queries", "tiempo")
+
+    def __init__(self):
+        self.queries = 0
+        self.tiempo = 0.0
+
+
+# Los endpoints síncronos corren en el threadpool con una copia del
+# contexto: el objeto es compartido, así que los contadores llegan aquí
+estadisticas_db_var: ContextVar[Optional[EstadisticasDB]] = ContextVar("estadisticas_db", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_sentencias", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["inicio_sentencias"].pop()
+    DB_SENTENCIAS.inc()
+    estadisticas = estadisticas_db_var.get()
+    if estadisticas is not None:
+        estadisticas.queries += 1
+        estadisticas.tiempo += time.perf_counter() - inicio
+
+
+@event.listens_for(Engine, "handle_error")
+def _error_en_sentencia(context):
+    # Sentencia fallida: descartar su marca de inicio
+    inicios = context.connection.info.get("inicio_sentencias") if context.connection else None
+    if inicios:
+        inicios.pop()
+
+
+@contextmanager
+def medir_http_saliente(servicio: str):
+    """Mide una llamada HTTP a un servicio externo: with medir_http_saliente("brevo"): ..."""
+    inicio = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        HTTP_SALIENTE_LATENCIA.labels(servicio, outcome).observe(time.perf_counter() - inicio)
+
+
+def ruta_de_scope(scope) -> str:
+    """Plantilla de la ruta que atendió la request (cardinalidad acotada)"""
+    route = scope.get("route")
+    return getattr(route, "path", RUTA_SIN_MATCH)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra latencia, status, in-flight y uso de BD por ruta"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        estadisticas = EstadisticasDB()
+        token = estadisticas_db_var.set(estadisticas)
+
+        async def send_con_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        en_curso = HTTP_EN_CURSO.labels(method)
+        en_curso.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_con_status)
+        finally:
+            duracion = time.perf_counter() - inicio
+            en_curso.dec()
+            estadisticas_db_var.reset(token)
+
+            route = ruta_de_scope(scope)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCIA.labels(method, route).observe(duracion)
+            DB_QUERIES_POR_REQUEST.labels(route).observe(estadisticas.queries)
+            DB_TIEMPO_POR_REQUEST.labels(route).observe(estadisticas.tiempo)
+
+
+def generar_metricas() -> bytes:
+    """Texto de exposición; con varios workers agrega los archivos de PROMETHEUS_MULTIPROC_DIR"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
@@ -0,0 +1,166 @@
+# app/core/query_budget.py
+"""
+Presupuesto de queries por request y detección de N+1 (modo prueba).
+
+Cada endpoint puede declarar cuántas sentencias SQL puede ejecutar:
+
+    @router.get("/")
+    @presupuesto_queries(4)
+    def get_espacios(...):
+
+Con QUERY_BUDGET_MODE="warn" las violaciones se registran en el log;
+con "strict" la request responde 500 para que la suite de verificación
+(scripts/check_query_budgets.py) falle. Con "off" (por defecto) no se
+registra ningún listener y no hay costo en producción.
+"""
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("off", "warn", "strict")
+
+# Violaciones detectadas desde el arranque (las lee el script de verificación)
+violaciones_registradas: List[dict] = []
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTA = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_RE_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|\?")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def presupuesto_queries(maximo: int):
+    """Declara el máximo de sentencias SQL que puede ejecutar el endpoint"""
+    def decorador(func):
+        func.presupuesto_queries = maximo
+        return func
+    return decorador
+
+
+def normalizar_sentencia(sql: str) -> str:
+    """Forma de la sentencia: literales y parámetros reemplazados por '?'"""
+    sql = _RE_STRING.sub("?", sql)
+    sql = _RE_PARAM.sub("?", sql)
+    sql = _RE_NUMERO.sub("?", sql)
+    sql = _RE_LISTA.sub("(?)", sql)
+    return _RE_ESPACIOS.sub(" ", sql).strip()
+
+
+class RegistroQueries:
+    """Sentencias ejecutadas durante una request"""
+    __slots__ = ("sentencias",)
+
+    def __init__(self):
+        self.sentencias: List[str] = []
+
+    @property
+    def total(self) -> int:
+        return len(self.sentencias)
+
+    def repetidas(self, umbral: int) -> List[dict]:
+        """Formas de sentencia que se repiten al menos `umbral` veces (patrón N+1)"""
+        conteo = Counter(normalizar_sentencia(s) for s in self.sentencias)
+        return [
+            {"sentencia": forma, "veces": veces}
+            for forma, veces in conteo.most_common()
+            if veces >= umbral
+        ]
+
+
+registro_queries_var: ContextVar[Optional[RegistroQueries]] = ContextVar("registro_queries", default=None)
+
+
+def _registrar_sentencia(conn, cursor, statement, parameters, context, executemany):
+    registro = registro_queries_var.get()
+    if registro is not None:
+        registro.sentencias.append(statement)
+
+
+def activar_registro_queries() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _registrar_sentencia):
+        event.listen(Engine, "before_cursor_execute", _registrar_sentencia)
+
+
+def evaluar_request(route, registro: RegistroQueries) -> Optional[dict]:
+    """Retorna la violación (presupuesto excedido o N+1) o None"""
+    endpoint = getattr(route, "endpoint", None)
+    presupuesto = getattr(endpoint, "presupuesto_queries", None)
+    repetidas = registro.repetidas(settings.QUERY_BUDGET_N_MAS_UNO)
+
+    excedido = presupuesto is not None and registro.total > presupuesto
+    if not excedido and not repetidas:
+        return None
+
+    return {
+        "ruta": getattr(route, "path", None),
+        "metodos": sorted(getattr(route, "methods", None) or []),
+        "queries": registro.total,
+        "presupuesto": presupuesto,
+        "excedido": excedido,
+        "repetidas": repetidas,
+    }
+
+
+class QueryBudgetMiddleware:
+    """
+    Cuenta las sentencias de cada request, agrega X-Query-Count a la
+    respuesta y verifica el presupuesto declarado por el endpoint.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.estricto = settings.QUERY_BUDGET_MODE == "strict"
+        activar_registro_queries()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = RegistroQueries()
+        token = registro_queries_var.set(registro)
+        reemplazada = False
+
+        async def send_verificado(message):
+            nonlocal reemplazada
+            if message["type"] == "http.response.start":
+                violacion = evaluar_request(scope.get("route"), registro)
+                if violacion:
+                    violaciones_registradas.append(violacion)
+                    logger.warning(
+                        "Presupuesto de queries: %s %s ejecutó %s (presupuesto %s), repetidas: %s",
+                        violacion["metodos"], violacion["ruta"], violacion["queries"],
+                        violacion["presupuesto"], violacion["repetidas"],
+                        extra={"violacion_queries": violacion}
+                    )
+                if violacion and self.estricto:
+                    reemplazada = True
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+                    })
+                    await send({
+                        "type": "http.response.body",
+                        "body": f"Presupuesto de queries excedido: {violacion}".encode("utf-8"),
+                    })
+                    return
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(registro.total).encode("latin-1"))
+                ]
+            elif reemplazada:
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_verificado)
+        finally:
+            registro_queries_var.reset(token)
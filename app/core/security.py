@@ -7,6 +7,9 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.usuario import Usuario
+import logging
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = "your-secret-key-change-in-production"  
 ALGORITHM = "HS256"
@@ -75,28 +78,28 @@ def get_current_user_optional(
     Útil para endpoints que aceptan tanto usuarios autenticados como visitantes
     """
     if token is None:
-        print(f"[AUTH] No hay token, tratando como visitante")
+        logger.debug("[AUTH] No hay token, tratando como visitante")
         return None  
     
     try:
-        print(f"[AUTH] Token recibido: {token[:20]}...")
+        logger.debug("[AUTH] Token recibido (%s caracteres)", len(token))
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         
         if email is None:
-            print(f"[AUTH] Token no tiene email, visitante")
+            logger.debug("[AUTH] Token no tiene email, visitante")
             return None  # Token inválido, tratar como visitante
             
         user = db.query(Usuario).filter(Usuario.email == email).first()
         if user:
-            print(f"[AUTH] Usuario autenticado: {user.email}")
+            logger.debug("[AUTH] Usuario autenticado: %s", user.email)
         else:
-            print(f"[AUTH] Usuario no encontrado, visitante")
+            logger.debug("[AUTH] Usuario no encontrado, visitante")
         return user  # Devuelve el usuario o None si no existe
         
     except JWTError as e:
-        print(f"[AUTH] Token JWTError: {str(e)}, tratando como visitante")
+        logger.debug("[AUTH] Token JWTError: %s, tratando como visitante", e)
         return None  # Token expirado o inválido, tratar como visitante
     except Exception as e:
-        print(f"[AUTH] Error general: {str(e)}, tratando como visitante")
+        logger.debug("[AUTH] Error general: %s, tratando como visitante", e)
         return None  # Cualquier otro error, tratar como visitante
\ No newline at end of file
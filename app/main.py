@@ -1,21 +1,31 @@
 # En main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import engine, Base
 from app.config import settings
+from app.core.logging_config import configurar_logging, detener_logging, RequestIdMiddleware
+from app.core.metrics import MetricsMiddleware, generar_metricas
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app import scheduler
+from app.services import eventos_pago
+from prometheus_client import CONTENT_TYPE_LATEST
 from app.routers import (
     auth, notifications, reservas_opcion, usuarios, espacios, canchas, 
     disciplinas, cupones, pagos, reportes, control_acceso, content, 
-    incidentes, comentarios
+    incidentes, comentarios, imagenes, busqueda
 )
 
+configurar_logging()
 
 app = FastAPI(
     title="Sistema de Reservas Deportivas - OlympiaHub",
     description="API para gestión de reservas de espacios deportivos",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configuración CORS
@@ -31,12 +41,47 @@ app.add_middleware(
         "Origin",
         "X-Requested-With",
         "X-CSRF-Token",
+        "Idempotency-Key",
         "Access-Control-Allow-Origin",
     ],
     expose_headers=["*"],
     max_age=600,
 )
 
+# El último agregado es el más externo: idempotencia queda junto a los routers
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
+if settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+@app.on_event("startup")
+async def iniciar_ciclo_reservas():
+    if settings.CICLO_RESERVAS_HABILITADO:
+        scheduler.iniciar()
+
+@app.on_event("shutdown")
+async def detener_ciclo_reservas():
+    await scheduler.detener()
+
+@app.on_event("startup")
+def iniciar_eventos_pago():
+    if settings.EVENTOS_PAGO_WORKER_HABILITADO:
+        eventos_pago.iniciar_worker()
+
+@app.on_event("shutdown")
+def detener_eventos_pago():
+    eventos_pago.detener_worker()
+
+@app.on_event("shutdown")
+def cerrar_pool_db():
+    # Cierra las conexiones del pool al terminar el worker (SIGTERM)
+    engine.dispose()
+
+@app.on_event("shutdown")
+def shutdown_logging():
+    detener_logging()
+
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["Autenticación"])
 app.include_router(usuarios.router, prefix="/usuarios", tags=["Usuarios"])
@@ -52,6 +97,8 @@ app.include_router(content.router, prefix="/content", tags=["Contenido Dinámico
 app.include_router(incidentes.router, prefix="/incidentes", tags=["Incidentes"])
 app.include_router(comentarios.router, prefix="/comentarios", tags=["Comentarios"])
 app.include_router(notifications.router, prefix="/notificaciones", tags=["Notificaciones"])
+app.include_router(imagenes.router, prefix="/imagenes", tags=["Imágenes"])
+app.include_router(busqueda.router, prefix="/busqueda", tags=["Búsqueda"])
 
 @app.get("/")
 def read_root():
@@ -65,4 +112,8 @@ def health_check():
     return {
         "status": "healthy",
         "service": "OlympiaHub API",
-    }
\ No newline at end of file
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=generar_metricas(), media_type=CONTENT_TYPE_LATEST)
@@ -10,9 +10,10 @@ from .comentario import Comentario
 from .cupon import Cupon
 from .administra import Administra
 from .cancha_disciplina import CanchaDisciplina
+from .calificaciones import CalificacionesCancha, CalificacionesEspacio
 
 __all__ = [
     "Usuario", "EspacioDeportivo", "Cancha", "Disciplina", "Reserva",
     "Pago", "Cancelacion", "Incidente", "Comentario", "Cupon",
-    "Administra", "CanchaDisciplina"
+    "Administra", "CanchaDisciplina", "CalificacionesCancha", "CalificacionesEspacio"
 ]
\ No newline at end of file
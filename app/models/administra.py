@@ -6,6 +6,7 @@ from sqlalchemy.sql import func
 class Administra(Base):
     __tablename__ = "administra"
     
+    # La clave primaria empieza por id_usuario: también sirve para los espacios asignados a un usuario
     id_usuario = Column(Integer, ForeignKey("usuario.id_usuario", ondelete="CASCADE"), primary_key=True)
     id_espacio_deportivo = Column(Integer, ForeignKey("espacio_deportivo.id_espacio_deportivo", ondelete="CASCADE"), primary_key=True)
     fecha_asignacion = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 class AsistenteReserva(Base):
     __tablename__ = "asistentes_reserva"
+    __table_args__ = (
+        Index("ix_asistentes_reserva_id_reserva", "id_reserva"),
+    )
     
     id_asistente = Column(Integer, primary_key=True, index=True)
     id_reserva = Column(Integer, ForeignKey("reserva.id_reserva"), nullable=False)
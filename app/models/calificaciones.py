@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+class CalificacionesCancha(Base):
+    """Resumen de calificaciones de los comentarios de una cancha (lo mantiene app/services/calificaciones.py)"""
+    __tablename__ = "calificaciones_cancha"
+
+    id_cancha = Column(Integer, ForeignKey("cancha.id_cancha", ondelete="CASCADE"), primary_key=True)
+    cantidad = Column(Integer, nullable=False, default=0)   # comentarios con calificación
+    suma = Column(Integer, nullable=False, default=0)
+    estrellas_1 = Column(Integer, nullable=False, default=0)
+    estrellas_2 = Column(Integer, nullable=False, default=0)
+    estrellas_3 = Column(Integer, nullable=False, default=0)
+    estrellas_4 = Column(Integer, nullable=False, default=0)
+    estrellas_5 = Column(Integer, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CalificacionesEspacio(Base):
+    """Suma de las calificaciones de las canchas del espacio (lo mantiene app/services/calificaciones.py)"""
+    __tablename__ = "calificaciones_espacio"
+
+    id_espacio_deportivo = Column(Integer, ForeignKey("espacio_deportivo.id_espacio_deportivo", ondelete="CASCADE"),
+                                  primary_key=True)
+    cantidad = Column(Integer, nullable=False, default=0)
+    suma = Column(Integer, nullable=False, default=0)
+    estrellas_1 = Column(Integer, nullable=False, default=0)
+    estrellas_2 = Column(Integer, nullable=False, default=0)
+    estrellas_3 = Column(Integer, nullable=False, default=0)
+    estrellas_4 = Column(Integer, nullable=False, default=0)
+    estrellas_5 = Column(Integer, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
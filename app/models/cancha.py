@@ -15,10 +15,14 @@ class Cancha(Base):
     estado = Column(String(20), default="disponible")
     id_espacio_deportivo = Column(Integer, ForeignKey("espacio_deportivo.id_espacio_deportivo", ondelete="CASCADE"))
     imagen = Column(String(255))
+    imagen_variantes = Column(String(255))  # imagen cuyas variantes ya se generaron (storage_base.registrar_variantes)
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relaciones
     espacio_deportivo = relationship("EspacioDeportivo", back_populates="canchas")
     reservas = relationship("Reserva", back_populates="cancha")
     disciplinas = relationship("CanchaDisciplina", back_populates="cancha")
-    comentarios = relationship("Comentario", back_populates="cancha")
\ No newline at end of file
+    # Los comentarios se borran en cascada en la base (ON DELETE CASCADE) al eliminar la cancha
+    comentarios = relationship("Comentario", back_populates="cancha", passive_deletes=True)
+    # Resumen de calificaciones: viene en el mismo SELECT que la cancha (LEFT JOIN por clave primaria)
+    calificaciones = relationship("CalificacionesCancha", uselist=False, lazy="joined", viewonly=True)
\ No newline at end of file
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, Numeric, Date, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from sqlalchemy.sql import func
 
 class Cupon(Base):
     __tablename__ = "cupon"
+    __table_args__ = (
+        Index("ix_cupon_usuario_estado_expiracion", "id_usuario", "estado", "fecha_expiracion"),
+    )
     
     id_cupon = Column(Integer, primary_key=True, index=True)
     codigo = Column(String(50), unique=True, nullable=False)
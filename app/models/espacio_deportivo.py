@@ -13,10 +13,13 @@ class EspacioDeportivo(Base):
     estado = Column(String(20), default="activo")
     descripcion = Column(Text)
     imagen = Column(String(255)) 
+    imagen_variantes = Column(String(255))  # imagen cuyas variantes ya se generaron (storage_base.registrar_variantes)
     latitud = Column(Float, nullable=True)    # NUEVO
     longitud = Column(Float, nullable=True)   # NUEVO
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relaciones
     canchas = relationship("Cancha", back_populates="espacio_deportivo")
-    administraciones = relationship("Administra", back_populates="espacio_deportivo")
\ No newline at end of file
+    administraciones = relationship("Administra", back_populates="espacio_deportivo")
+    # Resumen de calificaciones: viene en el mismo SELECT que el espacio (LEFT JOIN por clave primaria)
+    calificaciones = relationship("CalificacionesEspacio", uselist=False, lazy="joined", viewonly=True)
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+class EstadisticaUsuario(Base):
+    """Contadores de reservas por usuario (los mantiene app/services/estadisticas_usuario.py)"""
+    __tablename__ = "estadisticas_usuario"
+
+    id_usuario = Column(Integer, ForeignKey("usuario.id_usuario", ondelete="CASCADE"), primary_key=True)
+    reservas_totales = Column(Integer, nullable=False, default=0)     # creadas, incluidas las canceladas
+    reservas_activas = Column(Integer, nullable=False, default=0)     # pendiente, confirmada, en_curso
+    reservas_canceladas = Column(Integer, nullable=False, default=0)
+    inasistencias = Column(Integer, nullable=False, default=0)        # completadas sin ningún asistente registrado
+    total_gastado = Column(Numeric(12, 2), nullable=False, default=0)  # pagos completados
+    fecha_actualizacion = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class EventoPago(Base):
+    """Evento recibido del proveedor de pagos (app/services/eventos_pago.py)"""
+    __tablename__ = "evento_pago"
+    __table_args__ = (
+        # Un evento repetido por el proveedor se guarda una sola vez
+        UniqueConstraint("proveedor", "id_evento", name="uq_evento_pago_proveedor_id_evento"),
+        # Pendientes listos para procesar y purga de los procesados
+        Index("ix_evento_pago_estado_proximo_intento", "estado", "proximo_intento"),
+    )
+
+    id_evento_pago = Column(Integer, primary_key=True)
+    proveedor = Column(String(20), nullable=False)     # stripe, local
+    id_evento = Column(String(255), nullable=False)    # id del evento en el proveedor
+    tipo = Column(String(100), nullable=False)         # payment_intent.succeeded, charge.refunded, ...
+    payload = Column(Text, nullable=False)             # cuerpo JSON tal como llegó
+    estado = Column(String(20), nullable=False, default="pendiente")  # pendiente, procesado, ignorado, por_reembolsar, error
+    intentos = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    recibido_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    proximo_intento = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    procesado_en = Column(DateTime(timezone=True))
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, Text, LargeBinary, DateTime, Index
+from app.database import Base
+
+class ClaveIdempotencia(Base):
+    """Respuesta guardada de un POST con header Idempotency-Key (app/core/idempotency.py)"""
+    __tablename__ = "idempotencia"
+    __table_args__ = (
+        # Purga de claves vencidas
+        Index("ix_idempotencia_expira_en", "expira_en"),
+    )
+    
+    clave = Column(String(64), primary_key=True)   # sha256 de método, ruta, credencial e Idempotency-Key
+    huella = Column(String(64), nullable=False)    # sha256 del cuerpo de la request
+    estado = Column(String(20), nullable=False, default="en_proceso")  # en_proceso, completada
+    status_code = Column(Integer)
+    headers = Column(Text)                         # JSON: [[nombre, valor], ...]
+    cuerpo = Column(LargeBinary)
+    fecha_creacion = Column(DateTime(timezone=True), nullable=False)
+    expira_en = Column(DateTime(timezone=True), nullable=False)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Notificacion(Base):
     __tablename__ = "notificaciones"
+    __table_args__ = (
+        Index("ix_notificaciones_usuario_leida_fecha", "usuario_id", "leida", "fecha_creacion"),
+        # Contador y bandeja de no leídas
+        Index("ix_notificaciones_no_leidas", "usuario_id", "fecha_creacion",
+              postgresql_where=text("leida = false"), sqlite_where=text("leida = 0")),
+    )
     
     id_notificacion = Column(Integer, primary_key=True, index=True)
     titulo = Column(String(255), nullable=False)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from sqlalchemy.sql import func
 
 class Pago(Base):
     __tablename__ = "pago"
+    __table_args__ = (
+        Index("ix_pago_fecha_estado", "fecha_pago", "estado"),
+        Index("ix_pago_id_reserva", "id_reserva"),
+        # Eventos del proveedor de pagos (app/services/eventos_pago.py)
+        Index("ix_pago_id_transaccion", "id_transaccion"),
+    )
     
     id_pago = Column(Integer, primary_key=True, index=True)
     monto = Column(Numeric(10, 2), nullable=False)
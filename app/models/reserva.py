@@ -1,10 +1,30 @@
-from sqlalchemy import Column, String, Integer, Date, Time, Numeric, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, Time, Numeric, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from sqlalchemy.sql import func
 
 class Reserva(Base):
+    # En PostgreSQL está particionada por mes de fecha_reserva (migración 0009,
+    # app/services/particiones_reserva.py): clave primaria (id_reserva, fecha_reserva)
     __tablename__ = "reserva"
+    __table_args__ = (
+        Index("ix_reserva_cancha_fecha_estado", "id_cancha", "fecha_reserva", "estado"),
+        Index("ix_reserva_usuario_fecha", "id_usuario", "fecha_reserva"),
+        # Reportes por rango de fechas (reportes.py)
+        Index("ix_reserva_fecha_estado", "fecha_reserva", "estado"),
+        Index("ix_reserva_fecha_creacion", "fecha_creacion"),
+        # Solo las reservas que ocupan horario (verificar_disponibilidad / listar_horarios_disponibles)
+        Index("ix_reserva_cancha_fecha_activas", "id_cancha", "fecha_reserva", "hora_inicio",
+              postgresql_where=text("estado IN ('pendiente', 'confirmada', 'en_curso')"),
+              sqlite_where=text("estado IN ('pendiente', 'confirmada', 'en_curso')")),
+        # Ciclo de vida (app/services/ciclo_reservas.py): pendientes vencidas y horarios iniciados o terminados
+        Index("ix_reserva_pendientes_creacion", "fecha_creacion",
+              postgresql_where=text("estado = 'pendiente'"),
+              sqlite_where=text("estado = 'pendiente'")),
+        Index("ix_reserva_confirmadas_fecha", "fecha_reserva", "hora_inicio",
+              postgresql_where=text("estado IN ('confirmada', 'en_curso')"),
+              sqlite_where=text("estado IN ('confirmada', 'en_curso')")),
+    )
     
     id_reserva = Column(Integer, primary_key=True, index=True)
     fecha_reserva = Column(Date, nullable=False)
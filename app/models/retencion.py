@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Date, Time, DateTime, Index
+from app.database import Base
+
+class RetencionHorario(Base):
+    """Hora de una cancha retenida durante el checkout (app/services/retenciones.py, backend "base")"""
+    __tablename__ = "retencion_horario"
+    __table_args__ = (
+        # Purga de retenciones vencidas
+        Index("ix_retencion_horario_expira_en", "expira_en"),
+    )
+
+    # Una fila por hora: las reservas son en horas completas
+    id_cancha = Column(Integer, primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    hora_inicio = Column(Time, primary_key=True)
+    id_usuario = Column(Integer, nullable=False)   # titular de la retención
+    retenida_desde = Column(DateTime(timezone=True), nullable=False)  # límite de renovación (RETENCION_MAX_SEGUNDOS)
+    expira_en = Column(DateTime(timezone=True), nullable=False)
@@ -7,6 +7,9 @@ from app.schemas.auth import Token, Login, Register
 from app.core.security import verify_password, get_password_hash, create_access_token
 from app.core.exceptions import AuthException
 from app.core.captcha import verificar_captcha
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -48,7 +51,7 @@ def register(usuario_data: Register, db: Session = Depends(get_db)):
     Registra un nuevo usuario, validando el token de reCAPTCHA.
     """
     try:
-        print(f"Datos recibidos en registro: {usuario_data}")
+        logger.debug("Registro solicitado para: %s", usuario_data.email)
 
         # Verificar CAPTCHA
         if not usuario_data.captcha_token:
@@ -78,7 +81,7 @@ def register(usuario_data: Register, db: Session = Depends(get_db)):
                 detail=f"Rol no permitido. Roles válidos: {roles_permitidos}"
             )
         
-        print("Creando hash de contraseña...")
+        logger.debug("Creando hash de contraseña...")
         hashed_password = get_password_hash(usuario_data.contrasenia)
         
         # Crear usuario con estado inactivo
@@ -125,11 +128,11 @@ def register(usuario_data: Register, db: Session = Depends(get_db)):
         )
         
         if email_enviado:
-            print("✅ Email de bienvenida enviado correctamente")
+            logger.debug("✅ Email de bienvenida enviado correctamente")
         else:
-            print("⚠️  El usuario se registró pero el email no se pudo enviar")
+            logger.warning("⚠️  El usuario se registró pero el email no se pudo enviar")
         
-        print(f"Usuario registrado exitosamente: {nuevo_usuario.id_usuario}")
+        logger.info("Usuario registrado exitosamente: %s", nuevo_usuario.id_usuario)
         return {
             "message": "Usuario registrado exitosamente. Su cuenta está pendiente de aprobación por un administrador.", 
             "id": nuevo_usuario.id_usuario
@@ -139,9 +142,7 @@ def register(usuario_data: Register, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         db.rollback()
-        print(f"Error completo en registro: {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error completo en registro: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno del servidor: {str(e)}"
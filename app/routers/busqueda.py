@@ -0,0 +1,88 @@
+# app/routers/busqueda.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from datetime import date, time
+from typing import List, Literal, Optional
+from app.database import get_db
+from app.core.query_budget import presupuesto_queries
+from app.schemas.busqueda import BusquedaResponse, CanchasDisponiblesResponse, SugerenciaBusqueda
+from app.services.busqueda_canchas import buscar_canchas_disponibles
+from app.services.busqueda_catalogo import indice_catalogo
+
+router = APIRouter()
+
+
+@router.get("/", response_model=BusquedaResponse)
+@presupuesto_queries(4)
+def buscar(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto a buscar"),
+    tipo: Optional[List[Literal["espacio", "cancha", "disciplina"]]] = Query(None, description="Tipos de resultado"),
+    id_disciplina: Optional[int] = None,
+    id_espacio: Optional[int] = None,
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar espacios, canchas y disciplinas por nombre, ubicación, tipo o descripción.
+    💡 Tolera prefijos y errores de tipeo; las facetas cuentan los resultados por disciplina y por espacio.
+    Con el índice en memoria vigente no consulta la base.
+    """
+    resultado = indice_catalogo(db).buscar(q, tipos=tipo, id_disciplina=id_disciplina,
+                                           id_espacio=id_espacio, limite=limite)
+    return {"consulta": q, **resultado}
+
+
+@router.get("/autocompletar", response_model=List[SugerenciaBusqueda])
+@presupuesto_queries(4)
+def autocompletar(
+    q: str = Query(..., min_length=1, max_length=100),
+    limite: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """Sugerencias mientras se escribe (la última palabra cuenta como prefijo)"""
+    return indice_catalogo(db).buscar(q, limite=limite)["resultados"]
+
+
+@router.get("/canchas-disponibles", response_model=CanchasDisponiblesResponse)
+@presupuesto_queries(3)
+def get_canchas_disponibles(
+    id_disciplina: int,
+    fecha: date = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    hora_inicio: Optional[time] = Query(None, description="Hora deseada en punto (HH:00); sin ella, todo el día"),
+    duracion_horas: int = Query(1, ge=1, le=6),
+    flexibilidad_horas: int = Query(0, ge=0, le=6, description="Horas antes o después de hora_inicio que también sirven"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radio_km: float = Query(10.0, gt=0, le=100),
+    precio_max: Optional[float] = Query(None, gt=0),
+    id_usuario: Optional[int] = Query(None, description="Usuario cuyas retenciones no ocupan el horario"),
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Encontrar cancha: franjas libres (cancha, horario) de una disciplina en una fecha,
+    cerca de un punto y alrededor de una hora, con distancia y precio.
+    💡 Ordenadas por cercanía a la hora pedida, distancia y precio; tres consultas en total.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="lat y lon deben indicarse juntos"
+        )
+    if hora_inicio is not None and (hora_inicio.minute or hora_inicio.second):
+        # Como crear_reserva: solo horas completas
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="hora_inicio debe ser una hora en punto (ej: 19:00)"
+        )
+    return buscar_canchas_disponibles(
+        db, id_disciplina, fecha,
+        hora_inicio=hora_inicio,
+        duracion_horas=duracion_horas,
+        flexibilidad_horas=flexibilidad_horas,
+        punto=(lat, lon) if lat is not None else None,
+        radio_km=radio_km,
+        precio_max=precio_max,
+        id_usuario=id_usuario,
+        limite=limite,
+    )
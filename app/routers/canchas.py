@@ -1,21 +1,26 @@
 # app/routers/canchas.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import text
 from datetime import date
 from app.database import get_db
 from app.models.cancha import Cancha
 from app.models.espacio_deportivo import EspacioDeportivo
-from app.models.administra import Administra
 from app.models.cancha_disciplina import CanchaDisciplina
 from app.schemas.cancha import CanchaResponse, CanchaCreate, CanchaUpdate, DisponibilidadResponse, HorarioDisponible
 from app.core.security import get_current_user
 from app.models.usuario import Usuario
+from app.services.alcance_staff import alcance_staff, canchas_del_staff, invalidar_alcance
+from app.services.busqueda_catalogo import invalidar_indice
 from app.services.supabase_storage import storage_service
+from app.services.retenciones import MENSAJE_RETENIDO, retenciones_service
 import os
 from typing import Optional
 import uuid
 from datetime import time
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -36,9 +41,13 @@ def get_todas_canchas_public(db: Session = Depends(get_db)):
 def get_disponibilidad_cancha(
     cancha_id: int,
     fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    id_usuario: Optional[int] = Query(None, description="Usuario cuyas retenciones no ocupan el horario"),
     db: Session = Depends(get_db)
 ):
-    """Obtener horarios disponibles de una cancha usando la función PostgreSQL"""
+    """
+    Obtener horarios disponibles de una cancha usando la función PostgreSQL.
+    Las horas retenidas durante un checkout salen ocupadas, salvo las de id_usuario.
+    """
     try:
         # Convertir string a date
         fecha_date = date.fromisoformat(fecha)
@@ -63,14 +72,17 @@ def get_disponibilidad_cancha(
             {"cancha_id": cancha_id, "fecha": fecha_date}
         )
         
+        retenidas = retenciones_service.horas_retenidas(db, cancha_id, fecha_date, excluir_usuario=id_usuario)
+        
         horarios = []
         for row in result:
+            retenido = row.disponible and retenciones_service.franja_retenida(retenidas, row.hora_inicio, row.hora_fin)
             horarios.append(HorarioDisponible(
                 hora_inicio=row.hora_inicio,
                 hora_fin=row.hora_fin,
-                disponible=row.disponible,
+                disponible=row.disponible and not retenido,
                 precio_hora=row.precio_hora,
-                mensaje=row.mensaje
+                mensaje=MENSAJE_RETENIDO if retenido else row.mensaje
             ))
         
         return DisponibilidadResponse(
@@ -80,9 +92,7 @@ def get_disponibilidad_cancha(
         )
         
     except Exception as e:
-        print(f"Error en disponibilidad: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error en disponibilidad: %s", e)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -93,10 +103,11 @@ def get_disponibilidad_cancha(
 def get_disponibilidad_cancha_public(
     cancha_id: int,
     fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    id_usuario: Optional[int] = Query(None, description="Usuario cuyas retenciones no ocupan el horario"),
     db: Session = Depends(get_db)
 ):
     """Obtener horarios disponibles de una cancha (público)"""
-    return get_disponibilidad_cancha(cancha_id, fecha, db)
+    return get_disponibilidad_cancha(cancha_id, fecha, id_usuario, db)
 
 @router.get("/public/espacio/{espacio_id}/disciplina/{disciplina_id}", response_model=list[CanchaResponse])
 def get_canchas_por_espacio_y_disciplina_public(
@@ -131,9 +142,7 @@ def get_canchas_por_espacio_y_disciplina_public(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error al obtener canchas por espacio y disciplina: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al obtener canchas por espacio y disciplina: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener canchas: {str(e)}"
@@ -162,9 +171,7 @@ def get_canchas_por_disciplina_public(
         return canchas
         
     except Exception as e:
-        print(f"Error al obtener canchas por disciplina: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al obtener canchas por disciplina: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener canchas: {str(e)}"
@@ -175,43 +182,21 @@ def obtener_canchas_por_rol(current_user: Usuario, db: Session):
     if current_user.rol == "admin":
         return db.query(Cancha).all()
     else:
-        return db.query(Cancha).join(
-            EspacioDeportivo,
-            Cancha.id_espacio_deportivo == EspacioDeportivo.id_espacio_deportivo
-        ).join(
-            Administra,
-            EspacioDeportivo.id_espacio_deportivo == Administra.id_espacio_deportivo
-        ).filter(
-            Administra.id_usuario == current_user.id_usuario
-        ).all()
+        return db.query(Cancha).filter(Cancha.id_cancha.in_(canchas_del_staff(current_user.id_usuario))).all()
 
 def verificar_permiso_cancha(current_user: Usuario, cancha_id: int, db: Session):
-    """Verificar si el usuario tiene permisos sobre la cancha"""
+    """Verificar si el usuario tiene permisos sobre la cancha (alcance en caché)"""
     if current_user.rol == "admin":
         return True
     
-    cancha = db.query(Cancha).filter(Cancha.id_cancha == cancha_id).first()
-    if not cancha:
-        return False
-    
-    administra_espacio = db.query(Administra).filter(
-        Administra.id_usuario == current_user.id_usuario,
-        Administra.id_espacio_deportivo == cancha.id_espacio_deportivo
-    ).first()
-    
-    return administra_espacio is not None
+    return cancha_id in alcance_staff(db, current_user.id_usuario).canchas
 
 def verificar_permiso_espacio(current_user: Usuario, espacio_id: int, db: Session):
-    """Verificar si el usuario tiene permisos sobre el espacio deportivo"""
+    """Verificar si el usuario tiene permisos sobre el espacio deportivo (alcance en caché)"""
     if current_user.rol == "admin":
         return True
     
-    administra_espacio = db.query(Administra).filter(
-        Administra.id_usuario == current_user.id_usuario,
-        Administra.id_espacio_deportivo == espacio_id
-    ).first()
-    
-    return administra_espacio is not None
+    return espacio_id in alcance_staff(db, current_user.id_usuario).espacios
 
 @router.get("/", response_model=list[CanchaResponse])
 def get_canchas(
@@ -227,20 +212,7 @@ def get_canchas(
             detail="No tienes permisos para gestionar canchas"
         )
     
-    if current_user.rol == "admin":
-        canchas = db.query(Cancha).all()
-    else:
-        canchas = db.query(Cancha).join(
-            EspacioDeportivo,
-            Cancha.id_espacio_deportivo == EspacioDeportivo.id_espacio_deportivo
-        ).join(
-            Administra,
-            EspacioDeportivo.id_espacio_deportivo == Administra.id_espacio_deportivo
-        ).filter(
-            Administra.id_usuario == current_user.id_usuario
-        ).all()
-    
-    return canchas
+    return obtener_canchas_por_rol(current_user, db)
 
 @router.get("/{cancha_id}", response_model=CanchaResponse)
 def get_cancha(
@@ -288,6 +260,7 @@ def get_canchas_por_espacio(
 
 @router.post("/", response_model=CanchaResponse)
 async def create_cancha(
+    background_tasks: BackgroundTasks,
     nombre: str = Form(...),
     tipo: Optional[str] = Form(None),
     hora_apertura: str = Form(...),
@@ -333,7 +306,8 @@ async def create_cancha(
         try:
             imagen_url = await storage_service.upload_image(
                 file=imagen,
-                folder="canchas"
+                folder="canchas",
+                background_tasks=background_tasks
             )
         except HTTPException as e:
             raise e
@@ -360,12 +334,16 @@ async def create_cancha(
     
     db.add(nueva_cancha)
     db.commit()
+    # La cancha nueva entra en el alcance del staff de su espacio
+    invalidar_alcance()
+    invalidar_indice()
     db.refresh(nueva_cancha)
     return nueva_cancha
 
 @router.put("/{cancha_id}", response_model=CanchaResponse)
 async def update_cancha(
     cancha_id: int,
+    background_tasks: BackgroundTasks,
     nombre: Optional[str] = Form(None),
     tipo: Optional[str] = Form(None),
     hora_apertura: Optional[str] = Form(None),
@@ -444,7 +422,8 @@ async def update_cancha(
             # Subir nueva imagen
             imagen_url = await storage_service.upload_image(
                 file=imagen,
-                folder="canchas"
+                folder="canchas",
+                background_tasks=background_tasks
             )
             cancha.imagen = imagen_url
         except HTTPException as e:
@@ -456,6 +435,9 @@ async def update_cancha(
             )
     
     db.commit()
+    invalidar_indice()
+    if id_espacio_deportivo is not None:
+        invalidar_alcance()
     db.refresh(cancha)
     return cancha
 
@@ -496,10 +478,12 @@ async def delete_cancha(
         try:
             await storage_service.delete_file(cancha.imagen)
         except Exception as e:
-            print(f"Advertencia: No se pudo eliminar la imagen de Supabase: {str(e)}")
+            logger.warning("Advertencia: No se pudo eliminar la imagen de Supabase: %s", e)
     
     db.delete(cancha)
     db.commit()
+    invalidar_alcance()
+    invalidar_indice()
     
     return {"detail": "Cancha eliminada correctamente"}
 
@@ -531,6 +515,7 @@ def desactivar_cancha(
     
     cancha.estado = "inactiva"
     db.commit()
+    invalidar_indice()
     db.refresh(cancha)
     
     return {"detail": "Cancha desactivada correctamente"}
@@ -563,6 +548,7 @@ def activar_cancha(
     
     cancha.estado = "disponible"
     db.commit()
+    invalidar_indice()
     db.refresh(cancha)
     
     return {"detail": "Cancha activada correctamente"}
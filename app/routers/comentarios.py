@@ -8,6 +8,7 @@ from app.models.usuario import Usuario
 from app.models.cancha import Cancha
 from app.schemas.comentario import ComentarioCreate, ComentarioResponse, ComentarioUpdate
 from app.core.security import get_current_user
+import app.services.calificaciones  # noqa: F401  (registra el resumen de calificaciones en cada flush)
 
 router = APIRouter()
 
@@ -6,6 +6,7 @@ from app.database import get_db
 from app.models.asistente import AsistenteReserva
 from app.models.reserva import Reserva
 from app.models.usuario import Usuario
+from app.core.query_budget import presupuesto_queries
 from pydantic import BaseModel
 import traceback
 import logging
@@ -411,6 +412,7 @@ def obtener_asistentes_reserva(
 
 # Endpoints adicionales para estadísticas
 @router.get("/estadisticas/hoy")
+@presupuesto_queries(2)
 def obtener_estadisticas_hoy(db: Session = Depends(get_db)):
     """Obtener estadísticas de asistencias del día"""
     hoy = date.today()
@@ -421,7 +423,7 @@ def obtener_estadisticas_hoy(db: Session = Depends(get_db)):
     ).count()
     
     # Asistentes por estado de reserva
-    asistentes_con_reserva = db.query(AsistenteReserva).join(Reserva).filter(
+    asistentes_con_reserva = db.query(AsistenteReserva.id_reserva, Reserva.estado).join(Reserva).filter(
         Reserva.fecha_reserva == hoy
     ).all()
     
@@ -434,7 +436,7 @@ def obtener_estadisticas_hoy(db: Session = Depends(get_db)):
     
     # Contar por estado de reserva
     for asistente in asistentes_con_reserva:
-        estado = asistente.reserva.estado
+        estado = asistente.estado
         if estado not in estadisticas["desglose_estado"]:
             estadisticas["desglose_estado"][estado] = 0
         estadisticas["desglose_estado"][estado] += 1
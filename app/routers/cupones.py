@@ -16,10 +16,14 @@ from app.models.cupon import Cupon
 from app.models.reserva import Reserva
 from app.models.usuario import Usuario
 from app.core.security import get_current_user
+from app.core.idempotency import idempotente
 from app.schemas.cupon import (
     CuponResponse, CuponCreate, CuponUpdate, 
     CuponAplicar, CuponGenerarLote
 )
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -182,12 +186,13 @@ def update_cupon(cupon_id: int, cupon_data: CuponUpdate, db: Session = Depends(g
     return cupon
 
 @router.post("/aplicar")
+@idempotente
 def aplicar_cupon(aplicar_data: CuponAplicar, db: Session = Depends(get_db)):
     """
     🎯 APLICAR CUPÓN A RESERVA EXISTENTE
     💡 NOTA: Esta función ahora se usa principalmente para aplicar cupones a reservas ya creadas
     """
-    print(f"🎫 [CUPONES] Aplicando cupón: {aplicar_data.codigo_cupon} a reserva: {aplicar_data.id_reserva}")
+    logger.debug("🎫 [CUPONES] Aplicando cupón: %s a reserva: %s", aplicar_data.codigo_cupon, aplicar_data.id_reserva)
     
     # Buscar el cupón
     cupon = db.query(Cupon).filter(Cupon.codigo == aplicar_data.codigo_cupon).first()
@@ -199,7 +204,7 @@ def aplicar_cupon(aplicar_data: CuponAplicar, db: Session = Depends(get_db)):
     if not reserva:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
     
-    print(f"🔍 [CUPONES] Cupón encontrado: {cupon.codigo}, Reserva encontrada: {reserva.id_reserva}")
+    logger.debug("🔍 [CUPONES] Cupón encontrado: %s, Reserva encontrada: %s", cupon.codigo, reserva.id_reserva)
     
     # Validaciones del cupón
     if cupon.estado != "activo":
@@ -216,23 +221,23 @@ def aplicar_cupon(aplicar_data: CuponAplicar, db: Session = Depends(get_db)):
     
     # Guardar costo original para referencia
     costo_original = reserva.costo_total
-    print(f"💰 [CUPONES] Costo original de reserva: ${costo_original}")
+    logger.debug("💰 [CUPONES] Costo original de reserva: $%s", costo_original)
     
     # Aplicar descuento a la reserva
     if cupon.tipo == "porcentaje":
         descuento = (reserva.costo_total * cupon.monto_descuento) / 100
-        print(f"🎫 [CUPONES] Descuento porcentual: {cupon.monto_descuento}% = ${descuento}")
+        logger.debug("🎫 [CUPONES] Descuento porcentual: %s%% = $%s", cupon.monto_descuento, descuento)
     else:  # fijo
         descuento = cupon.monto_descuento
-        print(f"🎫 [CUPONES] Descuento fijo: ${descuento}")
+        logger.debug("🎫 [CUPONES] Descuento fijo: $%s", descuento)
     
     # Asegurar que el descuento no sea mayor al costo total
     if descuento > reserva.costo_total:
         descuento = reserva.costo_total
-        print(f"⚠️ [CUPONES] Descuento ajustado a costo total: ${descuento}")
+        logger.warning("⚠️ [CUPONES] Descuento ajustado a costo total: $%s", descuento)
     
     nuevo_costo = reserva.costo_total - descuento
-    print(f"💰 [CUPONES] Nuevo costo después de descuento: ${nuevo_costo}")
+    logger.debug("💰 [CUPONES] Nuevo costo después de descuento: $%s", nuevo_costo)
     
     # Actualizar reserva y cupón
     reserva.costo_total = nuevo_costo
@@ -241,7 +246,7 @@ def aplicar_cupon(aplicar_data: CuponAplicar, db: Session = Depends(get_db)):
     
     db.commit()
     
-    print(f"✅ [CUPONES] Cupón aplicado exitosamente a reserva {reserva.id_reserva}")
+    logger.info("✅ [CUPONES] Cupón aplicado exitosamente a reserva %s", reserva.id_reserva)
     
     return {
         "message": "Cupón aplicado exitosamente",
@@ -9,6 +9,7 @@ from app.models.cancha import Cancha
 from app.models.cancha_disciplina import CanchaDisciplina 
 
 from app.schemas.disciplina import DisciplinaResponse, DisciplinaCreate, DisciplinaUpdate
+from app.services.busqueda_catalogo import invalidar_indice
 
 router = APIRouter()
 
@@ -51,6 +52,7 @@ def create_disciplina(disciplina_data: DisciplinaCreate, db: Session = Depends(g
     nueva_disciplina = Disciplina(**disciplina_data.dict())
     db.add(nueva_disciplina)
     db.commit()
+    invalidar_indice()
     db.refresh(nueva_disciplina)
     return nueva_disciplina
 
@@ -72,6 +74,7 @@ def update_disciplina(disciplina_id: int, disciplina_data: DisciplinaUpdate, db:
         setattr(disciplina, field, value)
     
     db.commit()
+    invalidar_indice()
     db.refresh(disciplina)
     return disciplina
 
@@ -83,4 +86,5 @@ def delete_disciplina(disciplina_id: int, db: Session = Depends(get_db)):
     
     db.delete(disciplina)
     db.commit()
+    invalidar_indice()
     return {"message": "Disciplina eliminada correctamente"}
\ No newline at end of file
@@ -1,5 +1,5 @@
 # app/routers/espacios.py
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.espacio_deportivo import EspacioDeportivo
@@ -7,22 +7,72 @@ from app.schemas.espacio_deportivo import EspacioDeportivoResponse, EspacioDepor
 from app.models.usuario import Usuario
 from app.models.administra import Administra
 from app.core.security import get_current_user
+from app.core.query_budget import presupuesto_queries
+from app.services.alcance_staff import alcance_staff, invalidar_alcance
+from app.services.busqueda_catalogo import invalidar_indice
 from app.services.supabase_storage import storage_service
-from typing import Optional
+from typing import Dict, List, Optional
 from sqlalchemy import text
 from datetime import datetime
 
 router = APIRouter()
 
+def obtener_asignaciones(db: Session, espacios_ids: List[int]) -> Dict[int, Dict[str, Usuario]]:
+    """
+    Gestor y control de acceso asignados a cada espacio, en una sola consulta.
+    Retorna {id_espacio: {"gestor": Usuario, "control_acceso": Usuario}}
+    """
+    asignaciones = {}
+    if not espacios_ids:
+        return asignaciones
+    
+    filas = db.query(Administra.id_espacio_deportivo, Usuario)\
+        .join(Usuario, Usuario.id_usuario == Administra.id_usuario)\
+        .filter(Administra.id_espacio_deportivo.in_(espacios_ids))\
+        .all()
+    
+    for id_espacio, usuario in filas:
+        if usuario.rol in ("gestor", "control_acceso"):
+            asignaciones.setdefault(id_espacio, {})[usuario.rol] = usuario
+    return asignaciones
+
+def espacio_con_asignaciones(espacio: EspacioDeportivo, asignaciones: Dict[int, Dict[str, Usuario]]) -> dict:
+    """Datos del espacio más su gestor y control de acceso asignados"""
+    asignados = asignaciones.get(espacio.id_espacio_deportivo, {})
+    gestor_info = asignados.get("gestor")
+    control_info = asignados.get("control_acceso")
+    
+    return {
+        "id_espacio_deportivo": espacio.id_espacio_deportivo,
+        "nombre": espacio.nombre,
+        "ubicacion": espacio.ubicacion,
+        "capacidad": espacio.capacidad,
+        "descripcion": espacio.descripcion,
+        "imagen": espacio.imagen,
+        "imagen_variantes": espacio.imagen_variantes,
+        "estado": espacio.estado,
+        "latitud": espacio.latitud,
+        "longitud": espacio.longitud,
+        "fecha_creacion": espacio.fecha_creacion,
+        "calificaciones": espacio.calificaciones,
+        "gestor_id": gestor_info.id_usuario if gestor_info else None,
+        "gestor_nombre": gestor_info.nombre if gestor_info else None,
+        "gestor_apellido": gestor_info.apellido if gestor_info else None,
+        "control_acceso_id": control_info.id_usuario if control_info else None,
+        "control_acceso_nombre": control_info.nombre if control_info else None,
+        "control_acceso_apellido": control_info.apellido if control_info else None,
+    }
 
 
 @router.get("/public/list", response_model=list[EspacioDeportivoResponse]) # Asegúrate de importar el esquema correcto
+@presupuesto_queries(1)
 def get_espacios_public(db: Session = Depends(get_db)):
     """Obtener espacios deportivos para uso público (sin login)"""
     return db.query(EspacioDeportivo).all()
 
 
 @router.get("/", response_model=list[EspacioDeportivoResponse])
+@presupuesto_queries(3)
 def get_espacios(
     include_inactive: bool = False, 
     db: Session = Depends(get_db),
@@ -47,47 +97,18 @@ def get_espacios(
     if not include_inactive:
         espacios = [e for e in espacios if e.estado == "activo"]
     
-    # Enriquecer cada espacio con información de asignaciones
+    # Enriquecer cada espacio con información de asignaciones (una sola consulta)
+    asignaciones = obtener_asignaciones(db, [e.id_espacio_deportivo for e in espacios])
     espacios_enriquecidos = []
     for espacio in espacios:
-        usuarios_asignados = db.query(Usuario)\
-            .join(Administra, Usuario.id_usuario == Administra.id_usuario)\
-            .filter(Administra.id_espacio_deportivo == espacio.id_espacio_deportivo)\
-            .all()
-        
-        gestor_info = None
-        control_info = None
-        
-        for usuario in usuarios_asignados:
-            if usuario.rol == "gestor":
-                gestor_info = usuario
-            elif usuario.rol == "control_acceso":
-                control_info = usuario
-        
-        espacio_dict = {
-            "id_espacio_deportivo": espacio.id_espacio_deportivo,
-            "nombre": espacio.nombre,
-            "ubicacion": espacio.ubicacion,
-            "capacidad": espacio.capacidad,
-            "descripcion": espacio.descripcion,
-            "imagen": espacio.imagen,
-            "estado": espacio.estado,
-            "latitud": espacio.latitud,
-            "longitud": espacio.longitud,
-            "fecha_creacion": espacio.fecha_creacion,
-            "gestor_id": gestor_info.id_usuario if gestor_info else None,
-            "gestor_nombre": gestor_info.nombre if gestor_info else None,
-            "gestor_apellido": gestor_info.apellido if gestor_info else None,
-            "control_acceso_id": control_info.id_usuario if control_info else None,
-            "control_acceso_nombre": control_info.nombre if control_info else None,
-            "control_acceso_apellido": control_info.apellido if control_info else None,
-        }
+        espacio_dict = espacio_con_asignaciones(espacio, asignaciones)
         
         espacios_enriquecidos.append(espacio_dict)
     
     return espacios_enriquecidos
 
 @router.get("/{espacio_id}", response_model=EspacioDeportivoResponse)
+@presupuesto_queries(4)
 def get_espacio(
     espacio_id: int, 
     db: Session = Depends(get_db),
@@ -99,57 +120,23 @@ def get_espacio(
     if not espacio:
         raise HTTPException(status_code=404, detail="Espacio deportivo no encontrado")
     
-    # Verificar permisos si no es admin
+    # Verificar permisos si no es admin (alcance en caché)
     if current_user.rol not in ["admin"] and current_user.rol in ["gestor", "control_acceso"]:
-        asignacion = db.query(Administra).filter(
-            Administra.id_espacio_deportivo == espacio_id,
-            Administra.id_usuario == current_user.id_usuario
-        ).first()
-        
-        if not asignacion:
+        if espacio_id not in alcance_staff(db, current_user.id_usuario).espacios:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tienes permisos para acceder a este espacio"
             )
     
     # Obtener todos los usuarios asignados a este espacio
-    usuarios_asignados = db.query(Usuario)\
-        .join(Administra, Usuario.id_usuario == Administra.id_usuario)\
-        .filter(Administra.id_espacio_deportivo == espacio_id)\
-        .all()
-    
-    gestor_info = None
-    control_info = None
-    
-    for usuario in usuarios_asignados:
-        if usuario.rol == "gestor":
-            gestor_info = usuario
-        elif usuario.rol == "control_acceso":
-            control_info = usuario
-    
-    respuesta = {
-        "id_espacio_deportivo": espacio.id_espacio_deportivo,
-        "nombre": espacio.nombre,
-        "ubicacion": espacio.ubicacion,
-        "capacidad": espacio.capacidad,
-        "descripcion": espacio.descripcion,
-        "imagen": espacio.imagen,
-        "estado": espacio.estado,
-        "latitud": espacio.latitud,
-        "longitud": espacio.longitud,
-        "fecha_creacion": espacio.fecha_creacion,
-        "gestor_id": gestor_info.id_usuario if gestor_info else None,
-        "gestor_nombre": gestor_info.nombre if gestor_info else None,
-        "gestor_apellido": gestor_info.apellido if gestor_info else None,
-        "control_acceso_id": control_info.id_usuario if control_info else None,
-        "control_acceso_nombre": control_info.nombre if control_info else None,
-        "control_acceso_apellido": control_info.apellido if control_info else None,
-    }
+    asignaciones = obtener_asignaciones(db, [espacio_id])
+    respuesta = espacio_con_asignaciones(espacio, asignaciones)
     
     return respuesta
 
 @router.post("/", response_model=EspacioDeportivoResponse)
 async def create_espacio(
+    background_tasks: BackgroundTasks,
     nombre: str = Form(...),
     ubicacion: str = Form(...),
     capacidad: int = Form(...),
@@ -182,7 +169,8 @@ async def create_espacio(
             try:
                 imagen_url = await storage_service.upload_image(
                     file=imagen,
-                    folder="espacios"
+                    folder="espacios",
+                    background_tasks=background_tasks
                 )
             except HTTPException as e:
                 raise e
@@ -240,6 +228,8 @@ async def create_espacio(
                 db.add(nueva_asignacion)
         
         db.commit()
+        invalidar_alcance()
+        invalidar_indice()
         
         # Retornar el espacio creado
         espacio = db.query(EspacioDeportivo).filter(
@@ -247,38 +237,8 @@ async def create_espacio(
         ).first()
         
         # Obtener información de asignaciones
-        usuarios_asignados = db.query(Usuario)\
-            .join(Administra, Usuario.id_usuario == Administra.id_usuario)\
-            .filter(Administra.id_espacio_deportivo == espacio.id_espacio_deportivo)\
-            .all()
-        
-        gestor_info = None
-        control_info = None
-        
-        for usuario in usuarios_asignados:
-            if usuario.rol == "gestor":
-                gestor_info = usuario
-            elif usuario.rol == "control_acceso":
-                control_info = usuario
-        
-        return {
-            "id_espacio_deportivo": espacio.id_espacio_deportivo,
-            "nombre": espacio.nombre,
-            "ubicacion": espacio.ubicacion,
-            "capacidad": espacio.capacidad,
-            "descripcion": espacio.descripcion,
-            "imagen": espacio.imagen,
-            "estado": espacio.estado,
-            "latitud": espacio.latitud,
-            "longitud": espacio.longitud,
-            "fecha_creacion": espacio.fecha_creacion,
-            "gestor_id": gestor_info.id_usuario if gestor_info else None,
-            "gestor_nombre": gestor_info.nombre if gestor_info else None,
-            "gestor_apellido": gestor_info.apellido if gestor_info else None,
-            "control_acceso_id": control_info.id_usuario if control_info else None,
-            "control_acceso_nombre": control_info.nombre if control_info else None,
-            "control_acceso_apellido": control_info.apellido if control_info else None,
-        }
+        asignaciones = obtener_asignaciones(db, [espacio.id_espacio_deportivo])
+        return espacio_con_asignaciones(espacio, asignaciones)
         
     except HTTPException:
         db.rollback()
@@ -290,6 +250,7 @@ async def create_espacio(
 @router.put("/{espacio_id}", response_model=EspacioDeportivoResponse)
 async def update_espacio(
     espacio_id: int,
+    background_tasks: BackgroundTasks,
     nombre: Optional[str] = Form(None),
     ubicacion: Optional[str] = Form(None),
     capacidad: Optional[int] = Form(None),
@@ -344,7 +305,8 @@ async def update_espacio(
                 # Subir nueva imagen
                 imagen_url = await storage_service.upload_image(
                     file=imagen,
-                    folder="espacios"
+                    folder="espacios",
+                    background_tasks=background_tasks
                 )
                 espacio.imagen = imagen_url
             except HTTPException as e:
@@ -432,43 +394,16 @@ async def update_espacio(
                     db.delete(control_actual)
         
         db.commit()
+        invalidar_indice()
+        if gestor_id is not None or control_acceso_id is not None:
+            invalidar_alcance()
         
         # Obtener información actualizada
         espacio = db.query(EspacioDeportivo).filter(EspacioDeportivo.id_espacio_deportivo == espacio_id).first()
         
         # Obtener usuarios asignados
-        usuarios_asignados = db.query(Usuario)\
-            .join(Administra, Usuario.id_usuario == Administra.id_usuario)\
-            .filter(Administra.id_espacio_deportivo == espacio_id)\
-            .all()
-        
-        gestor_info = None
-        control_info = None
-        
-        for usuario in usuarios_asignados:
-            if usuario.rol == "gestor":
-                gestor_info = usuario
-            elif usuario.rol == "control_acceso":
-                control_info = usuario
-        
-        return {
-            "id_espacio_deportivo": espacio.id_espacio_deportivo,
-            "nombre": espacio.nombre,
-            "ubicacion": espacio.ubicacion,
-            "capacidad": espacio.capacidad,
-            "descripcion": espacio.descripcion,
-            "imagen": espacio.imagen,
-            "estado": espacio.estado,
-            "latitud": espacio.latitud,
-            "longitud": espacio.longitud,
-            "fecha_creacion": espacio.fecha_creacion,
-            "gestor_id": gestor_info.id_usuario if gestor_info else None,
-            "gestor_nombre": gestor_info.nombre if gestor_info else None,
-            "gestor_apellido": gestor_info.apellido if gestor_info else None,
-            "control_acceso_id": control_info.id_usuario if control_info else None,
-            "control_acceso_nombre": control_info.nombre if control_info else None,
-            "control_acceso_apellido": control_info.apellido if control_info else None,
-        }
+        asignaciones = obtener_asignaciones(db, [espacio_id])
+        return espacio_con_asignaciones(espacio, asignaciones)
         
     except HTTPException:
         db.rollback()
@@ -503,6 +438,7 @@ async def desactivar_espacio(
     
     espacio.estado = "inactivo"
     db.commit()
+    invalidar_indice()
     
     return {"detail": "Espacio deportivo desactivado exitosamente"}
 
@@ -529,6 +465,7 @@ def activar_espacio(
     
     espacio.estado = "activo"
     db.commit()
+    invalidar_indice()
     
     return {"detail": "Espacio deportivo activado exitosamente"}
 
@@ -562,6 +499,7 @@ def get_espacios_cercanos(
     return rows
 
 @router.get("/public/disponibles", response_model=list[EspacioDeportivoResponse])
+@presupuesto_queries(1)
 def get_espacios_disponibles(db: Session = Depends(get_db)):
     """Obtener espacios deportivos disponibles (público para reservas)"""
     espacios = db.query(EspacioDeportivo).filter(EspacioDeportivo.estado == "activo").all()
@@ -574,10 +512,12 @@ def get_espacios_disponibles(db: Session = Depends(get_db)):
             "capacidad": espacio.capacidad,
             "descripcion": espacio.descripcion,
             "imagen": espacio.imagen,
+            "imagen_variantes": espacio.imagen_variantes,
             "estado": espacio.estado,
             "latitud": espacio.latitud,
             "longitud": espacio.longitud,
             "fecha_creacion": espacio.fecha_creacion,
+            "calificaciones": espacio.calificaciones,
             "gestor_id": None,
             "gestor_nombre": None,
             "gestor_apellido": None,
@@ -606,10 +546,12 @@ def get_espacio_public(espacio_id: int, db: Session = Depends(get_db)):
         "capacidad": espacio.capacidad,
         "descripcion": espacio.descripcion,
         "imagen": espacio.imagen,
+        "imagen_variantes": espacio.imagen_variantes,
         "estado": espacio.estado,
         "latitud": espacio.latitud,
         "longitud": espacio.longitud,
         "fecha_creacion": espacio.fecha_creacion,
+        "calificaciones": espacio.calificaciones,
         "gestor_id": None,
         "gestor_nombre": None,
         "gestor_apellido": None,
@@ -728,6 +670,8 @@ def asignar_gestor_espacio(
         db.add(nueva_asignacion)
     
     db.commit()
+    # El gestor anterior pierde el espacio y el nuevo lo gana
+    invalidar_alcance()
     
     return {
         "detail": f"Gestor {gestor.nombre} {gestor.apellido} asignado exitosamente al espacio {espacio.nombre}",
@@ -791,6 +735,7 @@ def asignar_control_acceso_espacio(
         db.add(nueva_asignacion)
     
     db.commit()
+    invalidar_alcance()
     
     return {
         "detail": f"Control de acceso {control.nombre} {control.apellido} asignado exitosamente al espacio {espacio.nombre}",
@@ -0,0 +1,192 @@
+# app/routers/imagenes.py
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from jose import jwt, JWTError
+from app.database import get_db
+from app.config import settings
+from app.models.usuario import Usuario
+from app.models.cancha import Cancha
+from app.models.espacio_deportivo import EspacioDeportivo
+from app.schemas.imagen import (
+    SubidaFirmadaRequest, SubidaFirmadaResponse,
+    ConfirmarSubidaRequest, ConfirmarSubidaResponse
+)
+from app.core.security import get_current_user, SECRET_KEY, ALGORITHM
+from app.services.supabase_storage import storage_service
+from app.services.storage_base import TAMANIO_MAXIMO_MB
+from app.services.image_processing import es_imagen_valida
+from app.routers.canchas import verificar_permiso_cancha
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def verificar_permiso_destino(current_user: Usuario, destino: str, id_destino: int, db: Session):
+    """Mismos permisos que la edición: espacios solo admin, canchas admin o staff del espacio"""
+    if destino == "espacios":
+        if current_user.rol != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo los administradores pueden actualizar espacios deportivos"
+            )
+        existe = db.query(EspacioDeportivo.id_espacio_deportivo).filter(
+            EspacioDeportivo.id_espacio_deportivo == id_destino
+        ).first()
+        if not existe:
+            raise HTTPException(status_code=404, detail="Espacio deportivo no encontrado")
+    else:
+        existe = db.query(Cancha.id_cancha).filter(Cancha.id_cancha == id_destino).first()
+        if not existe:
+            raise HTTPException(status_code=404, detail="Cancha no encontrada")
+        if not verificar_permiso_cancha(current_user, id_destino, db):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para editar esta cancha"
+            )
+
+def rechazar_subida(storage_path: str, detalle: str, status_code: int = 400):
+    """Elimina del storage una subida directa que no se puede asociar y responde el error"""
+    try:
+        storage_service.delete(storage_path)
+    except Exception as e:
+        logger.error("❌ [STORAGE] No se pudo eliminar la subida rechazada %s: %s", storage_path, e)
+    raise HTTPException(status_code=status_code, detail=detalle)
+
+@router.post("/firmar", response_model=SubidaFirmadaResponse)
+def firmar_subida(
+    datos: SubidaFirmadaRequest,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Emite una URL firmada para subir una imagen directamente al storage.
+    Después de subirla, el cliente llama a POST /imagenes/confirmar.
+    """
+    verificar_permiso_destino(current_user, datos.destino, datos.id_destino, db)
+    
+    ext = storage_service.validar_extension(datos.nombre_archivo)
+    _, storage_path = storage_service.nueva_ruta_imagen(datos.destino, ext)
+    
+    try:
+        firmada = storage_service.create_signed_upload(storage_path)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al firmar la subida: {str(e)}"
+        )
+    
+    expira_en = settings.SIGNED_UPLOAD_EXPIRE_MINUTES * 60
+    token_confirmacion = jwt.encode(
+        {
+            "tipo": "confirmar_subida",
+            "path": storage_path,
+            "destino": datos.destino,
+            "id_destino": datos.id_destino,
+            "id_usuario": current_user.id_usuario,
+            "exp": datetime.utcnow() + timedelta(seconds=expira_en)
+        },
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+    
+    return {
+        "path": storage_path,
+        "signed_url": firmada["signed_url"],
+        "token": firmada["token"],
+        "token_confirmacion": token_confirmacion,
+        "expira_en": expira_en
+    }
+
+@router.post("/confirmar", response_model=ConfirmarSubidaResponse)
+def confirmar_subida(
+    datos: ConfirmarSubidaRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Asocia una imagen ya subida al espacio o cancha y genera sus variantes en background"""
+    try:
+        payload = jwt.decode(datos.token_confirmacion, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Token de confirmación inválido o expirado")
+    
+    if payload.get("tipo") != "confirmar_subida" or payload.get("id_usuario") != current_user.id_usuario:
+        raise HTTPException(status_code=400, detail="Token de confirmación inválido")
+    
+    destino = payload["destino"]
+    id_destino = payload["id_destino"]
+    storage_path = payload["path"]
+    
+    verificar_permiso_destino(current_user, destino, id_destino, db)
+    
+    info = storage_service.info(storage_path)
+    if not info:
+        raise HTTPException(status_code=400, detail="La imagen no fue subida al storage")
+    
+    if info["size"] > TAMANIO_MAXIMO_MB * 1024 * 1024:
+        rechazar_subida(storage_path, f"La imagen es demasiado grande (máximo {TAMANIO_MAXIMO_MB}MB)")
+    
+    # El cliente sube directo al storage: el contenido se revisa aquí
+    content = storage_service.download(storage_path)
+    if len(content) > TAMANIO_MAXIMO_MB * 1024 * 1024:
+        rechazar_subida(storage_path, f"La imagen es demasiado grande (máximo {TAMANIO_MAXIMO_MB}MB)")
+    if not es_imagen_valida(content):
+        rechazar_subida(storage_path, "El archivo no es una imagen PNG, JPG, GIF o WEBP válida")
+    
+    if destino == "espacios":
+        entidad = db.query(EspacioDeportivo).filter(EspacioDeportivo.id_espacio_deportivo == id_destino).first()
+    else:
+        entidad = db.query(Cancha).filter(Cancha.id_cancha == id_destino).first()
+    if entidad is None:
+        # Eliminada después de verificar permisos
+        detalle = "Espacio deportivo no encontrado" if destino == "espacios" else "Cancha no encontrada"
+        rechazar_subida(storage_path, detalle, status_code=404)
+    
+    imagen_url = storage_service.get_public_url(storage_path)
+    entidad.imagen = imagen_url
+    db.commit()
+    
+    background_tasks.add_task(storage_service.procesar_variantes, content, storage_path)
+    
+    return {"destino": destino, "id_destino": id_destino, "imagen": imagen_url}
+
+# ========== BACKEND LOCAL (desarrollo y pruebas) ==========
+
+def get_local_storage():
+    if settings.STORAGE_BACKEND != "local":
+        raise HTTPException(status_code=404, detail="Not Found")
+    return storage_service
+
+@router.put("/local/{storage_path:path}")
+async def subir_local(
+    storage_path: str,
+    token: str,
+    request: Request,
+    storage=Depends(get_local_storage)
+):
+    """Equivalente local de la URL firmada de Supabase"""
+    if not storage.verificar_token_subida(storage_path, token):
+        raise HTTPException(status_code=403, detail="Token de subida inválido o expirado")
+    
+    content = await request.body()
+    if len(content) > TAMANIO_MAXIMO_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La imagen es demasiado grande (máximo {TAMANIO_MAXIMO_MB}MB)"
+        )
+    
+    storage.upload_bytes(storage_path, content, request.headers.get("content-type", "application/octet-stream"))
+    return {"Key": storage_path}
+
+@router.get("/local/{storage_path:path}")
+def descargar_local(storage_path: str, storage=Depends(get_local_storage)):
+    try:
+        ruta = storage._ruta(storage_path)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    if not ruta.is_file():
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    return FileResponse(ruta)
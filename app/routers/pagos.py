@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
+from app.core.idempotency import idempotente
+from app.core.metrics import EVENTOS_PAGO_RECIBIDOS
 from app.models.pago import Pago
 from app.models.reserva import Reserva
 from app.schemas.pago import PagoResponse, PagoCreate, PagoUpdate
+from app.services import eventos_pago
 
 router = APIRouter()
 
@@ -26,6 +30,7 @@ def get_pago_por_reserva(reserva_id: int, db: Session = Depends(get_db)):
     return pago
 
 @router.post("/", response_model=PagoResponse)
+@idempotente
 def create_pago(pago_data: PagoCreate, db: Session = Depends(get_db)):
     # Verificar que la reserva existe
     reserva = db.query(Reserva).filter(Reserva.id_reserva == pago_data.id_reserva).first()
@@ -39,12 +44,11 @@ def create_pago(pago_data: PagoCreate, db: Session = Depends(get_db)):
     
     nuevo_pago = Pago(**pago_data.dict())
     db.add(nuevo_pago)
-    db.commit()
-    db.refresh(nuevo_pago)
     
-    # Actualizar estado de la reserva a "confirmada"
+    # Actualizar estado de la reserva a "confirmada" en la misma transacción
     reserva.estado = "confirmada"
     db.commit()
+    db.refresh(nuevo_pago)
     
     return nuevo_pago
 
@@ -70,4 +74,31 @@ def completar_pago(pago_id: int, db: Session = Depends(get_db)):
     pago.estado = "completado"
     db.commit()
     
-    return {"message": "Pago marcado como completado"}
\ No newline at end of file
+    return {"message": "Pago marcado como completado"}
+
+@router.post("/webhook/{proveedor}")
+async def recibir_evento_pago(proveedor: str, request: Request):
+    """
+    Webhook del proveedor de pagos: verifica la firma y guarda el evento;
+    pago y reserva se actualizan en segundo plano (app/services/eventos_pago.py)
+    """
+    verificador = eventos_pago.PROVEEDORES.get(proveedor)
+    if verificador is None:
+        raise HTTPException(status_code=404, detail="Proveedor de pagos no soportado")
+    
+    cuerpo = await request.body()
+    try:
+        verificador.verificar(cuerpo, request.headers.get(verificador.header))
+        evento = eventos_pago.leer_evento(cuerpo)
+    except eventos_pago.FirmaInvalida:
+        EVENTOS_PAGO_RECIBIDOS.labels(proveedor, "firma_invalida").inc()
+        raise HTTPException(status_code=400, detail="Firma inválida")
+    except ValueError:
+        EVENTOS_PAGO_RECIBIDOS.labels(proveedor, "invalido").inc()
+        raise HTTPException(status_code=400, detail="Evento inválido")
+    
+    nuevo = await run_in_threadpool(eventos_pago.registrar_evento, proveedor, evento, cuerpo)
+    EVENTOS_PAGO_RECIBIDOS.labels(proveedor, "nuevo" if nuevo else "duplicado").inc()
+    if nuevo:
+        eventos_pago.notificar()
+    return {"recibido": True, "duplicado": not nuevo}
@@ -4,10 +4,10 @@ from sqlalchemy import func, and_
 from datetime import datetime, date
 from typing import Optional
 from app.database import get_db
-from app.models.reserva import Reserva
 from app.models.pago import Pago
 from app.models.cancha import Cancha
 from app.models.espacio_deportivo import EspacioDeportivo
+from app.services.particiones_reserva import reservas_con_archivo
 
 router = APIRouter()
 
@@ -18,11 +18,14 @@ def reporte_ingresos(
     id_espacio_deportivo: Optional[int] = Query(None, description="Filtrar por espacio deportivo"),
     db: Session = Depends(get_db)
 ):
-    # Base query para ingresos
+    # Base query para ingresos (con las reservas de los meses archivados)
+    reserva = reservas_con_archivo(db.connection())
     query = db.query(
         func.sum(Pago.monto).label("total_ingresos"),
         func.count(Pago.id_pago).label("total_pagos")
-    ).join(Reserva).join(Cancha).join(EspacioDeportivo)
+    ).join(reserva, reserva.c.id_reserva == Pago.id_reserva)\
+     .join(Cancha, Cancha.id_cancha == reserva.c.id_cancha)\
+     .join(EspacioDeportivo)
     
     # Filtrar por fechas
     query = query.filter(
@@ -55,23 +58,24 @@ def reporte_uso_cancha(
     db: Session = Depends(get_db)
 ):
     # Reporte de uso de canchas por espacio deportivo
+    reserva = reservas_con_archivo(db.connection())
     query = db.query(
         EspacioDeportivo.nombre.label("espacio"),
         Cancha.nombre.label("cancha"),
-        func.count(Reserva.id_reserva).label("total_reservas"),
-        func.sum(Reserva.costo_total).label("ingresos_generados")
-    ).select_from(Reserva)\
-     .join(Cancha)\
+        func.count(reserva.c.id_reserva).label("total_reservas"),
+        func.sum(reserva.c.costo_total).label("ingresos_generados")
+    ).select_from(reserva)\
+     .join(Cancha, Cancha.id_cancha == reserva.c.id_cancha)\
      .join(EspacioDeportivo)\
      .filter(
          and_(
-             Reserva.fecha_reserva >= fecha_inicio,
-             Reserva.fecha_reserva <= fecha_fin,
-             Reserva.estado.in_(["confirmada", "completada"])
+             reserva.c.fecha_reserva >= fecha_inicio,
+             reserva.c.fecha_reserva <= fecha_fin,
+             reserva.c.estado.in_(["confirmada", "completada"])
          )
      )\
      .group_by(EspacioDeportivo.nombre, Cancha.nombre)\
-     .order_by(func.count(Reserva.id_reserva).desc())
+     .order_by(func.count(reserva.c.id_reserva).desc())
     
     resultados = query.all()
     
@@ -91,16 +95,18 @@ def reporte_reservas_por_estado(
     fecha_fin: date = Query(..., description="Fecha de fin del reporte"),
     db: Session = Depends(get_db)
 ):
-    # Reservas agrupadas por estado
+    # Reservas agrupadas por estado. Se filtra solo por fecha_creacion (ix_reserva_fecha_creacion
+    # en cada partición): fecha_reserva puede ser anterior a la creación o cambiarse después
+    reserva = reservas_con_archivo(db.connection())
     query = db.query(
-        Reserva.estado,
-        func.count(Reserva.id_reserva).label("cantidad")
+        reserva.c.estado,
+        func.count(reserva.c.id_reserva).label("cantidad")
     ).filter(
         and_(
-            Reserva.fecha_creacion >= datetime.combine(fecha_inicio, datetime.min.time()),
-            Reserva.fecha_creacion <= datetime.combine(fecha_fin, datetime.max.time())
+            reserva.c.fecha_creacion >= datetime.combine(fecha_inicio, datetime.min.time()),
+            reserva.c.fecha_creacion <= datetime.combine(fecha_fin, datetime.max.time())
         )
-    ).group_by(Reserva.estado)
+    ).group_by(reserva.c.estado)
     
     resultados = query.all()
     
@@ -120,18 +126,19 @@ def reporte_horarios_populares(
     db: Session = Depends(get_db)
 ):
     # Horarios más populares
+    reserva = reservas_con_archivo(db.connection())
     query = db.query(
-        Reserva.hora_inicio,
-        Reserva.hora_fin,
-        func.count(Reserva.id_reserva).label("total_reservas")
+        reserva.c.hora_inicio,
+        reserva.c.hora_fin,
+        func.count(reserva.c.id_reserva).label("total_reservas")
     ).filter(
         and_(
-            Reserva.fecha_reserva >= fecha_inicio,
-            Reserva.fecha_reserva <= fecha_fin,
-            Reserva.estado.in_(["confirmada", "completada"])
+            reserva.c.fecha_reserva >= fecha_inicio,
+            reserva.c.fecha_reserva <= fecha_fin,
+            reserva.c.estado.in_(["confirmada", "completada"])
         )
-    ).group_by(Reserva.hora_inicio, Reserva.hora_fin)\
-     .order_by(func.count(Reserva.id_reserva).desc())\
+    ).group_by(reserva.c.hora_inicio, reserva.c.hora_fin)\
+     .order_by(func.count(reserva.c.id_reserva).desc())\
      .limit(10)
     
     resultados = query.all()
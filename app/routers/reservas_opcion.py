@@ -3,62 +3,64 @@
 # 💡 VERSIÓN FUSIONADA: Combina reservas_opcion.py original con reservas.py básico
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, cast, String
 from datetime import datetime, date, time
 from datetime import timedelta
 from typing import List, Optional
+from app.config import settings
 from app.database import get_db
+from app.core.query_budget import presupuesto_queries
+from app.core.idempotency import idempotente
 from app.models.reserva import Reserva
 from app.models.cancha import Cancha
 from app.models.usuario import Usuario
 from app.models.disciplina import Disciplina
 from app.models.cupon import Cupon
-from app.schemas.reserva import ReservaResponse, ReservaCreate, ReservaUpdate
-from app.models.administra import Administra
+from app.schemas.reserva import (
+    ReservaResponse, ReservaResumen, ReservaCreate, ReservaUpdate, RetencionCreate, RetencionResponse
+)
 from app.models.asistente import AsistenteReserva
 from app.schemas.asistente import AsistenteCreate
 from app.core.email_service import send_qr_email, send_email
-import random
-import string
 from sqlalchemy import text
-import uuid
-import secrets
 from app.core.security import get_current_user, get_current_user_optional
 from app.core.security import get_password_hash
+from app.services.alcance_staff import alcance_staff, canchas_del_staff
+from app.services.estadisticas_usuario import reservas_vigentes
+from app.services.reservas import (
+    MAX_RESERVAS_CUPON_BIENVENIDA, agregar_cupon_bienvenida, crear_reserva, generar_codigo_qr,
+    generar_token_verificacion, opciones_carga_reserva
+)
+from app.services.reservas import verificar_disponibilidad as verificar_horario_libre
+from app.services.retenciones import MENSAJE_RETENIDO, horas_del_rango, retenciones_service
+import logging
 
+logger = logging.getLogger(__name__)
 
 
-router = APIRouter()
-
-def generar_codigo_reserva():
-    """Generar código único para la reserva - MEJORADO"""
-    letras = string.ascii_uppercase
-    numeros = string.digits
-    # Formato: AAA111 (3 letras + 3 números)
-    codigo = ''.join(random.choices(letras, k=3)) + ''.join(random.choices(numeros, k=3))
-    return codigo
 
-def generar_codigo_unico_reserva(db: Session, max_intentos=10):
-    """Generar código único con validación - NUEVA FUNCIÓN MEJORADA"""
-    for intento in range(max_intentos):
-        codigo = generar_codigo_reserva()
-        # Verificar que no exista
-        existe = db.query(Reserva).filter(Reserva.codigo_reserva == codigo).first()
-        if not existe:
-            return codigo
-    
-    # Si falla después de varios intentos, usar timestamp
-    timestamp = int(datetime.now().timestamp())
-    return f"RES{timestamp}"
+router = APIRouter()
 
-def calcular_costo_total(hora_inicio: time, hora_fin: time, precio_por_hora: float) -> float:
-    """Calcular el costo total basado en la duración y precio por hora"""
-    duracion_minutos = (hora_fin.hour * 60 + hora_fin.minute) - (hora_inicio.hour * 60 + hora_inicio.minute)
-    duracion_horas = duracion_minutos / 60.0
-    return round(duracion_horas * precio_por_hora, 2)
+# Columnas de ReservaResumen: los listados no cargan relaciones ni asistentes
+COLUMNAS_RESUMEN = (
+    Reserva.id_reserva,
+    func.coalesce(Reserva.codigo_reserva, "TEMP-" + cast(Reserva.id_reserva, String)).label("codigo_reserva"),
+    Reserva.fecha_reserva,
+    Reserva.hora_inicio,
+    Reserva.hora_fin,
+    Reserva.estado,
+    Reserva.costo_total,
+    Reserva.cantidad_asistentes,
+    Reserva.material_prestado,
+    Reserva.id_usuario,
+    Reserva.id_cancha,
+    Reserva.id_disciplina,
+    Reserva.fecha_creacion,
+)
 
-@router.get("/", response_model=List[ReservaResponse])
+@router.get("/", response_model=List[ReservaResumen])
+@presupuesto_queries(2)
 def get_reservas(
     skip: int = 0,
     limit: int = 100,
@@ -74,33 +76,14 @@ def get_reservas(
     
     if current_user.rol == "admin":
         # Admin ve todas las reservas
-        query = db.query(Reserva)
+        query = db.query(*COLUMNAS_RESUMEN)
         
     elif current_user.rol in ["gestor", "control_acceso"]:
-        # Gestor/control_acceso ve solo reservas de sus espacios
-        
-        # 1. Obtener espacios donde el usuario está asignado
-        espacios_gestor = db.query(Administra).filter(
-            Administra.id_usuario == current_user.id_usuario
-        ).all()
-        
-        espacios_ids = [espacio.id_espacio_deportivo for espacio in espacios_gestor]
-        
-        if not espacios_ids:
-            return []
-        
-        # 2. Obtener canchas que pertenecen a esos espacios
-        canchas_espacios = db.query(Cancha).filter(
-            Cancha.id_espacio_deportivo.in_(espacios_ids)
-        ).all()
-        
-        canchas_ids = [cancha.id_cancha for cancha in canchas_espacios]
-        
-        if not canchas_ids:
-            return []
-        
-        # 3. Filtrar reservas por esas canchas
-        query = db.query(Reserva).filter(Reserva.id_cancha.in_(canchas_ids))
+        # Gestor/control_acceso ve solo reservas de las canchas de sus espacios
+        # (subconsulta en la misma query)
+        query = db.query(*COLUMNAS_RESUMEN).filter(
+            Reserva.id_cancha.in_(canchas_del_staff(current_user.id_usuario))
+        )
         
     else:
         # Clientes no pueden ver todas las reservas
@@ -124,21 +107,11 @@ def get_reservas(
     if id_cancha:
         query = query.filter(Reserva.id_cancha == id_cancha)
     
-    reservas = query.options(
-        joinedload(Reserva.usuario),
-        joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-        joinedload(Reserva.disciplina)
-    ).offset(skip).limit(limit).all()
-    
-    reservas_sin_codigo = [r for r in reservas if not r.codigo_reserva]
-    if reservas_sin_codigo:
-        print(f"⚠️  ADVERTENCIA: {len(reservas_sin_codigo)} reservas sin código")
-        for reserva in reservas_sin_codigo:
-            reserva.codigo_reserva = f"TEMP-{reserva.id_reserva}"
-    
-    return reservas
+    # Las reservas sin código salen como TEMP-{id} (ver COLUMNAS_RESUMEN)
+    return query.offset(skip).limit(limit).all()
 
 @router.get("/{reserva_id}", response_model=ReservaResponse)
+@presupuesto_queries(4)
 def get_reserva(
     reserva_id: int, 
     db: Session = Depends(get_db),
@@ -146,10 +119,9 @@ def get_reserva(
 ):
     """Obtener una reserva específica por ID con relaciones y control de permisos"""
     
+    # La cancha se usa para verificar los permisos del gestor
     reserva = db.query(Reserva).options(
-        joinedload(Reserva.usuario),
-        joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-        joinedload(Reserva.disciplina)
+        *opciones_carga_reserva(Reserva.cancha)
     ).filter(Reserva.id_reserva == reserva_id).first()
     
     if not reserva:
@@ -162,13 +134,8 @@ def get_reserva(
             # Obtener el espacio deportivo de la cancha de la reserva
             espacio_id = reserva.cancha.id_espacio_deportivo
             
-            # Verificar si el usuario está asignado a ese espacio
-            asignacion = db.query(Administra).filter(
-                Administra.id_espacio_deportivo == espacio_id,
-                Administra.id_usuario == current_user.id_usuario
-            ).first()
-            
-            if not asignacion:
+            # Verificar si el usuario está asignado a ese espacio (alcance en caché)
+            if espacio_id not in alcance_staff(db, current_user.id_usuario).espacios:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="No tienes permisos para ver esta reserva"
@@ -182,56 +149,47 @@ def get_reserva(
             )
     
     if not reserva.codigo_reserva:
-        print(f"⚠️  ADVERTENCIA: Reserva {reserva_id} sin código_reserva")
+        logger.warning("⚠️  ADVERTENCIA: Reserva %s sin código_reserva", reserva_id)
         reserva.codigo_reserva = f"TEMP-{reserva_id}"
     
     return reserva
 
-@router.get("/usuario/{usuario_id}", response_model=List[ReservaResponse])
+@router.get("/usuario/{usuario_id}", response_model=List[ReservaResumen])
+@presupuesto_queries(2)
 def get_reservas_usuario(usuario_id: int, db: Session = Depends(get_db)):
     """Obtener reservas de un usuario específico con relaciones"""
-    print(f"👤 [BACKEND] Obteniendo reservas para usuario {usuario_id}")
+    logger.debug("👤 Obteniendo reservas para usuario %s", usuario_id)
     
     # Verificar que el usuario existe
     usuario = db.query(Usuario).filter(Usuario.id_usuario == usuario_id).first()
     if not usuario:
-        print(f"❌ [BACKEND] Usuario {usuario_id} no encontrado")
+        logger.warning("❌ Usuario %s no encontrado", usuario_id)
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    # Obtener reservas del usuario con relaciones
-    reservas = db.query(Reserva).options(
-        joinedload(Reserva.usuario),
-        joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-        joinedload(Reserva.disciplina)
-    ).filter(
+    # Solo columnas: los códigos NULL salen como TEMP-{id}
+    reservas = db.query(*COLUMNAS_RESUMEN).filter(
         Reserva.id_usuario == usuario_id
     ).order_by(
         Reserva.fecha_reserva.desc(),
         Reserva.hora_inicio.desc()
     ).all()
     
-    print(f"✅ [BACKEND] Encontradas {len(reservas)} reservas para usuario {usuario_id}")
-    
-    # ✅ VALIDACIÓN: Generar códigos temporales si son NULL
-    for reserva in reservas:
-        if not reserva.codigo_reserva:
-            reserva.codigo_reserva = f"TEMP-{reserva.id_reserva}"
-            print(f"⚠️  ADVERTENCIA: Reserva {reserva.id_reserva} sin código, usando temporal")
+    logger.debug("✅ Encontradas %s reservas para usuario %s", len(reservas), usuario_id)
     
     return reservas
 
 @router.patch("/{reserva_id}", response_model=ReservaResponse)
 def update_reserva(reserva_id: int, reserva_data: ReservaUpdate, db: Session = Depends(get_db)):
     """Actualizar reserva (principalmente estado) - NUEVO ENDPOINT PATCH"""
-    print(f"🔧 [BACKEND] Actualizando reserva {reserva_id} con datos: {reserva_data.dict()}")
+    logger.debug("🔧 Actualizando reserva %s con datos: %s", reserva_id, reserva_data)
     
     reserva = db.query(Reserva).filter(Reserva.id_reserva == reserva_id).first()
     if not reserva:
-        print(f"❌ [BACKEND] Reserva {reserva_id} no encontrada")
+        logger.warning("❌ Reserva %s no encontrada", reserva_id)
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
 
     # Log del estado actual
-    print(f"📋 [BACKEND] Estado actual de reserva {reserva_id}: {reserva.estado}")
+    logger.debug("📋 Estado actual de reserva %s: %s", reserva_id, reserva.estado)
     
     # Actualizar campos permitidos
     campos_permitidos = ['estado', 'material_prestado', 'cantidad_asistentes']
@@ -241,28 +199,26 @@ def update_reserva(reserva_id: int, reserva_data: ReservaUpdate, db: Session = D
         if campo in campos_permitidos and valor is not None:
             setattr(reserva, campo, valor)
             campos_actualizados.append(campo)
-            print(f"✅ [BACKEND] Campo actualizado: {campo} = {valor}")
+            logger.debug("✅ Campo actualizado: %s = %s", campo, valor)
 
     if not campos_actualizados:
-        print("⚠️ [BACKEND] No se actualizaron campos (ningún cambio o campos no permitidos)")
+        logger.warning("⚠️ No se actualizaron campos (ningún cambio o campos no permitidos)")
     
     try:
         db.commit()
         db.refresh(reserva)
-        print(f"🎉 [BACKEND] Reserva {reserva_id} actualizada exitosamente. Campos: {campos_actualizados}")
+        logger.info("🎉 Reserva %s actualizada exitosamente. Campos: %s", reserva_id, campos_actualizados)
         
         # Recargar con relaciones
         reserva_actualizada = db.query(Reserva).options(
-            joinedload(Reserva.usuario),
-            joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-            joinedload(Reserva.disciplina)
+            *opciones_carga_reserva()
         ).filter(Reserva.id_reserva == reserva_id).first()
         
         return reserva_actualizada
         
     except Exception as e:
         db.rollback()
-        print(f"❌ [BACKEND] Error al actualizar reserva {reserva_id}: {str(e)}")
+        logger.error("❌ Error al actualizar reserva %s: %s", reserva_id, e)
         raise HTTPException(
             status_code=500,
             detail=f"Error al actualizar reserva: {str(e)}"
@@ -271,15 +227,15 @@ def update_reserva(reserva_id: int, reserva_data: ReservaUpdate, db: Session = D
 @router.delete("/{reserva_id}")
 def cancelar_reserva(reserva_id: int, motivo: str = None, db: Session = Depends(get_db)):
     """Cancelar reserva (borrado lógico cambiando estado) - NUEVO ENDPOINT DELETE"""
-    print(f"🗑️ [BACKEND] Cancelando reserva {reserva_id}. Motivo: {motivo}")
+    logger.debug("🗑️ Cancelando reserva %s. Motivo: %s", reserva_id, motivo)
     
     reserva = db.query(Reserva).filter(Reserva.id_reserva == reserva_id).first()
     if not reserva:
-        print(f"❌ [BACKEND] Reserva {reserva_id} no encontrada")
+        logger.warning("❌ Reserva %s no encontrada", reserva_id)
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
     
     if reserva.estado == 'cancelada':
-        print(f"⚠️ [BACKEND] Reserva {reserva_id} ya está cancelada")
+        logger.warning("⚠️ Reserva %s ya está cancelada", reserva_id)
         raise HTTPException(status_code=400, detail="La reserva ya está cancelada")
     
     # Guardar el estado anterior para logging
@@ -297,14 +253,14 @@ def cancelar_reserva(reserva_id: int, motivo: str = None, db: Session = Depends(
             id_usuario=reserva.id_usuario  # o el usuario que cancela
         )
         db.add(cancelacion)
-        print(f"✅ [BACKEND] Registro de cancelación creado para reserva {reserva_id}")
+        logger.debug("✅ Registro de cancelación creado para reserva %s", reserva_id)
     except Exception as e:
-        print(f"⚠️ [BACKEND] No se pudo crear registro de cancelación: {str(e)}")
+        logger.warning("⚠️ No se pudo crear registro de cancelación: %s", e)
         # No fallar si no se puede crear el registro de cancelación
     
     try:
         db.commit()
-        print(f"🎉 [BACKEND] Reserva {reserva_id} cancelada exitosamente. Estado anterior: {estado_anterior}")
+        logger.info("🎉 Reserva %s cancelada exitosamente. Estado anterior: %s", reserva_id, estado_anterior)
         
         return {
             "detail": "Reserva cancelada exitosamente", 
@@ -315,7 +271,7 @@ def cancelar_reserva(reserva_id: int, motivo: str = None, db: Session = Depends(
         
     except Exception as e:
         db.rollback()
-        print(f"❌ [BACKEND] Error al cancelar reserva {reserva_id}: {str(e)}")
+        logger.error("❌ Error al cancelar reserva %s: %s", reserva_id, e)
         raise HTTPException(
             status_code=500,
             detail=f"Error al cancelar reserva: {str(e)}"
@@ -323,14 +279,6 @@ def cancelar_reserva(reserva_id: int, motivo: str = None, db: Session = Depends(
 
 # ========== ENDPOINTS COMPLETOS CON CUPONES (del archivo reservas_opcion.py original) ==========
 
-def generar_codigo_qr():
-    """Genera un código único para el QR"""
-    return f"QR-{uuid.uuid4().hex[:12].upper()}"
-
-def generar_token_verificacion():
-    """Genera un token seguro para verificación"""
-    return secrets.token_urlsafe(32)
-
 @router.post("/crear-con-asistentes", response_model=ReservaResponse)
 def crear_reserva_con_asistentes(
     reserva_data: ReservaCreate,
@@ -343,17 +291,10 @@ def crear_reserva_con_asistentes(
       - Crea la reserva normal
       - Registra cada asistente
       - Genera QR único para cada asistente
-      - Envía email con QR a cada asistente
+      - Envía email con QR a cada asistente (una tarea para todos: QR en paralelo, un envío por lotes)
       - Valida que cantidad_asistentes coincida con lista
     """
-    print(f"🎯 [BACKEND] Creando reserva con {len(reserva_data.asistentes)} asistentes")
-    
-    # ✅ VALIDACIÓN: Solo horas completas
-    if reserva_data.hora_inicio.minute != 0 or reserva_data.hora_fin.minute != 0:
-        raise HTTPException(
-            status_code=400, 
-            detail="Las reservas solo pueden hacerse en horas completas"
-        )
+    logger.debug("🎯 Creando reserva con %s asistentes", len(reserva_data.asistentes))
     
     # ✅ VALIDACIÓN: Cantidad de asistentes debe coincidir
     if reserva_data.cantidad_asistentes != len(reserva_data.asistentes):
@@ -364,160 +305,60 @@ def crear_reserva_con_asistentes(
     
     # ✅ VALIDACIÓN: No más asistentes que capacidad máxima (agregar si tienes ese dato)
     
-    # Verificar que la cancha existe
-    cancha = db.query(Cancha).filter(Cancha.id_cancha == reserva_data.id_cancha).first()
-    if not cancha:
-        raise HTTPException(status_code=404, detail="Cancha no encontrada")
-    
-    if cancha.estado != 'disponible':
-        raise HTTPException(status_code=400, detail="La cancha no está disponible")
-    
-    cancha_nombre = cancha.nombre
-    print(f"🏟️ [BACKEND] Cancha encontrada: {cancha.nombre} (ID: {cancha.id_cancha})")
-    
-    # Verificar usuario
-    usuario = db.query(Usuario).filter(Usuario.id_usuario == reserva_data.id_usuario).first()
-    if not usuario:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    # VERIFICAR DISPONIBILIDAD
-    try:
-        result = db.execute(
-            text("SELECT verificar_disponibilidad(:cancha_id, :fecha, :hora_inicio, :hora_fin) as disponible"),
-            {
-                "cancha_id": reserva_data.id_cancha,
-                "fecha": reserva_data.fecha_reserva,
-                "hora_inicio": reserva_data.hora_inicio,
-                "hora_fin": reserva_data.hora_fin
-            }
-        )
-        
-        disponible = result.scalar()
-        
-        if not disponible:
-            raise HTTPException(
-                status_code=400, 
-                detail="La cancha no está disponible en el horario solicitado"
-            )
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al verificar disponibilidad: {str(e)}"
-        )
-    
-    # Calcular costo total inicial
-    costo_total = calcular_costo_total(
-        reserva_data.hora_inicio, reserva_data.hora_fin, float(cancha.precio_por_hora)
+    # Reserva, cupón y asistentes (cada uno con su QR) en una sola transacción
+    reserva = crear_reserva(
+        db, reserva_data,
+        asistentes=[asistente.dict() for asistente in reserva_data.asistentes]
     )
     
-    # Generar código único de reserva
-    codigo_reserva = generar_codigo_unico_reserva(db)
-    
-    if not codigo_reserva:
-        codigo_reserva = f"RES-{int(datetime.now().timestamp())}"
-    
-    print(f"✅ [BACKEND] Código reserva: {codigo_reserva}")
-    print(f"💰 [BACKEND] Costo inicial: ${costo_total}")
-    
-    # Extraer código cupón
-    reserva_dict = reserva_data.dict()
-    asistentes_data = reserva_dict.pop('asistentes', [])
-    codigo_cupon = reserva_dict.pop('codigo_cupon', None)
+    # ✅ ENVIAR EMAILS CON QR EN BACKGROUND (después del commit)
+    if reserva.asistentes:
+        background_tasks.add_task(
+            enviar_emails_con_qr_asincrono,
+            asistentes=list(reserva.asistentes),
+            reserva=reserva,
+            cancha_nombre=reserva.cancha.nombre,
+            usuario=reserva.usuario
+        )
     
-    # Crear la reserva
-    nueva_reserva = Reserva(
-        **reserva_dict,
-        costo_total=costo_total,
-        codigo_reserva=codigo_reserva,
-        estado="pendiente"
-    )
+    logger.info("🎉 Reserva con asistentes creada exitosamente: %s", reserva.id_reserva)
     
+    return reserva
+
+def datos_email_qr(asistente: AsistenteReserva, reserva: Reserva, cancha_nombre: str, usuario: Usuario) -> dict:
+    """Datos del email con QR de un asistente"""
+    return {
+        "nombre_asistente": asistente.nombre,
+        "email_asistente": asistente.email,
+        "nombre_reservante": usuario.nombre,
+        "nombre_cancha": cancha_nombre,
+        "fecha_reserva": reserva.fecha_reserva.strftime("%d/%m/%Y"),
+        "hora_inicio": reserva.hora_inicio.strftime("%H:%M"),
+        "hora_fin": reserva.hora_fin.strftime("%H:%M"),
+        "codigo_reserva": reserva.codigo_reserva,
+        "codigo_qr": asistente.codigo_qr,
+        "token_verificacion": asistente.token_verificacion
+    }
+
+def enviar_emails_con_qr_asincrono(asistentes: List[AsistenteReserva], reserva: Reserva, cancha_nombre: str,
+                                   usuario: Usuario):
+    """
+    Envía el email con QR a todos los asistentes de la reserva en una sola tarea
+    """
     try:
-        db.add(nueva_reserva)
-        db.commit()
-        db.refresh(nueva_reserva)
-        
-        print(f"✅ [BACKEND] Reserva {nueva_reserva.id_reserva} creada")
-        
-        # ✅ APLICAR CUPÓN SI EXISTE
-        cupon_aplicado = False
-        if codigo_cupon:
-            try:
-                cupon = db.query(Cupon).filter(Cupon.codigo == codigo_cupon).first()
-                if cupon and cupon.estado == "activo":
-                    if cupon.tipo == "porcentaje":
-                        descuento = (costo_total * float(cupon.monto_descuento)) / 100
-                    else:
-                        descuento = float(cupon.monto_descuento)
-                    
-                    if descuento > costo_total:
-                        descuento = costo_total
-                    
-                    nuevo_costo = costo_total - descuento
-                    nueva_reserva.costo_total = nuevo_costo
-                    cupon.id_reserva = nueva_reserva.id_reserva
-                    cupon.estado = "utilizado"
-                    cupon_aplicado = True
-                    
-            except Exception as cupon_error:
-                print(f"⚠️ [BACKEND] Error aplicando cupón: {str(cupon_error)}")
-        
-        # ✅ CREAR ASISTENTES Y GENERAR QR PARA CADA UNO
-        asistentes_creados = []
-        for asistente_data in asistentes_data:
-            # Generar código QR único y token
-            codigo_qr = generar_codigo_qr()
-            token_verificacion = generar_token_verificacion()
-            
-            # Crear asistente
-            asistente = AsistenteReserva(
-                id_reserva=nueva_reserva.id_reserva,
-                nombre=asistente_data["nombre"],
-                email=asistente_data["email"],
-                codigo_qr=codigo_qr,
-                token_verificacion=token_verificacion,
-                asistio=False
-            )
-            
-            db.add(asistente)
-            asistentes_creados.append(asistente)
+        from app.core.email_service import send_qr_emails_batch
+        
+        enviados = send_qr_emails_batch([
+            datos_email_qr(asistente, reserva, cancha_nombre, usuario) for asistente in asistentes
+        ])
+        if enviados < len(asistentes):
+            logger.error("❌ [EMAIL] QR enviado a %s de %s asistentes de la reserva %s",
+                         enviados, len(asistentes), reserva.id_reserva)
+        else:
+            logger.debug("✅ [EMAIL] QR enviado a %s asistentes", enviados)
             
-            print(f"✅ [BACKEND] Asistente creado: {asistente.nombre} ({asistente.email})")
-        
-        db.commit()
-        
-        # ✅ ENVIAR EMAILS CON QR EN BACKGROUND
-        for asistente in asistentes_creados:
-            background_tasks.add_task(
-                enviar_email_con_qr_asincrono,
-                asistente=asistente,
-                reserva=nueva_reserva,
-                cancha_nombre=cancha_nombre,
-                usuario=usuario
-            )
-        
-        # Recargar con relaciones
-        reserva_final = db.query(Reserva).options(
-            joinedload(Reserva.usuario),
-            joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-            joinedload(Reserva.disciplina),
-            joinedload(Reserva.asistentes)
-        ).filter(Reserva.id_reserva == nueva_reserva.id_reserva).first()
-        
-        print(f"🎉 [BACKEND] Reserva con asistentes creada exitosamente: {nueva_reserva.id_reserva}")
-        
-        return reserva_final
-        
     except Exception as e:
-        db.rollback()
-        print(f"❌ [BACKEND] Error al crear reserva con asistentes: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al crear reserva: {str(e)}"
-        )
+        logger.error("❌ [EMAIL] Error en envío de emails: %s", e)
 
 def enviar_email_con_qr_asincrono(asistente: AsistenteReserva, reserva: Reserva, cancha_nombre: str, usuario: Usuario):
     """
@@ -527,18 +368,7 @@ def enviar_email_con_qr_asincrono(asistente: AsistenteReserva, reserva: Reserva,
         from app.core.email_service import send_qr_email_with_attachment
         
         # Datos para el email
-        datos_email = {
-            "nombre_asistente": asistente.nombre,
-            "email_asistente": asistente.email,
-            "nombre_reservante": usuario.nombre,
-            "nombre_cancha": cancha_nombre,
-            "fecha_reserva": reserva.fecha_reserva.strftime("%d/%m/%Y"),
-            "hora_inicio": reserva.hora_inicio.strftime("%H:%M"),
-            "hora_fin": reserva.hora_fin.strftime("%H:%M"),
-            "codigo_reserva": reserva.codigo_reserva,
-            "codigo_qr": asistente.codigo_qr,
-            "token_verificacion": asistente.token_verificacion
-        }
+        datos_email = datos_email_qr(asistente, reserva, cancha_nombre, usuario)
         
         # Enviar email
         enviado = send_qr_email_with_attachment(
@@ -547,12 +377,12 @@ def enviar_email_con_qr_asincrono(asistente: AsistenteReserva, reserva: Reserva,
         )
         
         if enviado:
-            print(f"✅ [EMAIL] QR enviado a {asistente.email}")
+            logger.debug("✅ [EMAIL] QR enviado a %s", asistente.email)
         else:
-            print(f"❌ [EMAIL] Error al enviar QR a {asistente.email}")
+            logger.error("❌ [EMAIL] Error al enviar QR a %s", asistente.email)
             
     except Exception as e:
-        print(f"❌ [EMAIL] Error en envío de email: {str(e)}")
+        logger.error("❌ [EMAIL] Error en envío de email: %s", e)
 
 @router.post("/", response_model=ReservaResponse)
 def create_reserva(reserva_data: ReservaCreate, db: Session = Depends(get_db)):
@@ -561,7 +391,7 @@ def create_reserva(reserva_data: ReservaCreate, db: Session = Depends(get_db)):
     💡 CAMBIO PRINCIPAL: Integración completa del sistema de cupones durante la creación
     💡 CORRECCIÓN CRÍTICA: Conversión de decimal.Decimal a float en cálculo de descuentos
     """
-    print(f"🎯 [BACKEND] Iniciando creación de reserva: {reserva_data.dict()}")
+    logger.debug("🎯 Iniciando creación de reserva: %s", reserva_data)
 
     # ✅ VALIDACIÓN: Solo horas completas (minutos en 00)
     if reserva_data.hora_inicio.minute != 0 or reserva_data.hora_fin.minute != 0:
@@ -570,189 +400,22 @@ def create_reserva(reserva_data: ReservaCreate, db: Session = Depends(get_db)):
             detail="Las reservas solo pueden hacerse en horas completas (ej: 10:00, 11:00). Por favor, seleccione una hora en punto."
         )
     
-    # Verificar que la cancha existe
-    cancha = db.query(Cancha).filter(Cancha.id_cancha == reserva_data.id_cancha).first()
-    if not cancha:
-        raise HTTPException(status_code=404, detail="Cancha no encontrada")
-    
-    # ✅ VALIDACIÓN ADICIONAL: Cancha debe estar activa
-    if cancha.estado != 'disponible':
-        raise HTTPException(status_code=400, detail="La cancha no está disponible para reservas")
-    
     # Verificar que la disciplina existe
-    disciplina = db.query(Disciplina).filter(Disciplina.id_disciplina == reserva_data.id_disciplina).first()
+    disciplina = db.query(Disciplina.id_disciplina).filter(Disciplina.id_disciplina == reserva_data.id_disciplina).first()
     if not disciplina:
         raise HTTPException(status_code=404, detail="Disciplina no encontrada")
     
-    # Verificar que el usuario existe
-    usuario = db.query(Usuario).filter(Usuario.id_usuario == reserva_data.id_usuario).first()
-    if not usuario:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    # VERIFICAR DISPONIBILIDAD USANDO FUNCIÓN POSTGRESQL
-    try:
-        print(f"🔍 [BACKEND] Verificando disponibilidad para cancha {reserva_data.id_cancha}, fecha {reserva_data.fecha_reserva}, horario {reserva_data.hora_inicio}-{reserva_data.hora_fin}")
-        
-        result = db.execute(
-            text("SELECT verificar_disponibilidad(:cancha_id, :fecha, :hora_inicio, :hora_fin) as disponible"),
-            {
-                "cancha_id": reserva_data.id_cancha,
-                "fecha": reserva_data.fecha_reserva,
-                "hora_inicio": reserva_data.hora_inicio,
-                "hora_fin": reserva_data.hora_fin
-            }
-        )
-        disponible = result.scalar()
-        
-        print(f"🔍 [BACKEND] Resultado verificación disponibilidad: {disponible}")
-        
-        if not disponible:
-            raise HTTPException(
-                status_code=400, 
-                detail="La cancha no está disponible en el horario solicitado"
-            )
-            
-    except Exception as e:
-        print(f"❌ [BACKEND] Error en verificación de disponibilidad: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al verificar disponibilidad: {str(e)}"
-        )
-    
     # Verificar que el horario esté dentro del rango de la cancha
-    if reserva_data.hora_inicio < cancha.hora_apertura or reserva_data.hora_fin > cancha.hora_cierre:
+    # (db.get reutiliza la cancha desde la sesión al crear la reserva)
+    cancha = db.get(Cancha, reserva_data.id_cancha)
+    if cancha and (reserva_data.hora_inicio < cancha.hora_apertura or reserva_data.hora_fin > cancha.hora_cierre):
         raise HTTPException(
             status_code=400, 
             detail=f"El horario debe estar entre {cancha.hora_apertura} y {cancha.hora_cierre}"
         )
     
-    # Verificar que la fecha no sea en el pasado
-    if reserva_data.fecha_reserva < date.today():
-        raise HTTPException(status_code=400, detail="No se pueden hacer reservas en fechas pasadas")
-    
-    # Calcular costo total INICIAL (sin cupón)
-    costo_total = calcular_costo_total(
-        reserva_data.hora_inicio, reserva_data.hora_fin, float(cancha.precio_por_hora)
-    )
-    
-    costo_inicial = costo_total  # Guardar para referencia
-    
-    # ✅ CORRECCIÓN IMPORTANTE: Generar código único de reserva CON VALIDACIÓN MEJORADA
-    codigo_reserva = generar_codigo_unico_reserva(db)
-    
-    # ✅ VALIDACIÓN EXTRA: Asegurar que el código no sea None
-    if not codigo_reserva:
-        codigo_reserva = f"RES-{int(datetime.now().timestamp())}"
-    
-    print(f"✅ [BACKEND] Generado código reserva: {codigo_reserva}")
-    print(f"💰 [BACKEND] Costo inicial calculado: ${costo_total}")
-    
-    # ✅ EXCLUIR CAMPO DE CUPÓN AL CREAR LA RESERVA INICIAL
-    reserva_dict = reserva_data.dict()
-    codigo_cupon = reserva_dict.pop('codigo_cupon', None)  # Extraer y remover código de cupón
-    
-    # Crear la reserva con costo inicial
-    nueva_reserva = Reserva(
-        **reserva_dict,
-        costo_total=costo_total,
-        codigo_reserva=codigo_reserva,
-        estado="pendiente"
-    )
-    
-    try:
-        db.add(nueva_reserva)
-        db.commit()
-        db.refresh(nueva_reserva)
-        
-        # ✅ VERIFICACIÓN FINAL
-        if not nueva_reserva.codigo_reserva:
-            raise Exception("Error crítico: Reserva creada sin código")
-            
-        print(f"✅ [BACKEND] Reserva {nueva_reserva.id_reserva} creada exitosamente con código: {nueva_reserva.codigo_reserva}")
-        
-        # ✅ APLICAR CUPÓN SI SE PROPORCIONA - CORRECCIÓN PRINCIPAL
-        cupon_aplicado = False
-        descuento_aplicado = 0.0
-        
-        if codigo_cupon:
-            try:
-                print(f"🎫 [BACKEND] Intentando aplicar cupón: {codigo_cupon}")
-                
-                # Buscar el cupón
-                cupon = db.query(Cupon).filter(Cupon.codigo == codigo_cupon).first()
-                if not cupon:
-                    print(f"❌ [BACKEND] Cupón no encontrado: {codigo_cupon}")
-                    # No lanzar excepción, la reserva se crea sin cupón
-                else:
-                    print(f"✅ [BACKEND] Cupón encontrado: {cupon.codigo} - Tipo: {cupon.tipo} - Monto: {cupon.monto_descuento}")
-                    
-                    # Validaciones del cupón
-                    if cupon.estado != "activo":
-                        print(f"❌ [BACKEND] Cupón no está activo: {cupon.estado}")
-                    elif cupon.fecha_expiracion and cupon.fecha_expiracion < date.today():
-                        print(f"❌ [BACKEND] Cupón expirado: {cupon.fecha_expiracion}")
-                    elif cupon.id_reserva:
-                        print(f"❌ [BACKEND] Cupón ya utilizado en reserva: {cupon.id_reserva}")
-                    elif cupon.id_usuario and cupon.id_usuario != reserva_data.id_usuario:
-                        print(f"❌ [BACKEND] Cupón no válido para este usuario. Cupón usuario: {cupon.id_usuario}, Reserva usuario: {reserva_data.id_usuario}")
-                    else:
-                        # ✅ APLICAR DESCUENTO - LÓGICA CORREGIDA (CONVERSIÓN A FLOAT)
-                        if cupon.tipo == "porcentaje":
-                            # ✅ CORRECCIÓN CRÍTICA: Convertir decimal.Decimal a float
-                            descuento = (costo_total * float(cupon.monto_descuento)) / 100
-                            print(f"🎫 [BACKEND] Descuento porcentual: {cupon.monto_descuento}% = ${descuento}")
-                        else:  # fijo
-                            # ✅ CORRECCIÓN CRÍTICA: Convertir decimal.Decimal a float
-                            descuento = float(cupon.monto_descuento)
-                            print(f"🎫 [BACKEND] Descuento fijo: ${descuento}")
-                        
-                        # Asegurar que el descuento no sea mayor al costo total
-                        if descuento > costo_total:
-                            descuento = costo_total
-                            print(f"⚠️ [BACKEND] Descuento ajustado a costo total: ${descuento}")
-                        
-                        nuevo_costo = costo_total - descuento
-                        
-                        # Actualizar reserva y cupón
-                        nueva_reserva.costo_total = nuevo_costo
-                        cupon.id_reserva = nueva_reserva.id_reserva
-                        cupon.estado = "utilizado"
-                        
-                        db.commit()
-                        db.refresh(nueva_reserva)
-                        
-                        cupon_aplicado = True
-                        descuento_aplicado = float(descuento)
-                        
-                        print(f"✅ [BACKEND] Cupón aplicado exitosamente: ${descuento_aplicado} de descuento")
-                        print(f"💰 [BACKEND] Costo actualizado: ${nuevo_costo} (antes: ${costo_inicial})")
-                        
-            except Exception as cupon_error:
-                print(f"⚠️ [BACKEND] Error aplicando cupón: {str(cupon_error)}")
-                import traceback
-                traceback.print_exc()
-                # No revertir la reserva por error en cupón, la reserva se mantiene con costo original
-        
-        # ✅ CONFIRMAR QUE LA RESERVA SE GUARDÓ CORRECTAMENTE
-        reserva_verificada = db.query(Reserva).filter(Reserva.id_reserva == nueva_reserva.id_reserva).first()
-        print(f"🔍 [BACKEND] Reserva verificada en BD: ID {reserva_verificada.id_reserva}, Estado: {reserva_verificada.estado}, Código: {reserva_verificada.codigo_reserva}, Costo Final: ${reserva_verificada.costo_total}")
-        
-        # Recargar con relaciones para la respuesta
-        reserva_con_relaciones = db.query(Reserva).options(
-            joinedload(Reserva.usuario),
-            joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-            joinedload(Reserva.disciplina)
-        ).filter(Reserva.id_reserva == nueva_reserva.id_reserva).first()
-        
-        return reserva_con_relaciones
-        
-    except Exception as e:
-        db.rollback()
-        print(f"❌ [BACKEND] Error al crear reserva: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al crear reserva: {str(e)}"
-        )
+    # Fecha, cancha, usuario, disponibilidad y cupón se validan en crear_reserva
+    return crear_reserva(db, reserva_data)
 
 # ========== ENDPOINTS ESPECIALES PARA DISPONIBILIDAD ==========
 
@@ -760,44 +423,51 @@ def create_reserva(reserva_data: ReservaCreate, db: Session = Depends(get_db)):
 def get_horarios_disponibles(
     cancha_id: int,
     fecha: date,
+    id_usuario: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Obtener horarios disponibles usando la función PostgreSQL - VERSIÓN CON DEBUGGING EXTENSIVO"""
+    """
+    Obtener horarios disponibles usando la función PostgreSQL.
+    Las horas retenidas durante un checkout salen ocupadas, salvo las de id_usuario.
+    """
     try:
-        print(f"🔍 [BACKEND] SOLICITUD HORARIOS - Cancha: {cancha_id}, Fecha: {fecha}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        logger.debug("🔍 SOLICITUD HORARIOS - Cancha: %s, Fecha: %s", cancha_id, fecha)
         
         # 1. Verificar que la cancha existe y está activa
         cancha = db.query(Cancha).filter(Cancha.id_cancha == cancha_id).first()
         if not cancha:
-            print(f"❌ [BACKEND] Cancha {cancha_id} no encontrada")
+            logger.warning("❌ Cancha %s no encontrada", cancha_id)
             raise HTTPException(status_code=404, detail="Cancha no encontrada")
         
-        print(f"✅ [BACKEND] Cancha encontrada: {cancha.nombre} (Activa: {cancha.estado})")
-        print(f"✅ [BACKEND] Horario cancha: {cancha.hora_apertura} - {cancha.hora_cierre}")
+        logger.debug("✅ Cancha encontrada: %s (Activa: %s)", cancha.nombre, cancha.estado)
+        logger.debug("✅ Horario cancha: %s - %s", cancha.hora_apertura, cancha.hora_cierre)
         
-        # 2. Verificar reservas existentes DIRECTAMENTE para debugging
-        reservas_directas = db.execute(text("""
-            SELECT id_reserva, hora_inicio, hora_fin, estado, codigo_reserva 
-            FROM reserva 
-            WHERE id_cancha = :cancha_id 
-            AND fecha_reserva = :fecha
-            AND estado IN ('pendiente', 'confirmada', 'en_curso')
-            ORDER BY hora_inicio
-        """), {"cancha_id": cancha_id, "fecha": fecha}).fetchall()
+        # 2. Reservas existentes (consulta extra, solo con DEBUG activo)
+        if debug:
+            reservas_directas = db.execute(text("""
+                SELECT id_reserva, hora_inicio, hora_fin, estado, codigo_reserva 
+                FROM reserva 
+                WHERE id_cancha = :cancha_id 
+                AND fecha_reserva = :fecha
+                AND estado IN ('pendiente', 'confirmada', 'en_curso')
+                ORDER BY hora_inicio
+            """), {"cancha_id": cancha_id, "fecha": fecha}).fetchall()
         
-        print(f"📊 [BACKEND] Reservas directas en BD: {len(reservas_directas)}")
-        for r in reservas_directas:
-            print(f"   - Reserva {r[0]}: {r[1]} a {r[2]} (Estado: {r[3]}, Código: {r[4]})")
+            logger.debug("📊 Reservas directas en BD: %s", len(reservas_directas))
+            for r in reservas_directas:
+                logger.debug("   - Reserva %s: %s a %s (Estado: %s, Código: %s)", r[0], r[1], r[2], r[3], r[4])
         
         # 3. Ejecutar función PostgreSQL para obtener horarios
-        print(f"🔍 [BACKEND] Ejecutando función listar_horarios_disponibles({cancha_id}, '{fecha}')...")
+        logger.debug("🔍 Ejecutando función listar_horarios_disponibles(%s, '%s')...", cancha_id, fecha)
         
         result = db.execute(
             text("SELECT * FROM listar_horarios_disponibles(:p_id_cancha, :p_fecha)"),
             {"p_id_cancha": cancha_id, "p_fecha": fecha}
         ).fetchall()
         
-        print(f"✅ [BACKEND] Función retornó {len(result)} horarios")
+        logger.debug("✅ Función retornó %s horarios", len(result))
+        retenidas = retenciones_service.horas_retenidas(db, cancha_id, fecha, excluir_usuario=id_usuario)
         
         # 4. Procesar resultados
         horarios = []
@@ -809,19 +479,22 @@ def get_horarios_disponibles(
                 "precio_hora": float(row[3]) if row[3] else 0.0,
                 "mensaje": row[4]
             }
+            if row[2] and retenciones_service.franja_retenida(retenidas, row[0], row[1]):
+                horario_data["disponible"] = False
+                horario_data["mensaje"] = MENSAJE_RETENIDO
             horarios.append(horario_data)
-            print(f"📅 [BACKEND] Horario {i}: {horario_data}")
+            if debug:
+                logger.debug("📅 Horario %s: %s", i, horario_data)
         
         # 5. Estadísticas para debugging
-        horarios_ocupados = [h for h in horarios if not h['disponible']]
-        print(f"📈 [BACKEND] Estadísticas - Total: {len(horarios)}, Ocupados: {len(horarios_ocupados)}, Disponibles: {len(horarios) - len(horarios_ocupados)}")
+        if debug:
+            horarios_ocupados = [h for h in horarios if not h['disponible']]
+            logger.debug("📈 Estadísticas - Total: %s, Ocupados: %s, Disponibles: %s", len(horarios), len(horarios_ocupados), len(horarios) - len(horarios_ocupados))
         
         return horarios
         
     except Exception as e:
-        print(f"❌ [BACKEND] ERROR en get_horarios_disponibles: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ ERROR en get_horarios_disponibles: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Error al obtener horarios disponibles: {str(e)}"
@@ -837,7 +510,7 @@ def verificar_disponibilidad(
 ):
     """Verificar disponibilidad usando la función PostgreSQL - VERSIÓN SIMPLIFICADA Y CORREGIDA"""
     try:
-        print(f"🔍 [BACKEND] Verificando disponibilidad: cancha={cancha_id}, fecha={fecha}, {hora_inicio}-{hora_fin}")
+        logger.debug("🔍 Verificando disponibilidad: cancha=%s, fecha=%s, %s-%s", cancha_id, fecha, hora_inicio, hora_fin)
         
         # Asegurar formato correcto para PostgreSQL
         # PostgreSQL espera formato TIME 'HH:MM:SS' y DATE 'YYYY-MM-DD'
@@ -859,19 +532,71 @@ def verificar_disponibilidad(
             }
         ).scalar()
         
-        print(f"✅ [BACKEND] Resultado disponibilidad: {result}")
+        logger.debug("✅ Resultado disponibilidad: %s", result)
         
         return {"disponible": result}
         
     except Exception as e:
-        print(f"❌ [BACKEND] Error al verificar disponibilidad: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error al verificar disponibilidad: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Error al verificar disponibilidad: {str(e)}"
         )
 
+# ========== RETENCIONES DE HORARIO (CHECKOUT) ==========
+
+@router.post("/retenciones", response_model=RetencionResponse, status_code=status.HTTP_201_CREATED)
+def retener_horario(
+    retencion: RetencionCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Retener un horario mientras el usuario completa la reserva.
+    💡 Vence sola después de RETENCION_TTL_SEGUNDOS; repetirla la renueva (hasta
+    RETENCION_MAX_SEGUNDOS, después 429) y una retención nueva reemplaza a la anterior del usuario.
+    """
+    if retencion.hora_fin <= retencion.hora_inicio:
+        raise HTTPException(status_code=400, detail="La hora de fin debe ser posterior a la de inicio")
+    # Mismas reglas que crear_reserva: no se retienen horarios pasados
+    if retencion.fecha_reserva < date.today():
+        raise HTTPException(status_code=400, detail="No se pueden retener horarios en fechas pasadas")
+    if datetime.combine(retencion.fecha_reserva, retencion.hora_inicio) <= datetime.now():
+        raise HTTPException(status_code=400, detail="No se pueden retener horarios que ya comenzaron")
+    if len(horas_del_rango(retencion.hora_inicio, retencion.hora_fin)) > settings.RETENCION_MAX_HORAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Se pueden retener hasta {settings.RETENCION_MAX_HORAS} horas seguidas"
+        )
+    
+    # Un horario ya reservado se rechaza aquí, no al confirmar
+    verificar_horario_libre(db, retencion.id_cancha, retencion.fecha_reserva, retencion.hora_inicio, retencion.hora_fin)
+    
+    expira_en = retenciones_service.retener(
+        db, retencion.id_cancha, retencion.fecha_reserva, retencion.hora_inicio, retencion.hora_fin,
+        current_user.id_usuario
+    )
+    if expira_en is None:
+        raise HTTPException(
+            status_code=409,
+            detail="El horario está retenido por otro usuario que está completando su reserva"
+        )
+    
+    return RetencionResponse(**retencion.model_dump(), id_usuario=current_user.id_usuario, expira_en=expira_en)
+
+@router.delete("/retenciones/{cancha_id}", status_code=status.HTTP_204_NO_CONTENT)
+def liberar_horario(
+    cancha_id: int,
+    fecha: date,
+    hora_inicio: time,
+    hora_fin: time,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Liberar la retención del usuario (checkout abandonado)"""
+    retenciones_service.liberar(db, current_user.id_usuario, cancha_id, fecha, hora_inicio, hora_fin)
+    db.commit()
+
 # ========== ENDPOINTS ADICIONALES ==========
 
 @router.get("/estado/{reserva_id}")
@@ -891,12 +616,11 @@ def get_estado_reserva(reserva_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/codigo/{codigo_reserva}", response_model=ReservaResponse)
+@presupuesto_queries(2)
 def get_reserva_por_codigo(codigo_reserva: str, db: Session = Depends(get_db)):
-    """Obtener una reserva por su código único con relaciones"""
+    """Obtener una reserva por su código único con sus asistentes"""
     reserva = db.query(Reserva).options(
-        joinedload(Reserva.usuario),
-        joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-        joinedload(Reserva.disciplina)
+        *opciones_carga_reserva()
     ).filter(Reserva.codigo_reserva == codigo_reserva).first()
     
     if not reserva:
@@ -904,16 +628,22 @@ def get_reserva_por_codigo(codigo_reserva: str, db: Session = Depends(get_db)):
     
     return reserva
 
-@router.get("/gestor/mis-reservas", response_model=List[ReservaResponse])
+@router.get("/gestor/mis-reservas", response_model=List[ReservaResumen])
+@presupuesto_queries(4)
 def get_reservas_gestor(
     gestor_id: int,
     skip: int = 0,
     limit: int = 100,
     estado: Optional[str] = None,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user) 
 ):
-    """Obtener reservas solo para los espacios deportivos del gestor"""
+    """
+    Obtener reservas solo para los espacios deportivos del gestor
+    💡 Con fecha_inicio / fecha_fin solo se leen las particiones de esos meses
+    """
     
     if current_user.id_usuario != gestor_id and current_user.rol != "admin":
         raise HTTPException(
@@ -921,63 +651,33 @@ def get_reservas_gestor(
             detail="Solo puedes ver tus propias reservas de gestor"
         )
     
-    print(f"👨‍💼 [BACKEND] Obteniendo reservas para gestor {gestor_id}")
-    
-    espacios_gestor = db.query(Administra).filter(
-        Administra.id_usuario == gestor_id
-    ).all()
-    
-    espacios_ids = [espacio.id_espacio_deportivo for espacio in espacios_gestor]
-    
-    if not espacios_ids:
-        print(f"ℹ️ [BACKEND] Gestor {gestor_id} no tiene espacios asignados")
-        return []
-    
-    print(f"🏟️ [BACKEND] Espacios del gestor: {espacios_ids}")
+    logger.debug("👨‍💼 Obteniendo reservas para gestor %s", gestor_id)
     
-    # 2. Obtener las canchas que pertenecen a esos espacios
-    canchas_espacios = db.query(Cancha).filter(
-        Cancha.id_espacio_deportivo.in_(espacios_ids)
-    ).all()
-    
-    canchas_ids = [cancha.id_cancha for cancha in canchas_espacios]
-    
-    if not canchas_ids:
-        print(f"ℹ️ [BACKEND] No hay canchas en los espacios del gestor {gestor_id}")
-        return []
-    
-    print(f"⚽ [BACKEND] Canchas del gestor: {canchas_ids}")
-    
-    # 3. Query para reservas de las canchas del gestor con relaciones
-    query = db.query(Reserva).options(
-        joinedload(Reserva.usuario),
-        joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-        joinedload(Reserva.disciplina)
-    ).filter(Reserva.id_cancha.in_(canchas_ids))
+    # Reservas de las canchas de los espacios del gestor (subconsulta, solo columnas)
+    query = db.query(*COLUMNAS_RESUMEN).filter(Reserva.id_cancha.in_(canchas_del_staff(gestor_id)))
     
     if estado:
         query = query.filter(Reserva.estado == estado)
+    if fecha_inicio:
+        query = query.filter(Reserva.fecha_reserva >= fecha_inicio)
+    if fecha_fin:
+        query = query.filter(Reserva.fecha_reserva <= fecha_fin)
     
     reservas = query.order_by(Reserva.fecha_reserva.desc()).offset(skip).limit(limit).all()
     
-    print(f"✅ [BACKEND] Encontradas {len(reservas)} reservas para gestor {gestor_id}")
-    
-    for reserva in reservas:
-        if not reserva.codigo_reserva:
-            reserva.codigo_reserva = f"TEMP-{reserva.id_reserva}"
+    logger.debug("✅ Encontradas %s reservas para gestor %s", len(reservas), gestor_id)
     
     return reservas
 
-@router.get("/proximas/{dias}")
+@router.get("/proximas/{dias}", response_model=List[ReservaResponse])
+@presupuesto_queries(2)
 def get_reservas_proximas(dias: int = 7, db: Session = Depends(get_db)):
     """Obtener reservas próximas (en los próximos X días)"""
     fecha_actual = date.today()
-    fecha_limite = fecha_actual + datetime.timedelta(days=dias)
+    fecha_limite = fecha_actual + timedelta(days=dias)
     
     reservas = db.query(Reserva).options(
-        joinedload(Reserva.usuario),
-        joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-        joinedload(Reserva.disciplina)
+        *opciones_carga_reserva()
     ).filter(
         Reserva.fecha_reserva >= fecha_actual,
         Reserva.fecha_reserva <= fecha_limite,
@@ -1007,9 +707,11 @@ def confirmar_reserva(reserva_id: int, db: Session = Depends(get_db)):
 @router.get("/codigo/{codigo_reserva}", response_model=ReservaResponse)
 def obtener_reserva_por_codigo(codigo_reserva: str, db: Session = Depends(get_db)):
     """Obtener reserva por código de reserva"""
-    print(f"[BACKEND] Buscando reserva con código: {codigo_reserva}")
+    logger.debug("Buscando reserva con código: %s", codigo_reserva)
     
-    reserva = db.query(Reserva).filter(Reserva.codigo_reserva == codigo_reserva).first()
+    reserva = db.query(Reserva).options(
+        *opciones_carga_reserva()
+    ).filter(Reserva.codigo_reserva == codigo_reserva).first()
     if not reserva:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
     
@@ -1037,15 +739,16 @@ def enviar_email_completo_reserva(usuario: Usuario, reserva: Reserva, cancha_nom
         enviado = send_reservation_complete_email(usuario.email, datos_email)
         
         if enviado:
-            print(f"[EMAIL] Email completo enviado a {usuario.email}")
+            logger.debug("[EMAIL] Email completo enviado a %s", usuario.email)
         else:
-            print(f"[EMAIL] Error al enviar email completo a {usuario.email}")
+            logger.error("[EMAIL] Error al enviar email completo a %s", usuario.email)
             
     except Exception as e:
-        print(f"[EMAIL] Error en envío de email completo: {str(e)}")
+        logger.error("[EMAIL] Error en envío de email completo: %s", e)
 
 
 @router.post("/crear-con-codigo-unico", response_model=ReservaResponse)
+@idempotente
 def crear_reserva_con_codigo_unico(
     reserva_data: ReservaCreate,
     background_tasks: BackgroundTasks,
@@ -1054,189 +757,36 @@ def crear_reserva_con_codigo_unico(
     """
     CREAR RESERVA CON CÓDIGO ÚNICO - Con QR solo para usuario principal
     """
-    print(f"[BACKEND] Creando reserva con código único - Asistentes: {reserva_data.cantidad_asistentes}")
-    
-    # ✅ VALIDACIÓN: Solo horas completas
-    if reserva_data.hora_inicio.minute != 0 or reserva_data.hora_fin.minute != 0:
-        raise HTTPException(
-            status_code=400, 
-            detail="Las reservas solo pueden hacerse en horas completas"
-        )
-    
-    # Verificar que la cancha existe
-    cancha = db.query(Cancha).filter(Cancha.id_cancha == reserva_data.id_cancha).first()
-    if not cancha:
-        raise HTTPException(status_code=404, detail="Cancha no encontrada")
-    
-    if cancha.estado != 'disponible':
-        raise HTTPException(status_code=400, detail="La cancha no está disponible")
-    
-    cancha_nombre = cancha.nombre
-    print(f"[BACKEND] Cancha: {cancha.nombre}")
-    
-    # Verificar usuario
-    usuario = db.query(Usuario).filter(Usuario.id_usuario == reserva_data.id_usuario).first()
-    if not usuario:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    # VERIFICAR DISPONIBILIDAD
-    try:
-        result = db.execute(
-            text("SELECT verificar_disponibilidad(:cancha_id, :fecha, :hora_inicio, :hora_fin) as disponible"),
-            {
-                "cancha_id": reserva_data.id_cancha,
-                "fecha": reserva_data.fecha_reserva,
-                "hora_inicio": reserva_data.hora_inicio,
-                "hora_fin": reserva_data.hora_fin
-            }
-        )
-        
-        disponible = result.scalar()
-        
-        if not disponible:
-            raise HTTPException(
-                status_code=400, 
-                detail="La cancha no está disponible en el horario solicitado"
-            )
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al verificar disponibilidad: {str(e)}"
-        )
-    
-    # Calcular costo total
-    costo_total = calcular_costo_total(
-        reserva_data.hora_inicio, reserva_data.hora_fin, float(cancha.precio_por_hora)
-    )
-    
-    # Generar código único de reserva
-    codigo_reserva = generar_codigo_unico_reserva(db)
-    
-    if not codigo_reserva:
-        codigo_reserva = f"RES-{int(datetime.now().timestamp())}"
-    
-    print(f"[BACKEND] Código reserva: {codigo_reserva}")
-    
-    # Extraer código cupón
-    reserva_dict = reserva_data.dict(exclude={'asistentes'})  # Excluir asistentes
-    codigo_cupon = reserva_dict.pop('codigo_cupon', None)
-    
-    # Crear la reserva
-    nueva_reserva = Reserva(
-        **reserva_dict,
-        costo_total=costo_total,
-        codigo_reserva=codigo_reserva,
-        estado="pendiente"
+    logger.debug("Creando reserva con código único - Asistentes: %s", reserva_data.cantidad_asistentes)
+    
+    # Reserva, cupón, asistente principal y cupón de bienvenida en una sola transacción
+    reserva = crear_reserva(db, reserva_data, incluir_principal=True, cupon_bienvenida=True)
+    
+    # ✅ ENVIAR EMAIL CON QR AL USUARIO PRINCIPAL (después del commit)
+    background_tasks.add_task(
+        enviar_email_con_qr_asincrono,
+        asistente=reserva.asistentes[0],
+        reserva=reserva,
+        cancha_nombre=reserva.cancha.nombre,
+        usuario=reserva.usuario
     )
     
-    try:
-        db.add(nueva_reserva)
-        db.commit()
-        db.refresh(nueva_reserva)
-        
-        print(f"[BACKEND] Reserva {nueva_reserva.id_reserva} creada")
-        
-        # ✅ APLICAR CUPÓN SI EXISTE
-        if codigo_cupon:
-            try:
-                cupon = db.query(Cupon).filter(Cupon.codigo == codigo_cupon).first()
-                if cupon and cupon.estado == "activo":
-                    if cupon.tipo == "porcentaje":
-                        descuento = (costo_total * float(cupon.monto_descuento)) / 100
-                    else:
-                        descuento = float(cupon.monto_descuento)
-                    
-                    if descuento > costo_total:
-                        descuento = costo_total
-                    
-                    nuevo_costo = costo_total - descuento
-                    nueva_reserva.costo_total = nuevo_costo
-                    cupon.id_reserva = nueva_reserva.id_reserva
-                    cupon.estado = "utilizado"
-                    
-                    db.commit()
-                    db.refresh(nueva_reserva)
-                    
-                    print(f"[BACKEND] Cupón aplicado: ${descuento} de descuento")
-                    
-            except Exception as cupon_error:
-                print(f"[BACKEND] Error aplicando cupón: {str(cupon_error)}")
-        
-        # ✅ CREAR ASISTENTE PARA EL USUARIO PRINCIPAL SOLAMENTE
-        # NO crear placeholders para otros asistentes
-        codigo_qr_principal = generar_codigo_qr()
-        token_principal = generar_token_verificacion()
-        
-        asistente_principal = AsistenteReserva(
-            id_reserva=nueva_reserva.id_reserva,
-            nombre=usuario.nombre,
-            email=usuario.email,
-            codigo_qr=codigo_qr_principal,
-            token_verificacion=token_principal,
-            asistio=False,
-        )
-        
-        db.add(asistente_principal)
-        db.commit()
-        db.refresh(asistente_principal)
-        
-        print(f"[BACKEND] Asistente principal creado con QR: {codigo_qr_principal}")
-        print(f"[BACKEND] Cupos disponibles para invitados: {reserva_data.cantidad_asistentes - 1}")
-        
-        # ✅ ENVIAR EMAIL CON QR AL USUARIO PRINCIPAL
+    # ✅ ENVIAR EMAIL ADICIONAL CON CÓDIGO PARA INVITADOS
+    cantidad_invitados = reserva_data.cantidad_asistentes
+    if cantidad_invitados > 0:
         background_tasks.add_task(
-            enviar_email_con_qr_asincrono,
-            asistente=asistente_principal,
-            reserva=nueva_reserva,
-            cancha_nombre=cancha_nombre,
-            usuario=usuario
-        )
-        
-        # ✅ ENVIAR EMAIL ADICIONAL CON CÓDIGO PARA INVITADOS
-        cantidad_invitados = reserva_data.cantidad_asistentes  # Restar 1 por el usuario principal
-        if cantidad_invitados > 0:
-            background_tasks.add_task(
-                enviar_email_codigo_invitados,
-                usuario=usuario,
-                reserva=nueva_reserva,
-                cancha_nombre=cancha_nombre,
-                cantidad_invitados=cantidad_invitados
-            )
-        
-        # ✅ ASIGNAR CUPÓN DE 5% SI TIENE MENOS DE 5 RESERVAS
-        reservas_usuario = db.query(Reserva).filter(
-            Reserva.id_usuario == usuario.id_usuario,
-            Reserva.estado != "cancelada"
-        ).count()
-        
-        if reservas_usuario < 5:
-            cupon_5 = generar_cupon_5_porciento(usuario.id_usuario, db)
-            if cupon_5:
-                print(f"[BACKEND] Cupón 5% asignado al usuario: {cupon_5.codigo}")
-        
-        # Recargar con relaciones
-        reserva_final = db.query(Reserva).options(
-            joinedload(Reserva.usuario),
-            joinedload(Reserva.cancha).joinedload(Cancha.espacio_deportivo),
-            joinedload(Reserva.disciplina)
-        ).filter(Reserva.id_reserva == nueva_reserva.id_reserva).first()
-        
-        print(f"[BACKEND] Reserva con código único creada exitosamente")
-        print(f"[BACKEND] Detalles: ID={reserva_final.id_reserva}, Código={reserva_final.codigo_reserva}, Asistentes={reserva_data.cantidad_asistentes}, Cupos disponibles={cantidad_invitados}")
-        
-        return reserva_final
-        
-    except Exception as e:
-        db.rollback()
-        print(f"[BACKEND] Error al crear reserva: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al crear reserva: {str(e)}"
+            enviar_email_codigo_invitados,
+            usuario=reserva.usuario,
+            reserva=reserva,
+            cancha_nombre=reserva.cancha.nombre,
+            cantidad_invitados=cantidad_invitados
         )
     
+    logger.info("Reserva con código único creada exitosamente")
+    logger.debug("Detalles: ID=%s, Código=%s, Asistentes=%s, Cupos disponibles=%s", reserva.id_reserva, reserva.codigo_reserva, reserva_data.cantidad_asistentes, cantidad_invitados)
+    
+    return reserva
+    
 def enviar_email_codigo_invitados(usuario: Usuario, reserva: Reserva, cancha_nombre: str, cantidad_invitados: int):
     """
     Envía email con código para compartir con invitados
@@ -1354,7 +904,7 @@ def enviar_email_codigo_invitados(usuario: Usuario, reserva: Reserva, cancha_nom
         )
         
     except Exception as e:
-        print(f"[EMAIL] Error enviando email código invitados: {str(e)}")
+        logger.error("[EMAIL] Error enviando email código invitados: %s", e)
         return False
     
 def generar_qr_y_enviar_email_usuario_principal(usuario: Usuario, reserva: Reserva, cancha_nombre: str, cantidad_invitados: int):
@@ -1388,40 +938,27 @@ def generar_qr_y_enviar_email_usuario_principal(usuario: Usuario, reserva: Reser
         enviado = send_qr_email(usuario.email, datos_email)
         
         if enviado:
-            print(f"[EMAIL] QR principal enviado a {usuario.email}")
+            logger.debug("[EMAIL] QR principal enviado a %s", usuario.email)
         else:
-            print(f"[EMAIL] Error al enviar QR principal a {usuario.email}")
+            logger.error("[EMAIL] Error al enviar QR principal a %s", usuario.email)
             
         return enviado, codigo_qr, token_verificacion
         
     except Exception as e:
-        print(f"[EMAIL] Error generando QR principal: {str(e)}")
+        logger.error("[EMAIL] Error generando QR principal: %s", e)
         return False, None, None
 
 def generar_cupon_5_porciento(id_usuario: int, db: Session) -> Optional[Cupon]:
     """Generar cupón de 5% para usuarios con menos de 5 reservas"""
     try:
-        # Generar código único
-        letras = string.ascii_uppercase
-        numeros = string.digits
-        codigo = ''.join(random.choices(letras, k=3)) + ''.join(random.choices(numeros, k=3))
-        
-        cupon = Cupon(
-            codigo=f"CUP5-{codigo}",
-            monto_descuento=5.0,
-            tipo="porcentaje",
-            estado="activo",
-            id_usuario=id_usuario,
-            fecha_expiracion=date.today() + timedelta(days=30)
-        )
-        
-        db.add(cupon)
+        cupon = agregar_cupon_bienvenida(db, id_usuario)
         db.commit()
         db.refresh(cupon)
         
         return cupon
     except Exception as e:
-        print(f"Error generando cupón 5%: {str(e)}")
+        db.rollback()
+        logger.error("Error generando cupón 5%%: %s", e)
         return None
 
 @router.post("/unirse-con-codigo/{codigo_reserva}")
@@ -1438,11 +975,11 @@ def unirse_con_codigo_reserva(
     - Visitante: debe proporcionar nombre y email
     - Autenticado: usa datos del perfil
     """
-    print(f"[BACKEND] Uniendo a reserva con código: {codigo_reserva}")
-    print(f"[BACKEND] Datos recibidos: {invitado_data}")
-    print(f"[BACKEND] Usuario autenticado: {'Sí' if current_user else 'No'}")
+    logger.debug("Uniendo a reserva con código: %s", codigo_reserva)
+    logger.debug("Datos recibidos: %s", invitado_data)
+    logger.debug("Usuario autenticado: %s", 'Sí' if current_user else 'No')
     if current_user:
-        print(f"[BACKEND] Usuario actual: {current_user.email} (ID: {current_user.id_usuario})")
+        logger.debug("Usuario actual: %s (ID: %s)", current_user.email, current_user.id_usuario)
     
     # 1. Buscar la reserva por código_reserva
     reserva = db.query(Reserva).filter(Reserva.codigo_reserva == codigo_reserva).first()
@@ -1450,7 +987,7 @@ def unirse_con_codigo_reserva(
     if not reserva:
         raise HTTPException(status_code=404, detail="Código de reserva no encontrado")
     
-    print(f"[BACKEND] Reserva encontrada: ID={reserva.id_reserva}, Total asistentes={reserva.cantidad_asistentes}")
+    logger.debug("Reserva encontrada: ID=%s, Total asistentes=%s", reserva.id_reserva, reserva.cantidad_asistentes)
     
     # 2. Verificar si la reserva está activa
     if reserva.estado not in ["pendiente", "confirmada"]:
@@ -1467,7 +1004,7 @@ def unirse_con_codigo_reserva(
         # ✅ USUARIO AUTENTICADO: Usar datos del perfil
         nombre_invitado = current_user.nombre
         email_invitado = current_user.email
-        print(f"[BACKEND] Usando datos del usuario autenticado: {nombre_invitado} ({email_invitado})")
+        logger.debug("Usando datos del usuario autenticado: %s (%s)", nombre_invitado, email_invitado)
     else:
         # ✅ VISITANTE: Usar datos del formulario
         if not invitado_data.get("nombre") or not invitado_data.get("email"):
@@ -1485,7 +1022,7 @@ def unirse_con_codigo_reserva(
         if not re.match(email_regex, email_invitado):
             raise HTTPException(status_code=400, detail="Email no válido")
         
-        print(f"[BACKEND] Usando datos del visitante: {nombre_invitado} ({email_invitado})")
+        logger.debug("Usando datos del visitante: %s (%s)", nombre_invitado, email_invitado)
     
     # 4. Verificar si este email ya está registrado en esta reserva
     asistente_existente = db.query(AsistenteReserva).filter(
@@ -1506,7 +1043,7 @@ def unirse_con_codigo_reserva(
         AsistenteReserva.email != "pendiente@ejemplo.com"  # Excluir placeholders
     ).count()
     
-    print(f"[BACKEND] Asistentes actuales (reales): {asistentes_actuales}")
+    logger.debug("Asistentes actuales (reales): %s", asistentes_actuales)
     
     # 6. Verificar si hay cupo disponible
     if asistentes_actuales >= reserva.cantidad_asistentes:
@@ -1516,7 +1053,7 @@ def unirse_con_codigo_reserva(
         )
     
     cupos_disponibles = reserva.cantidad_asistentes - asistentes_actuales
-    print(f"[BACKEND] Cupo disponible antes de unir: {cupos_disponibles}")
+    logger.debug("Cupo disponible antes de unir: %s", cupos_disponibles)
     
     # 7. Obtener información de la cancha para el email
     cancha_info = "Cancha"
@@ -1526,7 +1063,7 @@ def unirse_con_codigo_reserva(
     # 8. Obtener información del usuario que hizo la reserva (para el email)
     usuario_reserva = db.query(Usuario).filter(Usuario.id_usuario == reserva.id_usuario).first()
     if not usuario_reserva:
-        print(f"[BACKEND] ⚠️ Usuario que hizo la reserva no encontrado")
+        logger.warning("⚠️ Usuario que hizo la reserva no encontrado")
     
     # 9. Crear asistente
     codigo_qr = generar_codigo_qr()
@@ -1545,8 +1082,8 @@ def unirse_con_codigo_reserva(
         db.add(asistente)
         db.commit()
         
-        print(f"[BACKEND] Asistente creado exitosamente: {nombre_invitado} ({email_invitado})")
-        print(f"[BACKEND] QR generado: {codigo_qr}")
+        logger.debug("Asistente creado exitosamente: %s (%s)", nombre_invitado, email_invitado)
+        logger.debug("QR generado: %s", codigo_qr)
         
         # 10. Enviar email con QR al invitado
         if usuario_reserva:
@@ -1557,25 +1094,20 @@ def unirse_con_codigo_reserva(
                 cancha_nombre=cancha_info,
                 usuario=usuario_reserva
             )
-            print(f"[BACKEND] Email con QR programado para enviar")
+            logger.debug("Email con QR programado para enviar")
         
         # 11. ASIGNAR CUPÓN DE 5% SI ES USUARIO AUTENTICADO Y ES SU PRIMERA RESERVA
         if current_user:
-            reservas_como_usuario = db.query(Reserva).filter(
-                Reserva.id_usuario == current_user.id_usuario,
-                Reserva.estado != "cancelada"
-            ).count()
-            
-            if reservas_como_usuario < 5:
+            if reservas_vigentes(db, current_user.id_usuario) < MAX_RESERVAS_CUPON_BIENVENIDA:
                 cupon_5 = generar_cupon_5_porciento(current_user.id_usuario, db)
                 if cupon_5:
-                    print(f"[BACKEND] Cupón 5% asignado al usuario: {cupon_5.codigo}")
+                    logger.debug("Cupón 5%% asignado al usuario: %s", cupon_5.codigo)
         
         # 12. Calcular cupos restantes después de la unión
         asistentes_despues = asistentes_actuales + 1
         cupos_restantes = reserva.cantidad_asistentes - asistentes_despues
         
-        print(f"[BACKEND] Unión exitosa. Cupos restantes después: {cupos_restantes}")
+        logger.info("Unión exitosa. Cupos restantes después: %s", cupos_restantes)
         
         # 13. Si es visitante, crear un usuario temporal o sugerir registro
         if not current_user:
@@ -1583,7 +1115,7 @@ def unirse_con_codigo_reserva(
             usuario_existente = db.query(Usuario).filter(Usuario.email == email_invitado).first()
             if not usuario_existente:
                 # Podemos crear un usuario temporal o solo registrar el asistente
-                print(f"[BACKEND] Visitante con email nuevo: {email_invitado}")
+                logger.debug("Visitante con email nuevo: %s", email_invitado)
                 # Podrías crear aquí un usuario con estado 'visitante' si quieres
                 
         # 14. Preparar respuesta
@@ -1611,9 +1143,7 @@ def unirse_con_codigo_reserva(
         
     except Exception as e:
         db.rollback()
-        print(f"[BACKEND] Error uniendo invitado: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error uniendo invitado: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Error al unirse a la reserva: {str(e)}"
@@ -1629,8 +1159,8 @@ def registrar_y_unirse_reserva(
     """
     Registrar un nuevo usuario y unirlo automáticamente a una reserva
     """
-    print(f"[BACKEND] Registrando y uniendo usuario con código: {codigo_reserva}")
-    print(f"[BACKEND] Datos recibidos: {usuario_data}")
+    logger.debug("Registrando y uniendo usuario con código: %s", codigo_reserva)
+    logger.debug("Datos recibidos para: %s", usuario_data.get("email"))
     
     # 1. Verificar que el código de reserva existe
     reserva = db.query(Reserva).filter(Reserva.codigo_reserva == codigo_reserva).first()
@@ -1681,8 +1211,8 @@ def registrar_y_unirse_reserva(
         db.commit()
         db.refresh(nuevo_usuario)
         
-        print(f"[BACKEND] Usuario {nuevo_usuario.id_usuario} creado y activado")
-        print(f"[BACKEND] Estado del usuario: {nuevo_usuario.estado}")
+        logger.info("Usuario %s creado y activado", nuevo_usuario.id_usuario)
+        logger.debug("Estado del usuario: %s", nuevo_usuario.estado)
         
         # 6. Unir al usuario a la reserva
         codigo_qr = generar_codigo_qr()
@@ -1700,7 +1230,7 @@ def registrar_y_unirse_reserva(
         db.add(asistente)
         db.commit()
         
-        print(f"[BACKEND] Usuario unido a reserva como asistente. QR: {codigo_qr}")
+        logger.debug("Usuario unido a reserva como asistente. QR: %s", codigo_qr)
         
         # 7. Enviar emails
         # Email de bienvenida
@@ -1723,7 +1253,7 @@ def registrar_y_unirse_reserva(
         # 8. Asignar cupón de 5%
         cupon_5 = generar_cupon_5_porciento(nuevo_usuario.id_usuario, db)
         if cupon_5:
-            print(f"[BACKEND] Cupón 5% asignado al nuevo usuario: {cupon_5.codigo}")
+            logger.debug("Cupón 5%% asignado al nuevo usuario: %s", cupon_5.codigo)
         
         return {
             "message": "Usuario registrado y unido exitosamente a la reserva",
@@ -1738,9 +1268,7 @@ def registrar_y_unirse_reserva(
         
     except Exception as e:
         db.rollback()
-        print(f"[BACKEND] Error registrando y uniendo usuario: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error registrando y uniendo usuario: %s", e)
         raise HTTPException(status_code=500, detail=f"Error al registrar y unir: {str(e)}")
 
 def enviar_email_bienvenida_con_reserva(usuario: Usuario, reserva: Reserva, cancha_nombre: str):
@@ -1843,7 +1371,7 @@ def enviar_email_bienvenida_con_reserva(usuario: Usuario, reserva: Reserva, canc
         )
         
     except Exception as e:
-        print(f"[EMAIL] Error enviando email de bienvenida: {str(e)}")
+        logger.error("[EMAIL] Error enviando email de bienvenida: %s", e)
         return False
 
 @router.get("/test/{codigo}")
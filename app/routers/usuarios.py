@@ -3,7 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.usuario import Usuario
-from app.schemas.usuario import UsuarioResponse, UsuarioCreate, UsuarioUpdate
+from app.schemas.usuario import UsuarioResponse, UsuarioCreate, UsuarioUpdate, EstadisticaUsuarioResponse
+from app.services.estadisticas_usuario import obtener_estadisticas
 from app.core.security import get_password_hash
 from app.core.security import get_current_user
 
@@ -32,6 +33,13 @@ def get_usuario(usuario_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return usuario
 
+@router.get("/{usuario_id}/estadisticas", response_model=EstadisticaUsuarioResponse)
+def get_estadisticas_usuario(usuario_id: int, db: Session = Depends(get_db)):
+    """Contadores de reservas del usuario (una fila, sin recorrer sus reservas)"""
+    if not db.query(Usuario.id_usuario).filter(Usuario.id_usuario == usuario_id).first():
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return obtener_estadisticas(db, usuario_id)
+
 @router.post("/", response_model=UsuarioResponse)
 def create_usuario(usuario_data: UsuarioCreate, db: Session = Depends(get_db)):
     # Verificar si el email ya existe
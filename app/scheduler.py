@@ -0,0 +1,152 @@
+# app/scheduler.py
+"""
+Programador de tareas periódicas: ciclo de vida de reservas
+(app/services/ciclo_reservas.py), particiones mensuales de reserva, eventos
+de pago pendientes y purga de claves de idempotencia, retenciones de
+horario vencidas y eventos de pago procesados.
+
+En el proceso web corre como tarea de asyncio que se inicia con la app
+(CICLO_RESERVAS_HABILITADO) y ejecuta una pasada cada
+CICLO_RESERVAS_INTERVALO_SEGUNDOS en el threadpool. Con varios workers
+todos la programan, pero el advisory lock deja ejecutar a uno por vez.
+
+Como proceso separado (con CICLO_RESERVAS_HABILITADO=false en la web):
+
+    python -m app.scheduler            # bucle hasta SIGTERM
+    python -m app.scheduler --una-vez  # una pasada (cron)
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+import threading
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_tarea: Optional[asyncio.Task] = None
+
+
+def _purgar_idempotencia():
+    from app.core.idempotency import purgar_claves_vencidas
+    borradas = purgar_claves_vencidas()
+    if borradas:
+        logger.debug("🧹 %s claves de idempotencia vencidas eliminadas", borradas)
+
+
+def _purgar_retenciones():
+    from app.services.retenciones import retenciones_service
+    borradas = retenciones_service.purgar_vencidas()
+    if borradas:
+        logger.debug("🧹 %s horas retenidas vencidas borradas", borradas)
+
+
+def _procesar_eventos_pago():
+    from app.services import eventos_pago
+    # Los que el worker web no tomó (deshabilitado o reintentos)
+    eventos_pago.procesar_todos()
+    purgados = eventos_pago.purgar_procesados()
+    if purgados:
+        logger.debug("🧹 %s eventos de pago procesados eliminados", purgados)
+
+
+def _tareas():
+    from app.services.ciclo_reservas import ejecutar_ciclo
+    from app.services.particiones_reserva import mantener_particiones
+    return [
+        ("particiones", mantener_particiones),
+        ("ciclo_reservas", ejecutar_ciclo),
+        ("idempotencia", _purgar_idempotencia),
+        ("retenciones", _purgar_retenciones),
+        ("eventos_pago", _procesar_eventos_pago),
+    ]
+
+
+def ejecutar_pasada() -> bool:
+    """
+    Una pasada de todas las tareas. Cada una corre aunque otra falle (por
+    ejemplo, el DDL de particiones sin su lock): el error se registra, suma a
+    reservas_ciclo_errores_total{tarea} y se reintenta en la próxima pasada
+    """
+    from app.core.metrics import CICLO_ERRORES
+
+    ok = True
+    for nombre, tarea in _tareas():
+        try:
+            tarea()
+        except Exception as e:
+            ok = False
+            CICLO_ERRORES.labels(nombre).inc()
+            logger.exception("❌ Error en la tarea %s del programador: %s", nombre, e)
+    return ok
+
+
+async def _bucle(intervalo: int):
+    while True:
+        # La primera pasada espera un intervalo: no compite con el arranque del worker
+        await asyncio.sleep(intervalo)
+        await run_in_threadpool(ejecutar_pasada)
+
+
+def iniciar() -> None:
+    """Programa las pasadas en el event loop actual (evento startup de la app)"""
+    global _tarea
+    if _tarea is None:
+        _tarea = asyncio.get_running_loop().create_task(_bucle(settings.CICLO_RESERVAS_INTERVALO_SEGUNDOS))
+        logger.debug("⏰ Ciclo de reservas programado cada %ss", settings.CICLO_RESERVAS_INTERVALO_SEGUNDOS)
+
+
+async def detener() -> None:
+    """Cancela la espera; una pasada en curso termina en su hilo"""
+    global _tarea
+    if _tarea is not None:
+        _tarea.cancel()
+        try:
+            await _tarea
+        except asyncio.CancelledError:
+            pass
+        _tarea = None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--una-vez", action="store_true", help="ejecutar una pasada y salir")
+    args = parser.parse_args()
+
+    # Fuera de la app web: todos los modelos deben estar registrados antes de configurar los mappers
+    import app.models  # noqa: F401
+    from app.models.notification import Notificacion  # noqa: F401
+    from app.core.logging_config import configurar_logging, detener_logging
+    configurar_logging()
+
+    if args.una_vez:
+        ok = ejecutar_pasada()
+        detener_logging()
+        return 0 if ok else 1
+
+    if settings.CICLO_RESERVAS_METRICS_PORT:
+        from prometheus_client import start_http_server
+        start_http_server(settings.CICLO_RESERVAS_METRICS_PORT)
+
+    detenido = threading.Event()
+    for senial in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(senial, lambda *_: detenido.set())
+
+    logger.info("⏰ Ciclo de reservas cada %ss (Ctrl+C para detener)", settings.CICLO_RESERVAS_INTERVALO_SEGUNDOS)
+    while not detenido.is_set():
+        ejecutar_pasada()
+        detenido.wait(settings.CICLO_RESERVAS_INTERVALO_SEGUNDOS)
+
+    from app.database import engine
+    engine.dispose()
+    detener_logging()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,7 @@ __all__ = [
     "Token", "TokenData", "Login",
     
     # Usuario
-    "UsuarioBase", "UsuarioCreate", "UsuarioUpdate", "UsuarioResponse",
+    "UsuarioBase", "UsuarioCreate", "UsuarioUpdate", "UsuarioResponse", "EstadisticaUsuarioResponse",
     
     # Espacio Deportivo
     "EspacioDeportivoBase", "EspacioDeportivoCreate", "EspacioDeportivoUpdate", "EspacioDeportivoResponse",
@@ -27,7 +27,8 @@ __all__ = [
     "DisciplinaBase", "DisciplinaCreate", "DisciplinaUpdate", "DisciplinaResponse",
     
     # Reserva
-    "ReservaBase", "ReservaCreate", "ReservaUpdate", "ReservaResponse",
+    "ReservaBase", "ReservaCreate", "ReservaUpdate", "ReservaResponse", "ReservaResumen",
+    "RetencionCreate", "RetencionResponse",
     
     # Pago
     "PagoBase", "PagoCreate", "PagoUpdate", "PagoResponse",
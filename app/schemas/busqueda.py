@@ -0,0 +1,64 @@
+# app/schemas/busqueda.py
+from pydantic import BaseModel
+from datetime import date, time
+from typing import List, Optional
+
+
+class ResultadoBusqueda(BaseModel):
+    tipo: str                                   # "espacio", "cancha" o "disciplina"
+    id: int
+    nombre: str
+    detalle: Optional[str] = None               # ubicación, tipo de cancha o descripción
+    id_espacio_deportivo: Optional[int] = None
+    nombre_espacio: Optional[str] = None
+    disciplinas: List[int] = []
+    puntaje: float
+
+
+class FacetaBusqueda(BaseModel):
+    id: int
+    nombre: str
+    cantidad: int
+
+
+class FacetasBusqueda(BaseModel):
+    disciplinas: List[FacetaBusqueda] = []
+    espacios: List[FacetaBusqueda] = []
+
+
+class BusquedaResponse(BaseModel):
+    consulta: str
+    total: int
+    resultados: List[ResultadoBusqueda]
+    facetas: FacetasBusqueda
+
+
+class SugerenciaBusqueda(BaseModel):
+    tipo: str
+    id: int
+    nombre: str
+    nombre_espacio: Optional[str] = None
+
+
+class FranjaCanchaDisponible(BaseModel):
+    id_cancha: int
+    nombre_cancha: str
+    tipo: Optional[str] = None
+    imagen: Optional[str] = None
+    id_espacio_deportivo: int
+    nombre_espacio: str
+    ubicacion: Optional[str] = None
+    latitud: Optional[float] = None
+    longitud: Optional[float] = None
+    distancia_km: Optional[float] = None        # solo si se indicó lat/lon
+    fecha: date
+    hora_inicio: time
+    hora_fin: time
+    desvio_horas: float                         # distancia a la hora pedida
+    precio_por_hora: float
+    costo_total: float
+
+
+class CanchasDisponiblesResponse(BaseModel):
+    total: int
+    resultados: List[FranjaCanchaDisponible]
@@ -1,10 +1,12 @@
 # app/schemas/cancha.py
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, computed_field
+from typing import Optional, List, Dict
 from datetime import time, datetime  # ← Añadir datetime
 from decimal import Decimal
 
+from .comentario import ResumenCalificaciones
 from .espacio_deportivo import EspacioDeportivoResponse
+from app.services.image_processing import urls_variantes
 
 class CanchaBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=100, description="Nombre de la cancha")
@@ -32,9 +34,19 @@ class CanchaUpdate(BaseModel):
 class CanchaResponse(CanchaBase):
     id_cancha: int
     fecha_creacion: datetime  # ← Cambiar de str a datetime
+    calificaciones: Optional[ResumenCalificaciones] = None   # None: sin comentarios calificados
 
     espacio_deportivo: Optional[EspacioDeportivoResponse] = None 
     
+    # Imagen cuyas variantes ya se generaron (no se expone)
+    imagen_variantes: Optional[str] = Field(None, exclude=True)
+    
+    @computed_field
+    @property
+    def imagenes(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """URLs de las variantes (thumb, card, full) en webp/jpg; None mientras se generan y en imágenes antiguas"""
+        return urls_variantes(self.imagen, self.imagen_variantes)
+    
     class Config:
         from_attributes = True
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from typing import Optional
 from datetime import datetime
 
@@ -15,6 +15,24 @@ class ComentarioUpdate(BaseModel):
     descripcion: Optional[str] = None
     calificacion: Optional[int] = Field(None, ge=1, le=5)
 
+class ResumenCalificaciones(BaseModel):
+    """Calificaciones de los comentarios de una cancha, o de todas las canchas de un espacio"""
+    cantidad: int = 0
+    suma: int = 0
+    estrellas_1: int = 0
+    estrellas_2: int = 0
+    estrellas_3: int = 0
+    estrellas_4: int = 0
+    estrellas_5: int = 0
+
+    @computed_field
+    @property
+    def promedio(self) -> Optional[float]:
+        return round(self.suma / self.cantidad, 2) if self.cantidad else None
+
+    class Config:
+        from_attributes = True
+
 class ComentarioResponse(ComentarioBase):
     id_comentario: int
     fecha_comentario: datetime
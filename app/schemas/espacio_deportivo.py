@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, computed_field
+from typing import Optional, Dict
 from datetime import datetime
+from app.services.image_processing import urls_variantes
+from .comentario import ResumenCalificaciones
 
 class EspacioDeportivoBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=100)
@@ -40,6 +42,16 @@ class EspacioDeportivoUpdate(BaseModel):
 class EspacioDeportivoResponse(EspacioDeportivoBase):
     id_espacio_deportivo: int
     fecha_creacion: datetime
+    calificaciones: Optional[ResumenCalificaciones] = None   # None: ninguna cancha tiene calificaciones
+    
+    # Imagen cuyas variantes ya se generaron (no se expone)
+    imagen_variantes: Optional[str] = Field(None, exclude=True)
+    
+    @computed_field
+    @property
+    def imagenes(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """URLs de las variantes (thumb, card, full) en webp/jpg; None mientras se generan y en imágenes antiguas"""
+        return urls_variantes(self.imagen, self.imagen_variantes)
     
     class Config:
         from_attributes = True
\ No newline at end of file
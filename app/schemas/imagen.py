@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Literal
+
+class SubidaFirmadaRequest(BaseModel):
+    destino: Literal["espacios", "canchas"] = Field(..., description="Tipo de entidad a la que pertenece la imagen")
+    id_destino: int = Field(..., description="ID del espacio deportivo o de la cancha")
+    nombre_archivo: str = Field(..., max_length=255, description="Nombre original del archivo (para la extensión)")
+
+class SubidaFirmadaResponse(BaseModel):
+    path: str
+    signed_url: str = Field(..., description="URL para subir el archivo directamente al storage (PUT)")
+    token: str = Field(..., description="Token de subida del storage")
+    token_confirmacion: str = Field(..., description="Token para POST /imagenes/confirmar")
+    expira_en: int = Field(..., description="Segundos de validez del token de confirmación")
+
+class ConfirmarSubidaRequest(BaseModel):
+    token_confirmacion: str
+
+class ConfirmarSubidaResponse(BaseModel):
+    """Las variantes se generan después de responder: aparecen en "imagenes" del espacio o la cancha"""
+    destino: str
+    id_destino: int
+    imagen: str
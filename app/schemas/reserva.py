@@ -61,4 +61,50 @@ class ReservaResponse(ReservaBase):
     asistentes: List[AsistenteResponse] = []
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ReservaResumen(BaseModel):
+    """
+    🎯 ESQUEMA LIVIANO PARA LISTADOS
+    💡 Solo columnas de reserva, sin asistentes; el detalle completo está en GET /reservas/{id}
+    """
+    id_reserva: int
+    codigo_reserva: str
+    fecha_reserva: date
+    hora_inicio: time
+    hora_fin: time
+    estado: str
+    costo_total: Decimal
+    cantidad_asistentes: Optional[int] = None
+    material_prestado: Optional[str] = None
+    id_usuario: int
+    id_cancha: int
+    id_disciplina: int
+    fecha_creacion: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class RetencionCreate(BaseModel):
+    """
+    🎯 RETENCIÓN DE HORARIO DURANTE EL CHECKOUT
+    💡 El horario queda reservado para el usuario hasta expira_en (RETENCION_TTL_SEGUNDOS)
+    💡 Solo horarios futuros de hasta RETENCION_MAX_HORAS horas
+    """
+    id_cancha: int
+    fecha_reserva: date
+    hora_inicio: time
+    hora_fin: time
+
+    @validator('hora_inicio', 'hora_fin')
+    def validate_full_hours(cls, v):
+        if v.minute != 0:
+            raise ValueError('La hora debe ser en punto (ej: 10:00, 11:00)')
+        return v
+
+
+class RetencionResponse(RetencionCreate):
+    id_usuario: int
+    expira_en: datetime
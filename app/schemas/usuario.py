@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
+from decimal import Decimal
 
 class UsuarioBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=100)
@@ -27,4 +28,16 @@ class UsuarioResponse(UsuarioBase):
     fecha_actualizacion: Optional[datetime] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EstadisticaUsuarioResponse(BaseModel):
+    id_usuario: int
+    reservas_totales: int
+    reservas_activas: int
+    reservas_canceladas: int
+    inasistencias: int
+    total_gastado: Decimal
+    fecha_actualizacion: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
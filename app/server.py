@@ -0,0 +1,182 @@
+# app/server.py
+"""
+Punto de entrada de producción: gunicorn con workers de uvicorn (uvloop + httptools).
+
+    python -m app.server
+
+- Workers según CPU y memoria del contenedor (o WEB_CONCURRENCY).
+- La app se carga una vez en el proceso maestro (preload) y se hereda al hacer fork.
+- Pool de la base por worker, para que el total no supere DB_MAX_CONEXIONES.
+- SIGTERM: cada worker deja de aceptar conexiones y espera hasta
+  SERVER_GRACEFUL_TIMEOUT a que terminen los requests en curso y sus tareas
+  en segundo plano (emails), luego vacía la cola de logs y cierra el pool.
+"""
+import logging
+import math
+import os
+import shutil
+import tempfile
+from typing import Optional, Tuple
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OlympiaWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "proxy_headers": True,
+    }
+
+
+def _leer(ruta: str) -> Optional[str]:
+    try:
+        with open(ruta) as archivo:
+            return archivo.read().strip()
+    except OSError:
+        return None
+
+
+def cpus_disponibles() -> int:
+    """CPUs asignadas al proceso, respetando la cuota del cgroup (contenedores)"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+    cuota = _leer("/sys/fs/cgroup/cpu.max")  # cgroup v2: "max 100000" o "200000 100000"
+    if cuota and not cuota.startswith("max"):
+        limite, periodo = cuota.split()
+        cpus = min(cpus, max(1, math.ceil(int(limite) / int(periodo))))
+    else:
+        limite, periodo = _leer("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"), _leer("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if limite and periodo and int(limite) > 0:
+            cpus = min(cpus, max(1, math.ceil(int(limite) / int(periodo))))
+    return cpus
+
+
+def memoria_disponible_mb() -> Optional[int]:
+    """Límite de memoria del contenedor, o la memoria total del equipo"""
+    for ruta in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        valor = _leer(ruta)
+        # cgroup v1 sin límite reporta un número enorme
+        if valor and valor.isdigit() and int(valor) < 1 << 60:
+            return int(valor) // (1024 * 1024)
+
+    meminfo = _leer("/proc/meminfo")
+    if meminfo:
+        for linea in meminfo.splitlines():
+            if linea.startswith("MemTotal:"):
+                return int(linea.split()[1]) // 1024
+    return None
+
+
+def calcular_workers() -> int:
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+
+    workers = 2 * cpus_disponibles() + 1
+    memoria = memoria_disponible_mb()
+    if memoria:
+        workers = min(workers, memoria // settings.SERVER_MEMORIA_POR_WORKER_MB)
+    return max(1, workers)
+
+
+def pool_por_worker(workers: int) -> Tuple[int, int, int]:
+    """
+    Reparte DB_MAX_CONEXIONES (menos las reservadas) entre los workers.
+    Retorna (workers, pool_size, max_overflow); reduce los workers si no
+    alcanza una conexión para cada uno.
+    """
+    disponibles = max(1, settings.DB_MAX_CONEXIONES - settings.DB_CONEXIONES_RESERVADAS)
+    if workers > disponibles:
+        logger.warning("⚠️ %s workers no entran en %s conexiones: se usan %s", workers, disponibles, disponibles)
+        workers = disponibles
+
+    por_worker = disponibles // workers
+    # Un cuarto del cupo queda como overflow para picos; el resto se mantiene abierto
+    max_overflow = por_worker // 4
+    return workers, por_worker - max_overflow, max_overflow
+
+
+def _preparar_metricas_multiproceso():
+    """prometheus_client necesita el directorio antes de importarse en el maestro"""
+    directorio = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directorio:
+        directorio = os.path.join(tempfile.gettempdir(), "olympia_metricas")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directorio
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio, exist_ok=True)
+
+
+def _post_fork(server, worker):
+    from app.core.logging_config import reiniciar_logging_tras_fork
+    from app.database import engine
+
+    reiniciar_logging_tras_fork()
+    # Las conexiones abiertas en el maestro no se comparten entre procesos
+    engine.dispose(close=False)
+
+
+def _child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+class ServidorOlympia(BaseApplication):
+    def __init__(self, opciones: dict):
+        self.opciones = opciones
+        super().__init__()
+
+    def load_config(self):
+        for clave, valor in self.opciones.items():
+            self.cfg.set(clave, valor)
+
+    def load(self):
+        from app.main import app
+        return app
+
+
+def opciones_gunicorn(workers: int) -> dict:
+    return {
+        "bind": f"0.0.0.0:{settings.PORT}",
+        "workers": workers,
+        "worker_class": "app.server.OlympiaWorker",
+        "preload_app": True,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout": settings.SERVER_TIMEOUT,
+        # Margen para que uvicorn termine su propio apagado ordenado
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT + 5,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS // 10,
+        "forwarded_allow_ips": "*",
+        "post_fork": _post_fork,
+        "child_exit": _child_exit,
+        "accesslog": None,
+    }
+
+
+def main():
+    from app.core.logging_config import configurar_logging
+
+    configurar_logging()
+    workers, pool_size, max_overflow = pool_por_worker(calcular_workers())
+    # Antes de cargar la app: app.database crea el engine con estos valores
+    settings.DB_POOL_SIZE = pool_size
+    settings.DB_MAX_OVERFLOW = max_overflow
+    _preparar_metricas_multiproceso()
+
+    logger.info(
+        "🚀 Iniciando %s workers en :%s (pool por worker: %s + %s overflow, máximo %s conexiones)",
+        workers, settings.PORT, pool_size, max_overflow, settings.DB_MAX_CONEXIONES
+    )
+    ServidorOlympia(opciones_gunicorn(workers)).run()
+
+
+if __name__ == "__main__":
+    main()
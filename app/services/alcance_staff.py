@@ -0,0 +1,76 @@
+# app/services/alcance_staff.py
+"""
+Alcance de gestores y controles de acceso: los espacios deportivos que
+tienen asignados (tabla administra) y las canchas de esos espacios.
+
+- alcance_staff(db, id_usuario): espacios y canchas del usuario, resueltos
+  con una consulta y guardados en memoria del proceso durante
+  ALCANCE_STAFF_TTL_SEGUNDOS. Las verificaciones de permiso sobre una
+  cancha o un espacio no consultan la base mientras el alcance esté vigente.
+- canchas_del_staff(id_usuario): subconsulta con las canchas del usuario,
+  para filtrar listados en la misma consulta (sin listas de ids en IN).
+
+Las asignaciones de espacios.py y el alta, baja o cambio de espacio de una
+cancha llaman a invalidar_alcance(). Otro worker ve el cambio cuando vence
+su copia (a lo sumo ALCANCE_STAFF_TTL_SEGUNDOS).
+"""
+import threading
+import time
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.administra import Administra
+from app.models.cancha import Cancha
+
+
+class AlcanceStaff(NamedTuple):
+    espacios: FrozenSet[int]
+    canchas: FrozenSet[int]
+
+
+_lock = threading.Lock()
+# id_usuario -> (vence, alcance)
+_alcances: Dict[int, Tuple[float, AlcanceStaff]] = {}
+
+
+def alcance_staff(db: Session, id_usuario: int) -> AlcanceStaff:
+    """Espacios y canchas asignados al usuario (en caché durante ALCANCE_STAFF_TTL_SEGUNDOS)"""
+    ahora = time.monotonic()
+    with _lock:
+        guardado = _alcances.get(id_usuario)
+    if guardado and guardado[0] > ahora:
+        return guardado[1]
+
+    filas = db.execute(
+        select(Administra.id_espacio_deportivo, Cancha.id_cancha)
+        .outerjoin(Cancha, Cancha.id_espacio_deportivo == Administra.id_espacio_deportivo)
+        .where(Administra.id_usuario == id_usuario)
+    ).all()
+    alcance = AlcanceStaff(
+        espacios=frozenset(fila.id_espacio_deportivo for fila in filas),
+        canchas=frozenset(fila.id_cancha for fila in filas if fila.id_cancha is not None),
+    )
+    with _lock:
+        _alcances[id_usuario] = (ahora + settings.ALCANCE_STAFF_TTL_SEGUNDOS, alcance)
+    return alcance
+
+
+def invalidar_alcance(id_usuario: Optional[int] = None) -> None:
+    """Descarta el alcance guardado del usuario, o el de todos"""
+    with _lock:
+        if id_usuario is None:
+            _alcances.clear()
+        else:
+            _alcances.pop(id_usuario, None)
+
+
+def canchas_del_staff(id_usuario: int):
+    """Subconsulta con los id_cancha de los espacios asignados al usuario"""
+    return (
+        select(Cancha.id_cancha)
+        .join(Administra, Administra.id_espacio_deportivo == Cancha.id_espacio_deportivo)
+        .where(Administra.id_usuario == id_usuario)
+    )
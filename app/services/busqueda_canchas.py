@@ -0,0 +1,189 @@
+# app/services/busqueda_canchas.py
+"""
+"Encontrar cancha": canchas de una disciplina con horario libre en una
+fecha, opcionalmente cerca de un punto y alrededor de una hora.
+
+Reemplaza la secuencia disciplinas -> espacios cercanos -> canchas por
+espacio -> disponibilidad por cancha con tres consultas fijas, sin importar
+cuántos espacios o canchas entren en la búsqueda:
+
+1. canchas candidatas: disciplina (cancha_disciplina), cancha disponible en
+   un espacio activo, precio máximo y el recuadro del radio alrededor del
+   punto (la distancia exacta se calcula después, con haversine),
+2. horarios ocupados de todas las candidatas en la fecha (reservas
+   pendientes, confirmadas o en curso; índice ix_reserva_cancha_fecha_activas
+   y solo la partición del mes),
+3. horas retenidas de la fecha (retenciones del checkout).
+
+Las franjas se arman en memoria con las reglas de listar_horarios_disponibles
+y crear_reserva: en horas completas (la primera en punto desde la apertura),
+dentro del horario de la cancha y no pasadas. hora_inicio debe ser una hora en
+punto (el router responde 422 si no).
+"""
+import math
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.cancha import Cancha
+from app.models.cancha_disciplina import CanchaDisciplina
+from app.models.espacio_deportivo import EspacioDeportivo
+from app.models.reserva import Reserva
+from app.services.estadisticas_usuario import ESTADOS_ACTIVOS
+from app.services.retenciones import retenciones_service
+
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = 111.32
+
+
+def distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distancia haversine entre dos puntos"""
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    d_fi = fi2 - fi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_fi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(a))
+
+
+def _minutos(hora: time) -> int:
+    return hora.hour * 60 + hora.minute
+
+
+def _hora(minutos: int) -> time:
+    return time(minutos // 60, minutos % 60)
+
+
+def _inicios(apertura: int, cierre: int, duracion: int,
+             deseada: Optional[int], flexibilidad: int) -> List[int]:
+    """Minutos de inicio posibles, en horas completas: alrededor de la hora deseada, o desde la apertura"""
+    if deseada is None:
+        candidatos = range(-(-apertura // 60) * 60, cierre - duracion + 1, 60)
+    else:
+        candidatos = (deseada + 60 * desvio for desvio in range(-flexibilidad, flexibilidad + 1))
+    return [inicio for inicio in candidatos
+            if inicio % 60 == 0 and apertura <= inicio and inicio + duracion <= cierre]
+
+
+def _canchas_candidatas(db: Session, id_disciplina: int, punto: Optional[Tuple[float, float]],
+                        radio_km: float, precio_max: Optional[float]):
+    consulta = (
+        select(
+            Cancha.id_cancha, Cancha.nombre, Cancha.tipo, Cancha.imagen,
+            Cancha.hora_apertura, Cancha.hora_cierre, Cancha.precio_por_hora,
+            EspacioDeportivo.id_espacio_deportivo, EspacioDeportivo.nombre.label("nombre_espacio"),
+            EspacioDeportivo.ubicacion, EspacioDeportivo.latitud, EspacioDeportivo.longitud,
+        )
+        .join(CanchaDisciplina, CanchaDisciplina.id_cancha == Cancha.id_cancha)
+        .join(EspacioDeportivo, EspacioDeportivo.id_espacio_deportivo == Cancha.id_espacio_deportivo)
+        .where(
+            CanchaDisciplina.id_disciplina == id_disciplina,
+            Cancha.estado == "disponible",
+            EspacioDeportivo.estado == "activo",
+        )
+    )
+    if precio_max is not None:
+        consulta = consulta.where(Cancha.precio_por_hora <= precio_max)
+    if punto is not None:
+        lat, lon = punto
+        delta_lat = radio_km / KM_POR_GRADO
+        delta_lon = radio_km / (KM_POR_GRADO * max(math.cos(math.radians(lat)), 0.01))
+        consulta = consulta.where(
+            EspacioDeportivo.latitud.between(lat - delta_lat, lat + delta_lat),
+            EspacioDeportivo.longitud.between(lon - delta_lon, lon + delta_lon),
+        )
+    return db.execute(consulta).all()
+
+
+def _ocupados(db: Session, ids_canchas: List[int], fecha: date) -> Dict[int, List[Tuple[int, int]]]:
+    """{id_cancha: [(inicio, fin) en minutos]} de las reservas activas de la fecha"""
+    filas = db.execute(
+        select(Reserva.id_cancha, Reserva.hora_inicio, Reserva.hora_fin).where(
+            Reserva.fecha_reserva == fecha,
+            Reserva.estado.in_(ESTADOS_ACTIVOS),
+            Reserva.id_cancha.in_(ids_canchas),
+        )
+    )
+    resultado: Dict[int, List[Tuple[int, int]]] = {}
+    for fila in filas:
+        resultado.setdefault(fila.id_cancha, []).append((_minutos(fila.hora_inicio), _minutos(fila.hora_fin)))
+    return resultado
+
+
+def buscar_canchas_disponibles(
+    db: Session,
+    id_disciplina: int,
+    fecha: date,
+    hora_inicio: Optional[time] = None,
+    duracion_horas: int = 1,
+    flexibilidad_horas: int = 0,
+    punto: Optional[Tuple[float, float]] = None,
+    radio_km: float = 10.0,
+    precio_max: Optional[float] = None,
+    id_usuario: Optional[int] = None,
+    limite: int = 20,
+) -> dict:
+    """
+    Franjas libres (cancha, horario) ordenadas por cercanía a la hora deseada,
+    distancia y precio; retorna {"total", "resultados"}.
+    Las retenciones de id_usuario no ocupan el horario.
+    """
+    candidatas = _canchas_candidatas(db, id_disciplina, punto, radio_km, precio_max)
+    canchas = []
+    for cancha in candidatas:
+        distancia = None
+        if punto is not None:
+            distancia = distancia_km(punto[0], punto[1], cancha.latitud, cancha.longitud)
+            if distancia > radio_km:
+                continue
+        canchas.append((cancha, distancia))
+    if not canchas:
+        return {"total": 0, "resultados": []}
+
+    ocupados = _ocupados(db, [cancha.id_cancha for cancha, _ in canchas], fecha)
+    retenidas: Dict[int, Set[time]] = retenciones_service.horas_retenidas_del_dia(db, fecha, excluir_usuario=id_usuario)
+
+    ahora = datetime.now()
+    duracion = duracion_horas * 60
+    deseada = _minutos(hora_inicio) if hora_inicio is not None else None
+    franjas = []
+    for cancha, distancia in canchas:
+        reservas = ocupados.get(cancha.id_cancha, [])
+        horas_retenidas = retenidas.get(cancha.id_cancha, set())
+        precio = float(cancha.precio_por_hora)
+        for inicio in _inicios(_minutos(cancha.hora_apertura), _minutos(cancha.hora_cierre),
+                               duracion, deseada, flexibilidad_horas):
+            fin = inicio + duracion
+            hora_desde, hora_hasta = _hora(inicio), _hora(fin)
+            if datetime.combine(fecha, hora_desde) <= ahora:
+                continue
+            if any(r_inicio < fin and r_fin > inicio for r_inicio, r_fin in reservas):
+                continue
+            if horas_retenidas and retenciones_service.franja_retenida(horas_retenidas, hora_desde, hora_hasta):
+                continue
+            desvio = abs(inicio - deseada) / 60 if deseada is not None else 0
+            franjas.append({
+                "id_cancha": cancha.id_cancha,
+                "nombre_cancha": cancha.nombre,
+                "tipo": cancha.tipo,
+                "imagen": cancha.imagen,
+                "id_espacio_deportivo": cancha.id_espacio_deportivo,
+                "nombre_espacio": cancha.nombre_espacio,
+                "ubicacion": cancha.ubicacion,
+                "latitud": cancha.latitud,
+                "longitud": cancha.longitud,
+                "distancia_km": round(distancia, 2) if distancia is not None else None,
+                "fecha": fecha,
+                "hora_inicio": hora_desde,
+                "hora_fin": hora_hasta,
+                "desvio_horas": desvio,
+                "precio_por_hora": precio,
+                "costo_total": round(precio * duracion_horas, 2),
+            })
+
+    franjas.sort(key=lambda franja: (
+        franja["desvio_horas"], franja["distancia_km"] or 0, franja["precio_por_hora"],
+        franja["hora_inicio"], franja["id_cancha"],
+    ))
+    return {"total": len(franjas), "resultados": franjas[:limite]}
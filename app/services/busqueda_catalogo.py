@@ -0,0 +1,272 @@
+# app/services/busqueda_catalogo.py
+"""
+Búsqueda sobre el catálogo público: espacios deportivos activos, sus canchas
+(salvo las inactivas) y las disciplinas.
+
+El catálogo es chico (cientos de documentos), así que cada proceso arma un
+índice invertido en memoria con cuatro consultas y responde sin ir a la base:
+
+- textos normalizados (minúsculas, sin tildes) y separados en palabras,
+- cada palabra pesa según el campo: nombre > ubicación o tipo > descripción,
+- cada palabra de la consulta debe aparecer en el documento, completa, como
+  prefijo (autocompletar) o, si no hay ninguna, con hasta 1 o 2 errores de
+  tipeo según su largo,
+- facetas por disciplina y por espacio sobre los resultados.
+
+El índice se rearma cuando vence (BUSQUEDA_INDICE_TTL_SEGUNDOS) o cuando un
+endpoint de espacios, canchas o disciplinas llama a invalidar_indice(); los
+otros workers ven el cambio al vencer su copia.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.cancha import Cancha
+from app.models.cancha_disciplina import CanchaDisciplina
+from app.models.disciplina import Disciplina
+from app.models.espacio_deportivo import EspacioDeportivo
+
+logger = logging.getLogger(__name__)
+
+TIPOS = ("espacio", "cancha", "disciplina")
+# Peso de una palabra según el campo donde aparece
+PESO_NOMBRE = 3.0
+PESO_DETALLE = 2.0
+PESO_DESCRIPCION = 1.0
+# Fracción del peso para coincidencias por prefijo y con errores de tipeo
+FACTOR_PREFIJO = 0.7
+FACTOR_TIPEO = 0.5
+LARGO_MINIMO_TIPEO = 4
+FACETAS_MAXIMO = 10
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin tildes ("Fútbol" -> "futbol")"""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def palabras(texto: Optional[str]) -> List[str]:
+    return _PALABRA.findall(normalizar(texto))
+
+
+def distancia_edicion(a: str, b: str, maximo: int) -> int:
+    """
+    Distancia de edición con transposiciones (Damerau, OSA) entre a y b;
+    retorna maximo + 1 en cuanto se sabe que la supera
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2, anterior = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+class Documento(NamedTuple):
+    tipo: str
+    id: int
+    nombre: str
+    detalle: Optional[str]                # ubicación del espacio, tipo de cancha o descripción de la disciplina
+    id_espacio_deportivo: Optional[int]   # espacio de la cancha (o el propio espacio)
+    nombre_espacio: Optional[str]
+    disciplinas: FrozenSet[int]           # las de la cancha, las que ofrece el espacio o la propia disciplina
+    espacios: FrozenSet[int]              # el de la cancha, el propio espacio o donde se ofrece la disciplina
+
+
+class IndiceCatalogo:
+    """Índice invertido palabra -> {documento: peso} sobre el catálogo"""
+
+    def __init__(self, documentos: List[Tuple[Documento, Iterable[Tuple[Optional[str], float]]]],
+                 nombres_disciplinas: Dict[int, str], nombres_espacios: Dict[int, str]):
+        self.documentos: List[Documento] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+        for posicion, (documento, campos) in enumerate(documentos):
+            self.documentos.append(documento)
+            pesos: Dict[str, float] = {}
+            for texto, peso in campos:
+                for palabra in set(palabras(texto)):
+                    pesos[palabra] = pesos.get(palabra, 0.0) + peso
+            for palabra, peso in pesos.items():
+                self.postings.setdefault(palabra, {})[posicion] = peso
+        self.vocabulario = sorted(self.postings)
+        self.nombres_disciplinas = nombres_disciplinas
+        self.nombres_espacios = nombres_espacios
+
+    def _expandir(self, termino: str) -> Dict[str, float]:
+        """{palabra del índice: factor} que coinciden con el término de la consulta"""
+        coincidencias = {}
+        inicio = bisect_left(self.vocabulario, termino)
+        for palabra in self.vocabulario[inicio:]:
+            if not palabra.startswith(termino):
+                break
+            coincidencias[palabra] = 1.0 if palabra == termino else FACTOR_PREFIJO
+        if coincidencias or len(termino) < LARGO_MINIMO_TIPEO:
+            return coincidencias
+
+        maximo = 1 if len(termino) < 8 else 2
+        for palabra in self.vocabulario:
+            # También "futbl" -> "futbolito": el término contra el prefijo de su largo
+            if distancia_edicion(termino, palabra[:len(termino) + maximo], maximo) <= maximo:
+                coincidencias[palabra] = FACTOR_TIPEO
+        return coincidencias
+
+    def _puntajes(self, consulta: str) -> Dict[int, float]:
+        """{posición del documento: puntaje} de los que contienen todos los términos"""
+        puntajes: Optional[Dict[int, float]] = None
+        for termino in dict.fromkeys(palabras(consulta)):
+            del_termino: Dict[int, float] = {}
+            for palabra, factor in self._expandir(termino).items():
+                for posicion, peso in self.postings[palabra].items():
+                    del_termino[posicion] = max(del_termino.get(posicion, 0.0), peso * factor)
+            if puntajes is None:
+                puntajes = del_termino
+            else:
+                puntajes = {pos: p + del_termino[pos] for pos, p in puntajes.items() if pos in del_termino}
+            if not puntajes:
+                return {}
+        return puntajes or {}
+
+    def buscar(self, consulta: str, tipos: Optional[Iterable[str]] = None, id_disciplina: Optional[int] = None,
+               id_espacio: Optional[int] = None, limite: int = 20) -> dict:
+        """Resultados ordenados por puntaje, total y facetas {"disciplinas": [...], "espacios": [...]}"""
+        tipos = set(tipos or TIPOS)
+        encontrados = [
+            (self.documentos[posicion], puntaje) for posicion, puntaje in self._puntajes(consulta).items()
+            if self.documentos[posicion].tipo in tipos
+        ]
+        # Facetas disyuntivas: cada una se cuenta sin su propio filtro
+        por_espacio = [(d, p) for d, p in encontrados if id_espacio is None or id_espacio in d.espacios]
+        por_disciplina = [(d, p) for d, p in encontrados if id_disciplina is None or id_disciplina in d.disciplinas]
+        resultados = [(d, p) for d, p in por_espacio if id_disciplina is None or id_disciplina in d.disciplinas]
+        resultados.sort(key=lambda r: (-r[1], TIPOS.index(r[0].tipo), r[0].nombre))
+
+        return {
+            "total": len(resultados),
+            "resultados": [
+                {**documento._asdict(), "disciplinas": sorted(documento.disciplinas), "puntaje": round(puntaje, 3)}
+                for documento, puntaje in resultados[:limite]
+            ],
+            "facetas": {
+                "disciplinas": self._faceta(por_espacio, "disciplinas", self.nombres_disciplinas),
+                "espacios": self._faceta(por_disciplina, "espacios", self.nombres_espacios),
+            },
+        }
+
+    @staticmethod
+    def _faceta(resultados, campo: str, nombres: Dict[int, str]) -> List[dict]:
+        cantidades: Dict[int, int] = {}
+        for documento, _ in resultados:
+            for valor in getattr(documento, campo):
+                cantidades[valor] = cantidades.get(valor, 0) + 1
+        mayores = sorted(cantidades.items(), key=lambda c: (-c[1], nombres.get(c[0], "")))[:FACETAS_MAXIMO]
+        return [{"id": valor, "nombre": nombres.get(valor, ""), "cantidad": cantidad} for valor, cantidad in mayores]
+
+
+def construir_indice(db: Session) -> IndiceCatalogo:
+    """Arma el índice con cuatro consultas (espacios, canchas, disciplinas y cancha_disciplina)"""
+    espacios = db.execute(
+        select(EspacioDeportivo.id_espacio_deportivo, EspacioDeportivo.nombre,
+               EspacioDeportivo.ubicacion, EspacioDeportivo.descripcion)
+        .where(EspacioDeportivo.estado == "activo")
+    ).all()
+    canchas = db.execute(
+        select(Cancha.id_cancha, Cancha.nombre, Cancha.tipo, Cancha.id_espacio_deportivo)
+        .join(EspacioDeportivo, EspacioDeportivo.id_espacio_deportivo == Cancha.id_espacio_deportivo)
+        .where(EspacioDeportivo.estado == "activo", Cancha.estado != "inactiva")
+    ).all()
+    disciplinas = db.execute(select(Disciplina.id_disciplina, Disciplina.nombre, Disciplina.descripcion)).all()
+    relaciones = db.execute(select(CanchaDisciplina.id_cancha, CanchaDisciplina.id_disciplina)).all()
+
+    nombres_espacios = {e.id_espacio_deportivo: e.nombre for e in espacios}
+    nombres_disciplinas = {d.id_disciplina: d.nombre for d in disciplinas}
+    espacio_de_cancha = {c.id_cancha: c.id_espacio_deportivo for c in canchas}
+    disciplinas_cancha: Dict[int, set] = {}
+    disciplinas_espacio: Dict[int, set] = {}
+    espacios_disciplina: Dict[int, set] = {}
+    for id_cancha, id_disciplina in relaciones:
+        if id_cancha not in espacio_de_cancha:
+            continue
+        id_espacio = espacio_de_cancha[id_cancha]
+        disciplinas_cancha.setdefault(id_cancha, set()).add(id_disciplina)
+        disciplinas_espacio.setdefault(id_espacio, set()).add(id_disciplina)
+        espacios_disciplina.setdefault(id_disciplina, set()).add(id_espacio)
+
+    def texto_disciplinas(ids) -> str:
+        return " ".join(nombres_disciplinas.get(id_disciplina, "") for id_disciplina in ids)
+
+    # Las disciplinas también encuentran los espacios y canchas donde se practican, con menos peso
+    documentos = []
+    for e in espacios:
+        documentos.append((
+            Documento("espacio", e.id_espacio_deportivo, e.nombre, e.ubicacion, e.id_espacio_deportivo, e.nombre,
+                      frozenset(disciplinas_espacio.get(e.id_espacio_deportivo, ())),
+                      frozenset([e.id_espacio_deportivo])),
+            [(e.nombre, PESO_NOMBRE), (e.ubicacion, PESO_DETALLE), (e.descripcion, PESO_DESCRIPCION),
+             (texto_disciplinas(disciplinas_espacio.get(e.id_espacio_deportivo, ())), PESO_DESCRIPCION)],
+        ))
+    for c in canchas:
+        documentos.append((
+            Documento("cancha", c.id_cancha, c.nombre, c.tipo, c.id_espacio_deportivo,
+                      nombres_espacios.get(c.id_espacio_deportivo),
+                      frozenset(disciplinas_cancha.get(c.id_cancha, ())), frozenset([c.id_espacio_deportivo])),
+            [(c.nombre, PESO_NOMBRE), (c.tipo, PESO_DETALLE),
+             (nombres_espacios.get(c.id_espacio_deportivo), PESO_DESCRIPCION),
+             (texto_disciplinas(disciplinas_cancha.get(c.id_cancha, ())), PESO_DESCRIPCION)],
+        ))
+    for d in disciplinas:
+        documentos.append((
+            Documento("disciplina", d.id_disciplina, d.nombre, d.descripcion, None, None,
+                      frozenset([d.id_disciplina]), frozenset(espacios_disciplina.get(d.id_disciplina, ()))),
+            [(d.nombre, PESO_NOMBRE), (d.descripcion, PESO_DESCRIPCION)],
+        ))
+
+    return IndiceCatalogo(documentos, nombres_disciplinas, nombres_espacios)
+
+
+_lock = threading.Lock()
+# (vence, índice)
+_indice: Optional[Tuple[float, IndiceCatalogo]] = None
+
+
+def indice_catalogo(db: Session) -> IndiceCatalogo:
+    """Índice vigente del proceso; lo arma si venció o fue invalidado"""
+    global _indice
+    actual = _indice
+    if actual and actual[0] > time.monotonic():
+        return actual[1]
+    # Una sola reconstrucción a la vez; las demás requests esperan y usan el resultado
+    with _lock:
+        actual = _indice
+        if actual and actual[0] > time.monotonic():
+            return actual[1]
+        inicio = time.perf_counter()
+        indice = construir_indice(db)
+        _indice = (time.monotonic() + settings.BUSQUEDA_INDICE_TTL_SEGUNDOS, indice)
+    logger.debug("🔎 Índice de búsqueda armado: %s documentos, %s palabras en %.1f ms",
+                 len(indice.documentos), len(indice.vocabulario), (time.perf_counter() - inicio) * 1000)
+    return indice
+
+
+def invalidar_indice() -> None:
+    """El próximo request de búsqueda de este proceso rearma el índice"""
+    global _indice
+    _indice = None
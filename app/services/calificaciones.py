@@ -0,0 +1,202 @@
+# app/services/calificaciones.py
+"""
+Resumen de calificaciones por cancha y por espacio (tablas
+calificaciones_cancha y calificaciones_espacio).
+
+Cada comentario con calificación (1-5) suma a la cancha: cantidad, suma y
+una columna por cantidad de estrellas; el espacio acumula las de sus
+canchas. Igual que app/services/estadisticas_usuario.py, los cambios se
+calculan en before_flush y se escriben en after_flush, en la misma
+transacción que el comentario:
+
+- alta, baja o cambio de calificación o de cancha de un comentario,
+- una cancha que cambia de espacio lleva su resumen al espacio nuevo,
+- una cancha eliminada descuenta su resumen del espacio (su fila y sus
+  comentarios se borran en cascada).
+
+Las respuestas de cancha y espacio traen el resumen en el mismo SELECT
+(relación calificaciones, lazy="joined"), sin consultas por cancha.
+
+Los cambios con SQL directo no pasan por el evento;
+scripts/check_calificaciones.py detecta y corrige diferencias.
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.calificaciones import CalificacionesCancha, CalificacionesEspacio
+from app.models.cancha import Cancha
+from app.models.comentario import Comentario
+from app.services.estadisticas_usuario import modificado, valor_anterior, valor_nuevo
+
+logger = logging.getLogger(__name__)
+
+ESTRELLAS = ("estrellas_1", "estrellas_2", "estrellas_3", "estrellas_4", "estrellas_5")
+CONTADORES = ("cantidad", "suma") + ESTRELLAS
+
+
+def _aporte(calificacion: Optional[int]) -> dict:
+    if calificacion is None:
+        return {}
+    return {"cantidad": 1, "suma": calificacion, f"estrellas_{calificacion}": 1}
+
+
+def _acumular(deltas: dict, clave: Optional[int], aporte: dict, signo: int = 1):
+    if clave is None:
+        return
+    for contador, valor in aporte.items():
+        deltas[clave][contador] += signo * valor
+
+
+def _sin_ceros(deltas: dict) -> Dict[int, dict]:
+    return {clave: dict(delta) for clave, delta in deltas.items() if any(delta.values())}
+
+
+def _calcular_cambios(session: Session) -> dict:
+    """Deltas por cancha y por espacio, y canchas que cambian de espacio; con la base en el estado anterior"""
+    por_cancha = defaultdict(lambda: defaultdict(int))
+    por_espacio = defaultdict(lambda: defaultdict(int))
+    canchas_borradas = [obj for obj in session.deleted if isinstance(obj, Cancha)]
+    ids_borradas = {cancha.id_cancha for cancha in canchas_borradas}
+
+    for comentario in (obj for obj in session.new if isinstance(obj, Comentario)):
+        _acumular(por_cancha, comentario.id_cancha, _aporte(valor_nuevo(comentario, "calificacion")))
+    for comentario in (obj for obj in session.deleted if isinstance(obj, Comentario)):
+        _acumular(por_cancha, valor_anterior(session, comentario, "id_cancha"),
+                  _aporte(valor_anterior(session, comentario, "calificacion")), -1)
+    for comentario in (obj for obj in session.dirty if isinstance(obj, Comentario)):
+        if modificado(comentario, "calificacion") or modificado(comentario, "id_cancha"):
+            _acumular(por_cancha, valor_anterior(session, comentario, "id_cancha"),
+                      _aporte(valor_anterior(session, comentario, "calificacion")), -1)
+            _acumular(por_cancha, comentario.id_cancha, _aporte(comentario.calificacion))
+
+    # La fila de una cancha eliminada se borra en cascada: solo cuenta para su espacio
+    for id_cancha in ids_borradas:
+        por_cancha.pop(id_cancha, None)
+    por_cancha = _sin_ceros(por_cancha)
+
+    if por_cancha:
+        espacios = dict(session.execute(
+            select(Cancha.id_cancha, Cancha.id_espacio_deportivo).where(Cancha.id_cancha.in_(por_cancha))
+        ).all())
+        # Canchas y comentarios nuevos en el mismo flush
+        espacios.update({
+            obj.id_cancha: obj.id_espacio_deportivo for obj in session.new
+            if isinstance(obj, Cancha) and obj.id_cancha in por_cancha
+        })
+        for id_cancha, delta in por_cancha.items():
+            _acumular(por_espacio, espacios.get(id_cancha), delta)
+
+    if ids_borradas:
+        tabla = CalificacionesCancha.__table__
+        resumenes = session.execute(select(tabla).where(tabla.c.id_cancha.in_(ids_borradas))).all()
+        for resumen in resumenes:
+            cancha = next(c for c in canchas_borradas if c.id_cancha == resumen.id_cancha)
+            _acumular(por_espacio, valor_anterior(session, cancha, "id_espacio_deportivo"),
+                      {contador: getattr(resumen, contador) for contador in CONTADORES}, -1)
+
+    movidas: List[Tuple[int, Optional[int], Optional[int]]] = [
+        (cancha.id_cancha, valor_anterior(session, cancha, "id_espacio_deportivo"), cancha.id_espacio_deportivo)
+        for cancha in session.dirty
+        if isinstance(cancha, Cancha) and modificado(cancha, "id_espacio_deportivo")
+    ]
+
+    return {"canchas": por_cancha, "espacios": _sin_ceros(por_espacio), "movidas": movidas}
+
+
+@event.listens_for(Session, "before_flush")
+def _calcular_calificaciones(session: Session, flush_context, instances):
+    # Se reemplaza en cada flush: un flush fallido no deja cambios para el siguiente
+    session.info["calificaciones_pendientes"] = _calcular_cambios(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _actualizar_calificaciones(session: Session, flush_context):
+    cambios = session.info.pop("calificaciones_pendientes", None)
+    if not cambios:
+        return
+    conexion = session.connection()
+    aplicar_deltas(conexion, CalificacionesCancha.__table__, cambios["canchas"])
+
+    por_espacio = defaultdict(lambda: defaultdict(int))
+    for id_espacio, delta in cambios["espacios"].items():
+        _acumular(por_espacio, id_espacio, delta)
+    if cambios["movidas"]:
+        # Con los deltas de este flush ya aplicados, la cancha lleva todo su resumen al espacio nuevo
+        tabla = CalificacionesCancha.__table__
+        resumenes = {fila.id_cancha: fila for fila in conexion.execute(
+            select(tabla).where(tabla.c.id_cancha.in_([id_cancha for id_cancha, _, _ in cambios["movidas"]]))
+        )}
+        for id_cancha, espacio_anterior, espacio_nuevo in cambios["movidas"]:
+            resumen = resumenes.get(id_cancha)
+            if resumen is None or espacio_anterior == espacio_nuevo:
+                continue
+            aporte = {contador: getattr(resumen, contador) for contador in CONTADORES}
+            _acumular(por_espacio, espacio_anterior, aporte, -1)
+            _acumular(por_espacio, espacio_nuevo, aporte)
+    aplicar_deltas(conexion, CalificacionesEspacio.__table__, _sin_ceros(por_espacio))
+
+
+def aplicar_deltas(conexion, tabla, deltas: Dict[int, dict]) -> None:
+    """Suma los cambios ({clave: {contador: delta}}) a calificaciones_cancha o calificaciones_espacio"""
+    if not deltas:
+        return
+    clave = tabla.primary_key.columns.values()[0]
+    insert = postgresql.insert if conexion.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(tabla)
+    # Una sentencia: la primera calificación crea la fila, las siguientes suman (ordenadas por clave)
+    conexion.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[clave],
+            set_={
+                **{contador: tabla.c[contador] + stmt.excluded[contador] for contador in CONTADORES},
+                "fecha_actualizacion": func.now(),
+            }
+        ),
+        [
+            {clave.name: id_, **{contador: deltas[id_].get(contador, 0) for contador in CONTADORES}}
+            for id_ in sorted(deltas)
+        ]
+    )
+    logger.debug("⭐ Calificaciones actualizadas en %s para %s filas", tabla.name, len(deltas))
+
+
+def _columnas_resumen(calificacion):
+    return [
+        func.count(calificacion).label("cantidad"),
+        func.coalesce(func.sum(calificacion), 0).label("suma"),
+        *(func.sum(case((calificacion == estrellas, 1), else_=0)).label(f"estrellas_{estrellas}")
+          for estrellas in range(1, 6)),
+    ]
+
+
+def consultas_recalculo():
+    """(por cancha, por espacio) calculadas desde comentario (verificación y reparación de las tablas)"""
+    por_cancha = select(
+        Comentario.id_cancha, *_columnas_resumen(Comentario.calificacion)
+    ).where(Comentario.calificacion.isnot(None)).group_by(Comentario.id_cancha)
+    por_espacio = select(
+        Cancha.id_espacio_deportivo, *_columnas_resumen(Comentario.calificacion)
+    ).join(Cancha, Cancha.id_cancha == Comentario.id_cancha).where(
+        Comentario.calificacion.isnot(None), Cancha.id_espacio_deportivo.isnot(None)
+    ).group_by(Cancha.id_espacio_deportivo)
+    return por_cancha, por_espacio
+
+
+def recalcular_calificaciones(conexion) -> int:
+    """
+    Reconstruye las dos tablas desde comentario (después de cargas masivas
+    o para reparar diferencias); retorna las filas escritas
+    """
+    filas = 0
+    for tabla, consulta in zip((CalificacionesCancha.__table__, CalificacionesEspacio.__table__),
+                               consultas_recalculo()):
+        conexion.execute(tabla.delete())
+        filas += conexion.execute(tabla.insert().from_select(
+            [columna.name for columna in consulta.selected_columns], consulta
+        )).rowcount
+    return filas
@@ -0,0 +1,179 @@
+# app/services/ciclo_reservas.py
+"""
+Ciclo de vida de reservas por tiempo.
+
+Cada transición es un UPDATE por conjunto, en lotes de CICLO_RESERVAS_LOTE
+filas, en lugar de cargar y modificar las reservas una por una:
+
+- pendiente → cancelada: sin pago completado después de
+  RESERVA_PENDIENTE_EXPIRA_MINUTOS; libera el horario en
+  verificar_disponibilidad y deja su registro en cancelacion.
+- confirmada → en_curso: el horario empezó.
+- confirmada / en_curso → completada: el horario terminó.
+
+El UPDATE retorna el usuario de cada fila (RETURNING) para actualizar
+estadisticas_usuario en la misma transacción. En PostgreSQL un advisory
+lock deja ejecutar el ciclo a un solo proceso por vez, y las filas que
+otra transacción tiene bloqueadas quedan para la próxima ejecución.
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import and_, exists, insert, or_, select, text, update
+
+from app.config import settings
+from app.core.metrics import CICLO_DURACION, CICLO_TRANSICIONES, CICLO_ULTIMA_EJECUCION
+from app.database import engine
+from app.models.asistente import AsistenteReserva
+from app.models.cancelacion import Cancelacion
+from app.models.pago import Pago
+from app.models.reserva import Reserva
+from app.services.estadisticas_usuario import aplicar_deltas
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de PostgreSQL para el ciclo (única en la aplicación)
+CLAVE_BLOQUEO = 42_042
+MOTIVO_EXPIRACION = "Expirada: sin pago dentro del tiempo de reserva"
+
+
+def _actualizar_lote(conexion, condicion, estado: str, retorno, lote: int) -> list:
+    """UPDATE de hasta `lote` reservas que cumplen la condición; retorna las filas de RETURNING"""
+    ids = (
+        select(Reserva.id_reserva)
+        .where(condicion)
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    # La condición se repite: una fila que cambió entre el SELECT y el UPDATE no se toca
+    return conexion.execute(
+        update(Reserva).where(Reserva.id_reserva.in_(ids), condicion).values(estado=estado).returning(*retorno)
+    ).all()
+
+
+def expirar_pendientes(conexion, ahora: datetime, lote: int) -> int:
+    limite = ahora.astimezone(timezone.utc) - timedelta(minutes=settings.RESERVA_PENDIENTE_EXPIRA_MINUTOS)
+    pagada = exists().where(and_(Pago.id_reserva == Reserva.id_reserva, Pago.estado == "completado"))
+    filas = _actualizar_lote(
+        conexion,
+        and_(Reserva.estado == "pendiente", Reserva.fecha_creacion <= limite, ~pagada),
+        "cancelada", (Reserva.id_reserva, Reserva.id_usuario), lote
+    )
+    if not filas:
+        return 0
+
+    conexion.execute(insert(Cancelacion), [
+        {"motivo": MOTIVO_EXPIRACION, "id_reserva": fila.id_reserva, "id_usuario": fila.id_usuario}
+        for fila in filas
+    ])
+    deltas = defaultdict(lambda: {"reservas_activas": 0, "reservas_canceladas": 0})
+    for fila in filas:
+        if fila.id_usuario is not None:
+            deltas[fila.id_usuario]["reservas_activas"] -= 1
+            deltas[fila.id_usuario]["reservas_canceladas"] += 1
+    aplicar_deltas(conexion, deltas)
+    return len(filas)
+
+
+def iniciar_en_curso(conexion, ahora: datetime, lote: int) -> int:
+    # Confirmada y en_curso son ambas activas: las estadísticas no cambian
+    filas = _actualizar_lote(
+        conexion,
+        and_(
+            Reserva.estado == "confirmada",
+            Reserva.fecha_reserva == ahora.date(),
+            Reserva.hora_inicio <= ahora.time(),
+            Reserva.hora_fin > ahora.time(),
+        ),
+        "en_curso", (Reserva.id_reserva,), lote
+    )
+    return len(filas)
+
+
+def completar_terminadas(conexion, ahora: datetime, lote: int) -> int:
+    asistio = exists().where(and_(
+        AsistenteReserva.id_reserva == Reserva.id_reserva, AsistenteReserva.asistio.is_(True)
+    )).label("asistio")
+    filas = _actualizar_lote(
+        conexion,
+        and_(
+            Reserva.estado.in_(("confirmada", "en_curso")),
+            or_(
+                Reserva.fecha_reserva < ahora.date(),
+                and_(Reserva.fecha_reserva == ahora.date(), Reserva.hora_fin <= ahora.time()),
+            ),
+        ),
+        "completada", (Reserva.id_usuario, asistio), lote
+    )
+
+    deltas = defaultdict(lambda: {"reservas_activas": 0, "inasistencias": 0})
+    for fila in filas:
+        if fila.id_usuario is not None:
+            deltas[fila.id_usuario]["reservas_activas"] -= 1
+            deltas[fila.id_usuario]["inasistencias"] += 0 if fila.asistio else 1
+    aplicar_deltas(conexion, deltas)
+    return len(filas)
+
+
+# Las terminadas primero: una reserva cuyo horario ya pasó no se marca en_curso
+TRANSICIONES = (
+    ("pendiente_a_cancelada", expirar_pendientes),
+    ("a_completada", completar_terminadas),
+    ("confirmada_a_en_curso", iniciar_en_curso),
+)
+
+
+def _tomar_bloqueo(conexion) -> bool:
+    if conexion.dialect.name != "postgresql":
+        return True
+    tomado = conexion.execute(text("SELECT pg_try_advisory_lock(:clave)"), {"clave": CLAVE_BLOQUEO}).scalar()
+    conexion.commit()
+    return bool(tomado)
+
+
+def _soltar_bloqueo(conexion) -> None:
+    if conexion.dialect.name == "postgresql":
+        conexion.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": CLAVE_BLOQUEO})
+        conexion.commit()
+
+
+def ejecutar_ciclo(ahora: Optional[datetime] = None, lote: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    Aplica las transiciones pendientes; retorna cuántas reservas cambió cada
+    una, o None si otro proceso está ejecutando el ciclo
+    """
+    ahora = ahora or datetime.now()
+    lote = lote or settings.CICLO_RESERVAS_LOTE
+    inicio = time.perf_counter()
+
+    with engine.connect() as conexion:
+        if not _tomar_bloqueo(conexion):
+            logger.debug("⏭️ Ciclo de reservas en ejecución en otro proceso")
+            return None
+        try:
+            totales = {}
+            for nombre, transicion in TRANSICIONES:
+                totales[nombre] = 0
+                while True:
+                    # Un lote por transacción: no se bloquean miles de filas a la vez
+                    with conexion.begin():
+                        cambiadas = transicion(conexion, ahora, lote)
+                    totales[nombre] += cambiadas
+                    if cambiadas < lote:
+                        break
+                CICLO_TRANSICIONES.labels(nombre).inc(totales[nombre])
+        finally:
+            _soltar_bloqueo(conexion)
+
+    duracion = time.perf_counter() - inicio
+    CICLO_DURACION.observe(duracion)
+    CICLO_ULTIMA_EJECUCION.set_to_current_time()
+    if any(totales.values()):
+        logger.info("🔄 Ciclo de reservas en %.3fs: %s", duracion, totales)
+    else:
+        logger.debug("🔄 Ciclo de reservas sin cambios (%.3fs)", duracion)
+    return totales
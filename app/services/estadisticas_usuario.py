@@ -0,0 +1,247 @@
+# app/services/estadisticas_usuario.py
+"""
+Estadísticas de reservas por usuario (tabla estadisticas_usuario).
+
+Cuando se crea, cambia de estado o se elimina una reserva o un pago, los
+cambios de los contadores se calculan en before_flush (con la base todavía
+en el estado anterior) y se escriben en after_flush: van en la misma
+transacción que el cambio y se confirman o revierten con él. La
+regla del cupón de bienvenida y el perfil leen una fila por clave primaria
+en lugar de contar las reservas del usuario.
+
+Los cambios hechos con query().update() o SQL directo no pasan por el
+evento: deben llamar a aplicar_deltas (como el ciclo de vida de reservas);
+scripts/check_estadisticas_usuario.py detecta y corrige diferencias.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, event, exists, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.asistente import AsistenteReserva
+from app.models.estadistica_usuario import EstadisticaUsuario
+from app.models.pago import Pago
+from app.models.reserva import Reserva
+from app.services.particiones_reserva import reservas_con_archivo
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_ACTIVOS = ("pendiente", "confirmada", "en_curso")
+CONTADORES = ("reservas_totales", "reservas_activas", "reservas_canceladas", "inasistencias", "total_gastado")
+
+
+def valor_anterior(session: Session, obj, atributo: str):
+    """Valor del atributo en la base antes de este flush"""
+    historia = inspect(obj).attrs[atributo].history
+    if historia.deleted:
+        return historia.deleted[0]
+    if historia.unchanged:
+        return historia.unchanged[0]
+    # Se asignó sobre una instancia expirada (después de un commit): la base aún tiene el valor
+    mapper = inspect(obj).mapper
+    columna = mapper.columns[atributo]
+    clave = mapper.primary_key[0]
+    return session.execute(
+        select(columna).where(clave == inspect(obj).identity[0])
+    ).scalar()
+
+
+def valor_nuevo(obj, atributo: str):
+    """Valor que se escribirá; en un INSERT sin valor se aplica el default de la columna"""
+    valor = getattr(obj, atributo)
+    if valor is None and inspect(obj).pending:
+        default = inspect(obj).mapper.columns[atributo].default
+        valor = default.arg if default is not None and default.is_scalar else None
+    return valor
+
+
+def modificado(obj, atributo: str) -> bool:
+    return inspect(obj).attrs[atributo].history.has_changes()
+
+
+def _inasistencia(session: Session, reserva: Reserva, estado: Optional[str]) -> int:
+    """Una reserva completada en la que ningún asistente registró su ingreso"""
+    if estado != "completada" or reserva.id_reserva is None:
+        return int(estado == "completada")
+    asistio = session.execute(
+        select(exists().where(and_(
+            AsistenteReserva.id_reserva == reserva.id_reserva, AsistenteReserva.asistio.is_(True)
+        )))
+    ).scalar()
+    return 0 if asistio else 1
+
+
+def _aporte_reserva(session: Session, reserva: Reserva, estado: Optional[str]) -> dict:
+    return {
+        "reservas_totales": 1,
+        "reservas_activas": int(estado in ESTADOS_ACTIVOS),
+        "reservas_canceladas": int(estado == "cancelada"),
+        "inasistencias": _inasistencia(session, reserva, estado),
+    }
+
+
+def _aporte_pago(estado: Optional[str], monto) -> Decimal:
+    return Decimal(monto or 0) if estado == "completado" else Decimal(0)
+
+
+def _usuario_del_pago(session: Session, pago: Pago) -> Optional[int]:
+    if pago.id_reserva is not None:
+        return session.execute(
+            select(Reserva.id_usuario).where(Reserva.id_reserva == pago.id_reserva)
+        ).scalar()
+    # Pago y reserva nuevos en el mismo flush
+    return pago.reserva.id_usuario if pago.reserva is not None else None
+
+
+def _acumular(deltas: dict, id_usuario: Optional[int], antes: dict, despues: dict):
+    if id_usuario is None:
+        return
+    for contador in set(antes) | set(despues):
+        deltas[id_usuario][contador] += despues.get(contador, 0) - antes.get(contador, 0)
+
+
+def _calcular_deltas(session: Session) -> Dict[int, dict]:
+    """Cambios de los contadores por usuario; se calcula antes del flush, con la base en el estado anterior"""
+    deltas = defaultdict(lambda: defaultdict(int))
+
+    for reserva in (obj for obj in session.new if isinstance(obj, Reserva)):
+        despues = _aporte_reserva(session, reserva, valor_nuevo(reserva, "estado"))
+        _acumular(deltas, reserva.id_usuario, {}, despues)
+    for reserva in (obj for obj in session.deleted if isinstance(obj, Reserva)):
+        antes = _aporte_reserva(session, reserva, valor_anterior(session, reserva, "estado"))
+        _acumular(deltas, reserva.id_usuario, antes, {})
+    for reserva in (obj for obj in session.dirty if isinstance(obj, Reserva)):
+        if modificado(reserva, "estado"):
+            antes = _aporte_reserva(session, reserva, valor_anterior(session, reserva, "estado"))
+            _acumular(deltas, reserva.id_usuario, antes, _aporte_reserva(session, reserva, reserva.estado))
+
+    for pago in (obj for obj in session.new if isinstance(obj, Pago)):
+        despues = _aporte_pago(valor_nuevo(pago, "estado"), pago.monto)
+        if despues:
+            _acumular(deltas, _usuario_del_pago(session, pago), {}, {"total_gastado": despues})
+    for pago in (obj for obj in session.deleted if isinstance(obj, Pago)):
+        antes = _aporte_pago(valor_anterior(session, pago, "estado"), valor_anterior(session, pago, "monto"))
+        if antes:
+            _acumular(deltas, _usuario_del_pago(session, pago), {"total_gastado": antes}, {})
+    for pago in (obj for obj in session.dirty if isinstance(obj, Pago)):
+        if modificado(pago, "estado") or modificado(pago, "monto"):
+            antes = _aporte_pago(valor_anterior(session, pago, "estado"), valor_anterior(session, pago, "monto"))
+            despues = _aporte_pago(pago.estado, pago.monto)
+            if antes != despues:
+                _acumular(deltas, _usuario_del_pago(session, pago), {"total_gastado": antes}, {"total_gastado": despues})
+
+    return {
+        id_usuario: dict(delta) for id_usuario, delta in deltas.items()
+        if any(delta.values())
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _calcular_estadisticas(session: Session, flush_context, instances):
+    # Se reemplaza en cada flush: un flush fallido no deja deltas para el siguiente
+    session.info["estadisticas_pendientes"] = _calcular_deltas(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _actualizar_estadisticas(session: Session, flush_context):
+    deltas = session.info.pop("estadisticas_pendientes", None)
+    if deltas:
+        aplicar_deltas(session.connection(), deltas)
+
+
+def aplicar_deltas(conexion, deltas: Dict[int, dict]) -> None:
+    """
+    Suma los cambios por usuario ({id_usuario: {contador: delta}}) en la
+    transacción de la conexión; lo usan el flush de la sesión y las
+    actualizaciones masivas (app/services/ciclo_reservas.py)
+    """
+    if not deltas:
+        return
+    tabla = EstadisticaUsuario.__table__
+    insert = postgresql.insert if conexion.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(tabla)
+    # Una sola sentencia (executemany): el primer cambio del usuario crea la fila, los siguientes suman.
+    # Ordenadas por usuario para que transacciones concurrentes bloqueen las filas en el mismo orden
+    conexion.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[tabla.c.id_usuario],
+            set_={
+                **{contador: tabla.c[contador] + stmt.excluded[contador] for contador in CONTADORES},
+                "fecha_actualizacion": func.now(),
+            }
+        ),
+        [
+            {"id_usuario": id_usuario, **{contador: deltas[id_usuario].get(contador, 0) for contador in CONTADORES}}
+            for id_usuario in sorted(deltas)
+        ]
+    )
+    logger.debug("📊 Estadísticas actualizadas para %s usuarios", len(deltas))
+
+
+def obtener_estadisticas(db: Session, id_usuario: int) -> EstadisticaUsuario:
+    """Fila del usuario; uno sin reservas recibe contadores en cero (sin guardar)"""
+    estadisticas = db.get(EstadisticaUsuario, id_usuario)
+    if estadisticas is None:
+        estadisticas = EstadisticaUsuario(id_usuario=id_usuario, **{contador: 0 for contador in CONTADORES})
+    return estadisticas
+
+
+def reservas_vigentes(db: Session, id_usuario: int) -> int:
+    """Reservas no canceladas del usuario, incluidas las ya enviadas con flush en esta transacción"""
+    vigentes = db.execute(
+        select(EstadisticaUsuario.reservas_totales - EstadisticaUsuario.reservas_canceladas)
+        .where(EstadisticaUsuario.id_usuario == id_usuario)
+    ).scalar()
+    return vigentes or 0
+
+
+def consulta_recalculo(reservas=None):
+    """
+    Estadísticas calculadas desde reserva y pago (verificación y reparación de la tabla).
+    `reservas` es la fuente de reservas: por defecto la tabla reserva; con meses
+    archivados, reservas_con_archivo(conexion) para contarlos también
+    """
+    r = Reserva.__table__ if reservas is None else reservas
+    asistio = exists().where(and_(
+        AsistenteReserva.id_reserva == r.c.id_reserva, AsistenteReserva.asistio.is_(True)
+    ))
+    por_usuario = select(
+        r.c.id_usuario.label("id_usuario"),
+        func.count().label("reservas_totales"),
+        func.sum(case((r.c.estado.in_(ESTADOS_ACTIVOS), 1), else_=0)).label("reservas_activas"),
+        func.sum(case((r.c.estado == "cancelada", 1), else_=0)).label("reservas_canceladas"),
+        func.sum(case((and_(r.c.estado == "completada", ~asistio), 1), else_=0)).label("inasistencias"),
+    ).where(r.c.id_usuario.isnot(None)).group_by(r.c.id_usuario).subquery()
+    pagos = select(
+        r.c.id_usuario.label("id_usuario"),
+        func.sum(Pago.monto).label("total_gastado"),
+    ).join(r, r.c.id_reserva == Pago.id_reserva).where(
+        Pago.estado == "completado"
+    ).group_by(r.c.id_usuario).subquery()
+    return select(
+        por_usuario.c.id_usuario,
+        por_usuario.c.reservas_totales,
+        por_usuario.c.reservas_activas,
+        por_usuario.c.reservas_canceladas,
+        por_usuario.c.inasistencias,
+        func.coalesce(pagos.c.total_gastado, 0).label("total_gastado"),
+    ).outerjoin(pagos, pagos.c.id_usuario == por_usuario.c.id_usuario)
+
+
+def recalcular_estadisticas(conexion) -> int:
+    """
+    Reconstruye la tabla desde reserva (con los meses archivados) y pago
+    (después de cargas masivas que no pasan por la sesión, o para reparar
+    diferencias); retorna las filas escritas
+    """
+    tabla = EstadisticaUsuario.__table__
+    consulta = consulta_recalculo(reservas_con_archivo(conexion))
+    conexion.execute(tabla.delete())
+    resultado = conexion.execute(tabla.insert().from_select(
+        [columna.name for columna in consulta.selected_columns], consulta
+    ))
+    return resultado.rowcount
@@ -0,0 +1,425 @@
+# app/services/eventos_pago.py
+"""
+Eventos del proveedor de pagos (webhooks) con procesamiento asíncrono.
+
+POST /pagos/webhook/{proveedor} solo verifica la firma y guarda el evento
+en la tabla evento_pago (bandeja de entrada) con un INSERT ... ON CONFLICT
+DO NOTHING sobre (proveedor, id_evento): un evento que el proveedor
+reenvía se guarda una sola vez y responde 200 igual. El request no toca
+pago ni reserva, así una ráfaga de webhooks no ocupa el threadpool.
+
+Un hilo por worker web (EVENTOS_PAGO_WORKER_HABILITADO) se despierta con
+cada evento nuevo y procesa los pendientes en lotes de EVENTOS_PAGO_LOTE,
+una transacción por lote: el pago y su reserva cambian juntos (un
+SAVEPOINT por evento aísla los que fallan). En PostgreSQL los lotes se
+toman con FOR UPDATE SKIP LOCKED, así varios workers y el programador
+(app/scheduler.py) se reparten los eventos sin procesar dos veces el mismo.
+
+- Un evento que falla (por ejemplo, el pago todavía no existe) se reintenta
+  después de EVENTOS_PAGO_REINTENTO_SEGUNDOS, duplicando la espera, hasta
+  EVENTOS_PAGO_MAX_INTENTOS; después queda en estado "error".
+- Los tipos que no cambian pagos quedan "ignorado".
+- Un cobro que llega cuando el ciclo de vida ya expiró la reserva (sin pago
+  a tiempo) la vuelve a confirmar si el horario sigue libre; si no, o si la
+  canceló el usuario, el pago queda "por_reembolsar" y el evento también
+  (no se purga), con la métrica pagos_eventos_procesados_total{resultado}.
+- Aplicar un evento dos veces no cambia nada: cada tipo lleva el pago a un
+  estado y un evento atrasado no deshace uno posterior.
+
+Proveedores: "stripe" (firma Stripe-Signature, STRIPE_WEBHOOK_SECRET) y
+"local" (mismo formato de evento, firma X-Pago-Firma con
+PAGOS_WEBHOOK_SECRET_LOCAL) para desarrollo y pruebas sin cuenta en Stripe;
+scripts/enviar_evento_pago.py lo simula.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, exists, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.core.metrics import EVENTOS_PAGO_DEMORA, EVENTOS_PAGO_PROCESADOS
+from app.database import SessionLocal
+from app.models.cancelacion import Cancelacion
+from app.models.evento_pago import EventoPago
+from app.models.pago import Pago
+from app.models.reserva import Reserva
+from app.services.ciclo_reservas import MOTIVO_EXPIRACION
+from app.services.estadisticas_usuario import ESTADOS_ACTIVOS
+from app.services.retenciones import retenciones_service
+
+logger = logging.getLogger(__name__)
+
+# Tipo de evento -> estado del pago
+ESTADO_POR_TIPO = {
+    "payment_intent.succeeded": "completado",
+    "checkout.session.completed": "completado",
+    "payment_intent.payment_failed": "fallido",
+    "charge.refunded": "reembolsado",
+}
+# Estados desde los que cada evento cambia el pago
+TRANSICIONES = {
+    "completado": {"pendiente", "fallido"},
+    "fallido": {"pendiente"},
+    "reembolsado": {"pendiente", "completado", "fallido", "por_reembolsar"},
+}
+# Resultados que cierran el evento (los demás se reintentan o quedan en error)
+RESULTADOS_FINALES = ("procesado", "ignorado", "por_reembolsar")
+LARGO_MAXIMO_ERROR = 1000
+
+
+class FirmaInvalida(Exception):
+    """La firma del webhook no corresponde al cuerpo o está vencida"""
+
+
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def firmar_local(cuerpo: bytes, secreto: str, timestamp: Optional[int] = None) -> str:
+    """Header X-Pago-Firma del proveedor local: t=<timestamp>,v1=<HMAC-SHA256 de "<timestamp>.<cuerpo>">"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    firma = hmac.new(secreto.encode(), f"{timestamp}.".encode() + cuerpo, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={firma}"
+
+
+class ProveedorPagos(ABC):
+    """Verificación de la firma de los webhooks de un proveedor"""
+    header: str = ""
+
+    @abstractmethod
+    def verificar(self, cuerpo: bytes, firma: Optional[str]) -> None:
+        """Lanza FirmaInvalida si la firma no corresponde al cuerpo"""
+
+
+class ProveedorStripe(ProveedorPagos):
+    header = "Stripe-Signature"
+
+    def verificar(self, cuerpo: bytes, firma: Optional[str]) -> None:
+        settings.requerir("STRIPE_WEBHOOK_SECRET")
+        # Import diferido: el SDK de Stripe no entra en el arranque de la app
+        import stripe
+        try:
+            stripe.WebhookSignature.verify_header(
+                cuerpo.decode("utf-8"), firma or "", settings.STRIPE_WEBHOOK_SECRET,
+                settings.PAGOS_WEBHOOK_TOLERANCIA_SEGUNDOS
+            )
+        except (stripe.SignatureVerificationError, UnicodeDecodeError) as e:
+            raise FirmaInvalida(str(e)) from e
+
+
+class ProveedorLocal(ProveedorPagos):
+    header = "X-Pago-Firma"
+
+    def verificar(self, cuerpo: bytes, firma: Optional[str]) -> None:
+        settings.requerir("PAGOS_WEBHOOK_SECRET_LOCAL")
+        partes = dict(parte.split("=", 1) for parte in (firma or "").split(",") if "=" in parte)
+        try:
+            timestamp = int(partes.get("t", ""))
+        except ValueError:
+            raise FirmaInvalida("Firma sin timestamp")
+        if abs(time.time() - timestamp) > settings.PAGOS_WEBHOOK_TOLERANCIA_SEGUNDOS:
+            raise FirmaInvalida("Firma vencida")
+        esperada = firmar_local(cuerpo, settings.PAGOS_WEBHOOK_SECRET_LOCAL, timestamp)
+        if not hmac.compare_digest(esperada, f"t={timestamp},v1={partes.get('v1', '')}"):
+            raise FirmaInvalida("Firma inválida")
+
+
+PROVEEDORES: Dict[str, ProveedorPagos] = {
+    "stripe": ProveedorStripe(),
+    "local": ProveedorLocal(),
+}
+
+
+def leer_evento(cuerpo: bytes) -> dict:
+    """Evento JSON del proveedor (con id y type); ValueError si el cuerpo no lo es"""
+    evento = json.loads(cuerpo)
+    if not isinstance(evento, dict) or not isinstance(evento.get("id"), str) or not isinstance(evento.get("type"), str):
+        raise ValueError("El evento debe tener id y type")
+    return evento
+
+
+def registrar_evento(proveedor: str, evento: dict, cuerpo: bytes) -> bool:
+    """Guarda el evento en la bandeja de entrada; False si ya estaba (reenvío del proveedor)"""
+    db = SessionLocal()
+    try:
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        ahora = _ahora()
+        resultado = db.execute(
+            insert(EventoPago.__table__).values(
+                proveedor=proveedor,
+                id_evento=evento["id"],
+                tipo=evento["type"][:100],
+                payload=cuerpo.decode("utf-8"),
+                estado="pendiente",
+                intentos=0,
+                recibido_en=ahora,
+                proximo_intento=ahora,
+            ).on_conflict_do_nothing(index_elements=["proveedor", "id_evento"])
+        )
+        db.commit()
+        return resultado.rowcount == 1
+    finally:
+        db.close()
+
+
+def _diccionario(valor) -> dict:
+    return valor if isinstance(valor, dict) else {}
+
+
+def _entero(valor) -> Optional[int]:
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _referencias(evento: EventoPago) -> Tuple[Optional[int], Optional[str], Optional[int], dict]:
+    """(id_pago, id_transaccion, id_reserva, objeto) del evento"""
+    # El cuerpo se validó al recibirlo (JSON con id y type); el resto puede faltar
+    objeto = _diccionario(_diccionario(json.loads(evento.payload).get("data")).get("object"))
+    metadata = _diccionario(objeto.get("metadata"))
+    # Charge y Checkout Session apuntan al PaymentIntent; en un PaymentIntent es su propio id
+    id_transaccion = objeto.get("payment_intent")
+    if not isinstance(id_transaccion, str):
+        id_transaccion = objeto.get("id") if isinstance(objeto.get("id"), str) else None
+    return _entero(metadata.get("id_pago")), id_transaccion, _entero(metadata.get("id_reserva")), objeto
+
+
+class _PagosDelLote:
+    """Pagos (con su reserva) de todos los eventos del lote, cargados en una consulta"""
+
+    def __init__(self, db: Session, referencias: List[Tuple[Optional[int], Optional[str], Optional[int], dict]]):
+        ids_pago = {ref[0] for ref in referencias if ref[0] is not None}
+        transacciones = {ref[1] for ref in referencias if ref[1] is not None}
+        ids_reserva = {ref[2] for ref in referencias if ref[2] is not None}
+        self.por_id: Dict[int, Pago] = {}
+        self.por_transaccion: Dict[str, Pago] = {}
+        self.por_reserva: Dict[int, Pago] = {}
+        condiciones = [
+            columna.in_(valores)
+            for columna, valores in ((Pago.id_pago, ids_pago), (Pago.id_transaccion, transacciones),
+                                     (Pago.id_reserva, ids_reserva))
+            if valores
+        ]
+        if condiciones:
+            for pago in db.scalars(select(Pago).options(selectinload(Pago.reserva)).where(or_(*condiciones))):
+                self.agregar(pago)
+
+    def agregar(self, pago: Pago) -> None:
+        self.por_id[pago.id_pago] = pago
+        if pago.id_transaccion:
+            self.por_transaccion[pago.id_transaccion] = pago
+        if pago.id_reserva is not None:
+            self.por_reserva.setdefault(pago.id_reserva, pago)
+
+    def buscar(self, id_pago: Optional[int], id_transaccion: Optional[str], id_reserva: Optional[int]) -> Optional[Pago]:
+        return (self.por_id.get(id_pago) or self.por_transaccion.get(id_transaccion)
+                or self.por_reserva.get(id_reserva))
+
+
+def _aplicar(db: Session, evento: EventoPago, pagos: _PagosDelLote) -> str:
+    """Lleva el pago y su reserva al estado del evento; retorna "procesado", "ignorado" o "por_reembolsar" """
+    estado = ESTADO_POR_TIPO.get(evento.tipo)
+    if estado is None:
+        return "ignorado"
+    id_pago, id_transaccion, id_reserva, objeto = _referencias(evento)
+
+    pago = pagos.buscar(id_pago, id_transaccion, id_reserva)
+    if pago is None:
+        if estado != "completado":
+            return "ignorado"
+        # El cobro llegó antes que POST /pagos/ (o sin él): el pago se crea desde el evento
+        reserva = db.get(Reserva, id_reserva) if id_reserva is not None else None
+        if reserva is None:
+            raise LookupError(f"Sin pago ni reserva para la transacción {id_transaccion}")
+        centavos = objeto.get("amount_received") or objeto.get("amount_total") or objeto.get("amount") or 0
+        pago = Pago(monto=Decimal(centavos) / 100, metodo_pago=evento.proveedor, estado="pendiente",
+                    id_transaccion=id_transaccion, id_reserva=reserva.id_reserva, reserva=reserva)
+        db.add(pago)
+        db.flush()
+        pagos.agregar(pago)
+
+    if id_transaccion and not pago.id_transaccion:
+        pago.id_transaccion = id_transaccion
+    cambia = pago.estado in TRANSICIONES[estado]
+    if cambia:
+        pago.estado = estado
+    reserva = pago.reserva
+    if pago.estado == "completado" and reserva is not None:
+        if reserva.estado == "pendiente":
+            reserva.estado = "confirmada"
+        elif reserva.estado == "cancelada" and cambia and not _reconfirmar(db, reserva):
+            # Cobrado sin horario: se devuelve el dinero (charge.refunded lo cierra)
+            pago.estado = "por_reembolsar"
+            logger.error("❌ Pago %s cobrado para la reserva cancelada %s: queda por reembolsar",
+                         pago.id_pago, reserva.id_reserva)
+            return "por_reembolsar"
+    return "procesado"
+
+
+def _reconfirmar(db: Session, reserva: Reserva) -> bool:
+    """
+    Confirma una reserva que el ciclo de vida expiró por falta de pago, si el
+    horario no pasó, no lo ocupa otra reserva y no lo retiene otro usuario
+    """
+    cancelacion = db.scalars(
+        select(Cancelacion).where(Cancelacion.id_reserva == reserva.id_reserva,
+                                  Cancelacion.motivo == MOTIVO_EXPIRACION)
+    ).first()
+    if cancelacion is None or datetime.combine(reserva.fecha_reserva, reserva.hora_inicio) <= datetime.now():
+        return False
+    ocupado = db.execute(select(exists().where(
+        Reserva.id_cancha == reserva.id_cancha,
+        Reserva.fecha_reserva == reserva.fecha_reserva,
+        Reserva.estado.in_(ESTADOS_ACTIVOS),
+        Reserva.id_reserva != reserva.id_reserva,
+        Reserva.hora_inicio < reserva.hora_fin,
+        Reserva.hora_fin > reserva.hora_inicio,
+    ))).scalar()
+    if ocupado:
+        return False
+    retenidas = retenciones_service.horas_retenidas(db, reserva.id_cancha, reserva.fecha_reserva,
+                                                    excluir_usuario=reserva.id_usuario)
+    if retenciones_service.franja_retenida(retenidas, reserva.hora_inicio, reserva.hora_fin):
+        return False
+    db.delete(cancelacion)
+    reserva.estado = "confirmada"
+    logger.info("✅ Reserva %s expirada vuelve a confirmada: el pago llegó y el horario sigue libre",
+                reserva.id_reserva)
+    return True
+
+
+def procesar_pendientes(lote: Optional[int] = None) -> int:
+    """Procesa hasta `lote` eventos pendientes en una transacción; retorna cuántos tomó"""
+    lote = lote or settings.EVENTOS_PAGO_LOTE
+    db = SessionLocal()
+    try:
+        ahora = _ahora()
+        eventos = db.scalars(
+            select(EventoPago)
+            .where(EventoPago.estado == "pendiente", EventoPago.proximo_intento <= ahora)
+            .order_by(EventoPago.proximo_intento, EventoPago.id_evento_pago)
+            .limit(lote)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not eventos:
+            return 0
+
+        pagos = _PagosDelLote(db, [_referencias(evento) for evento in eventos])
+        resultados = []
+        for evento in eventos:
+            evento.intentos += 1
+            try:
+                with db.begin_nested():
+                    resultado = _aplicar(db, evento, pagos)
+                evento.estado = resultado
+                evento.procesado_en = ahora
+                evento.error = None
+            except Exception as e:
+                evento.error = str(e)[:LARGO_MAXIMO_ERROR]
+                if evento.intentos >= settings.EVENTOS_PAGO_MAX_INTENTOS:
+                    resultado = evento.estado = "error"
+                    logger.error("❌ Evento de pago %s descartado tras %s intentos: %s",
+                                 evento.id_evento, evento.intentos, e)
+                else:
+                    resultado = "reintento"
+                    espera = settings.EVENTOS_PAGO_REINTENTO_SEGUNDOS * 2 ** (evento.intentos - 1)
+                    evento.proximo_intento = ahora + timedelta(seconds=espera)
+                    logger.warning("⚠️ Evento de pago %s falló (intento %s), reintento en %ss: %s",
+                                   evento.id_evento, evento.intentos, espera, e)
+            resultados.append((resultado, evento.recibido_en))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    for resultado, recibido_en in resultados:
+        EVENTOS_PAGO_PROCESADOS.labels(resultado).inc()
+        if resultado in RESULTADOS_FINALES:
+            # SQLite devuelve las fechas sin zona (UTC)
+            recibido_en = recibido_en if recibido_en.tzinfo else recibido_en.replace(tzinfo=timezone.utc)
+            EVENTOS_PAGO_DEMORA.observe(max((_ahora() - recibido_en).total_seconds(), 0))
+    logger.debug("💳 %s eventos de pago procesados", len(resultados))
+    return len(resultados)
+
+
+def procesar_todos() -> int:
+    """Procesa lotes hasta que no queden eventos listos; retorna cuántos tomó"""
+    total = 0
+    while True:
+        tomados = procesar_pendientes()
+        total += tomados
+        if tomados < settings.EVENTOS_PAGO_LOTE or _detener.is_set():
+            return total
+
+
+def purgar_procesados() -> int:
+    """Elimina los eventos procesados o ignorados hace más de EVENTOS_PAGO_RETENCION_DIAS"""
+    limite = _ahora() - timedelta(days=settings.EVENTOS_PAGO_RETENCION_DIAS)
+    db = SessionLocal()
+    try:
+        borrados = db.execute(
+            delete(EventoPago).where(
+                EventoPago.estado.in_(("procesado", "ignorado")), EventoPago.procesado_en <= limite
+            )
+        ).rowcount
+        db.commit()
+        return borrados
+    finally:
+        db.close()
+
+
+# Worker del proceso web: un hilo que espera eventos nuevos
+_despertar = threading.Event()
+_detener = threading.Event()
+_hilo: Optional[threading.Thread] = None
+
+
+def notificar() -> None:
+    """Avisa al worker que hay un evento nuevo; las ráfagas se juntan en un mismo lote"""
+    _despertar.set()
+
+
+def _bucle() -> None:
+    while not _detener.is_set():
+        # Sin avisos, revisa los reintentos cada EVENTOS_PAGO_REINTENTO_SEGUNDOS
+        _despertar.wait(settings.EVENTOS_PAGO_REINTENTO_SEGUNDOS)
+        _despertar.clear()
+        if _detener.is_set():
+            break
+        try:
+            procesar_todos()
+        except Exception as e:
+            logger.exception("❌ Error procesando eventos de pago: %s", e)
+
+
+def iniciar_worker() -> None:
+    """Inicia el hilo que procesa los eventos (evento startup de la app)"""
+    global _hilo
+    if _hilo is None:
+        _detener.clear()
+        _hilo = threading.Thread(target=_bucle, name="eventos-pago", daemon=True)
+        _hilo.start()
+        logger.debug("💳 Worker de eventos de pago iniciado")
+
+
+def detener_worker(timeout: float = 10) -> None:
+    """Detiene el hilo; un lote en curso termina su transacción"""
+    global _hilo
+    if _hilo is not None:
+        _detener.set()
+        _despertar.set()
+        _hilo.join(timeout)
+        _hilo = None
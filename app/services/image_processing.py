@@ -0,0 +1,125 @@
+# app/services/image_processing.py
+import io
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+# Pillow se importa al procesar la primera imagen: los schemas importan este
+# módulo solo por urls_variantes y no deben cargarlo en el arranque
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Variantes generadas para cada imagen subida: nombre -> lado máximo en píxeles
+VARIANTES = {
+    "thumb": 320,
+    "card": 800,
+    "full": 1600,
+}
+
+# Formatos de salida: extensión -> (formato Pillow, content-type, calidad)
+FORMATOS = {
+    "webp": ("WEBP", "image/webp", 80),
+    "jpg": ("JPEG", "image/jpeg", 82),
+}
+
+# Formatos Pillow aceptados como original (mismas extensiones que EXTENSIONES_PERMITIDAS)
+FORMATOS_ENTRADA = {"PNG", "JPEG", "GIF", "WEBP"}
+
+# Nombre del archivo original dentro de la carpeta de la imagen
+NOMBRE_ORIGINAL = "original"
+
+
+def es_imagen_valida(content: bytes) -> bool:
+    """True si el contenido es una imagen PNG, JPEG, GIF o WEBP completa"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            formato = img.format
+            # verify revisa la estructura y los checksums sin decodificar los píxeles
+            img.verify()
+    except Exception:
+        return False
+    return formato in FORMATOS_ENTRADA
+
+
+def _abrir_imagen(content: bytes) -> "Image.Image":
+    """Abre la imagen, aplica la orientación EXIF y descarta los metadatos"""
+    from PIL import Image, ImageOps
+
+    img = Image.open(io.BytesIO(content))
+    # En GIF animados solo se usa el primer frame
+    img.seek(0)
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+
+    # Copiar solo los píxeles: no se arrastra EXIF, ICC ni XMP
+    limpia = Image.new(img.mode, img.size)
+    limpia.paste(img)
+    return limpia
+
+
+def generar_variantes(content: bytes) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Genera las variantes redimensionadas (thumb, card, full) en WebP y JPEG.
+    Retorna {"thumb.webp": (bytes, content_type), ...}
+    """
+    from PIL import Image
+
+    original = _abrir_imagen(content)
+    variantes = {}
+
+    for nombre, lado_maximo in VARIANTES.items():
+        img = original.copy()
+        # thumbnail nunca agranda la imagen
+        img.thumbnail((lado_maximo, lado_maximo), Image.LANCZOS)
+
+        for extension, (formato, content_type, calidad) in FORMATOS.items():
+            salida = img
+            if formato == "JPEG" and salida.mode == "RGBA":
+                fondo = Image.new("RGB", salida.size, (255, 255, 255))
+                fondo.paste(salida, mask=salida.split()[-1])
+                salida = fondo
+
+            buffer = io.BytesIO()
+            if formato == "JPEG":
+                salida.save(buffer, format=formato, quality=calidad, optimize=True, progressive=True)
+            else:
+                salida.save(buffer, format=formato, quality=calidad, method=4)
+            variantes[f"{nombre}.{extension}"] = (buffer.getvalue(), content_type)
+
+    return variantes
+
+
+def carpeta_de_imagen(imagen_url: Optional[str]) -> Optional[str]:
+    """
+    Retorna la URL de la carpeta de una imagen subida con variantes
+    (".../espacios/<uuid>/original.png" -> ".../espacios/<uuid>").
+    Las imágenes antiguas (sin carpeta propia) retornan None.
+    """
+    if not imagen_url:
+        return None
+
+    # get_public_url de Supabase agrega "?" al final
+    base, _, archivo = imagen_url.split("?")[0].rpartition("/")
+    if not base or archivo.split(".")[0] != NOMBRE_ORIGINAL:
+        return None
+    return base
+
+
+def urls_variantes(imagen_url: Optional[str], imagen_variantes: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Construye las URLs de las variantes a partir de la URL del original.
+    imagen_variantes es la imagen cuyas variantes ya se subieron: si no
+    coincide (todavía se generan o fallaron) retorna None.
+    """
+    if imagen_variantes != imagen_url:
+        return None
+    base = carpeta_de_imagen(imagen_url)
+    if not base:
+        return None
+
+    return {
+        nombre: {extension: f"{base}/{nombre}.{extension}" for extension in FORMATOS}
+        for nombre in VARIANTES
+    }
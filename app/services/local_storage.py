@@ -0,0 +1,73 @@
+# app/services/local_storage.py
+import mimetypes
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from jose import jwt, JWTError
+from app.config import settings
+from app.services.storage_base import StorageBase
+from app.core.security import SECRET_KEY, ALGORITHM
+
+class LocalStorage(StorageBase):
+    """
+    Backend de almacenamiento en disco para desarrollo y pruebas.
+    Imita las subidas firmadas de Supabase mediante /imagenes/local/{path}.
+    """
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.LOCAL_STORAGE_DIR).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = settings.LOCAL_STORAGE_BASE_URL.rstrip("/")
+    
+    def _ruta(self, storage_path: str) -> Path:
+        ruta = (self.root / storage_path).resolve()
+        # Evitar escapar del directorio raíz con "../"
+        if self.root not in ruta.parents:
+            raise ValueError(f"Ruta fuera del almacenamiento: {storage_path}")
+        return ruta
+    
+    def upload_bytes(self, storage_path: str, content: bytes, content_type: str) -> str:
+        ruta = self._ruta(storage_path)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_bytes(content)
+        return self.get_public_url(storage_path)
+    
+    def download(self, storage_path: str) -> bytes:
+        return self._ruta(storage_path).read_bytes()
+    
+    def info(self, storage_path: str) -> Optional[dict]:
+        ruta = self._ruta(storage_path)
+        if not ruta.is_file():
+            return None
+        return {
+            "size": ruta.stat().st_size,
+            "content_type": mimetypes.guess_type(ruta.name)[0]
+        }
+    
+    def delete(self, storage_path: str) -> None:
+        self._ruta(storage_path).unlink(missing_ok=True)
+    
+    def create_signed_upload(self, storage_path: str) -> dict:
+        token = jwt.encode(
+            {
+                "path": storage_path,
+                "tipo": "subida_local",
+                "exp": datetime.utcnow() + timedelta(minutes=settings.SIGNED_UPLOAD_EXPIRE_MINUTES)
+            },
+            SECRET_KEY,
+            algorithm=ALGORITHM
+        )
+        return {
+            "signed_url": f"{self.base_url}/imagenes/local/{storage_path}?token={token}",
+            "token": token,
+            "path": storage_path
+        }
+    
+    def verificar_token_subida(self, storage_path: str, token: str) -> bool:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return False
+        return payload.get("tipo") == "subida_local" and payload.get("path") == storage_path
+    
+    def get_public_url(self, storage_path: str) -> str:
+        return f"{self.base_url}/imagenes/local/{storage_path}"
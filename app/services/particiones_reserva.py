@@ -0,0 +1,216 @@
+# app/services/particiones_reserva.py
+"""
+Particiones mensuales de reserva (PostgreSQL, migración 0009).
+
+reserva está particionada por rango de fecha_reserva: una partición por
+mes (reserva_pAAAA_MM) y reserva_default para las fechas sin partición.
+Una consulta con fecha_reserva en el WHERE solo lee los meses del rango.
+
+mantener_particiones corre en cada pasada de app/scheduler.py:
+
+- crea las particiones del mes actual y de los RESERVA_PARTICIONES_FUTURAS_MESES
+  siguientes; si reserva_default ya tiene filas de ese mes, las mueve a la
+  partición nueva,
+- con RESERVA_ARCHIVAR_DESPUES_MESES configurado, separa de reserva los
+  meses más viejos y los mueve al esquema archivo (archivo.reserva_pAAAA_MM).
+  Un mes con reservas activas no se archiva.
+
+Las reservas archivadas salen de reserva y de las consultas del ORM, pero
+no se borran: reservas_con_archivo() las suma a reserva para lo que necesita
+el historial completo (reconstrucción de estadisticas_usuario y reportes).
+Sus filas en pago, asistentes_reserva, cancelacion, incidente y cupon
+quedan donde estaban, apuntando a un id_reserva que ya no está en reserva:
+el ORM las ve sin reserva (relación en None) y cambiarles id_reserva falla
+en el trigger reserva_referenciada. estadisticas_usuario y los resúmenes que
+se mantienen por deltas no cambian al archivar.
+
+Sin cambios pendientes cuesta una consulta al catálogo. Las sentencias DDL
+esperan a lo sumo LOCK_TIMEOUT por sus bloqueos; si no los obtienen, lo
+intenta la próxima pasada.
+"""
+import logging
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import column, select, table, text, union_all
+
+from app.config import settings
+from app.database import engine
+from app.models.reserva import Reserva
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de PostgreSQL para el mantenimiento (única en la aplicación)
+CLAVE_BLOQUEO = 42_044
+ESQUEMA_ARCHIVO = "archivo"
+PARTICION_DEFAULT = "reserva_default"
+LOCK_TIMEOUT = "2s"
+ESTADOS_ACTIVOS = "('pendiente', 'confirmada', 'en_curso')"
+
+_PATRON_PARTICION = re.compile(r"^reserva_p(\d{4})_(\d{2})$")
+
+
+def sumar_meses(mes: date, meses: int) -> date:
+    """Primer día del mes que está `meses` después (o antes, si es negativo)"""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"reserva_p{mes:%Y_%m}"
+
+
+def particiones(conexion) -> Optional[Dict[date, str]]:
+    """{primer día del mes: nombre} de las particiones mensuales, o None si reserva no está particionada"""
+    if conexion.dialect.name != "postgresql":
+        return None
+    nombres = conexion.execute(text("""
+        SELECT c.relname
+        FROM pg_class p
+        JOIN pg_inherits i ON i.inhparent = p.oid
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE p.oid = to_regclass('public.reserva') AND p.relkind = 'p'
+    """)).scalars().all()
+    if not nombres:
+        return None
+    resultado = {}
+    for nombre in nombres:
+        coincidencia = _PATRON_PARTICION.match(nombre)
+        if coincidencia:
+            resultado[date(int(coincidencia[1]), int(coincidencia[2]), 1)] = nombre
+    return resultado
+
+
+def particiones_archivadas(conexion) -> List[str]:
+    """Nombres de las particiones movidas al esquema archivo, de la más vieja a la más nueva"""
+    if conexion.dialect.name != "postgresql":
+        return []
+    nombres = conexion.execute(
+        text("SELECT tablename FROM pg_tables WHERE schemaname = :esquema"), {"esquema": ESQUEMA_ARCHIVO}
+    ).scalars().all()
+    return sorted(nombre for nombre in nombres if _PATRON_PARTICION.match(nombre))
+
+
+def reservas_con_archivo(conexion):
+    """
+    reserva más las particiones archivadas, con las mismas columnas (.c);
+    sin meses archivados es la tabla reserva
+    """
+    tabla = Reserva.__table__
+    archivadas = particiones_archivadas(conexion)
+    if not archivadas:
+        return tabla
+    columnas = [(columna.name, columna.type) for columna in tabla.columns]
+    return union_all(
+        select(tabla),
+        *(select(table(nombre, *(column(n, tipo) for n, tipo in columnas), schema=ESQUEMA_ARCHIVO))
+          for nombre in archivadas),
+    ).subquery("reserva_con_archivo")
+
+
+def crear_particion(conexion, mes: date) -> str:
+    """Crea la partición del mes; las filas de ese mes que estaban en reserva_default pasan a ella"""
+    nombre = nombre_particion(mes)
+    desde, hasta = mes, sumar_meses(mes, 1)
+    rango = {"desde": desde, "hasta": hasta}
+    en_default = conexion.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {PARTICION_DEFAULT} WHERE fecha_reserva >= :desde AND fecha_reserva < :hasta)"
+    ), rango).scalar()
+
+    if not en_default:
+        conexion.execute(text(
+            f"CREATE TABLE {nombre} PARTITION OF reserva FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+        ))
+        return nombre
+
+    # Con filas en default no se puede crear la partición directamente: se llena aparte y se adjunta.
+    # El CHECK evita que ATTACH vuelva a recorrer la tabla; reservas.moviendo evita que el
+    # trigger de borrado trate las filas movidas como reservas eliminadas
+    conexion.execute(text(f"CREATE TABLE {nombre} (LIKE reserva INCLUDING DEFAULTS)"))
+    conexion.execute(text(
+        f"ALTER TABLE {nombre} ADD CONSTRAINT {nombre}_rango "
+        f"CHECK (fecha_reserva >= '{desde}' AND fecha_reserva < '{hasta}')"
+    ))
+    conexion.execute(text("SET LOCAL reservas.moviendo = 'on'"))
+    movidas = conexion.execute(text(f"""
+        WITH movidas AS (
+            DELETE FROM {PARTICION_DEFAULT} WHERE fecha_reserva >= :desde AND fecha_reserva < :hasta
+            RETURNING *
+        )
+        INSERT INTO {nombre} SELECT * FROM movidas
+    """), rango).rowcount
+    conexion.execute(text("SET LOCAL reservas.moviendo = 'off'"))
+    conexion.execute(text(f"ALTER TABLE reserva ATTACH PARTITION {nombre} FOR VALUES FROM ('{desde}') TO ('{hasta}')"))
+    conexion.execute(text(f"ALTER TABLE {nombre} DROP CONSTRAINT {nombre}_rango"))
+    logger.info("📦 %s reservas movidas de %s a %s", movidas, PARTICION_DEFAULT, nombre)
+    return nombre
+
+
+def asegurar_particiones(conexion, desde: date, hasta: date) -> List[str]:
+    """Crea las particiones que faltan entre los meses de `desde` y `hasta`; retorna las creadas"""
+    existentes = particiones(conexion)
+    if existentes is None:
+        return []
+    creadas = []
+    mes, ultimo = desde.replace(day=1), hasta.replace(day=1)
+    while mes <= ultimo:
+        if mes not in existentes:
+            creadas.append(crear_particion(conexion, mes))
+        mes = sumar_meses(mes, 1)
+    return creadas
+
+
+def archivar_particiones(conexion, antes_de: date) -> List[str]:
+    """Mueve al esquema archivo las particiones de meses anteriores a `antes_de`; retorna las archivadas"""
+    archivadas = []
+    for mes, nombre in sorted((particiones(conexion) or {}).items()):
+        if mes >= antes_de:
+            break
+        activas = conexion.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {nombre} WHERE estado IN {ESTADOS_ACTIVOS})"
+        )).scalar()
+        if activas:
+            logger.warning("⚠️ %s tiene reservas activas: no se archiva", nombre)
+            continue
+        conexion.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA_ARCHIVO}"))
+        conexion.execute(text(f"ALTER TABLE reserva DETACH PARTITION {nombre}"))
+        conexion.execute(text(f"ALTER TABLE {nombre} SET SCHEMA {ESQUEMA_ARCHIVO}"))
+        archivadas.append(nombre)
+    return archivadas
+
+
+def mantener_particiones(hoy: Optional[date] = None) -> Optional[Dict[str, List[str]]]:
+    """
+    Crea las particiones futuras y archiva las viejas; retorna
+    {"creadas": [...], "archivadas": [...]}, o None si reserva no está
+    particionada u otro proceso está haciendo el mantenimiento
+    """
+    if engine.dialect.name != "postgresql":
+        return None
+    hoy = hoy or date.today()
+    mes_actual = hoy.replace(day=1)
+
+    with engine.begin() as conexion:
+        tomado = conexion.execute(text("SELECT pg_try_advisory_xact_lock(:clave)"), {"clave": CLAVE_BLOQUEO}).scalar()
+        existentes = particiones(conexion) if tomado else None
+        if existentes is None:
+            return None
+
+        ultimo = sumar_meses(mes_actual, settings.RESERVA_PARTICIONES_FUTURAS_MESES)
+        faltan = any(sumar_meses(mes_actual, n) not in existentes
+                     for n in range(settings.RESERVA_PARTICIONES_FUTURAS_MESES + 1))
+        limite_archivo = (sumar_meses(mes_actual, -settings.RESERVA_ARCHIVAR_DESPUES_MESES)
+                          if settings.RESERVA_ARCHIVAR_DESPUES_MESES else None)
+        archivar = limite_archivo is not None and any(mes < limite_archivo for mes in existentes)
+        if not faltan and not archivar:
+            return {"creadas": [], "archivadas": []}
+
+        conexion.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        resultado = {
+            "creadas": asegurar_particiones(conexion, mes_actual, ultimo),
+            "archivadas": archivar_particiones(conexion, limite_archivo) if archivar else [],
+        }
+
+    logger.info("📦 Particiones de reserva: %s", resultado)
+    return resultado
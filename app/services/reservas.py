@@ -0,0 +1,266 @@
+# app/services/reservas.py
+"""
+Creación de reservas como una única unidad de trabajo.
+
+La reserva, el cupón aplicado, los asistentes y el cupón de bienvenida se
+agregan a la misma sesión: la reserva se envía con flush (el INSERT obtiene
+el id con RETURNING) y todo se confirma con un solo commit, así un error a
+mitad de camino no deja una reserva sin asistentes ni un cupón marcado como
+utilizado. Los emails los encola el router después del commit, con la
+reserva ya recargada.
+
+Un horario retenido por otro usuario (app/services/retenciones.py) se
+rechaza con 409 antes de consultar la disponibilidad; la retención del
+propio usuario se libera en el mismo commit que crea la reserva.
+"""
+import logging
+import random
+import secrets
+import string
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.asistente import AsistenteReserva
+from app.models.cancha import Cancha
+from app.models.cupon import Cupon
+from app.models.reserva import Reserva
+from app.models.usuario import Usuario
+from app.schemas.reserva import ReservaCreate
+from app.services.estadisticas_usuario import reservas_vigentes
+from app.services.retenciones import retenciones_service
+
+logger = logging.getLogger(__name__)
+
+# Usuarios con menos reservas activas reciben el cupón de bienvenida del 5%
+MAX_RESERVAS_CUPON_BIENVENIDA = 5
+
+
+def generar_codigo_reserva():
+    """Generar código único para la reserva - MEJORADO"""
+    letras = string.ascii_uppercase
+    numeros = string.digits
+    # Formato: AAA111 (3 letras + 3 números)
+    codigo = ''.join(random.choices(letras, k=3)) + ''.join(random.choices(numeros, k=3))
+    return codigo
+
+
+def generar_codigo_unico_reserva(db: Session, max_intentos=10):
+    """
+    Generar código único con validación - NUEVA FUNCIÓN MEJORADA
+    (con reserva particionada, PostgreSQL no puede exigir UNIQUE sobre codigo_reserva)
+    """
+    for intento in range(max_intentos):
+        codigo = generar_codigo_reserva()
+        # Verificar que no exista
+        existe = db.query(Reserva.id_reserva).filter(Reserva.codigo_reserva == codigo).first()
+        if not existe:
+            return codigo
+
+    # Si falla después de varios intentos, usar timestamp
+    timestamp = int(datetime.now().timestamp())
+    return f"RES{timestamp}"
+
+
+def generar_codigo_qr():
+    """Genera un código único para el QR"""
+    return f"QR-{uuid.uuid4().hex[:12].upper()}"
+
+
+def generar_token_verificacion():
+    """Genera un token seguro para verificación"""
+    return secrets.token_urlsafe(32)
+
+
+def generar_credenciales_asistentes(cantidad: int):
+    """[(codigo_qr, token_verificacion)] distintos entre sí, generados en memoria sin consultar la base"""
+    codigos, tokens = set(), set()
+    while len(codigos) < cantidad:
+        codigos.add(generar_codigo_qr())
+    while len(tokens) < cantidad:
+        tokens.add(generar_token_verificacion())
+    return list(zip(codigos, tokens))
+
+
+def calcular_costo_total(hora_inicio: time, hora_fin: time, precio_por_hora: float) -> float:
+    """Calcular el costo total basado en la duración y precio por hora"""
+    duracion_minutos = (hora_fin.hour * 60 + hora_fin.minute) - (hora_inicio.hour * 60 + hora_inicio.minute)
+    duracion_horas = duracion_minutos / 60.0
+    return round(duracion_horas * precio_por_hora, 2)
+
+
+def opciones_carga_reserva(*escalares):
+    """
+    Opciones de carga para responder ReservaResponse con un número fijo de queries:
+    las relaciones escalares indicadas van en el mismo SELECT (joinedload) y los
+    asistentes en un único SELECT ... IN para todas las reservas (selectinload).
+    """
+    return [*(joinedload(relacion) for relacion in escalares), selectinload(Reserva.asistentes)]
+
+
+def verificar_disponibilidad(db: Session, id_cancha: int, fecha: date, hora_inicio: time, hora_fin: time) -> None:
+    """Lanza 400 si el horario está ocupado (función verificar_disponibilidad de la base)"""
+    try:
+        disponible = db.execute(
+            text("SELECT verificar_disponibilidad(:cancha_id, :fecha, :hora_inicio, :hora_fin) as disponible"),
+            {"cancha_id": id_cancha, "fecha": fecha, "hora_inicio": hora_inicio, "hora_fin": hora_fin}
+        ).scalar()
+    except Exception as e:
+        logger.error("❌ Error en verificación de disponibilidad: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error al verificar disponibilidad: {str(e)}")
+
+    if not disponible:
+        raise HTTPException(status_code=400, detail="La cancha no está disponible en el horario solicitado")
+
+
+def calcular_descuento(cupon: Optional[Cupon], costo_total: float, id_usuario: int) -> Optional[float]:
+    """Descuento del cupón sobre el costo, o None si no se puede aplicar (la reserva sigue sin cupón)"""
+    if not cupon:
+        logger.warning("❌ Cupón no encontrado")
+        return None
+    if cupon.estado != "activo":
+        logger.warning("❌ Cupón %s no está activo: %s", cupon.codigo, cupon.estado)
+        return None
+    if cupon.fecha_expiracion and cupon.fecha_expiracion < date.today():
+        logger.warning("❌ Cupón %s expirado: %s", cupon.codigo, cupon.fecha_expiracion)
+        return None
+    if cupon.id_reserva:
+        logger.warning("❌ Cupón %s ya utilizado en reserva: %s", cupon.codigo, cupon.id_reserva)
+        return None
+    if cupon.id_usuario and cupon.id_usuario != id_usuario:
+        logger.warning("❌ Cupón %s no válido para el usuario %s", cupon.codigo, id_usuario)
+        return None
+
+    if cupon.tipo == "porcentaje":
+        descuento = (costo_total * float(cupon.monto_descuento)) / 100
+    else:  # fijo
+        descuento = float(cupon.monto_descuento)
+
+    # El descuento no puede superar el costo total
+    return min(descuento, costo_total)
+
+
+def agregar_cupon_bienvenida(db: Session, id_usuario: int) -> Cupon:
+    """Agrega a la sesión un cupón del 5% por 30 días (lo confirma el commit de quien llama)"""
+    codigo = ''.join(random.choices(string.ascii_uppercase, k=3)) + ''.join(random.choices(string.digits, k=3))
+    cupon = Cupon(
+        codigo=f"CUP5-{codigo}",
+        monto_descuento=5.0,
+        tipo="porcentaje",
+        estado="activo",
+        id_usuario=id_usuario,
+        fecha_expiracion=date.today() + timedelta(days=30)
+    )
+    db.add(cupon)
+    return cupon
+
+
+def crear_reserva(
+    db: Session,
+    reserva_data: ReservaCreate,
+    asistentes: Iterable[dict] = (),
+    incluir_principal: bool = False,
+    cupon_bienvenida: bool = False,
+) -> Reserva:
+    """
+    Crea la reserva con un solo commit y la retorna recargada con usuario,
+    cancha y asistentes.
+
+    - asistentes: [{"nombre", "email"}] que reciben QR propio
+    - incluir_principal: agrega al usuario que reserva como asistente
+    - cupon_bienvenida: cupón del 5% si el usuario tiene pocas reservas activas
+    """
+    if reserva_data.hora_inicio.minute != 0 or reserva_data.hora_fin.minute != 0:
+        raise HTTPException(status_code=400, detail="Las reservas solo pueden hacerse en horas completas")
+    if reserva_data.fecha_reserva < date.today():
+        raise HTTPException(status_code=400, detail="No se pueden hacer reservas en fechas pasadas")
+
+    cancha = db.get(Cancha, reserva_data.id_cancha)
+    if not cancha:
+        raise HTTPException(status_code=404, detail="Cancha no encontrada")
+    if cancha.estado != 'disponible':
+        raise HTTPException(status_code=400, detail="La cancha no está disponible")
+
+    usuario = db.get(Usuario, reserva_data.id_usuario)
+    if not usuario:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    retenida = retenciones_service.verificar(
+        db, reserva_data.id_cancha, reserva_data.fecha_reserva, reserva_data.hora_inicio, reserva_data.hora_fin,
+        usuario.id_usuario
+    )
+    verificar_disponibilidad(
+        db, reserva_data.id_cancha, reserva_data.fecha_reserva, reserva_data.hora_inicio, reserva_data.hora_fin
+    )
+
+    costo_total = calcular_costo_total(
+        reserva_data.hora_inicio, reserva_data.hora_fin, float(cancha.precio_por_hora)
+    )
+
+    try:
+        # El cupón queda bloqueado hasta el commit: dos reservas no pueden usarlo a la vez
+        cupon = None
+        descuento = None
+        if reserva_data.codigo_cupon:
+            cupon = db.query(Cupon).filter(Cupon.codigo == reserva_data.codigo_cupon).with_for_update().first()
+            descuento = calcular_descuento(cupon, costo_total, reserva_data.id_usuario)
+
+        reserva = Reserva(
+            **reserva_data.dict(exclude={'asistentes', 'codigo_cupon'}),
+            costo_total=costo_total - (descuento or 0),
+            codigo_reserva=generar_codigo_unico_reserva(db),
+            estado="pendiente"
+        )
+        db.add(reserva)
+        db.flush()
+
+        if descuento is not None:
+            cupon.id_reserva = reserva.id_reserva
+            cupon.estado = "utilizado"
+            logger.debug("🎫 Cupón %s aplicado: $%s de descuento", cupon.codigo, descuento)
+
+        personas = [{"nombre": usuario.nombre, "email": usuario.email}] if incluir_principal else []
+        personas.extend(asistentes)
+        if personas:
+            # Un solo INSERT de varias filas; la respuesta los carga al recargar la reserva
+            db.execute(insert(AsistenteReserva), [
+                {
+                    "id_reserva": reserva.id_reserva,
+                    "nombre": persona["nombre"],
+                    "email": persona["email"],
+                    "codigo_qr": codigo_qr,
+                    "token_verificacion": token_verificacion,
+                    "asistio": False,
+                }
+                for persona, (codigo_qr, token_verificacion)
+                in zip(personas, generar_credenciales_asistentes(len(personas)))
+            ])
+
+        if cupon_bienvenida:
+            # La reserva ya se envió con flush: las estadísticas la incluyen
+            if reservas_vigentes(db, usuario.id_usuario) < MAX_RESERVAS_CUPON_BIENVENIDA:
+                agregar_cupon_bienvenida(db, usuario.id_usuario)
+
+        if retenida:
+            retenciones_service.liberar(
+                db, usuario.id_usuario, reserva_data.id_cancha, reserva_data.fecha_reserva,
+                reserva_data.hora_inicio, reserva_data.hora_fin
+            )
+
+        # Leídos antes del commit: después la instancia queda expirada
+        id_reserva, codigo_reserva = reserva.id_reserva, reserva.codigo_reserva
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.exception("❌ Error al crear reserva: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error al crear reserva: {str(e)}")
+
+    logger.info("✅ Reserva %s creada con código %s", id_reserva, codigo_reserva)
+
+    return db.query(Reserva).options(
+        *opciones_carga_reserva(Reserva.usuario, Reserva.cancha)
+    ).filter(Reserva.id_reserva == id_reserva).one()
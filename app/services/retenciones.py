@@ -0,0 +1,347 @@
+# app/services/retenciones.py
+"""
+Retenciones de horario durante el checkout.
+
+Al elegir un horario, POST /reservas/retenciones lo retiene durante
+RETENCION_TTL_SEGUNDOS: los endpoints de disponibilidad lo muestran ocupado
+y crear_reserva rechaza con 409 a cualquier otro usuario. La competencia por
+un horario se resuelve al elegirlo, con una escritura corta, y no al
+confirmar la reserva. La reserva del titular consume la retención en su
+mismo commit; si no reserva, la retención vence sola.
+
+Cada usuario tiene una sola retención: una nueva reemplaza a la anterior.
+Se guarda una entrada por hora (las reservas son en horas completas).
+
+Repetir la retención la renueva, pero un usuario retiene las mismas horas a
+lo sumo RETENCION_MAX_SEGUNDOS desde que las tomó (después responde 429).
+Las retenciones vencidas o liberadas guardan ese inicio hasta que la purga
+las borra, RETENCION_TTL_SEGUNDOS después de vencer: mientras tanto otros
+usuarios pueden tomar el horario.
+
+Backends (RETENCIONES_BACKEND):
+- "base": tabla retencion_horario (UNLOGGED en PostgreSQL), compartida por
+  todos los workers; usa la conexión de la request.
+- "memoria": diccionario del proceso, para desarrollo y pruebas con un solo worker.
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, not_, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.retencion import RetencionHorario
+
+logger = logging.getLogger(__name__)
+
+MENSAJE_RETENIDO = "Retenido temporalmente"
+
+
+def horas_del_rango(hora_inicio: time, hora_fin: time) -> List[time]:
+    """Horas completas que toca el rango [hora_inicio, hora_fin)"""
+    fin = hora_fin.hour + (1 if (hora_fin.minute or hora_fin.second) else 0)
+    return [time(hora) for hora in range(hora_inicio.hour, fin)]
+
+
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _limite_purga() -> datetime:
+    """Las retenciones vencidas antes de este momento ya no cuentan para el límite de renovación"""
+    return _ahora() - timedelta(seconds=settings.RETENCION_TTL_SEGUNDOS)
+
+
+class RetencionesBase(ABC):
+    """
+    Lógica común de las retenciones.
+    Cada backend implementa _tomar, _soltar, _retenida_desde, _titulares,
+    _titulares_del_dia y purgar_vencidas.
+    """
+
+    @abstractmethod
+    def _tomar(self, db: Session, id_cancha: int, fecha: date, horas: List[time],
+               id_usuario: int, desde: datetime, expira_en: datetime, ahora: datetime) -> bool:
+        """Reemplaza la retención del usuario por estas horas (la anterior vence); False si otro usuario retiene alguna"""
+
+    @abstractmethod
+    def _soltar(self, db: Session, id_usuario: int, id_cancha: int, fecha: date, horas: List[time],
+                ahora: datetime) -> None:
+        """Vence las horas del usuario indicadas (conservan su inicio hasta la purga)"""
+
+    @abstractmethod
+    def _retenida_desde(self, db: Session, id_cancha: int, fecha: date, horas: List[time],
+                        id_usuario: int) -> Optional[datetime]:
+        """Inicio de la retención del usuario sobre estas horas, vigente o vencida sin purgar; None si no hay"""
+
+    @abstractmethod
+    def _titulares(self, db: Session, id_cancha: int, fecha: date, ahora: datetime) -> Dict[time, int]:
+        """{hora: id_usuario} de las retenciones vigentes de la cancha en la fecha"""
+
+    @abstractmethod
+    def _titulares_del_dia(self, db: Session, fecha: date, ahora: datetime) -> Dict[int, Dict[time, int]]:
+        """{id_cancha: {hora: id_usuario}} de las retenciones vigentes de todas las canchas en la fecha"""
+
+    @abstractmethod
+    def purgar_vencidas(self) -> int:
+        """Elimina las retenciones vencidas hace más de RETENCION_TTL_SEGUNDOS; retorna cuántas horas borró"""
+
+    def retener(self, db: Session, id_cancha: int, fecha: date, hora_inicio: time, hora_fin: time,
+                id_usuario: int) -> Optional[datetime]:
+        """
+        Retiene el horario para el usuario y confirma; retorna el vencimiento o
+        None si otro lo retiene. 429 si el usuario ya lo retuvo RETENCION_MAX_SEGUNDOS.
+        """
+        ahora = _ahora()
+        horas = horas_del_rango(hora_inicio, hora_fin)
+        try:
+            desde = self._retenida_desde(db, id_cancha, fecha, horas, id_usuario) or ahora
+            # SQLite devuelve los DateTime sin zona horaria (se guardan en UTC)
+            if desde.tzinfo is None:
+                desde = desde.replace(tzinfo=timezone.utc)
+            limite = desde + timedelta(seconds=settings.RETENCION_MAX_SEGUNDOS)
+            if limite <= ahora:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Alcanzaste el tiempo máximo de retención de este horario; intenta de nuevo en unos minutos"
+                )
+            expira_en = min(ahora + timedelta(seconds=settings.RETENCION_TTL_SEGUNDOS), limite)
+            tomada = self._tomar(db, id_cancha, fecha, horas, id_usuario, desde, expira_en, ahora)
+        except Exception:
+            db.rollback()
+            raise
+        if not tomada:
+            db.rollback()
+            return None
+        db.commit()
+        logger.debug("⏳ Cancha %s %s %s-%s retenida por usuario %s", id_cancha, fecha, hora_inicio, hora_fin, id_usuario)
+        return expira_en
+
+    def liberar(self, db: Session, id_usuario: int, id_cancha: int, fecha: date,
+                hora_inicio: time, hora_fin: time) -> None:
+        """Libera la retención del usuario sobre el horario (en la transacción de quien llama)"""
+        self._soltar(db, id_usuario, id_cancha, fecha, horas_del_rango(hora_inicio, hora_fin), _ahora())
+
+    def horas_retenidas(self, db: Session, id_cancha: int, fecha: date,
+                        excluir_usuario: Optional[int] = None) -> Set[time]:
+        """Horas retenidas de la cancha en la fecha, sin las del usuario excluido"""
+        return {
+            hora for hora, titular in self._titulares(db, id_cancha, fecha, _ahora()).items()
+            if titular != excluir_usuario
+        }
+
+    def horas_retenidas_del_dia(self, db: Session, fecha: date,
+                                excluir_usuario: Optional[int] = None) -> Dict[int, Set[time]]:
+        """{id_cancha: horas retenidas} de la fecha, sin las del usuario excluido (una consulta para todas las canchas)"""
+        resultado = {}
+        for id_cancha, titulares in self._titulares_del_dia(db, fecha, _ahora()).items():
+            horas = {hora for hora, titular in titulares.items() if titular != excluir_usuario}
+            if horas:
+                resultado[id_cancha] = horas
+        return resultado
+
+    def verificar(self, db: Session, id_cancha: int, fecha: date, hora_inicio: time, hora_fin: time,
+                  id_usuario: int) -> bool:
+        """
+        Lanza 409 si otro usuario retiene alguna hora del horario; retorna
+        True si el propio usuario retiene alguna (su reserva debe liberarla)
+        """
+        horas = horas_del_rango(hora_inicio, hora_fin)
+        titulares = {self._titulares(db, id_cancha, fecha, _ahora()).get(hora) for hora in horas} - {None}
+        if titulares - {id_usuario}:
+            raise HTTPException(
+                status_code=409,
+                detail="El horario está retenido por otro usuario que está completando su reserva"
+            )
+        return id_usuario in titulares
+
+    @staticmethod
+    def franja_retenida(retenidas: Set[time], hora_inicio: time, hora_fin: time) -> bool:
+        return bool(retenidas.intersection(horas_del_rango(hora_inicio, hora_fin)))
+
+
+class RetencionesBaseDatos(RetencionesBase):
+    """Tabla retencion_horario: compartida entre workers y procesos"""
+
+    tabla = RetencionHorario.__table__
+
+    def _tomar(self, db, id_cancha, fecha, horas, id_usuario, desde, expira_en, ahora):
+        tabla = self.tabla
+        # La retención anterior del usuario vence; si esta falla, el rollback la restaura
+        db.execute(update(tabla).where(
+            tabla.c.id_usuario == id_usuario,
+            tabla.c.expira_en > ahora,
+            not_(and_(tabla.c.id_cancha == id_cancha, tabla.c.fecha == fecha, tabla.c.hora_inicio.in_(horas))),
+        ).values(expira_en=ahora))
+
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(tabla).values([
+            {"id_cancha": id_cancha, "fecha": fecha, "hora_inicio": hora,
+             "id_usuario": id_usuario, "retenida_desde": desde, "expira_en": expira_en}
+            for hora in sorted(horas)
+        ])
+        # Una hora retenida por otro solo se toma si ya venció; RETURNING trae las que se tomaron
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.id_cancha, tabla.c.fecha, tabla.c.hora_inicio],
+            set_={"id_usuario": stmt.excluded.id_usuario, "retenida_desde": stmt.excluded.retenida_desde,
+                  "expira_en": stmt.excluded.expira_en},
+            where=or_(tabla.c.id_usuario == stmt.excluded.id_usuario, tabla.c.expira_en <= ahora)
+        ).returning(tabla.c.hora_inicio)
+        return len(db.execute(stmt).all()) == len(horas)
+
+    def _soltar(self, db, id_usuario, id_cancha, fecha, horas, ahora):
+        tabla = self.tabla
+        db.execute(update(tabla).where(
+            tabla.c.id_usuario == id_usuario,
+            tabla.c.id_cancha == id_cancha,
+            tabla.c.fecha == fecha,
+            tabla.c.hora_inicio.in_(horas),
+            tabla.c.expira_en > ahora,
+        ).values(expira_en=ahora))
+
+    def _retenida_desde(self, db, id_cancha, fecha, horas, id_usuario):
+        tabla = self.tabla
+        return db.execute(
+            select(func.min(tabla.c.retenida_desde)).where(and_(
+                tabla.c.id_cancha == id_cancha,
+                tabla.c.fecha == fecha,
+                tabla.c.hora_inicio.in_(horas),
+                tabla.c.id_usuario == id_usuario,
+                tabla.c.expira_en > _limite_purga(),
+            ))
+        ).scalar()
+
+    def _titulares(self, db, id_cancha, fecha, ahora):
+        tabla = self.tabla
+        filas = db.execute(
+            select(tabla.c.hora_inicio, tabla.c.id_usuario).where(and_(
+                tabla.c.id_cancha == id_cancha,
+                tabla.c.fecha == fecha,
+                tabla.c.expira_en > ahora,
+            ))
+        )
+        return {fila.hora_inicio: fila.id_usuario for fila in filas}
+
+    def _titulares_del_dia(self, db, fecha, ahora):
+        tabla = self.tabla
+        filas = db.execute(
+            select(tabla.c.id_cancha, tabla.c.hora_inicio, tabla.c.id_usuario).where(and_(
+                tabla.c.fecha == fecha,
+                tabla.c.expira_en > ahora,
+            ))
+        )
+        resultado: Dict[int, Dict[time, int]] = {}
+        for fila in filas:
+            resultado.setdefault(fila.id_cancha, {})[fila.hora_inicio] = fila.id_usuario
+        return resultado
+
+    def purgar_vencidas(self) -> int:
+        db = SessionLocal()
+        try:
+            borradas = db.execute(delete(self.tabla).where(self.tabla.c.expira_en <= _limite_purga())).rowcount
+            db.commit()
+            return borradas
+        finally:
+            db.close()
+
+
+class RetencionesMemoria(RetencionesBase):
+    """Diccionario del proceso: cada worker ve solo sus retenciones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (id_cancha, fecha) -> {hora: (id_usuario, expira_en, retenida_desde)}
+        self._por_dia: Dict[Tuple[int, date], Dict[time, Tuple[int, datetime, datetime]]] = {}
+        # id_usuario -> (id_cancha, fecha, horas) de su retención
+        self._por_usuario: Dict[int, Tuple[int, date, List[time]]] = {}
+
+    def _vencer(self, id_usuario: int, id_cancha: int, fecha: date, horas: List[time], ahora: datetime) -> None:
+        dia = self._por_dia.get((id_cancha, fecha), {})
+        for hora in horas:
+            titular, vence, desde = dia.get(hora, (None, None, None))
+            if titular == id_usuario and vence > ahora:
+                dia[hora] = (titular, ahora, desde)
+
+    def _tomar(self, db, id_cancha, fecha, horas, id_usuario, desde, expira_en, ahora):
+        with self._lock:
+            dia = self._por_dia.get((id_cancha, fecha), {})
+            for hora in horas:
+                titular, vence, _ = dia.get(hora, (id_usuario, ahora, ahora))
+                if titular != id_usuario and vence > ahora:
+                    return False
+            anterior = self._por_usuario.pop(id_usuario, None)
+            if anterior:
+                self._vencer(id_usuario, *anterior, ahora)
+            dia = self._por_dia.setdefault((id_cancha, fecha), {})
+            for hora in horas:
+                dia[hora] = (id_usuario, expira_en, desde)
+            self._por_usuario[id_usuario] = (id_cancha, fecha, list(horas))
+            return True
+
+    def _soltar(self, db, id_usuario, id_cancha, fecha, horas, ahora):
+        with self._lock:
+            self._vencer(id_usuario, id_cancha, fecha, horas, ahora)
+            retencion = self._por_usuario.get(id_usuario)
+            if retencion and retencion[:2] == (id_cancha, fecha):
+                restantes = [hora for hora in retencion[2] if hora not in horas]
+                if restantes:
+                    self._por_usuario[id_usuario] = (id_cancha, fecha, restantes)
+                else:
+                    del self._por_usuario[id_usuario]
+
+    def _retenida_desde(self, db, id_cancha, fecha, horas, id_usuario):
+        limite = _limite_purga()
+        with self._lock:
+            dia = self._por_dia.get((id_cancha, fecha), {})
+            inicios = [
+                desde for titular, vence, desde in (dia[hora] for hora in horas if hora in dia)
+                if titular == id_usuario and vence > limite
+            ]
+        return min(inicios, default=None)
+
+    def _titulares(self, db, id_cancha, fecha, ahora):
+        with self._lock:
+            dia = self._por_dia.get((id_cancha, fecha), {})
+            return {hora: titular for hora, (titular, vence, _) in dia.items() if vence > ahora}
+
+    def _titulares_del_dia(self, db, fecha, ahora):
+        with self._lock:
+            return {
+                id_cancha: {hora: titular for hora, (titular, vence, _) in dia.items() if vence > ahora}
+                for (id_cancha, fecha_dia), dia in self._por_dia.items() if fecha_dia == fecha
+            }
+
+    def purgar_vencidas(self) -> int:
+        limite = _limite_purga()
+        borradas = 0
+        with self._lock:
+            for clave, dia in list(self._por_dia.items()):
+                vencidas = [hora for hora, (_, vence, _) in dia.items() if vence <= limite]
+                for hora in vencidas:
+                    del dia[hora]
+                borradas += len(vencidas)
+                if not dia:
+                    del self._por_dia[clave]
+            # Una hora vencida pudo pasar a otro usuario: la retención sigue mientras tenga horas propias
+            for id_usuario, (id_cancha, fecha, horas) in list(self._por_usuario.items()):
+                dia = self._por_dia.get((id_cancha, fecha), {})
+                if not any(dia.get(hora, (None,))[0] == id_usuario for hora in horas):
+                    del self._por_usuario[id_usuario]
+        return borradas
+
+
+def crear_retenciones_service() -> RetencionesBase:
+    """Selecciona el backend según RETENCIONES_BACKEND ("base" o "memoria")"""
+    if settings.RETENCIONES_BACKEND == "memoria":
+        return RetencionesMemoria()
+    return RetencionesBaseDatos()
+
+
+# Instancia global
+retenciones_service = crear_retenciones_service()
@@ -0,0 +1,142 @@
+# app/services/storage_base.py
+from fastapi import UploadFile, HTTPException, BackgroundTasks
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+from sqlalchemy import update
+from app.database import SessionLocal
+from app.models.cancha import Cancha
+from app.models.espacio_deportivo import EspacioDeportivo
+from app.services.image_processing import generar_variantes, NOMBRE_ORIGINAL
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_PERMITIDAS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+TAMANIO_MAXIMO_MB = 5
+
+
+class StorageBase(ABC):
+    """
+    Lógica común de almacenamiento de imágenes.
+    Cada backend implementa upload_bytes, download, info, delete, create_signed_upload y get_public_url.
+    """
+
+    @abstractmethod
+    def upload_bytes(self, storage_path: str, content: bytes, content_type: str) -> str:
+        """Sube bytes a la ruta indicada y retorna la URL pública"""
+
+    @abstractmethod
+    def download(self, storage_path: str) -> bytes:
+        """Descarga el contenido de un objeto"""
+
+    @abstractmethod
+    def info(self, storage_path: str) -> Optional[dict]:
+        """Retorna {"size": int, "content_type": str} o None si el objeto no existe"""
+
+    @abstractmethod
+    def delete(self, storage_path: str) -> None:
+        """Elimina un objeto (no falla si no existe)"""
+
+    @abstractmethod
+    def create_signed_upload(self, storage_path: str) -> dict:
+        """Retorna {"signed_url", "token", "path"} para subir directamente al storage"""
+
+    @abstractmethod
+    def get_public_url(self, storage_path: str) -> str:
+        """URL pública del objeto"""
+
+    @staticmethod
+    def validar_extension(filename: Optional[str]) -> str:
+        """Valida la extensión del archivo y la retorna en minúsculas"""
+        filename = filename or "image"
+        ext = filename.split('.')[-1].lower() if '.' in filename else ''
+
+        if ext not in EXTENSIONES_PERMITIDAS:
+            raise HTTPException(
+                status_code=400,
+                detail="Tipo de archivo no permitido. Use PNG, JPG, JPEG, GIF o WEBP"
+            )
+        return ext
+
+    @staticmethod
+    def nueva_ruta_imagen(folder: str, ext: str) -> Tuple[str, str]:
+        """Cada imagen tiene su propia carpeta: original + variantes. Retorna (carpeta, ruta)"""
+        carpeta = f"{folder}/{uuid.uuid4().hex}"
+        return carpeta, f"{carpeta}/{NOMBRE_ORIGINAL}.{ext}"
+
+    async def upload_image(
+        self,
+        file: UploadFile,
+        folder: str = "uploads",
+        max_size_mb: int = TAMANIO_MAXIMO_MB,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> str:
+        """
+        Sube imagen y retorna URL pública.
+        Si se pasa background_tasks, las variantes (thumb, card, full)
+        se generan y suben después de responder; las respuestas las
+        muestran cuando registrar_variantes las marca.
+        """
+        # Validar tamaño
+        content = await file.read()
+        if len(content) > max_size_mb * 1024 * 1024:
+            raise HTTPException(
+                status_code=400,
+                detail=f"La imagen es demasiado grande (máximo {max_size_mb}MB)"
+            )
+
+        # Validar tipo de archivo
+        ext = self.validar_extension(file.filename)
+        carpeta, storage_path = self.nueva_ruta_imagen(folder, ext)
+
+        try:
+            url = self.upload_bytes(storage_path, content, file.content_type or f"image/{ext}")
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al subir imagen: {str(e)}"
+            )
+
+        if background_tasks is not None:
+            background_tasks.add_task(self.procesar_variantes, content, storage_path)
+
+        return url
+
+    def subir_variantes(self, content: bytes, carpeta: str) -> bool:
+        """Genera las variantes redimensionadas y las sube junto al original; False si alguna falló"""
+        try:
+            variantes = generar_variantes(content)
+        except Exception as e:
+            logger.warning("❌ [STORAGE] No se pudieron generar variantes de %s: %s", carpeta, e)
+            return False
+
+        completas = True
+        for nombre, (datos, content_type) in variantes.items():
+            try:
+                self.upload_bytes(f"{carpeta}/{nombre}", datos, content_type)
+            except Exception as e:
+                logger.error("❌ [STORAGE] Error subiendo variante %s/%s: %s", carpeta, nombre, e)
+                completas = False
+        return completas
+
+    def procesar_variantes(self, content: bytes, storage_path: str) -> None:
+        """Sube las variantes del original y, si están todas, las habilita en las respuestas"""
+        if self.subir_variantes(content, storage_path.rsplit("/", 1)[0]):
+            registrar_variantes(self.get_public_url(storage_path))
+
+
+def registrar_variantes(imagen_url: str) -> None:
+    """Marca las variantes como generadas en el espacio o la cancha que todavía usa esa imagen"""
+    db = SessionLocal()
+    try:
+        for modelo in (EspacioDeportivo, Cancha):
+            db.execute(
+                update(modelo).where(modelo.imagen == imagen_url).values(imagen_variantes=imagen_url)
+            )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error("❌ [STORAGE] No se pudieron registrar las variantes de %s: %s", imagen_url, e)
+    finally:
+        db.close()
@@ -1,65 +1,70 @@
 # app/services/supabase_storage.py
-from fastapi import UploadFile, HTTPException
-from supabase import create_client
-import uuid
+from functools import cached_property
+from typing import Optional
 from app.config import settings
-import os
+from app.services.storage_base import StorageBase
+from app.core.metrics import medir_http_saliente
 
-class SupabaseStorage:
+class SupabaseStorage(StorageBase):
     def __init__(self):
+        self.bucket = "olympiaHub"
+    
+    @cached_property
+    def client(self):
+        """Cliente de Supabase, creado en el primer uso (importarlo cuesta ~200ms al arrancar)"""
+        from supabase import create_client
+        
+        settings.requerir("SUPABASE_URL", "SUPABASE_SERVICE_KEY")
         # Usar SERVICE KEY para escritura
-        self.client = create_client(
+        return create_client(
             settings.SUPABASE_URL,
             settings.SUPABASE_SERVICE_KEY
         )
-        self.bucket = "olympiaHub"
     
-    async def upload_image(
-        self, 
-        file: UploadFile, 
-        folder: str = "uploads",
-        max_size_mb: int = 5
-    ) -> str:
-        """Sube imagen y retorna URL pública"""
-        # Validar tamaño
-        content = await file.read()
-        if len(content) > max_size_mb * 1024 * 1024:
-            raise HTTPException(
-                status_code=400,
-                detail=f"La imagen es demasiado grande (máximo {max_size_mb}MB)"
-            )
-        
-        # Validar tipo de archivo
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-        filename = file.filename or "image"
-        ext = filename.split('.')[-1].lower() if '.' in filename else ''
-        
-        if ext not in allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail="Tipo de archivo no permitido. Use PNG, JPG, JPEG, GIF o WEBP"
-            )
-        
-        # Generar nombre único
-        unique_filename = f"{uuid.uuid4().hex}.{ext}"
-        storage_path = f"{folder}/{unique_filename}"
-        
-        try:
-            # Subir a Supabase Storage
+    def upload_bytes(self, storage_path: str, content: bytes, content_type: str) -> str:
+        """Sube bytes a la ruta indicada y retorna la URL pública"""
+        with medir_http_saliente("supabase"):
             self.client.storage.from_(self.bucket).upload(
                 storage_path,
                 content,
-                {"content-type": file.content_type or f"image/{ext}"}
-            )
-            
-            # Obtener URL pública
-            return self.client.storage.from_(self.bucket).get_public_url(storage_path)
-            
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error al subir imagen: {str(e)}"
+                {"content-type": content_type}
             )
+        return self.get_public_url(storage_path)
+    
+    def download(self, storage_path: str) -> bytes:
+        with medir_http_saliente("supabase"):
+            return self.client.storage.from_(self.bucket).download(storage_path)
+    
+    def info(self, storage_path: str) -> Optional[dict]:
+        carpeta, _, nombre = storage_path.rpartition("/")
+        with medir_http_saliente("supabase"):
+            objetos = self.client.storage.from_(self.bucket).list(carpeta, {"search": nombre})
+        for objeto in objetos:
+            if objeto.get("name") == nombre:
+                metadata = objeto.get("metadata") or {}
+                return {
+                    "size": int(metadata.get("size") or 0),
+                    "content_type": metadata.get("mimetype")
+                }
+        return None
+    
+    def delete(self, storage_path: str) -> None:
+        with medir_http_saliente("supabase"):
+            self.client.storage.from_(self.bucket).remove([storage_path])
+    
+    def create_signed_upload(self, storage_path: str) -> dict:
+        with medir_http_saliente("supabase"):
+            return self.client.storage.from_(self.bucket).create_signed_upload_url(storage_path)
+    
+    def get_public_url(self, storage_path: str) -> str:
+        return self.client.storage.from_(self.bucket).get_public_url(storage_path)
+
+def crear_storage_service() -> StorageBase:
+    """Selecciona el backend según STORAGE_BACKEND ("supabase" o "local")"""
+    if settings.STORAGE_BACKEND == "local":
+        from app.services.local_storage import LocalStorage
+        return LocalStorage()
+    return SupabaseStorage()
 
 # Instancia global
-storage_service = SupabaseStorage()
\ No newline at end of file
+storage_service = crear_storage_service()
@@ -0,0 +1,442 @@
+"""
+Generador de datos sintéticos a escala de producción.
+
+Carga espacios, canchas, usuarios, reservas (con distribución realista por
+hora y día de la semana), asistentes, pagos, cupones, notificaciones y
+comentarios usando las tablas de los modelos. Es determinista por semilla y
+se parametriza con un factor de escala:
+
+    escala 1    ->  200 espacios, 800 canchas, 20k usuarios, ~1M reservas
+    escala 0.01 ->  ~10k reservas (pruebas rápidas)
+
+En Postgres carga con COPY; en otros motores con executemany por lotes.
+
+Uso:
+    python -m benchmarks.dataset --escala 1 --semilla 42 --truncar
+    DATABASE_URL=sqlite:////tmp/dataset.db python -m benchmarks.dataset --escala 0.01 --crear-tablas
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as hora, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+# Por escala 1
+ESPACIOS = 200
+CANCHAS_POR_ESPACIO = 4
+CLIENTES = 20_000
+DIAS_PASADOS = 365
+DIAS_FUTUROS = 60
+
+DISCIPLINAS = ["Fútbol", "Fútbol 5", "Básquet", "Vóley", "Tenis", "Pádel", "Futsal", "Handball"]
+ZONAS = ["Centro", "Norte", "Sur", "Este", "Oeste", "Zona Universitaria", "Periferia"]
+METODOS_PAGO = ["tarjeta", "qr", "transferencia", "efectivo"]
+
+# Horas de inicio permitidas (la cancha abre a las 8 y cierra a las 22)
+HORAS = list(range(8, 22))
+# Probabilidad relativa de ocupación por hora: pico de 18 a 21
+PESO_HORA = [0.15, 0.15, 0.2, 0.2, 0.2, 0.25, 0.25, 0.3, 0.35, 0.45, 0.6, 0.7, 0.65, 0.45]
+# Lunes..Domingo
+PESO_DIA = [0.85, 0.85, 0.9, 0.95, 1.15, 1.35, 1.25]
+# Ajuste global para ~1250 reservas por cancha (≈1M con escala 1)
+OCUPACION = 0.55
+
+TAMANIO_LOTE = 20_000
+
+
+class Cargador:
+    """Inserta filas por lotes: COPY en Postgres, executemany en el resto"""
+    def __init__(self, engine, metodo: str = "auto"):
+        self.engine = engine
+        self.usar_copy = metodo == "copy" or (metodo == "auto" and engine.dialect.name == "postgresql")
+        self.totales = {}
+
+    def cargar(self, tabla, columnas: Sequence[str], filas: Iterable[tuple]) -> int:
+        inicio = time.perf_counter()
+        total = 0
+        for lote in _en_lotes(filas, TAMANIO_LOTE):
+            if self.usar_copy:
+                self._copy(tabla.name, columnas, lote)
+            else:
+                with self.engine.begin() as conn:
+                    conn.execute(tabla.insert(), [dict(zip(columnas, fila, strict=True)) for fila in lote])
+            total += len(lote)
+        self.totales[tabla.name] = total
+        print(f"   {tabla.name:22} {total:>12,} filas  {time.perf_counter() - inicio:7.1f}s")
+        return total
+
+    def _copy(self, nombre_tabla: str, columnas: Sequence[str], lote: List[tuple]):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for fila in lote:
+            writer.writerow(_valor_csv(v) for v in fila)
+        datos = io.BytesIO(buffer.getvalue().encode("utf-8"))
+        conexion = self.engine.raw_connection()
+        try:
+            with conexion.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {nombre_tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')",
+                    datos
+                )
+            conexion.commit()
+        finally:
+            conexion.close()
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    if isinstance(valor, (date, datetime, hora)):
+        return valor.isoformat()
+    return valor
+
+
+def _en_lotes(filas: Iterable[tuple], tamanio: int) -> Iterator[List[tuple]]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamanio:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class GeneradorDataset:
+    def __init__(self, escala: float, semilla: int, hoy: date = None):
+        self.escala = escala
+        self.semilla = semilla
+        self.hoy = hoy or date.today()
+        self.ahora = datetime.combine(self.hoy, hora(12))
+
+        self.n_espacios = max(1, round(ESPACIOS * escala))
+        self.n_canchas = self.n_espacios * CANCHAS_POR_ESPACIO
+        self.n_clientes = max(10, round(CLIENTES * escala))
+        self.n_disciplinas = len(DISCIPLINAS)
+
+        # Ids asignados explícitamente: las FK no dependen del orden de inserción
+        self.id_admin = 1
+        self.primer_staff = 2
+        self.primer_cliente = self.primer_staff + 2 * self.n_espacios
+
+        # Se llenan al generar reservas (para pagos, notificaciones y comentarios)
+        self.reservas_resumen: List[Tuple[int, int, int, date, str, float, datetime]] = []
+
+    def rng(self, tabla: str) -> random.Random:
+        """Un generador por tabla: cambiar una tabla no altera las demás"""
+        return random.Random(f"{self.semilla}:{tabla}")
+
+    # ---------- Catálogo y usuarios ----------
+
+    def disciplinas(self):
+        for i, nombre in enumerate(DISCIPLINAS, start=1):
+            yield (i, nombre, f"Disciplina {nombre}")
+
+    def usuarios(self, hash_contrasenia: str):
+        rng = self.rng("usuario")
+        yield (self.id_admin, "Admin", "Dataset", "admin@dataset.olympiahub.com", hash_contrasenia,
+               "activo", "admin", "70000000", self.ahora - timedelta(days=DIAS_PASADOS + 30), None)
+        for i in range(self.n_espacios):
+            for j, rol in enumerate(("gestor", "control_acceso")):
+                id_usuario = self.primer_staff + 2 * i + j
+                yield (id_usuario, rol.capitalize(), f"Espacio{i}", f"{rol}{i}@dataset.olympiahub.com",
+                       hash_contrasenia, "activo", rol, f"7{rng.randrange(10**7):07d}",
+                       self.ahora - timedelta(days=rng.randrange(DIAS_PASADOS, DIAS_PASADOS + 30)), None)
+        for i in range(self.n_clientes):
+            id_usuario = self.primer_cliente + i
+            estado = "activo" if rng.random() < 0.97 else "inactivo"
+            yield (id_usuario, f"Cliente{i}", f"Apellido{i % 997}", f"cliente{i}@dataset.olympiahub.com",
+                   hash_contrasenia, estado, "cliente", f"6{rng.randrange(10**7):07d}",
+                   self.ahora - timedelta(days=rng.randrange(0, DIAS_PASADOS + 30), seconds=rng.randrange(86400)), None)
+
+    def espacios(self):
+        rng = self.rng("espacio")
+        for i in range(self.n_espacios):
+            estado = "activo" if rng.random() < 0.95 else "inactivo"
+            yield (i + 1, f"Complejo Deportivo {i}", f"{rng.choice(ZONAS)}, calle {rng.randrange(1, 300)}",
+                   rng.choice([50, 100, 200, 500]), estado, "Espacio generado para pruebas de escala", None,
+                   round(-16.5 + rng.uniform(-0.1, 0.1), 6), round(-68.15 + rng.uniform(-0.1, 0.1), 6),
+                   self.ahora - timedelta(days=DIAS_PASADOS + 60))
+
+    def administra(self):
+        for i in range(self.n_espacios):
+            for j in range(2):
+                yield (self.primer_staff + 2 * i + j, i + 1, self.ahora - timedelta(days=DIAS_PASADOS))
+
+    def canchas(self):
+        rng = self.rng("cancha")
+        for i in range(self.n_canchas):
+            estado = "disponible" if rng.random() < 0.93 else "mantenimiento"
+            yield (i + 1, f"Cancha {i % CANCHAS_POR_ESPACIO + 1}", rng.choice(["Sintética", "Parquet", "Cemento", "Arcilla"]),
+                   hora(8), hora(22), rng.choice([40, 50, 60, 80, 100, 120]), estado,
+                   i // CANCHAS_POR_ESPACIO + 1, None, self.ahora - timedelta(days=DIAS_PASADOS + 30))
+
+    def canchas_disciplinas(self):
+        rng = self.rng("cancha_disciplina")
+        for i in range(self.n_canchas):
+            for id_disciplina in sorted(rng.sample(range(1, self.n_disciplinas + 1), rng.randint(1, 3))):
+                yield (i + 1, id_disciplina)
+
+    # ---------- Reservas ----------
+
+    def reservas(self, precios: List[float]):
+        """
+        Recorre cada cancha, día y hora decidiendo si el horario está ocupado,
+        así no hay reservas superpuestas y la distribución sigue los pesos.
+        """
+        rng = self.rng("reserva")
+        id_reserva = 0
+        primer_dia = self.hoy - timedelta(days=DIAS_PASADOS)
+        dias = DIAS_PASADOS + DIAS_FUTUROS
+        for id_cancha in range(1, self.n_canchas + 1):
+            popularidad = rng.uniform(0.5, 1.5) * OCUPACION
+            precio = precios[id_cancha - 1]
+            for d in range(dias):
+                fecha = primer_dia + timedelta(days=d)
+                factor_dia = PESO_DIA[fecha.weekday()] * popularidad
+                for h, peso in zip(HORAS, PESO_HORA):
+                    if rng.random() >= peso * factor_dia:
+                        continue
+                    id_reserva += 1
+                    duracion = 1 if rng.random() < 0.8 else 2
+                    if h + duracion > 22:
+                        duracion = 1
+                    if fecha < self.hoy:
+                        estado = "completada" if rng.random() < 0.86 else "cancelada"
+                    elif fecha == self.hoy:
+                        estado = "confirmada" if rng.random() < 0.9 else "cancelada"
+                    else:
+                        x = rng.random()
+                        estado = "pendiente" if x < 0.4 else ("confirmada" if x < 0.92 else "cancelada")
+                    cantidad = rng.choice([2, 4, 6, 8, 10, 12])
+                    id_usuario = self.primer_cliente + int(rng.paretovariate(1.2) * 37) % self.n_clientes
+                    creada = datetime.combine(fecha, hora(h)) - timedelta(
+                        days=rng.randrange(0, 15), seconds=rng.randrange(86400)
+                    )
+                    costo = precio * duracion
+                    self.reservas_resumen.append((id_reserva, id_usuario, id_cancha, fecha, estado, costo, creada))
+                    yield (id_reserva, fecha, hora(h), hora(h + duracion), estado, costo, None, cantidad,
+                           f"R{id_reserva:010d}", id_usuario, id_cancha,
+                           rng.randint(1, self.n_disciplinas), creada, None)
+
+    def asistentes(self):
+        rng = self.rng("asistente")
+        id_asistente = 0
+        for id_reserva, id_usuario, _, fecha, estado, _, creada in self.reservas_resumen:
+            cantidad = rng.randint(1, 6)
+            for k in range(cantidad):
+                id_asistente += 1
+                asistio = estado == "completada" and rng.random() < 0.9
+                validacion = datetime.combine(fecha, hora(8)) + timedelta(minutes=rng.randrange(0, 840)) if asistio else None
+                yield (id_asistente, id_reserva, f"Asistente {id_asistente}",
+                       f"asistente{id_asistente}@dataset.olympiahub.com",
+                       f"QR{id_asistente:012d}", f"TK{id_asistente:016d}", asistio, validacion,
+                       creada + timedelta(minutes=k), None)
+
+    def pagos(self):
+        rng = self.rng("pago")
+        id_pago = 0
+        for id_reserva, _, _, _, estado, costo, creada in self.reservas_resumen:
+            if estado in ("completada", "confirmada"):
+                estado_pago = "completado"
+            elif estado == "pendiente" and rng.random() < 0.3:
+                estado_pago = "pendiente"
+            elif estado == "cancelada" and rng.random() < 0.2:
+                estado_pago = "reembolsado"
+            else:
+                continue
+            id_pago += 1
+            yield (id_pago, costo, creada + timedelta(minutes=rng.randrange(1, 120)), rng.choice(METODOS_PAGO),
+                   estado_pago, f"TX{id_pago:012d}", id_reserva)
+
+    def cupones(self):
+        rng = self.rng("cupon")
+        id_cupon = 0
+        reservas = self.reservas_resumen
+        for i in range(self.n_clientes):
+            for _ in range(rng.choice([0, 0, 1, 1, 2])):
+                id_cupon += 1
+                x = rng.random()
+                if x < 0.5:
+                    estado, id_reserva = "activo", None
+                elif x < 0.85 and reservas:
+                    estado, id_reserva = "utilizado", reservas[rng.randrange(len(reservas))][0]
+                else:
+                    estado, id_reserva = "inactivo", None
+                tipo = "porcentaje" if rng.random() < 0.8 else "fijo"
+                monto = rng.choice([5, 10, 15, 20]) if tipo == "porcentaje" else rng.choice([10, 20, 30])
+                creado = self.ahora - timedelta(days=rng.randrange(0, DIAS_PASADOS))
+                yield (id_cupon, f"CUP{id_cupon:09d}", monto, tipo,
+                       (creado + timedelta(days=rng.choice([30, 60, 90]))).date(), estado,
+                       self.primer_cliente + i, id_reserva, creado)
+
+    def notificaciones(self):
+        rng = self.rng("notificaciones")
+        id_notificacion = 0
+        for id_reserva, id_usuario, _, fecha, estado, _, creada in self.reservas_resumen:
+            tipos = ["reserva_creada"]
+            if estado in ("confirmada", "completada"):
+                tipos.append("reserva_confirmada")
+            if estado == "cancelada":
+                tipos.append("reserva_cancelada")
+            for tipo in tipos:
+                id_notificacion += 1
+                leida = fecha < self.hoy - timedelta(days=3) or rng.random() < 0.4
+                yield (id_notificacion, "Actualización de reserva", f"Reserva R{id_reserva:010d}: {tipo}",
+                       tipo, leida, creada + timedelta(minutes=id_notificacion % 30), id_usuario)
+
+    def comentarios(self):
+        rng = self.rng("comentario")
+        id_comentario = 0
+        for id_reserva, id_usuario, id_cancha, fecha, estado, _, _ in self.reservas_resumen:
+            if estado != "completada" or rng.random() >= 0.06:
+                continue
+            id_comentario += 1
+            calificacion = rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 15, 37, 40])[0]
+            yield (id_comentario, f"Comentario de la reserva {id_reserva}", calificacion,
+                   datetime.combine(fecha, hora(22)) + timedelta(hours=rng.randrange(1, 72)), id_usuario, id_cancha)
+
+
+def _columnas(tabla) -> List[str]:
+    return [c.name for c in tabla.columns]
+
+
+def truncar(engine, tablas):
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            nombres = ", ".join(t.name for t in tablas)
+            conn.exec_driver_sql(f"TRUNCATE {nombres} RESTART IDENTITY CASCADE")
+        else:
+            for tabla in reversed(tablas):
+                conn.execute(tabla.delete())
+
+
+def ajustar_secuencias(engine, tablas):
+    """Después de insertar ids explícitos, las secuencias de Postgres deben continuar desde el máximo"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for tabla in tablas:
+            pk = list(tabla.primary_key.columns)
+            if len(pk) != 1 or not pk[0].autoincrement or str(pk[0].type) != "INTEGER":
+                continue
+            conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{tabla.name}', '{pk[0].name}'), "
+                f"COALESCE((SELECT MAX({pk[0].name}) FROM {tabla.name}), 1))"
+            )
+            conn.exec_driver_sql(f"ANALYZE {tabla.name}")
+
+
+def generar(engine, escala: float, semilla: int, metodo: str = "auto", hoy: date = None) -> dict:
+    from app.core.security import get_password_hash
+    from app.models.usuario import Usuario
+    from app.models.espacio_deportivo import EspacioDeportivo
+    from app.models.administra import Administra
+    from app.models.cancha import Cancha
+    from app.models.cancha_disciplina import CanchaDisciplina
+    from app.models.disciplina import Disciplina
+    from app.models.reserva import Reserva
+    from app.models.asistente import AsistenteReserva
+    from app.models.pago import Pago
+    from app.models.cupon import Cupon
+    from app.models.notification import Notificacion
+    from app.models.comentario import Comentario
+    from app.services.calificaciones import recalcular_calificaciones
+    from app.services.estadisticas_usuario import recalcular_estadisticas
+    from app.services.particiones_reserva import asegurar_particiones
+
+    generador = GeneradorDataset(escala, semilla, hoy)
+    cargador = Cargador(engine, metodo)
+    # Todos los usuarios generados comparten la contraseña "dataset123"
+    hash_contrasenia = get_password_hash("dataset123")
+
+    pasos = [
+        (Disciplina, generador.disciplinas()),
+        (Usuario, generador.usuarios(hash_contrasenia)),
+        (EspacioDeportivo, generador.espacios()),
+        (Administra, generador.administra()),
+        (Cancha, generador.canchas()),
+        (CanchaDisciplina, generador.canchas_disciplinas()),
+    ]
+    for modelo, filas in pasos:
+        cargador.cargar(modelo.__table__, _columnas(modelo.__table__), filas)
+
+    # En PostgreSQL particionado, cada mes del dataset necesita su partición antes del COPY
+    with engine.begin() as conn:
+        asegurar_particiones(conn, generador.hoy - timedelta(days=DIAS_PASADOS), generador.hoy + timedelta(days=DIAS_FUTUROS))
+
+    precios = [float(fila[5]) for fila in generador.canchas()]
+    for modelo, filas in [
+        (Reserva, generador.reservas(precios)),
+        (AsistenteReserva, generador.asistentes()),
+        (Pago, generador.pagos()),
+        (Cupon, generador.cupones()),
+        (Notificacion, generador.notificaciones()),
+        (Comentario, generador.comentarios()),
+    ]:
+        cargador.cargar(modelo.__table__, _columnas(modelo.__table__), filas)
+
+    ajustar_secuencias(engine, [m.__table__ for m, _ in pasos] + [
+        Reserva.__table__, AsistenteReserva.__table__, Pago.__table__,
+        Cupon.__table__, Notificacion.__table__, Comentario.__table__,
+    ])
+    # COPY no pasa por la sesión: las estadísticas por usuario y las calificaciones se calculan al final
+    with engine.begin() as conn:
+        cargador.totales["estadisticas_usuario"] = recalcular_estadisticas(conn)
+        cargador.totales["calificaciones"] = recalcular_calificaciones(conn)
+    return cargador.totales
+
+
+def tablas_dataset():
+    from app.database import Base
+    import app.models  # noqa: F401
+    from app.models.asistente import AsistenteReserva  # noqa: F401
+    from app.models.notification import Notificacion  # noqa: F401
+    from app.models.estadistica_usuario import EstadisticaUsuario  # noqa: F401
+
+    nombres = ["disciplina", "usuario", "espacio_deportivo", "administra", "cancha", "cancha_disciplina",
+               "reserva", "asistentes_reserva", "pago", "cupon", "notificaciones", "comentario",
+               "estadisticas_usuario", "calificaciones_cancha", "calificaciones_espacio"]
+    return [Base.metadata.tables[n] for n in nombres]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=float, default=1.0, help="factor de escala (1 ≈ 1M reservas)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--metodo", choices=["auto", "copy", "executemany"], default="auto")
+    parser.add_argument("--truncar", action="store_true", help="vaciar las tablas antes de cargar")
+    parser.add_argument("--crear-tablas", action="store_true", help="crear las tablas desde los modelos (SQLite/pruebas)")
+    parser.add_argument("--hoy", type=date.fromisoformat, help="fecha de referencia (por defecto hoy)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    # El generador no usa servicios externos: valores de relleno si faltan
+    for variable in ("RECAPTCHA_SECRET_KEY", "SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY",
+                     "IMG_BB_API_KEY", "BREVO_API_KEY", "SENDER_EMAIL"):
+        os.environ.setdefault(variable, "dataset")
+
+    from app.database import Base, engine
+
+    tablas = tablas_dataset()
+    if args.crear_tablas:
+        Base.metadata.create_all(engine)
+    if args.truncar:
+        truncar(engine, tablas)
+
+    print(f"📦 Generando dataset escala={args.escala} semilla={args.semilla} en {engine.url.render_as_string()}")
+    inicio = time.perf_counter()
+    totales = generar(engine, args.escala, args.semilla, args.metodo, args.hoy)
+    print(f"✅ {sum(totales.values()):,} filas en {time.perf_counter() - inicio:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
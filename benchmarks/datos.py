@@ -0,0 +1,88 @@
+"""
+Datos iniciales para los benchmarks.
+
+Crea el catálogo (espacios, canchas, disciplinas), clientes, reservas
+pendientes para unirse con código y asistentes con QR de hoy para el
+escaneo en puerta. Retorna los ids que usan los escenarios.
+"""
+import secrets
+from datetime import date, datetime, time
+
+from app.models.usuario import Usuario
+from app.models.espacio_deportivo import EspacioDeportivo
+from app.models.cancha import Cancha
+from app.models.cancha_disciplina import CanchaDisciplina
+from app.models.disciplina import Disciplina
+from app.models.reserva import Reserva
+from app.models.asistente import AsistenteReserva
+
+
+def cargar_datos(db, espacios: int, canchas_por_espacio: int, clientes: int,
+                 reservas_abiertas: int, asistentes_qr: int) -> dict:
+    disciplinas = [Disciplina(nombre=nombre) for nombre in ("Fútbol", "Básquet", "Vóley", "Tenis")]
+    db.add_all(disciplinas)
+
+    usuarios = [
+        Usuario(nombre="Cliente", apellido=str(i), email=f"cliente{i}@benchmark.olympiahub.com",
+                contrasenia="x", rol="cliente", estado="activo")
+        for i in range(clientes)
+    ]
+    db.add_all(usuarios)
+    db.flush()
+
+    canchas = []
+    for i in range(espacios):
+        espacio = EspacioDeportivo(nombre=f"Espacio {i}", ubicacion=f"Zona {i % 7}", capacidad=200,
+                                   estado="activo", descripcion="Espacio de benchmark")
+        db.add(espacio)
+        db.flush()
+        for j in range(canchas_por_espacio):
+            cancha = Cancha(nombre=f"Cancha {i}-{j}", tipo="Sintética", hora_apertura=time(8),
+                            hora_cierre=time(22), precio_por_hora=40 + j * 5, estado="disponible",
+                            id_espacio_deportivo=espacio.id_espacio_deportivo)
+            db.add(cancha)
+            db.flush()
+            db.add(CanchaDisciplina(id_cancha=cancha.id_cancha,
+                                    id_disciplina=disciplinas[j % len(disciplinas)].id_disciplina))
+            canchas.append(cancha)
+    db.flush()
+
+    def nueva_reserva(indice: int, fecha: date, estado: str, asistentes: int) -> Reserva:
+        cancha = canchas[indice % len(canchas)]
+        hora = 8 + (indice // len(canchas)) % 14
+        reserva = Reserva(fecha_reserva=fecha, hora_inicio=time(hora), hora_fin=time(hora + 1),
+                          estado=estado, costo_total=cancha.precio_por_hora,
+                          cantidad_asistentes=asistentes, codigo_reserva=f"BEN{indice:06d}{estado[0].upper()}",
+                          id_usuario=usuarios[indice % len(usuarios)].id_usuario, id_cancha=cancha.id_cancha,
+                          id_disciplina=disciplinas[0].id_disciplina)
+        db.add(reserva)
+        return reserva
+
+    # Reservas a las que se unen invitados (cupo amplio para no agotarlo)
+    abiertas = [nueva_reserva(i, date.today().replace(year=date.today().year + 1), "pendiente", 10_000)
+                for i in range(reservas_abiertas)]
+
+    # Reservas confirmadas de hoy con asistentes para escanear en puerta
+    confirmadas = [nueva_reserva(i, date.today(), "confirmada", 50)
+                   for i in range(max(1, asistentes_qr // 50 + 1))]
+    db.flush()
+
+    qrs = []
+    for i in range(asistentes_qr):
+        codigo_qr = f"QRB-{i}-{secrets.token_hex(4)}"
+        token = secrets.token_hex(8)
+        db.add(AsistenteReserva(id_reserva=confirmadas[i % len(confirmadas)].id_reserva,
+                                nombre=f"Asistente {i}", email=f"asistente{i}@benchmark.olympiahub.com",
+                                codigo_qr=codigo_qr, token_verificacion=token, asistio=False))
+        qrs.append({"codigo_qr": codigo_qr, "token_verificacion": token})
+    db.commit()
+
+    return {
+        "espacios": sorted({c.id_espacio_deportivo for c in canchas}),
+        "canchas": [c.id_cancha for c in canchas],
+        "disciplinas": [d.id_disciplina for d in disciplinas],
+        "clientes": [u.id_usuario for u in usuarios],
+        "codigos_abiertos": [r.codigo_reserva for r in abiertas],
+        "qrs": qrs,
+        "cargado_en": datetime.now().isoformat(),
+    }
@@ -0,0 +1,307 @@
+"""
+Benchmark de carga HTTP con escenarios reales de reservas.
+
+Levanta la app de app/main.py con uvicorn en un hilo, contra Postgres
+(DATABASE_URL) o un SQLite temporal, con Brevo e ImgBB simulados por un
+servidor local y el storage en disco (STORAGE_BACKEND=local). Cada
+escenario se ejecuta con la concurrencia indicada y reporta throughput y
+p50/p95/p99 por endpoint.
+
+Uso:
+    python -m benchmarks.run                       # SQLite temporal
+    DATABASE_URL=postgresql://... python -m benchmarks.run --peticiones 500
+    python -m benchmarks.run --guardar base        # guarda benchmarks/baselines/base.json
+    python -m benchmarks.run --comparar base       # compara y falla si hay regresión
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+DIRECTORIO_BASELINES = Path(__file__).resolve().parent / "baselines"
+
+
+def preparar_entorno(args):
+    """Variables de entorno que la app lee al importarse"""
+    if not os.environ.get("DATABASE_URL"):
+        archivo = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        os.environ["DATABASE_URL"] = f"sqlite:///{archivo.name}"
+    for variable in ("RECAPTCHA_SECRET_KEY", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY",
+                     "IMG_BB_API_KEY", "BREVO_API_KEY"):
+        os.environ.setdefault(variable, "benchmark")
+    os.environ.setdefault("SENDER_EMAIL", "benchmark@olympiahub.com")
+    os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ.setdefault("LOCAL_STORAGE_DIR", tempfile.mkdtemp(prefix="benchmark_storage_"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Las reservas del benchmark no cambian de estado mientras se mide
+    os.environ.setdefault("CICLO_RESERVAS_HABILITADO", "false")
+
+
+def registrar_funciones_sqlite(engine):
+    """
+    En SQLite no existen las funciones PL/pgSQL: verificar_disponibilidad se
+    reemplaza por una que siempre retorna disponible (los escenarios generan
+    horarios que no se superponen). listar_horarios_disponibles no tiene
+    equivalente, por eso su escenario solo corre en Postgres.
+    """
+    import sqlite3
+    from datetime import time as hora
+    from sqlalchemy import event
+
+    # text() pasa los time de Python sin convertir: sqlite3 no sabe enlazarlos
+    sqlite3.register_adapter(hora, hora.isoformat)
+
+    @event.listens_for(engine, "connect")
+    def _registrar(dbapi_connection, connection_record):
+        dbapi_connection.create_function("verificar_disponibilidad", 4, lambda *args: 1)
+
+
+def definir_escenarios(datos: dict, es_postgres: bool) -> dict:
+    """nombre -> función(i) que retorna (método, url, json)"""
+    canchas = datos["canchas"]
+    espacios = datos["espacios"]
+    manana = date.today() + timedelta(days=1)
+
+    def crear_reserva(i):
+        # Un horario distinto por petición: cancha, hora y día rotan
+        cancha = canchas[i % len(canchas)]
+        bloque = i // len(canchas)
+        dia = manana + timedelta(days=30 + bloque // 14)
+        hora = 8 + bloque % 14
+        return "POST", "/reservas/crear-con-codigo-unico", {
+            "id_usuario": datos["clientes"][i % len(datos["clientes"])],
+            "id_cancha": cancha,
+            "id_disciplina": datos["disciplinas"][0],
+            "fecha_reserva": dia.isoformat(),
+            "hora_inicio": f"{hora:02d}:00:00",
+            "hora_fin": f"{hora + 1:02d}:00:00",
+            "cantidad_asistentes": 4,
+        }
+
+    escenarios = {
+        "catalogo_espacios": lambda i: ("GET", "/espacios/public/list", None),
+        "catalogo_canchas": lambda i: ("GET", "/canchas/public/disponibles", None),
+        "canchas_por_espacio": lambda i: ("GET", f"/canchas/public/espacio/{espacios[i % len(espacios)]}", None),
+        "disciplinas": lambda i: ("GET", "/disciplinas/", None),
+        "crear_reserva": crear_reserva,
+        "unirse_con_codigo": lambda i: (
+            "POST",
+            f"/reservas/unirse-con-codigo/{datos['codigos_abiertos'][i % len(datos['codigos_abiertos'])]}",
+            {"nombre": f"Invitado {i}", "email": f"invitado{i}@benchmark.olympiahub.com"},
+        ),
+        "escanear_qr": lambda i: ("POST", "/control-acceso/verificar-qr", datos["qrs"][i]),
+    }
+    if es_postgres:
+        escenarios["horarios_disponibles"] = lambda i: (
+            "GET",
+            f"/reservas/cancha/{canchas[i % len(canchas)]}/horarios-disponibles?fecha={manana.isoformat()}",
+            None,
+        )
+    return escenarios
+
+
+def percentil(valores, p: int) -> float:
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+async def ejecutar_escenario(client, generador, inicio: int, peticiones: int, concurrencia: int) -> dict:
+    import httpx
+
+    latencias = []
+    errores = 0
+    primer_error = None
+    siguiente = iter(range(inicio, inicio + peticiones))
+    lock = asyncio.Lock()
+
+    async def trabajador():
+        nonlocal errores, primer_error
+        while True:
+            async with lock:
+                i = next(siguiente, None)
+            if i is None:
+                return
+            metodo, url, cuerpo = generador(i)
+            t0 = time.perf_counter()
+            try:
+                respuesta = await client.request(metodo, url, json=cuerpo)
+                if respuesta.status_code >= 400:
+                    errores += 1
+                    primer_error = primer_error or f"{respuesta.status_code} {respuesta.text[:200]}"
+            except httpx.HTTPError as e:
+                errores += 1
+                primer_error = primer_error or repr(e)
+            latencias.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - t0
+
+    if primer_error:
+        print(f"   ⚠️  {errores} errores, el primero: {primer_error}")
+
+    return {
+        "peticiones": peticiones,
+        "errores": errores,
+        "throughput_rps": round(peticiones / duracion, 2),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+    }
+
+
+async def ejecutar_benchmark(url_base: str, escenarios: dict, args) -> dict:
+    import httpx
+
+    resultados = {}
+    limites = httpx.Limits(max_connections=args.concurrencia)
+    async with httpx.AsyncClient(base_url=url_base, limits=limites, timeout=60) as client:
+        for nombre, generador in escenarios.items():
+            if args.escenarios and nombre not in args.escenarios:
+                continue
+            # Calentamiento (no se mide); los índices siguen para no repetir horarios ni QR
+            if args.calentamiento:
+                await ejecutar_escenario(client, generador, 0, args.calentamiento, args.concurrencia)
+            resultados[nombre] = await ejecutar_escenario(
+                client, generador, args.calentamiento, args.peticiones, args.concurrencia
+            )
+            r = resultados[nombre]
+            print(f"{nombre:24} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                  f"{r['p99_ms']:>9.1f} {r['errores']:>7}")
+    return resultados
+
+
+def iniciar_servidor(app):
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", access_log=False)
+    servidor = uvicorn.Server(config)
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        time.sleep(0.05)
+    puerto = servidor.servers[0].sockets[0].getsockname()[1]
+    return servidor, hilo, f"http://127.0.0.1:{puerto}"
+
+
+def commit_actual() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "desconocido"
+
+
+def comparar(actual: dict, baseline: dict, tolerancia: float) -> list:
+    """Retorna las regresiones mayores a `tolerancia` (fracción) respecto del baseline"""
+    regresiones = []
+    print(f"\nComparación con baseline ({baseline['metadata']['commit']}):")
+    for nombre, r in actual.items():
+        base = baseline["escenarios"].get(nombre)
+        if not base:
+            continue
+        for metrica in ("p50_ms", "p95_ms", "p99_ms"):
+            delta = (r[metrica] - base[metrica]) / base[metrica] if base[metrica] else 0
+            marca = "❌" if delta > tolerancia else "  "
+            print(f"  {marca} {nombre:24} {metrica:8} {base[metrica]:>9.1f} -> {r[metrica]:>9.1f} ({delta:+.0%})")
+            if delta > tolerancia:
+                regresiones.append(f"{nombre} {metrica} {delta:+.0%}")
+        delta = (base["throughput_rps"] - r["throughput_rps"]) / base["throughput_rps"]
+        if delta > tolerancia:
+            regresiones.append(f"{nombre} throughput {-delta:+.0%}")
+    return regresiones
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=200, help="peticiones medidas por escenario")
+    parser.add_argument("--concurrencia", type=int, default=10)
+    parser.add_argument("--calentamiento", type=int, default=10, help="peticiones previas sin medir")
+    parser.add_argument("--latencia-externa", type=float, default=50, help="ms de latencia de Brevo/ImgBB simulados")
+    parser.add_argument("--espacios", type=int, default=20)
+    parser.add_argument("--escenarios", nargs="*", help="ejecutar solo estos escenarios")
+    parser.add_argument("--guardar", metavar="NOMBRE", help="guardar resultados como baseline")
+    parser.add_argument("--comparar", metavar="NOMBRE", help="comparar con un baseline guardado")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="regresión permitida (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    preparar_entorno(args)
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+    from benchmarks.stubs import ServiciosSimulados
+
+    with ServiciosSimulados(latencia_ms=args.latencia_externa) as stubs:
+        os.environ["BREVO_API_URL"] = f"{stubs.url_base}/brevo"
+        os.environ["IMGBB_API_URL"] = f"{stubs.url_base}/imgbb"
+
+        from app.main import app
+        from app.database import Base, SessionLocal, engine
+        from benchmarks.datos import cargar_datos
+
+        es_postgres = engine.dialect.name == "postgresql"
+        if engine.dialect.name == "sqlite":
+            registrar_funciones_sqlite(engine)
+            Base.metadata.create_all(engine)
+        else:
+            print("⚠️  Postgres: los datos de benchmark se agregan a la base indicada en DATABASE_URL")
+
+        db = SessionLocal()
+        total = args.peticiones + args.calentamiento
+        datos = cargar_datos(db, espacios=args.espacios, canchas_por_espacio=3, clientes=50,
+                             reservas_abiertas=20, asistentes_qr=total)
+        db.close()
+
+        escenarios = definir_escenarios(datos, es_postgres)
+        if not es_postgres:
+            print("ℹ️  SQLite: se omite horarios_disponibles (requiere listar_horarios_disponibles de Postgres)")
+
+        servidor, hilo, url_base = iniciar_servidor(app)
+        print(f"\n{'Escenario':24} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>7}")
+        try:
+            resultados = asyncio.run(ejecutar_benchmark(url_base, escenarios, args))
+        finally:
+            servidor.should_exit = True
+            hilo.join()
+
+    informe = {
+        "metadata": {
+            "commit": commit_actual(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "base_de_datos": engine.dialect.name,
+            "peticiones": args.peticiones,
+            "concurrencia": args.concurrencia,
+            "latencia_externa_ms": args.latencia_externa,
+        },
+        "escenarios": resultados,
+    }
+
+    if args.guardar:
+        DIRECTORIO_BASELINES.mkdir(exist_ok=True)
+        destino = DIRECTORIO_BASELINES / f"{args.guardar}.json"
+        destino.write_text(json.dumps(informe, indent=2, ensure_ascii=False))
+        print(f"\n💾 Baseline guardado en {destino}")
+
+    if args.comparar:
+        baseline = json.loads((DIRECTORIO_BASELINES / f"{args.comparar}.json").read_text())
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print("\n❌ Regresiones de rendimiento:")
+            for regresion in regresiones:
+                print(f"   - {regresion}")
+            return 1
+        print("\n✅ Sin regresiones respecto del baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Servidor HTTP local que reemplaza a Brevo e ImgBB durante los benchmarks.
+
+Responde como las APIs reales (201 para Brevo, 200 con la URL para ImgBB)
+después de una latencia configurable, para que el costo de las llamadas
+salientes se parezca al de producción sin enviar emails reales.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    latencia = 0.0
+
+    def do_POST(self):
+        longitud = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(longitud)
+        time.sleep(self.latencia)
+
+        if self.path.startswith("/brevo"):
+            self._responder(201, {"messageId": "<benchmark@olympiahub>"})
+        elif self.path.startswith("/imgbb"):
+            host = self.headers.get("Host", "localhost")
+            self._responder(200, {"data": {"url": f"http://{host}/qr.png"}})
+        else:
+            self._responder(404, {"error": "ruta no simulada"})
+
+    def _responder(self, status_code: int, cuerpo: dict):
+        datos = json.dumps(cuerpo).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServiciosSimulados:
+    """Levanta el servidor en un hilo: with ServiciosSimulados(latencia_ms=50) as stubs: ..."""
+    def __init__(self, latencia_ms: float = 0):
+        handler = type("StubHandler", (_StubHandler,), {"latencia": latencia_ms / 1000})
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.servidor.daemon_threads = True
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def url_base(self) -> str:
+        host, port = self.servidor.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.servidor.shutdown()
+        self.servidor.server_close()
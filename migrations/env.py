@@ -0,0 +1,90 @@
+"""Entorno de Alembic: usa DATABASE_URL y los modelos de la app"""
+import re
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401
+from app.models.asistente import AsistenteReserva  # noqa: F401
+from app.models.estadistica_usuario import EstadisticaUsuario  # noqa: F401
+from app.models.evento_pago import EventoPago  # noqa: F401
+from app.models.idempotencia import ClaveIdempotencia  # noqa: F401
+from app.models.notification import Notificacion  # noqa: F401
+from app.models.retencion import RetencionHorario  # noqa: F401
+from app.models.website_content import WebsiteContent  # noqa: F401
+
+config = context.config
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Particiones mensuales de reserva (migración 0009): las crea y archiva
+# app/services/particiones_reserva.py, no el modelo
+PARTICION_RESERVA = re.compile(r"^reserva_(p\d{4}_\d{2}|default)$")
+
+
+def incluir_nombre(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and name and PARTICION_RESERVA.match(name))
+
+
+def incluir_objeto(particionada: bool):
+    """
+    Con reserva particionada (PostgreSQL) la base difiere del modelo a propósito:
+    las FK hacia reserva son triggers y codigo_reserva tiene un índice simple en
+    lugar de UNIQUE. El modelo las conserva para el ORM y para SQLite.
+    """
+    def incluir(objeto, name, type_, reflected, compare_to) -> bool:
+        if not particionada:
+            return True
+        if type_ == "foreign_key_constraint" and not reflected:
+            return objeto.referred_table.name != "reserva"
+        if type_ == "unique_constraint" and not reflected and objeto.table.name == "reserva":
+            return [columna.name for columna in objeto.columns] != ["codigo_reserva"]
+        if type_ == "index" and reflected and compare_to is None:
+            return name != "ix_reserva_codigo_reserva"
+        return True
+    return incluir
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL sin conectarse (alembic upgrade head --sql)"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=incluir_nombre,
+            include_object=incluir_objeto(connection.dialect.name == "postgresql"),
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,250 @@
+"""esquema base
+
+Tablas tal como existían antes de versionar el esquema. En una base ya
+creada (Supabase) no se ejecuta: se marca con
+
+    alembic stamp 0001
+
+y se continúa con `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 08:52:52.643772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('disciplina',
+    sa.Column('id_disciplina', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id_disciplina'),
+    sa.UniqueConstraint('nombre')
+    )
+    op.create_index(op.f('ix_disciplina_id_disciplina'), 'disciplina', ['id_disciplina'], unique=False)
+    op.create_table('espacio_deportivo',
+    sa.Column('id_espacio_deportivo', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('ubicacion', sa.String(length=150), nullable=True),
+    sa.Column('capacidad', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('imagen', sa.String(length=255), nullable=True),
+    sa.Column('latitud', sa.Float(), nullable=True),
+    sa.Column('longitud', sa.Float(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id_espacio_deportivo')
+    )
+    op.create_index(op.f('ix_espacio_deportivo_id_espacio_deportivo'), 'espacio_deportivo', ['id_espacio_deportivo'], unique=False)
+    op.create_table('usuario',
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('apellido', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=150), nullable=False),
+    sa.Column('contrasenia', sa.String(length=255), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('rol', sa.String(length=20), nullable=False),
+    sa.Column('telefono', sa.String(length=15), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('fecha_actualizacion', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id_usuario')
+    )
+    op.create_index(op.f('ix_usuario_email'), 'usuario', ['email'], unique=True)
+    op.create_index(op.f('ix_usuario_id_usuario'), 'usuario', ['id_usuario'], unique=False)
+    op.create_table('website_content',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.Text(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_website_content_key'), 'website_content', ['key'], unique=True)
+    op.create_table('administra',
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('id_espacio_deportivo', sa.Integer(), nullable=False),
+    sa.Column('fecha_asignacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['id_espacio_deportivo'], ['espacio_deportivo.id_espacio_deportivo'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_usuario', 'id_espacio_deportivo')
+    )
+    op.create_table('cancha',
+    sa.Column('id_cancha', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=True),
+    sa.Column('hora_apertura', sa.Time(), nullable=False),
+    sa.Column('hora_cierre', sa.Time(), nullable=False),
+    sa.Column('precio_por_hora', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('id_espacio_deportivo', sa.Integer(), nullable=True),
+    sa.Column('imagen', sa.String(length=255), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['id_espacio_deportivo'], ['espacio_deportivo.id_espacio_deportivo'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_cancha')
+    )
+    op.create_index(op.f('ix_cancha_id_cancha'), 'cancha', ['id_cancha'], unique=False)
+    op.create_table('notificaciones',
+    sa.Column('id_notificacion', sa.Integer(), nullable=False),
+    sa.Column('titulo', sa.String(length=255), nullable=False),
+    sa.Column('mensaje', sa.Text(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('leida', sa.Boolean(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuario.id_usuario'], ),
+    sa.PrimaryKeyConstraint('id_notificacion')
+    )
+    op.create_index(op.f('ix_notificaciones_id_notificacion'), 'notificaciones', ['id_notificacion'], unique=False)
+    op.create_table('cancha_disciplina',
+    sa.Column('id_cancha', sa.Integer(), nullable=False),
+    sa.Column('id_disciplina', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_cancha'], ['cancha.id_cancha'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_disciplina'], ['disciplina.id_disciplina'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_cancha', 'id_disciplina')
+    )
+    op.create_table('comentario',
+    sa.Column('id_comentario', sa.Integer(), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=False),
+    sa.Column('calificacion', sa.Integer(), nullable=True),
+    sa.Column('fecha_comentario', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('id_cancha', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_cancha'], ['cancha.id_cancha'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_comentario')
+    )
+    op.create_index(op.f('ix_comentario_id_comentario'), 'comentario', ['id_comentario'], unique=False)
+    op.create_table('reserva',
+    sa.Column('id_reserva', sa.Integer(), nullable=False),
+    sa.Column('fecha_reserva', sa.Date(), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False),
+    sa.Column('hora_fin', sa.Time(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('costo_total', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('material_prestado', sa.Text(), nullable=True),
+    sa.Column('cantidad_asistentes', sa.Integer(), nullable=True),
+    sa.Column('codigo_reserva', sa.String(length=20), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.Column('id_cancha', sa.Integer(), nullable=True),
+    sa.Column('id_disciplina', sa.Integer(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('fecha_actualizacion', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['id_cancha'], ['cancha.id_cancha'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_disciplina'], ['disciplina.id_disciplina'], ),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_reserva'),
+    sa.UniqueConstraint('codigo_reserva')
+    )
+    op.create_index(op.f('ix_reserva_id_reserva'), 'reserva', ['id_reserva'], unique=False)
+    op.create_table('asistentes_reserva',
+    sa.Column('id_asistente', sa.Integer(), nullable=False),
+    sa.Column('id_reserva', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('codigo_qr', sa.String(length=255), nullable=False),
+    sa.Column('token_verificacion', sa.String(length=255), nullable=False),
+    sa.Column('asistio', sa.Boolean(), nullable=False),
+    sa.Column('fecha_validacion', sa.DateTime(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_reserva'], ['reserva.id_reserva'], ),
+    sa.PrimaryKeyConstraint('id_asistente'),
+    sa.UniqueConstraint('codigo_qr'),
+    sa.UniqueConstraint('token_verificacion')
+    )
+    op.create_index(op.f('ix_asistentes_reserva_id_asistente'), 'asistentes_reserva', ['id_asistente'], unique=False)
+    op.create_table('cancelacion',
+    sa.Column('id_cancelacion', sa.Integer(), nullable=False),
+    sa.Column('motivo', sa.Text(), nullable=False),
+    sa.Column('fecha_cancelacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('id_reserva', sa.Integer(), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_reserva'], ['reserva.id_reserva'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_cancelacion')
+    )
+    op.create_index(op.f('ix_cancelacion_id_cancelacion'), 'cancelacion', ['id_cancelacion'], unique=False)
+    op.create_table('cupon',
+    sa.Column('id_cupon', sa.Integer(), nullable=False),
+    sa.Column('codigo', sa.String(length=50), nullable=False),
+    sa.Column('monto_descuento', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=True),
+    sa.Column('fecha_expiracion', sa.Date(), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.Column('id_reserva', sa.Integer(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_reserva'], ['reserva.id_reserva'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_cupon'),
+    sa.UniqueConstraint('codigo')
+    )
+    op.create_index(op.f('ix_cupon_id_cupon'), 'cupon', ['id_cupon'], unique=False)
+    op.create_table('incidente',
+    sa.Column('id_incidente', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=False),
+    sa.Column('multa', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('fecha_incidente', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('id_reserva', sa.Integer(), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_reserva'], ['reserva.id_reserva'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_incidente')
+    )
+    op.create_index(op.f('ix_incidente_id_incidente'), 'incidente', ['id_incidente'], unique=False)
+    op.create_table('pago',
+    sa.Column('id_pago', sa.Integer(), nullable=False),
+    sa.Column('monto', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('fecha_pago', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('metodo_pago', sa.String(length=50), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('id_transaccion', sa.String(length=100), nullable=True),
+    sa.Column('id_reserva', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_reserva'], ['reserva.id_reserva'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_pago')
+    )
+    op.create_index(op.f('ix_pago_id_pago'), 'pago', ['id_pago'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pago_id_pago'), table_name='pago')
+    op.drop_table('pago')
+    op.drop_index(op.f('ix_incidente_id_incidente'), table_name='incidente')
+    op.drop_table('incidente')
+    op.drop_index(op.f('ix_cupon_id_cupon'), table_name='cupon')
+    op.drop_table('cupon')
+    op.drop_index(op.f('ix_cancelacion_id_cancelacion'), table_name='cancelacion')
+    op.drop_table('cancelacion')
+    op.drop_index(op.f('ix_asistentes_reserva_id_asistente'), table_name='asistentes_reserva')
+    op.drop_table('asistentes_reserva')
+    op.drop_index(op.f('ix_reserva_id_reserva'), table_name='reserva')
+    op.drop_table('reserva')
+    op.drop_index(op.f('ix_comentario_id_comentario'), table_name='comentario')
+    op.drop_table('comentario')
+    op.drop_table('cancha_disciplina')
+    op.drop_index(op.f('ix_notificaciones_id_notificacion'), table_name='notificaciones')
+    op.drop_table('notificaciones')
+    op.drop_index(op.f('ix_cancha_id_cancha'), table_name='cancha')
+    op.drop_table('cancha')
+    op.drop_table('administra')
+    op.drop_index(op.f('ix_website_content_key'), table_name='website_content')
+    op.drop_table('website_content')
+    op.drop_index(op.f('ix_usuario_id_usuario'), table_name='usuario')
+    op.drop_index(op.f('ix_usuario_email'), table_name='usuario')
+    op.drop_table('usuario')
+    op.drop_index(op.f('ix_espacio_deportivo_id_espacio_deportivo'), table_name='espacio_deportivo')
+    op.drop_table('espacio_deportivo')
+    op.drop_index(op.f('ix_disciplina_id_disciplina'), table_name='disciplina')
+    op.drop_table('disciplina')
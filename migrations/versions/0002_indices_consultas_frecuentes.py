@@ -0,0 +1,68 @@
+"""índices para las consultas frecuentes
+
+Índices secundarios para los predicados más usados (disponibilidad,
+reservas por usuario, asistentes por reserva, cupones vigentes,
+notificaciones y reportes de pagos).
+
+En PostgreSQL se crean con CREATE INDEX CONCURRENTLY fuera de la
+transacción de la migración, así no bloquean escrituras sobre tablas
+grandes. Si una creación concurrente falla deja un índice INVALID:
+borrarlo (DROP INDEX CONCURRENTLY) y volver a correr la migración.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ESTADOS_ACTIVOS = "estado IN ('pendiente', 'confirmada', 'en_curso')"
+
+# (nombre, tabla, columnas, condición del índice parcial o None)
+INDICES = [
+    ('ix_reserva_cancha_fecha_estado', 'reserva', ['id_cancha', 'fecha_reserva', 'estado'], None),
+    ('ix_reserva_cancha_fecha_activas', 'reserva', ['id_cancha', 'fecha_reserva', 'hora_inicio'], ESTADOS_ACTIVOS),
+    ('ix_reserva_usuario_fecha', 'reserva', ['id_usuario', 'fecha_reserva'], None),
+    ('ix_asistentes_reserva_id_reserva', 'asistentes_reserva', ['id_reserva'], None),
+    ('ix_cupon_usuario_estado_expiracion', 'cupon', ['id_usuario', 'estado', 'fecha_expiracion'], None),
+    ('ix_notificaciones_usuario_leida_fecha', 'notificaciones', ['usuario_id', 'leida', 'fecha_creacion'], None),
+    ('ix_notificaciones_no_leidas', 'notificaciones', ['usuario_id', 'fecha_creacion'], 'leida = false'),
+    ('ix_pago_fecha_estado', 'pago', ['fecha_pago', 'estado'], None),
+]
+
+
+def _condicion(condicion: str) -> str:
+    # SQLite guarda los booleanos como 0/1
+    if op.get_bind().dialect.name == 'sqlite':
+        return condicion.replace('= false', '= 0')
+    return condicion
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas, condicion in INDICES:
+            op.create_index(
+                nombre, tabla, columnas, unique=False, if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(condicion) if condicion else None,
+                sqlite_where=sa.text(_condicion(condicion)) if condicion else None,
+            )
+    if op.get_bind().dialect.name == 'postgresql':
+        for tabla in sorted({tabla for _, tabla, _, _ in INDICES}):
+            op.execute(f'ANALYZE {tabla}')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, if_exists=True, postgresql_concurrently=True)
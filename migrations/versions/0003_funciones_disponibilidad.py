@@ -0,0 +1,180 @@
+"""funciones de disponibilidad en PL/pgSQL
+
+Versiona las funciones que usan los routers por `text()`:
+
+- verificar_disponibilidad(id_cancha, fecha, hora_inicio, hora_fin) -> boolean
+  (reservas_opcion: crear reserva, reservas de gestor, /verificar-disponibilidad)
+- listar_horarios_disponibles(id_cancha, fecha) -> tabla de franjas de una hora
+  (canchas: /{id}/disponibilidad, reservas_opcion: /horarios-disponibles)
+
+Una reserva ocupa su horario mientras está pendiente, confirmada o en curso;
+ambas consultas usan el índice parcial ix_reserva_cancha_fecha_activas.
+
+Solo crea las funciones que la base no tiene (bases nuevas). En una base
+existente (alembic stamp 0001) las funciones en producción se conservan tal
+cual: estas definiciones se escribieron a partir de cómo las llaman los
+routers, no desde la base, y no deben reemplazar la lógica de reservas en
+uso. Para versionar las reales, volcarlas con pg_get_functiondef y
+reemplazar los textos de abajo. El downgrade solo borra las funciones que
+coinciden con estas definiciones.
+
+Solo aplica a PostgreSQL: en SQLite (scripts y benchmarks) las funciones se
+registran desde Python.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERIFICAR_DISPONIBILIDAD = """
+CREATE FUNCTION verificar_disponibilidad(
+    p_id_cancha integer,
+    p_fecha date,
+    p_hora_inicio time,
+    p_hora_fin time
+) RETURNS boolean
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+    v_cancha cancha%ROWTYPE;
+BEGIN
+    IF p_hora_fin <= p_hora_inicio THEN
+        RETURN false;
+    END IF;
+
+    SELECT * INTO v_cancha FROM cancha WHERE id_cancha = p_id_cancha;
+    IF NOT FOUND OR v_cancha.estado <> 'disponible' THEN
+        RETURN false;
+    END IF;
+
+    IF p_hora_inicio < v_cancha.hora_apertura OR p_hora_fin > v_cancha.hora_cierre THEN
+        RETURN false;
+    END IF;
+
+    RETURN NOT EXISTS (
+        SELECT 1
+        FROM reserva r
+        WHERE r.id_cancha = p_id_cancha
+          AND r.fecha_reserva = p_fecha
+          AND r.estado IN ('pendiente', 'confirmada', 'en_curso')
+          AND r.hora_inicio < p_hora_fin
+          AND r.hora_fin > p_hora_inicio
+    );
+END;
+$$
+"""
+
+LISTAR_HORARIOS_DISPONIBLES = """
+CREATE FUNCTION listar_horarios_disponibles(
+    p_id_cancha integer,
+    p_fecha date
+) RETURNS TABLE (
+    hora_inicio time,
+    hora_fin time,
+    disponible boolean,
+    precio_hora numeric,
+    mensaje text
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_cancha cancha%ROWTYPE;
+BEGIN
+    SELECT * INTO v_cancha FROM cancha c WHERE c.id_cancha = p_id_cancha;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH franjas AS (
+        SELECT f::time AS inicio, (f + interval '1 hour')::time AS fin
+        FROM generate_series(
+            p_fecha + v_cancha.hora_apertura,
+            p_fecha + v_cancha.hora_cierre - interval '1 hour',
+            interval '1 hour'
+        ) AS f
+    ),
+    ocupadas AS (
+        SELECT r.hora_inicio, r.hora_fin
+        FROM reserva r
+        WHERE r.id_cancha = p_id_cancha
+          AND r.fecha_reserva = p_fecha
+          AND r.estado IN ('pendiente', 'confirmada', 'en_curso')
+    )
+    SELECT
+        fr.inicio,
+        fr.fin,
+        (v_cancha.estado = 'disponible' AND o.hora_inicio IS NULL
+         AND p_fecha + fr.inicio > localtimestamp) AS disponible,
+        v_cancha.precio_por_hora,
+        CASE
+            WHEN v_cancha.estado <> 'disponible' THEN 'Cancha no disponible'
+            WHEN o.hora_inicio IS NOT NULL THEN 'Reservado'
+            WHEN p_fecha + fr.inicio <= localtimestamp THEN 'Horario pasado'
+            ELSE 'Disponible'
+        END::text
+    FROM franjas fr
+    LEFT JOIN LATERAL (
+        SELECT oc.hora_inicio
+        FROM ocupadas oc
+        WHERE oc.hora_inicio < fr.fin AND oc.hora_fin > fr.inicio
+        LIMIT 1
+    ) o ON true
+    ORDER BY fr.inicio;
+END;
+$$
+"""
+
+
+# nombre -> (firma, definición)
+FUNCIONES = {
+    'verificar_disponibilidad': ('verificar_disponibilidad(integer, date, time, time)', VERIFICAR_DISPONIBILIDAD),
+    'listar_horarios_disponibles': ('listar_horarios_disponibles(integer, date)', LISTAR_HORARIOS_DISPONIBLES),
+}
+
+
+def cuerpo(definicion: str) -> str:
+    """Texto entre $$ de la definición (lo que PostgreSQL guarda en pg_proc.prosrc)"""
+    return definicion.split('$$')[1]
+
+
+def cuerpos_en_base(bind, nombre: str) -> list:
+    """prosrc de las funciones public.<nombre> (vacía si no existe ninguna)"""
+    return list(bind.execute(sa.text(
+        "SELECT prosrc FROM pg_proc WHERE proname = :nombre AND pronamespace = 'public'::regnamespace"
+    ), {'nombre': nombre}).scalars())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for nombre, (_, definicion) in FUNCIONES.items():
+        if not cuerpos_en_base(bind, nombre):
+            op.execute(definicion)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    # Solo se borran las que creó esta migración (no las de una base marcada con stamp)
+    for nombre, (firma, definicion) in reversed(list(FUNCIONES.items())):
+        if cuerpos_en_base(bind, nombre) == [cuerpo(definicion)]:
+            op.execute(f'DROP FUNCTION {firma}')
@@ -0,0 +1,45 @@
+"""índices para reportes por rango de fechas
+
+Los reportes de uso, horarios populares y reservas por estado filtran
+reserva por fecha sin id_cancha, y el reporte de ingresos une pago con
+reserva por id_reserva (que no tenía índice). Detectado con
+scripts/check_query_plans.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ('ix_reserva_fecha_estado', 'reserva', ['fecha_reserva', 'estado']),
+    ('ix_reserva_fecha_creacion', 'reserva', ['fecha_creacion']),
+    ('ix_pago_id_reserva', 'pago', ['id_reserva']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(nombre, tabla, columnas, unique=False, if_not_exists=True,
+                            postgresql_concurrently=True)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ANALYZE reserva')
+        op.execute('ANALYZE pago')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""claves de idempotencia
+
+Tabla donde app/core/idempotency.py guarda la primera respuesta de cada
+POST con header Idempotency-Key (reservas con código único, pagos y
+aplicación de cupones) para repetirla en los reintentos.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotencia',
+        sa.Column('clave', sa.String(length=64), nullable=False),
+        sa.Column('huella', sa.String(length=64), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('headers', sa.Text(), nullable=True),
+        sa.Column('cuerpo', sa.LargeBinary(), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expira_en', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('clave'),
+    )
+    op.create_index('ix_idempotencia_expira_en', 'idempotencia', ['expira_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotencia_expira_en', table_name='idempotencia')
+    op.drop_table('idempotencia')
@@ -0,0 +1,72 @@
+"""estadisticas de reservas por usuario
+
+Tabla con los contadores de reservas y el total pagado por usuario que
+mantiene app/services/estadisticas_usuario.py, cargada desde las reservas
+y pagos existentes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'estadisticas_usuario',
+        sa.Column('id_usuario', sa.Integer(), nullable=False),
+        sa.Column('reservas_totales', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('reservas_activas', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('reservas_canceladas', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('inasistencias', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_gastado', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'),
+        sa.Column('fecha_actualizacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id_usuario'),
+    )
+    op.execute("""
+        INSERT INTO estadisticas_usuario
+            (id_usuario, reservas_totales, reservas_activas, reservas_canceladas, inasistencias, total_gastado)
+        SELECT r.id_usuario,
+               r.reservas_totales,
+               r.reservas_activas,
+               r.reservas_canceladas,
+               r.inasistencias,
+               COALESCE(p.total_gastado, 0)
+        FROM (
+            SELECT id_usuario,
+                   count(*) AS reservas_totales,
+                   count(*) FILTER (WHERE estado IN ('pendiente', 'confirmada', 'en_curso')) AS reservas_activas,
+                   count(*) FILTER (WHERE estado = 'cancelada') AS reservas_canceladas,
+                   count(*) FILTER (
+                       WHERE estado = 'completada' AND NOT EXISTS (
+                           SELECT 1 FROM asistentes_reserva a
+                           WHERE a.id_reserva = reserva.id_reserva AND a.asistio
+                       )
+                   ) AS inasistencias
+            FROM reserva
+            WHERE id_usuario IS NOT NULL
+            GROUP BY id_usuario
+        ) r
+        LEFT JOIN (
+            SELECT reserva.id_usuario, sum(pago.monto) AS total_gastado
+            FROM pago JOIN reserva ON reserva.id_reserva = pago.id_reserva
+            WHERE pago.estado = 'completado'
+            GROUP BY reserva.id_usuario
+        ) p ON p.id_usuario = r.id_usuario
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('estadisticas_usuario')
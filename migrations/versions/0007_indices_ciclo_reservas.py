@@ -0,0 +1,45 @@
+"""índices parciales para el ciclo de vida de reservas
+
+app/services/ciclo_reservas.py busca cada minuto las reservas pendientes
+vencidas (por fecha_creacion) y las confirmadas / en curso cuyo horario
+empezó o terminó (por fecha y hora). Los índices parciales solo contienen
+esas filas, así la búsqueda no recorre el historial de reservas completadas.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, columnas, condición)
+INDICES = [
+    ('ix_reserva_pendientes_creacion', ['fecha_creacion'], "estado = 'pendiente'"),
+    ('ix_reserva_confirmadas_fecha', ['fecha_reserva', 'hora_inicio'], "estado IN ('confirmada', 'en_curso')"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, columnas, condicion in INDICES:
+            op.create_index(nombre, 'reserva', columnas, unique=False, if_not_exists=True,
+                            postgresql_where=sa.text(condicion), sqlite_where=sa.text(condicion),
+                            postgresql_concurrently=True)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ANALYZE reserva')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, _, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name='reserva', if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,45 @@
+"""retenciones de horario
+
+Tabla donde app/services/retenciones.py guarda las horas retenidas durante
+el checkout (backend "base"). En PostgreSQL es UNLOGGED: las retenciones
+duran minutos y no necesitan sobrevivir a una caída de la base, así cada
+retención no escribe en el WAL. retenida_desde limita cuánto tiempo un
+usuario puede renovar la misma retención.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    prefijos = ['UNLOGGED'] if op.get_bind().dialect.name == 'postgresql' else []
+    op.create_table(
+        'retencion_horario',
+        sa.Column('id_cancha', sa.Integer(), nullable=False),
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('hora_inicio', sa.Time(), nullable=False),
+        sa.Column('id_usuario', sa.Integer(), nullable=False),
+        sa.Column('retenida_desde', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expira_en', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id_cancha', 'fecha', 'hora_inicio'),
+        prefixes=prefijos,
+    )
+    op.create_index('ix_retencion_horario_expira_en', 'retencion_horario', ['expira_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_retencion_horario_expira_en', table_name='retencion_horario')
+    op.drop_table('retencion_horario')
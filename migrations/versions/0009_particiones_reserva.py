@@ -0,0 +1,205 @@
+"""particiones mensuales de reserva
+
+reserva pasa a estar particionada por rango de fecha_reserva, una partición
+por mes (reserva_pAAAA_MM) más reserva_default para fechas sin partición.
+Las consultas de disponibilidad, reportes y el ciclo de vida filtran por
+fecha_reserva y solo leen los meses del rango; las particiones futuras y el
+archivo de las viejas los mantiene app/services/particiones_reserva.py.
+
+En una tabla particionada la clave primaria y los UNIQUE deben incluir la
+columna de partición:
+
+- la clave primaria pasa a (id_reserva, fecha_reserva); id_reserva sigue
+  saliendo de la misma secuencia y el modelo sigue identificando por él,
+- codigo_reserva deja de ser UNIQUE en la base (índice simple); la unicidad
+  la asegura generar_codigo_unico_reserva,
+- las claves foráneas hacia reserva (asistentes_reserva, pago, cupon,
+  cancelacion, incidente) no pueden referenciar solo id_reserva y se
+  reemplazan por triggers con el mismo efecto: al insertar o cambiar
+  id_reserva se verifica que la reserva exista (FOR KEY SHARE, como una FK),
+  y al borrar una reserva se borran o desvinculan sus dependientes con la
+  regla ON DELETE que tenía cada FK.
+
+Las tablas dependientes no se particionan: no tienen fecha_reserva.
+
+Solo aplica a PostgreSQL.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses con partición por delante del actual (después los crea el programador)
+MESES_FUTUROS = 3
+
+ESTADOS_ACTIVOS = "estado IN ('pendiente', 'confirmada', 'en_curso')"
+
+# (nombre, columnas, condición): los mismos índices que tenía reserva
+INDICES = [
+    ('ix_reserva_id_reserva', ['id_reserva'], None),
+    ('ix_reserva_codigo_reserva', ['codigo_reserva'], None),
+    ('ix_reserva_cancha_fecha_estado', ['id_cancha', 'fecha_reserva', 'estado'], None),
+    ('ix_reserva_usuario_fecha', ['id_usuario', 'fecha_reserva'], None),
+    ('ix_reserva_fecha_estado', ['fecha_reserva', 'estado'], None),
+    ('ix_reserva_fecha_creacion', ['fecha_creacion'], None),
+    ('ix_reserva_cancha_fecha_activas', ['id_cancha', 'fecha_reserva', 'hora_inicio'], ESTADOS_ACTIVOS),
+    ('ix_reserva_pendientes_creacion', ['fecha_creacion'], "estado = 'pendiente'"),
+    ('ix_reserva_confirmadas_fecha', ['fecha_reserva', 'hora_inicio'], "estado IN ('confirmada', 'en_curso')"),
+]
+
+# (tabla, nombre de la FK, ON DELETE) de las tablas que referencian reserva
+DEPENDIENTES = [
+    ('asistentes_reserva', 'asistentes_reserva_id_reserva_fkey', None),
+    ('cancelacion', 'cancelacion_id_reserva_fkey', 'CASCADE'),
+    ('cupon', 'cupon_id_reserva_fkey', 'SET NULL'),
+    ('incidente', 'incidente_id_reserva_fkey', 'CASCADE'),
+    ('pago', 'pago_id_reserva_fkey', 'CASCADE'),
+]
+
+FK_SALIENTES = [
+    ('reserva_id_cancha_fkey', 'id_cancha', 'cancha', 'CASCADE'),
+    ('reserva_id_disciplina_fkey', 'id_disciplina', 'disciplina', None),
+    ('reserva_id_usuario_fkey', 'id_usuario', 'usuario', 'CASCADE'),
+]
+
+RESERVA_REFERENCIADA = """
+CREATE OR REPLACE FUNCTION reserva_referenciada() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.id_reserva IS NOT NULL THEN
+        PERFORM 1 FROM reserva WHERE id_reserva = NEW.id_reserva FOR KEY SHARE;
+        IF NOT FOUND THEN
+            RAISE foreign_key_violation
+                USING MESSAGE = format('%s.id_reserva = %s no existe en reserva', TG_TABLE_NAME, NEW.id_reserva);
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$
+"""
+
+# Una reserva movida entre particiones (UPDATE de fecha_reserva, o
+# app/services/particiones_reserva.py con reservas.moviendo = on) no se borró
+RESERVA_BORRAR_DEPENDIENTES = """
+CREATE OR REPLACE FUNCTION reserva_borrar_dependientes() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF current_setting('reservas.moviendo', true) = 'on'
+       OR EXISTS (SELECT 1 FROM reserva WHERE id_reserva = OLD.id_reserva) THEN
+        RETURN NULL;
+    END IF;
+    IF EXISTS (SELECT 1 FROM asistentes_reserva WHERE id_reserva = OLD.id_reserva) THEN
+        RAISE foreign_key_violation
+            USING MESSAGE = format('la reserva %s todavía tiene asistentes', OLD.id_reserva);
+    END IF;
+    DELETE FROM cancelacion WHERE id_reserva = OLD.id_reserva;
+    DELETE FROM incidente WHERE id_reserva = OLD.id_reserva;
+    DELETE FROM pago WHERE id_reserva = OLD.id_reserva;
+    UPDATE cupon SET id_reserva = NULL WHERE id_reserva = OLD.id_reserva;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def _meses(desde: date, hasta: date):
+    mes = desde.replace(day=1)
+    while mes <= hasta:
+        siguiente = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+        yield mes, siguiente
+        mes = siguiente
+
+
+def _crear_indices():
+    for nombre, columnas, condicion in INDICES:
+        op.create_index(nombre, 'reserva', columnas, unique=False,
+                        postgresql_where=sa.text(condicion) if condicion else None)
+
+
+def _crear_fk_salientes():
+    for nombre, columna, tabla, al_borrar in FK_SALIENTES:
+        op.create_foreign_key(nombre, 'reserva', tabla, [columna], [columna], ondelete=al_borrar)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    for tabla, nombre, _ in DEPENDIENTES:
+        op.drop_constraint(nombre, tabla, type_='foreignkey')
+    # La secuencia sobrevive a la tabla anterior
+    op.execute('ALTER SEQUENCE reserva_id_reserva_seq OWNED BY NONE')
+
+    op.execute('CREATE TABLE reserva_particionada (LIKE reserva INCLUDING DEFAULTS) PARTITION BY RANGE (fecha_reserva)')
+    minimo, maximo = conn.execute(sa.text('SELECT MIN(fecha_reserva), MAX(fecha_reserva) FROM reserva')).one()
+    hoy = date.today()
+    desde = min(minimo or hoy, hoy)
+    hasta = max(maximo or hoy, date(hoy.year + (hoy.month + MESES_FUTUROS - 1) // 12,
+                                    (hoy.month + MESES_FUTUROS - 1) % 12 + 1, 1))
+    for inicio, fin in _meses(desde, hasta):
+        op.execute(f"CREATE TABLE reserva_p{inicio:%Y_%m} PARTITION OF reserva_particionada "
+                   f"FOR VALUES FROM ('{inicio}') TO ('{fin}')")
+    op.execute('CREATE TABLE reserva_default PARTITION OF reserva_particionada DEFAULT')
+
+    op.execute('INSERT INTO reserva_particionada SELECT * FROM reserva')
+    op.execute('DROP TABLE reserva')
+    op.execute('ALTER TABLE reserva_particionada RENAME TO reserva')
+    op.execute('ALTER SEQUENCE reserva_id_reserva_seq OWNED BY reserva.id_reserva')
+
+    op.create_primary_key('reserva_pkey', 'reserva', ['id_reserva', 'fecha_reserva'])
+    _crear_indices()
+    _crear_fk_salientes()
+
+    op.execute(RESERVA_REFERENCIADA)
+    op.execute(RESERVA_BORRAR_DEPENDIENTES)
+    for tabla, _, _ in DEPENDIENTES:
+        op.execute(f'CREATE TRIGGER {tabla}_reserva_referenciada BEFORE INSERT OR UPDATE OF id_reserva '
+                   f'ON {tabla} FOR EACH ROW EXECUTE FUNCTION reserva_referenciada()')
+    op.execute('CREATE TRIGGER reserva_borrar_dependientes AFTER DELETE ON reserva '
+               'FOR EACH ROW EXECUTE FUNCTION reserva_borrar_dependientes()')
+    op.execute('ANALYZE reserva')
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    # Las particiones ya archivadas (esquema archivo) no vuelven a la tabla
+    op.execute('DROP TRIGGER reserva_borrar_dependientes ON reserva')
+    for tabla, _, _ in DEPENDIENTES:
+        op.execute(f'DROP TRIGGER {tabla}_reserva_referenciada ON {tabla}')
+    op.execute('DROP FUNCTION reserva_borrar_dependientes()')
+    op.execute('DROP FUNCTION reserva_referenciada()')
+    op.execute('ALTER SEQUENCE reserva_id_reserva_seq OWNED BY NONE')
+
+    op.execute('CREATE TABLE reserva_sin_particionar (LIKE reserva INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO reserva_sin_particionar SELECT * FROM reserva')
+    op.execute('DROP TABLE reserva')
+    op.execute('ALTER TABLE reserva_sin_particionar RENAME TO reserva')
+    op.execute('ALTER SEQUENCE reserva_id_reserva_seq OWNED BY reserva.id_reserva')
+
+    op.create_primary_key('reserva_pkey', 'reserva', ['id_reserva'])
+    op.create_unique_constraint('reserva_codigo_reserva_key', 'reserva', ['codigo_reserva'])
+    _crear_indices()
+    op.drop_index('ix_reserva_codigo_reserva', table_name='reserva')
+    _crear_fk_salientes()
+    for tabla, nombre, al_borrar in DEPENDIENTES:
+        op.create_foreign_key(nombre, tabla, 'reserva', ['id_reserva'], ['id_reserva'], ondelete=al_borrar)
+    op.execute('ANALYZE reserva')
@@ -0,0 +1,71 @@
+"""resumen de calificaciones por cancha y por espacio
+
+Tablas calificaciones_cancha y calificaciones_espacio (cantidad, suma y
+una columna por cantidad de estrellas) que mantiene
+app/services/calificaciones.py, cargadas desde los comentarios existentes.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNAS = ['cantidad', 'suma', 'estrellas_1', 'estrellas_2', 'estrellas_3', 'estrellas_4', 'estrellas_5']
+
+RESUMEN = """
+    count(*),
+    sum(c.calificacion),
+    sum(CASE WHEN c.calificacion = 1 THEN 1 ELSE 0 END),
+    sum(CASE WHEN c.calificacion = 2 THEN 1 ELSE 0 END),
+    sum(CASE WHEN c.calificacion = 3 THEN 1 ELSE 0 END),
+    sum(CASE WHEN c.calificacion = 4 THEN 1 ELSE 0 END),
+    sum(CASE WHEN c.calificacion = 5 THEN 1 ELSE 0 END)
+"""
+
+
+def _crear_tabla(nombre: str, clave: str, tabla_referida: str) -> None:
+    op.create_table(
+        nombre,
+        sa.Column(clave, sa.Integer(), nullable=False),
+        *(sa.Column(columna, sa.Integer(), nullable=False, server_default='0') for columna in COLUMNAS),
+        sa.Column('fecha_actualizacion', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint([clave], [f'{tabla_referida}.{clave}'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(clave),
+    )
+
+
+def upgrade() -> None:
+    _crear_tabla('calificaciones_cancha', 'id_cancha', 'cancha')
+    _crear_tabla('calificaciones_espacio', 'id_espacio_deportivo', 'espacio_deportivo')
+    columnas = ", ".join(COLUMNAS)
+    op.execute(f"""
+        INSERT INTO calificaciones_cancha (id_cancha, {columnas})
+        SELECT c.id_cancha, {RESUMEN}
+        FROM comentario c
+        WHERE c.calificacion IS NOT NULL
+        GROUP BY c.id_cancha
+    """)
+    op.execute(f"""
+        INSERT INTO calificaciones_espacio (id_espacio_deportivo, {columnas})
+        SELECT ca.id_espacio_deportivo, {RESUMEN}
+        FROM comentario c
+        JOIN cancha ca ON ca.id_cancha = c.id_cancha
+        WHERE c.calificacion IS NOT NULL AND ca.id_espacio_deportivo IS NOT NULL
+        GROUP BY ca.id_espacio_deportivo
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('calificaciones_espacio')
+    op.drop_table('calificaciones_cancha')
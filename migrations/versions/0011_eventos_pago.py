@@ -0,0 +1,55 @@
+"""eventos de pago
+
+Bandeja de entrada de los webhooks del proveedor de pagos: POST
+/pagos/webhook/{proveedor} guarda cada evento una sola vez (proveedor,
+id_evento) y app/services/eventos_pago.py lo aplica a pago y reserva en
+segundo plano. Índice por pago.id_transaccion para encontrar el pago de
+cada evento.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'evento_pago',
+        sa.Column('id_evento_pago', sa.Integer(), nullable=False),
+        sa.Column('proveedor', sa.String(length=20), nullable=False),
+        sa.Column('id_evento', sa.String(length=255), nullable=False),
+        sa.Column('tipo', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('intentos', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('recibido_en', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('proximo_intento', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('procesado_en', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id_evento_pago'),
+        sa.UniqueConstraint('proveedor', 'id_evento', name='uq_evento_pago_proveedor_id_evento'),
+    )
+    op.create_index('ix_evento_pago_estado_proximo_intento', 'evento_pago', ['estado', 'proximo_intento'],
+                    unique=False)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_pago_id_transaccion', 'pago', ['id_transaccion'], unique=False, if_not_exists=True,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_pago_id_transaccion', table_name='pago', if_exists=True, postgresql_concurrently=True)
+    op.drop_index('ix_evento_pago_estado_proximo_intento', table_name='evento_pago')
+    op.drop_table('evento_pago')
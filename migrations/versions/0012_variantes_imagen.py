@@ -0,0 +1,36 @@
+"""variantes de imagen generadas
+
+Columna imagen_variantes en cancha y espacio_deportivo: la URL de la
+imagen cuyas variantes (thumb, card, full) ya se subieron al storage.
+Las respuestas solo exponen las variantes cuando coincide con imagen. Las
+imágenes con carpeta propia que ya existían se marcan como procesadas.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ['cancha', 'espacio_deportivo']
+
+
+def upgrade() -> None:
+    for tabla in TABLAS:
+        op.add_column(tabla, sa.Column('imagen_variantes', sa.String(length=255), nullable=True))
+        op.execute(f"UPDATE {tabla} SET imagen_variantes = imagen WHERE imagen LIKE '%/original.%'")
+
+
+def downgrade() -> None:
+    for tabla in TABLAS:
+        op.drop_column(tabla, 'imagen_variantes')
@@ -0,0 +1,83 @@
+"""
+Verifica que calificaciones_cancha y calificaciones_espacio coincidan con los comentarios.
+
+Los resúmenes se mantienen en cada flush de la sesión
+(app/services/calificaciones.py); los cambios hechos con SQL directo no
+pasan por ahí. El script los recalcula desde comentario y falla (exit 1)
+si alguna fila difiere.
+
+Uso:
+    python scripts/check_calificaciones.py
+    python scripts/check_calificaciones.py --reparar
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# La verificación no llama a servicios externos: basta con valores de relleno
+for variable in ("RECAPTCHA_SECRET_KEY", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY",
+                 "IMG_BB_API_KEY", "BREVO_API_KEY", "SENDER_EMAIL"):
+    os.environ.setdefault(variable, "verificacion")
+os.environ.setdefault("SUPABASE_URL", "https://verificacion.supabase.co")
+
+from sqlalchemy import select  # noqa: E402
+
+from app.database import engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.notification import Notificacion  # noqa: E402,F401
+from app.models.calificaciones import CalificacionesCancha, CalificacionesEspacio  # noqa: E402
+from app.services.calificaciones import CONTADORES, consultas_recalculo, recalcular_calificaciones  # noqa: E402
+
+MAXIMO_MOSTRADAS = 20
+
+
+def diferencias(conn) -> list:
+    resultado = []
+    for tabla, consulta in zip((CalificacionesCancha.__table__, CalificacionesEspacio.__table__),
+                               consultas_recalculo()):
+        clave = tabla.primary_key.columns.values()[0].name
+        esperadas = {fila[0]: fila for fila in conn.execute(consulta)}
+        guardadas = {getattr(fila, clave): fila for fila in conn.execute(select(tabla))}
+        for id_ in sorted(set(esperadas) | set(guardadas)):
+            esperada, guardada = esperadas.get(id_), guardadas.get(id_)
+            for contador in CONTADORES:
+                valor_esperado = getattr(esperada, contador) if esperada else 0
+                valor_guardado = getattr(guardada, contador) if guardada else 0
+                if (valor_esperado or 0) != (valor_guardado or 0):
+                    resultado.append((tabla.name, id_, contador, valor_guardado, valor_esperado))
+    return resultado
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reparar", action="store_true", help="reconstruir las tablas si hay diferencias")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        encontradas = diferencias(conn)
+
+    if not encontradas:
+        print("✅ calificaciones_cancha y calificaciones_espacio coinciden con comentario")
+        return 0
+
+    print(f"❌ {len(encontradas)} contadores difieren:")
+    print(f"   {'Tabla':24} {'Id':>8}  {'Contador':12} {'Guardado':>10} {'Esperado':>10}")
+    for tabla, id_, contador, guardado, esperado in encontradas[:MAXIMO_MOSTRADAS]:
+        print(f"   {tabla:24} {id_:>8}  {contador:12} {guardado!s:>10} {esperado!s:>10}")
+    if len(encontradas) > MAXIMO_MOSTRADAS:
+        print(f"   ... y {len(encontradas) - MAXIMO_MOSTRADAS} más")
+
+    if args.reparar:
+        with engine.begin() as conn:
+            filas = recalcular_calificaciones(conn)
+        print(f"🔧 Tablas reconstruidas: {filas} filas")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
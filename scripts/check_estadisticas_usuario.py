@@ -0,0 +1,83 @@
+"""
+Verifica que la tabla estadisticas_usuario coincida con las reservas y pagos.
+
+Los contadores se mantienen en cada flush de la sesión
+(app/services/estadisticas_usuario.py); los cambios hechos con SQL directo
+o query().update() no pasan por ahí. El script recalcula las estadísticas
+desde reserva (con los meses archivados) y pago y falla (exit 1) si alguna
+fila difiere.
+
+Uso:
+    python scripts/check_estadisticas_usuario.py
+    python scripts/check_estadisticas_usuario.py --reparar
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# La verificación no llama a servicios externos: basta con valores de relleno
+for variable in ("RECAPTCHA_SECRET_KEY", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY",
+                 "IMG_BB_API_KEY", "BREVO_API_KEY", "SENDER_EMAIL"):
+    os.environ.setdefault(variable, "verificacion")
+os.environ.setdefault("SUPABASE_URL", "https://verificacion.supabase.co")
+
+from sqlalchemy import select  # noqa: E402
+
+from app.database import engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.notification import Notificacion  # noqa: E402,F401
+from app.models.estadistica_usuario import EstadisticaUsuario  # noqa: E402
+from app.services.estadisticas_usuario import CONTADORES, consulta_recalculo, recalcular_estadisticas  # noqa: E402
+from app.services.particiones_reserva import reservas_con_archivo  # noqa: E402
+
+MAXIMO_MOSTRADAS = 20
+
+
+def diferencias(conn) -> list:
+    esperadas = {fila.id_usuario: fila for fila in conn.execute(consulta_recalculo(reservas_con_archivo(conn)))}
+    guardadas = {fila.id_usuario: fila for fila in conn.execute(select(EstadisticaUsuario.__table__))}
+
+    resultado = []
+    for id_usuario in sorted(set(esperadas) | set(guardadas)):
+        esperada, guardada = esperadas.get(id_usuario), guardadas.get(id_usuario)
+        for contador in CONTADORES:
+            valor_esperado = getattr(esperada, contador) if esperada else 0
+            valor_guardado = getattr(guardada, contador) if guardada else 0
+            if float(valor_esperado or 0) != float(valor_guardado or 0):
+                resultado.append((id_usuario, contador, valor_guardado, valor_esperado))
+    return resultado
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reparar", action="store_true", help="reconstruir la tabla si hay diferencias")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        encontradas = diferencias(conn)
+
+    if not encontradas:
+        print("✅ estadisticas_usuario coincide con reserva y pago")
+        return 0
+
+    print(f"❌ {len(encontradas)} contadores difieren:")
+    print(f"   {'Usuario':>8}  {'Contador':22} {'Guardado':>12} {'Esperado':>12}")
+    for id_usuario, contador, guardado, esperado in encontradas[:MAXIMO_MOSTRADAS]:
+        print(f"   {id_usuario:>8}  {contador:22} {guardado!s:>12} {esperado!s:>12}")
+    if len(encontradas) > MAXIMO_MOSTRADAS:
+        print(f"   ... y {len(encontradas) - MAXIMO_MOSTRADAS} más")
+
+    if args.reparar:
+        with engine.begin() as conn:
+            filas = recalcular_estadisticas(conn)
+        print(f"🔧 Tabla reconstruida: {filas} usuarios")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
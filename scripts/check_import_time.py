@@ -0,0 +1,130 @@
+"""
+Presupuesto de arranque en frío.
+
+1. Importa app.main con `python -X importtime` y falla (exit 1) si se cargan
+   módulos de integraciones que deben inicializarse en el primer uso
+   (Supabase, Stripe, qrcode, Pillow, requests) o si la importación supera
+   el presupuesto en milisegundos.
+2. Levanta uvicorn y mide el tiempo hasta el primer /health exitoso.
+
+Uso:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --presupuesto-ms 1500 --presupuesto-health-ms 4000
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# Módulos que no pueden importarse al arrancar (prefijos de paquete)
+PESADOS = ("supabase", "postgrest", "storage3", "gotrue", "stripe", "qrcode", "PIL", "requests")
+
+REPETICIONES = 3
+
+
+def entorno() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/arranque.db")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def medir_importacion(env: dict):
+    """Retorna (ms acumulados de app.main, {módulo: ms propios})"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=RAIZ, env=env, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"No se pudo importar app.main:\n{resultado.stderr[-2000:]}")
+
+    modulos = {}
+    total = None
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        _, propio, acumulado, nombre = (parte.strip() for parte in linea.replace("import time:", "|", 1).split("|"))
+        modulos[nombre] = int(propio) / 1000
+        if nombre == "app.main":
+            total = int(acumulado) / 1000
+    return total, modulos
+
+
+def medir_health(env: dict, timeout: float = 30.0) -> float:
+    """Milisegundos desde que arranca el proceso hasta el primer 200 en /health"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        while time.perf_counter() - inicio < timeout:
+            if proceso.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó antes de responder:\n{proceso.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/health", timeout=1) as respuesta:
+                    if respuesta.status == 200:
+                        return (time.perf_counter() - inicio) * 1000
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"/health no respondió en {timeout:.0f}s")
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--presupuesto-ms", type=float, default=1500,
+                        help="máximo para importar app.main (mejor de %d intentos)" % REPETICIONES)
+    parser.add_argument("--presupuesto-health-ms", type=float, default=4000,
+                        help="máximo desde el arranque hasta el primer /health exitoso")
+    parser.add_argument("--top", type=int, default=10, help="módulos más lentos a mostrar")
+    args = parser.parse_args()
+
+    env = entorno()
+    errores = []
+
+    mediciones = [medir_importacion(env) for _ in range(REPETICIONES)]
+    total, modulos = min(mediciones, key=lambda medicion: medicion[0])
+
+    print(f"⏱️  import app.main: {total:.0f} ms (presupuesto {args.presupuesto_ms:.0f} ms)")
+    print(f"   Módulos más lentos (tiempo propio):")
+    for nombre, ms in sorted(modulos.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {ms:8.1f} ms  {nombre}")
+
+    cargados = sorted({nombre for nombre in modulos if nombre.split(".")[0] in PESADOS})
+    if cargados:
+        errores.append(f"se importan al arrancar: {', '.join(cargados[:10])}"
+                       f"{' ...' if len(cargados) > 10 else ''}")
+    if total > args.presupuesto_ms:
+        errores.append(f"import app.main tarda {total:.0f} ms (presupuesto {args.presupuesto_ms:.0f} ms)")
+
+    health = medir_health(env)
+    print(f"⏱️  primer /health exitoso: {health:.0f} ms (presupuesto {args.presupuesto_health_ms:.0f} ms)")
+    if health > args.presupuesto_health_ms:
+        errores.append(f"/health responde a los {health:.0f} ms (presupuesto {args.presupuesto_health_ms:.0f} ms)")
+
+    if errores:
+        print("\n❌ Presupuesto de arranque incumplido:")
+        for error in errores:
+            print(f"   - {error}")
+        return 1
+
+    print("\n✅ Arranque dentro del presupuesto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
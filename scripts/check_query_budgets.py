@@ -0,0 +1,231 @@
+"""
+Verificación de presupuestos de queries y detección de N+1.
+
+Levanta la app con QUERY_BUDGET_MODE=strict contra una base SQLite temporal
+(siempre: la verificación borra y recrea el esquema, así que nunca usa
+DATABASE_URL), carga datos con dos tamaños distintos y llama a los
+endpoints que declaran @presupuesto_queries. Falla (exit 1) si algún endpoint:
+
+- ejecuta más sentencias que su presupuesto,
+- repite la misma forma de sentencia QUERY_BUDGET_N_MAS_UNO veces o más,
+- ejecuta más sentencias con más datos (la cantidad debe ser constante).
+
+Uso:
+    python scripts/check_query_budgets.py
+"""
+import os
+import sys
+import tempfile
+from datetime import date, time, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Reemplaza DATABASE_URL aunque esté definida: main() ejecuta drop_all
+_db_temporal = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_temporal.name}"
+
+os.environ["QUERY_BUDGET_MODE"] = "strict"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# La verificación no llama a servicios externos: basta con valores de relleno
+for variable in ("RECAPTCHA_SECRET_KEY", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY",
+                 "IMG_BB_API_KEY", "BREVO_API_KEY", "SENDER_EMAIL"):
+    os.environ.setdefault(variable, "verificacion")
+os.environ.setdefault("SUPABASE_URL", "https://verificacion.supabase.co")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORAGE_DIR", tempfile.mkdtemp(prefix="verificacion_storage_"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.core.query_budget import violaciones_registradas  # noqa: E402
+from app.services.busqueda_catalogo import invalidar_indice  # noqa: E402
+from app.models.usuario import Usuario  # noqa: E402
+from app.models.espacio_deportivo import EspacioDeportivo  # noqa: E402
+from app.models.cancha import Cancha  # noqa: E402
+from app.models.administra import Administra  # noqa: E402
+from app.models.disciplina import Disciplina  # noqa: E402
+from app.models.cancha_disciplina import CanchaDisciplina  # noqa: E402
+from app.models.reserva import Reserva  # noqa: E402
+from app.models.asistente import AsistenteReserva  # noqa: E402
+
+# (método, ruta, rol del usuario autenticado o None); la ruta se completa con ids_casos()
+CASOS = [
+    ("GET", "/espacios/public/list", None),
+    ("GET", "/espacios/public/disponibles", None),
+    ("GET", "/espacios/", "admin"),
+    ("GET", "/espacios/{espacio_id}", "admin"),
+    ("GET", "/espacios/{espacio_id}", "gestor"),
+    ("GET", "/control-acceso/estadisticas/hoy", None),
+    ("GET", "/reservas/", "admin"),
+    ("GET", "/reservas/", "gestor"),
+    ("GET", "/reservas/{reserva_id}", "admin"),
+    ("GET", "/reservas/{reserva_id}", "control_acceso"),
+    ("GET", "/reservas/usuario/{usuario_id}", None),
+    ("GET", "/reservas/gestor/mis-reservas?gestor_id={gestor_id}", "admin"),
+    ("GET", "/reservas/gestor/mis-reservas?gestor_id={gestor_id}", "gestor"),
+    ("GET", "/reservas/proximas/{dias}", None),
+    ("GET", "/reservas/codigo/{codigo_reserva}", None),
+    ("GET", "/busqueda/?q=futbol", None),
+    ("GET", "/busqueda/autocompletar?q=fut", None),
+    ("GET", "/busqueda/canchas-disponibles?id_disciplina={disciplina_id}&fecha={manana}&lat=-16.5&lon=-68.1", None),
+]
+
+TAMANIOS = (2, 12)
+
+# El staff de los casos es el del primer espacio (el de ids_casos)
+EMAILS_STAFF = {"gestor": "gestor0@verificacion.local", "control_acceso": "control0@verificacion.local"}
+
+
+def cargar_datos(db, cantidad: int, inicio: int):
+    """Agrega `cantidad` espacios, cada uno con staff, una cancha y reservas de hoy"""
+    disciplina = db.query(Disciplina).first()
+    if not disciplina:
+        disciplina = Disciplina(nombre="Fútbol")
+        db.add(disciplina)
+        db.flush()
+
+    cliente = db.query(Usuario).filter(Usuario.rol == "cliente").first()
+
+    for i in range(inicio, inicio + cantidad):
+        espacio = EspacioDeportivo(nombre=f"Espacio {i}", ubicacion="Centro", capacidad=50, estado="activo",
+                                   latitud=-16.5 + i / 1000, longitud=-68.1)
+        gestor = Usuario(nombre="Gestor", apellido=str(i), email=f"gestor{i}@verificacion.local",
+                         contrasenia="x", rol="gestor", estado="activo")
+        control = Usuario(nombre="Control", apellido=str(i), email=f"control{i}@verificacion.local",
+                          contrasenia="x", rol="control_acceso", estado="activo")
+        db.add_all([espacio, gestor, control])
+        db.flush()
+        db.add_all([
+            Administra(id_usuario=gestor.id_usuario, id_espacio_deportivo=espacio.id_espacio_deportivo),
+            Administra(id_usuario=control.id_usuario, id_espacio_deportivo=espacio.id_espacio_deportivo),
+        ])
+
+        cancha = Cancha(nombre=f"Cancha {i}", tipo="Fútbol", hora_apertura=time(8), hora_cierre=time(22),
+                        precio_por_hora=50, estado="disponible", id_espacio_deportivo=espacio.id_espacio_deportivo)
+        db.add(cancha)
+        db.flush()
+        db.add(CanchaDisciplina(id_cancha=cancha.id_cancha, id_disciplina=disciplina.id_disciplina))
+
+        reserva = Reserva(fecha_reserva=date.today(), hora_inicio=time(10), hora_fin=time(11),
+                          estado="confirmada", costo_total=50, cantidad_asistentes=2,
+                          codigo_reserva=f"VER{i:05d}", id_usuario=cliente.id_usuario,
+                          id_cancha=cancha.id_cancha, id_disciplina=disciplina.id_disciplina)
+        db.add(reserva)
+        db.flush()
+        for j in range(2):
+            db.add(AsistenteReserva(id_reserva=reserva.id_reserva, nombre=f"Asistente {j}",
+                                    email=f"asistente{i}_{j}@verificacion.olympiahub.com",
+                                    codigo_qr=f"QR-{i}-{j}", token_verificacion=f"TOK-{i}-{j}",
+                                    asistio=True, fecha_validacion=datetime.now()))
+    db.commit()
+    # Los datos no pasan por los endpoints: el índice de búsqueda se reconstruye con cada tamaño
+    invalidar_indice()
+
+
+def crear_usuarios_base(db):
+    for rol in ("admin", "cliente"):
+        db.add(Usuario(nombre=rol.capitalize(), apellido="Verificación", email=f"{rol}@verificacion.local",
+                       contrasenia="x", rol=rol, estado="activo"))
+    db.commit()
+
+
+def ids_casos(db) -> dict:
+    """Valores para completar las rutas de CASOS (siempre los primeros registros)"""
+    reserva = db.query(Reserva).order_by(Reserva.id_reserva).first()
+    gestor = db.query(Usuario).filter(Usuario.rol == "gestor").order_by(Usuario.id_usuario).first()
+    return {
+        "espacio_id": db.query(EspacioDeportivo.id_espacio_deportivo).order_by(EspacioDeportivo.id_espacio_deportivo).first()[0],
+        "reserva_id": reserva.id_reserva,
+        "codigo_reserva": reserva.codigo_reserva,
+        "usuario_id": reserva.id_usuario,
+        "gestor_id": gestor.id_usuario,
+        "dias": 7,
+        "disciplina_id": db.query(Disciplina.id_disciplina).order_by(Disciplina.id_disciplina).first()[0],
+        "manana": (date.today() + timedelta(days=1)).isoformat(),
+    }
+
+
+def ejecutar_casos(client, ids: dict) -> dict:
+    """Llama a cada caso y retorna {(método, ruta, rol): cantidad de queries}"""
+    resultados = {}
+    for metodo, ruta, rol in CASOS:
+        headers = {}
+        if rol:
+            email = EMAILS_STAFF.get(rol, f"{rol}@verificacion.local")
+            headers["Authorization"] = f"Bearer {create_access_token({'sub': email})}"
+        url = ruta.format(**ids)
+        respuesta = client.request(metodo, url, headers=headers)
+        queries = int(respuesta.headers.get("x-query-count", -1))
+        resultados[(metodo, ruta, rol)] = (respuesta.status_code, queries)
+    return resultados
+
+
+def rutas_sin_caso():
+    declaradas = set()
+    for route in app.routes:
+        if getattr(getattr(route, "endpoint", None), "presupuesto_queries", None) is not None:
+            for metodo in route.methods:
+                declaradas.add((metodo, route.path))
+    return sorted(declaradas - {(m, r.split("?")[0]) for m, r, _ in CASOS})
+
+
+def main() -> int:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    db = SessionLocal()
+    crear_usuarios_base(db)
+
+    errores = []
+    por_tamanio = []
+    cargados = 0
+    with TestClient(app) as client:
+        for tamanio in TAMANIOS:
+            cargar_datos(db, tamanio - cargados, cargados)
+            cargados = tamanio
+            por_tamanio.append(ejecutar_casos(client, ids_casos(db)))
+
+    db.close()
+
+    for violacion in violaciones_registradas:
+        errores.append(
+            f"{violacion['metodos']} {violacion['ruta']}: {violacion['queries']} queries "
+            f"(presupuesto {violacion['presupuesto']}), repetidas: {violacion['repetidas']}"
+        )
+
+    print(f"{'Endpoint':100} " + " ".join(f"{'n=' + str(t):>8}" for t in TAMANIOS))
+    for clave in por_tamanio[0]:
+        conteos = [resultado[clave] for resultado in por_tamanio]
+        nombre = f"{clave[0]} {clave[1]}" + (f" ({clave[2]})" if clave[2] in EMAILS_STAFF else "")
+        print(f"{nombre:100} " + " ".join(f"{q:>8}" for _, q in conteos))
+        for status_code, _ in conteos:
+            if status_code >= 400:
+                errores.append(f"{nombre}: respondió {status_code}")
+                break
+        if conteos[-1][1] > conteos[0][1]:
+            errores.append(
+                f"{nombre}: las queries crecen con los datos "
+                f"({conteos[0][1]} -> {conteos[-1][1]})"
+            )
+
+    for metodo, ruta in rutas_sin_caso():
+        print(f"⚠️  {metodo} {ruta} declara presupuesto pero no tiene caso en CASOS")
+
+    engine.dispose()
+    os.unlink(_db_temporal.name)
+
+    if errores:
+        print("\n❌ Presupuestos de queries incumplidos:")
+        for error in dict.fromkeys(errores):
+            print(f"   - {error}")
+        return 1
+
+    print("\n✅ Todos los endpoints cumplen su presupuesto de queries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""
+Regresión de planes de ejecución para las consultas críticas.
+
+Corre contra una base PostgreSQL con el dataset sintético cargado
+(benchmarks.dataset). Para cada caso obtiene las sentencias reales
+(llamando al endpoint y capturando el SQL que ejecuta, o el SQL de las
+funciones de disponibilidad) y las pasa por EXPLAIN (FORMAT JSON).
+Falla (exit 1) si algún plan:
+
+- hace Seq Scan sobre una tabla grande (más de --umbral-filas filas); en
+  reserva, particionada por mes, un Seq Scan sobre una partición es válido
+  si el plan descartó otras (poda de particiones) o si lee la mayor parte
+  de la partición (un índice no ahorraría lecturas),
+- no usa ninguno de los índices esperados para el caso,
+- supera el costo máximo estimado del caso.
+
+Uso:
+    python -m benchmarks.dataset --escala 1 --truncar
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --mostrar "reportes/ingresos"
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# La verificación no llama a servicios externos: basta con valores de relleno
+for variable in ("RECAPTCHA_SECRET_KEY", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY",
+                 "IMG_BB_API_KEY", "BREVO_API_KEY", "SENDER_EMAIL"):
+    os.environ.setdefault(variable, "verificacion")
+os.environ.setdefault("SUPABASE_URL", "https://verificacion.supabase.co")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+# El dataset no cambia mientras se capturan los planes
+os.environ.setdefault("CICLO_RESERVAS_HABILITADO", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+
+# Filas de reserva a partir de las cuales el plan es representativo
+MINIMO_RESERVAS = 500_000
+UMBRAL_FILAS = 10_000
+
+# Consultas de las funciones de migrations/versions/0003_funciones_disponibilidad.py
+# (EXPLAIN sobre la llamada a la función no muestra el plan interno). Solo valen
+# si la función de la base es la de 0003: si no, el caso se omite con un aviso.
+SQL_VERIFICAR_DISPONIBILIDAD = """
+    SELECT NOT EXISTS (
+        SELECT 1
+        FROM reserva r
+        WHERE r.id_cancha = %(id_cancha)s
+          AND r.fecha_reserva = %(fecha)s
+          AND r.estado IN ('pendiente', 'confirmada', 'en_curso')
+          AND r.hora_inicio < %(hora_fin)s
+          AND r.hora_fin > %(hora_inicio)s
+    )
+"""
+
+SQL_HORARIOS_OCUPADOS = """
+    SELECT r.hora_inicio, r.hora_fin
+    FROM reserva r
+    WHERE r.id_cancha = %(id_cancha)s
+      AND r.fecha_reserva = %(fecha)s
+      AND r.estado IN ('pendiente', 'confirmada', 'en_curso')
+"""
+
+
+def definir_casos(datos: dict) -> list:
+    """
+    Cada caso: nombre, origen ("sql" con parámetros o "http" con método/ruta/cuerpo),
+    índices esperados (basta con que el plan use uno) y costo máximo estimado.
+    """
+    hoy = date.today()
+    inicio_mes = (hoy - timedelta(days=30)).isoformat()
+    manana = (hoy + timedelta(days=1)).isoformat()
+    rango = f"fecha_inicio={inicio_mes}&fecha_fin={hoy.isoformat()}"
+    return [
+        {
+            "nombre": "disponibilidad/verificar_disponibilidad",
+            "funcion": "verificar_disponibilidad",
+            "sql": (SQL_VERIFICAR_DISPONIBILIDAD, {"id_cancha": datos["cancha"], "fecha": manana,
+                                                   "hora_inicio": "18:00", "hora_fin": "19:00"}),
+            "indices": {"ix_reserva_cancha_fecha_activas"},
+            "costo_maximo": 20,
+        },
+        {
+            "nombre": "disponibilidad/listar_horarios_disponibles",
+            "funcion": "listar_horarios_disponibles",
+            "sql": (SQL_HORARIOS_OCUPADOS, {"id_cancha": datos["cancha"], "fecha": manana}),
+            "indices": {"ix_reserva_cancha_fecha_activas"},
+            "costo_maximo": 20,
+        },
+        {
+            "nombre": "busqueda/canchas-disponibles",
+            "http": ("GET", f"/busqueda/canchas-disponibles?id_disciplina={datos['disciplina']}&fecha={manana}"
+                            f"&hora_inicio=19:00&flexibilidad_horas=2&lat={datos['latitud']}&lon={datos['longitud']}"
+                            "&radio_km=20", None, None),
+            "indices": {"ix_reserva_cancha_fecha_activas"},
+            "costo_maximo": 2_000,
+        },
+        {
+            "nombre": "reportes/ingresos",
+            "http": ("GET", f"/reportes/ingresos?{rango}&id_espacio_deportivo={datos['espacio']}", None, None),
+            # Por fecha de pago, o por las canchas del espacio hacia sus pagos
+            "indices": {"ix_pago_fecha_estado", "ix_reserva_cancha_fecha_estado"},
+            "costo_maximo": 40_000,
+        },
+        {
+            "nombre": "reportes/uso-cancha",
+            "http": ("GET", f"/reportes/uso-cancha?{rango}", None, None),
+            "indices": {"ix_reserva_fecha_estado"},
+            "costo_maximo": 40_000,
+        },
+        {
+            "nombre": "reportes/reservas-por-estado",
+            "http": ("GET", f"/reportes/reservas-por-estado?{rango}", None, None),
+            "indices": {"ix_reserva_fecha_creacion"},
+            "costo_maximo": 40_000,
+        },
+        {
+            "nombre": "reportes/horarios-populares",
+            "http": ("GET", f"/reportes/horarios-populares?{rango}", None, None),
+            "indices": {"ix_reserva_fecha_estado"},
+            "costo_maximo": 40_000,
+        },
+        {
+            "nombre": "reservas/gestor/mis-reservas",
+            "http": ("GET", f"/reservas/gestor/mis-reservas?gestor_id={datos['gestor_id']}", datos["gestor_email"], None),
+            # Por cancha, o recorriendo por fecha descendente hasta llenar el LIMIT
+            "indices": {"ix_reserva_cancha_fecha_estado", "ix_reserva_cancha_fecha_activas", "ix_reserva_fecha_estado"},
+            "costo_maximo": 15_000,
+        },
+        {
+            "nombre": "cupones/codigo",
+            "http": ("GET", f"/cupones/codigo/{datos['cupon']}", None, None),
+            "indices": {"cupon_codigo_key"},
+            "costo_maximo": 20,
+        },
+        {
+            "nombre": "control-acceso/verificar-qr",
+            # Asistente que ya ingresó: la búsqueda corre completa y responde 400 sin escribir
+            "http": ("POST", "/control-acceso/verificar-qr", None,
+                     {"codigo_qr": datos["codigo_qr"], "token_verificacion": datos["token"]}),
+            "indices": {"asistentes_reserva_codigo_qr_key", "asistentes_reserva_token_verificacion_key"},
+            # La reserva del asistente se busca por id_reserva: una búsqueda por índice en cada partición
+            "costo_maximo": 250,
+        },
+    ]
+
+
+def funciones_distintas(conn) -> set:
+    """Funciones de disponibilidad de la base que no son las de la migración 0003"""
+    ruta = RAIZ / "migrations" / "versions" / "0003_funciones_disponibilidad.py"
+    spec = importlib.util.spec_from_file_location("funciones_disponibilidad", ruta)
+    migracion = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migracion)
+    return {
+        nombre for nombre, (_, definicion) in migracion.FUNCIONES.items()
+        if migracion.cuerpos_en_base(conn, nombre) != [migracion.cuerpo(definicion)]
+    }
+
+
+def obtener_datos(conn) -> dict:
+    """Ids del dataset para parametrizar los casos"""
+    gestor = conn.execute(text(
+        "SELECT u.id_usuario, u.email FROM usuario u JOIN administra a ON a.id_usuario = u.id_usuario "
+        "WHERE u.rol = 'gestor' ORDER BY u.id_usuario LIMIT 1"
+    )).first()
+    asistente = conn.execute(text(
+        "SELECT codigo_qr, token_verificacion FROM asistentes_reserva WHERE asistio ORDER BY id_asistente LIMIT 1"
+    )).first()
+    punto = conn.execute(text(
+        "SELECT latitud, longitud FROM espacio_deportivo WHERE latitud IS NOT NULL "
+        "ORDER BY id_espacio_deportivo LIMIT 1"
+    )).first()
+    return {
+        "cancha": conn.execute(text("SELECT MIN(id_cancha) FROM cancha")).scalar(),
+        "disciplina": conn.execute(text("SELECT MIN(id_disciplina) FROM cancha_disciplina")).scalar(),
+        "latitud": punto[0] if punto else 0,
+        "longitud": punto[1] if punto else 0,
+        "espacio": conn.execute(text("SELECT MIN(id_espacio_deportivo) FROM espacio_deportivo")).scalar(),
+        "gestor_id": gestor[0] if gestor else None,
+        "gestor_email": gestor[1] if gestor else None,
+        "cupon": conn.execute(text("SELECT codigo FROM cupon ORDER BY id_cupon DESC LIMIT 1")).scalar(),
+        "codigo_qr": asistente[0] if asistente else None,
+        "token": asistente[1] if asistente else None,
+    }
+
+
+@contextmanager
+def capturar_sql():
+    """Registra los SELECT que ejecuta la app mientras dura el bloque"""
+    sentencias = []
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            sentencias.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", antes)
+    try:
+        yield sentencias
+    finally:
+        event.remove(engine, "before_cursor_execute", antes)
+
+
+def explicar(conexion, sentencia: str, parametros) -> dict:
+    with conexion.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sentencia, parametros)
+        resultado = cursor.fetchone()[0]
+    if isinstance(resultado, str):
+        resultado = json.loads(resultado)
+    return resultado[0]["Plan"]
+
+
+def recorrer(nodo: dict):
+    yield nodo
+    for hijo in nodo.get("Plans", []):
+        yield from recorrer(hijo)
+
+
+def filas_por_tabla(conn) -> dict:
+    filas = conn.execute(text(
+        "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind IN ('r', 'p') "
+        "AND relnamespace = 'public'::regnamespace"
+    )).all()
+    return {nombre: cantidad for nombre, cantidad in filas}
+
+
+def padres_de_particiones(conn) -> dict:
+    """{partición o índice de partición: tabla o índice particionado} (el plan muestra los de la partición)"""
+    filas = conn.execute(text(
+        "SELECT hijo.relname, padre.relname FROM pg_inherits i "
+        "JOIN pg_class hijo ON hijo.oid = i.inhrelid JOIN pg_class padre ON padre.oid = i.inhparent "
+        "WHERE hijo.relkind IN ('r', 'i')"
+    )).all()
+    return {hijo: padre for hijo, padre in filas}
+
+
+def sentencias_del_caso(client, caso: dict) -> list:
+    if "sql" in caso:
+        return [caso["sql"]]
+
+    metodo, ruta, email, cuerpo = caso["http"]
+    headers = {}
+    if email:
+        headers["Authorization"] = f"Bearer {create_access_token({'sub': email})}"
+    with capturar_sql() as sentencias:
+        respuesta = client.request(metodo, ruta, headers=headers, json=cuerpo)
+    if respuesta.status_code >= 500:
+        raise RuntimeError(f"{metodo} {ruta} respondió {respuesta.status_code}: {respuesta.text[:200]}")
+    return sentencias
+
+
+def evaluar_caso(conexion, caso: dict, sentencias: list, filas: dict, padres: dict,
+                 umbral: int, mostrar: bool) -> list:
+    errores = []
+    indices_usados = set()
+    costo = 0.0
+    for sentencia, parametros in sentencias:
+        plan = explicar(conexion, sentencia, parametros)
+        costo = max(costo, plan["Total Cost"])
+        if mostrar:
+            print(f"\n--- {caso['nombre']}\n{sentencia.strip()}\n{json.dumps(plan, indent=2)}")
+        nodos = list(recorrer(plan))
+        leidas = {nodo["Relation Name"] for nodo in nodos if nodo.get("Relation Name") in padres}
+        for nodo in nodos:
+            if "Index Name" in nodo:
+                indices_usados.add(padres.get(nodo["Index Name"], nodo["Index Name"]))
+            tabla = nodo.get("Relation Name")
+            if nodo["Node Type"] != "Seq Scan" or filas.get(tabla, 0) < umbral:
+                continue
+            if tabla in padres:
+                # Leer una partición entera es el plan esperado si la consulta descartó las demás
+                # o si necesita casi todas sus filas
+                hermanas = {hijo for hijo, padre in padres.items() if padre == padres[tabla]}
+                if hermanas - leidas or nodo["Plan Rows"] >= filas[tabla] / 2:
+                    continue
+                errores.append(f"{caso['nombre']}: Seq Scan sobre {tabla} sin poda de particiones de {padres[tabla]}")
+            else:
+                errores.append(f"{caso['nombre']}: Seq Scan sobre {tabla} ({filas[tabla]:,} filas)")
+
+    if not indices_usados & caso["indices"]:
+        errores.append(
+            f"{caso['nombre']}: no usa {' ni '.join(sorted(caso['indices']))} "
+            f"(usa: {', '.join(sorted(indices_usados)) or 'ningún índice'})"
+        )
+    if costo > caso["costo_maximo"]:
+        errores.append(f"{caso['nombre']}: costo estimado {costo:,.0f} supera el máximo {caso['costo_maximo']:,}")
+
+    print(f"{caso['nombre']:45} {len(sentencias):>3} {costo:>12,.1f} {caso['costo_maximo']:>10,}  "
+          f"{', '.join(sorted(indices_usados & caso['indices'])) or '-'}")
+    return errores
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--umbral-filas", type=int, default=UMBRAL_FILAS,
+                        help="tablas con al menos estas filas no pueden tener Seq Scan")
+    parser.add_argument("--mostrar", default=None, help="imprimir los planes de los casos que contienen este texto")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ La regresión de planes necesita PostgreSQL (DATABASE_URL)")
+        return 2
+
+    with engine.connect() as conn:
+        filas = filas_por_tabla(conn)
+        padres = padres_de_particiones(conn)
+        datos = obtener_datos(conn)
+        distintas = funciones_distintas(conn)
+
+    if filas.get("reserva", 0) < MINIMO_RESERVAS:
+        print(f"❌ reserva tiene {filas.get('reserva', 0):,} filas; cargar el dataset primero:\n"
+              f"   python -m benchmarks.dataset --escala 1 --truncar")
+        return 2
+
+    errores = []
+    conexion = engine.raw_connection()
+    try:
+        print(f"{'Caso':45} {'SQL':>3} {'Costo':>12} {'Máximo':>10}  Índice esperado")
+        with TestClient(app) as client:
+            for caso in definir_casos(datos):
+                if caso.get("funcion") in distintas:
+                    print(f"{caso['nombre']:45} ⚠️  omitido: {caso['funcion']} de la base no es la de la migración 0003")
+                    continue
+                sentencias = sentencias_del_caso(client, caso)
+                mostrar = bool(args.mostrar and args.mostrar in caso["nombre"])
+                errores.extend(evaluar_caso(conexion, caso, sentencias, filas, padres,
+                                            args.umbral_filas, mostrar))
+        conexion.rollback()
+    finally:
+        conexion.close()
+
+    if errores:
+        print("\n❌ Regresiones en planes de ejecución:")
+        for error in dict.fromkeys(errores):
+            print(f"   - {error}")
+        return 1
+
+    print("\n✅ Todos los planes usan los índices esperados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
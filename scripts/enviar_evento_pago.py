@@ -0,0 +1,101 @@
+"""
+Proveedor de pagos simulado: envía eventos firmados a POST /pagos/webhook/local.
+
+Los eventos tienen el formato de Stripe (id, type, data.object con
+metadata.id_reserva) y la firma X-Pago-Firma con PAGOS_WEBHOOK_SECRET_LOCAL
+(el mismo valor que usa la app). Sirve para probar el flujo de pago sin
+cuenta en Stripe y para medir ráfagas: --eventos envía eventos distintos y
+--repetir reenvía cada uno, como hace el proveedor cuando no recibe el 200.
+
+Uso:
+    PAGOS_WEBHOOK_SECRET_LOCAL=secreto python scripts/enviar_evento_pago.py --id-reserva 10 --monto 80
+    python scripts/enviar_evento_pago.py --id-reserva 10 --tipo charge.refunded
+    python scripts/enviar_evento_pago.py --id-reserva 10 --eventos 500 --repetir 3 --concurrencia 50
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+# Tipos que app/services/eventos_pago.py aplica al pago
+TIPOS = ["payment_intent.succeeded", "payment_intent.payment_failed", "charge.refunded"]
+
+
+def firmar(cuerpo: bytes, secreto: str) -> str:
+    """Header X-Pago-Firma (mismo esquema que firmar_local en app/services/eventos_pago.py)"""
+    timestamp = int(time.time())
+    firma = hmac.new(secreto.encode(), f"{timestamp}.".encode() + cuerpo, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={firma}"
+
+
+def construir_evento(tipo: str, id_reserva: int, monto: float, id_transaccion: str) -> dict:
+    centavos = round(monto * 100)
+    return {
+        "id": f"evt_{uuid.uuid4().hex}",
+        "type": tipo,
+        "created": int(time.time()),
+        "data": {"object": {
+            "id": id_transaccion,
+            "object": "payment_intent",
+            "amount": centavos,
+            "amount_received": centavos if tipo == "payment_intent.succeeded" else 0,
+            "currency": "bob",
+            "metadata": {"id_reserva": str(id_reserva)},
+        }},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL base de la API")
+    parser.add_argument("--id-reserva", type=int, required=True)
+    parser.add_argument("--tipo", default="payment_intent.succeeded", choices=TIPOS)
+    parser.add_argument("--monto", type=float, default=50.0)
+    parser.add_argument("--transaccion", default=None, help="id del PaymentIntent (por defecto uno nuevo)")
+    parser.add_argument("--eventos", type=int, default=1, help="eventos distintos a enviar")
+    parser.add_argument("--repetir", type=int, default=1, help="envíos de cada evento (duplicados)")
+    parser.add_argument("--concurrencia", type=int, default=1)
+    args = parser.parse_args()
+
+    secreto = os.environ.get("PAGOS_WEBHOOK_SECRET_LOCAL")
+    if not secreto:
+        print("Falta configurar: PAGOS_WEBHOOK_SECRET_LOCAL")
+        return 1
+
+    id_transaccion = args.transaccion or f"pi_{uuid.uuid4().hex[:24]}"
+    cuerpos = [
+        json.dumps(construir_evento(args.tipo, args.id_reserva, args.monto, id_transaccion)).encode()
+        for _ in range(args.eventos)
+    ] * args.repetir
+    url = f"{args.url.rstrip('/')}/pagos/webhook/local"
+
+    with httpx.Client(timeout=30) as cliente:
+        def enviar(cuerpo: bytes):
+            respuesta = cliente.post(url, content=cuerpo, headers={
+                "Content-Type": "application/json", "X-Pago-Firma": firmar(cuerpo, secreto),
+            })
+            if respuesta.status_code != 200:
+                return str(respuesta.status_code)
+            return "duplicado" if respuesta.json().get("duplicado") else "nuevo"
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(args.concurrencia, 1)) as executor:
+            resultados = Counter(executor.map(enviar, cuerpos))
+        duracion = time.perf_counter() - inicio
+
+    print(f"{len(cuerpos)} envíos en {duracion:.2f}s ({len(cuerpos) / duracion:.0f}/s), transacción {id_transaccion}")
+    for resultado, cantidad in sorted(resultados.items()):
+        print(f"  {resultado:<10} {cantidad}")
+    return 0 if set(resultados) <= {"nuevo", "duplicado"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())